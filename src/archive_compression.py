@@ -0,0 +1,142 @@
+"""
+gzip compression of the generated tar archives.
+
+The archives are always plain single-member gzip files (i.e. tar.gz), which is
+what the platform upload expects, but the compression level is configurable
+and the compression can be spread across threads. The data is split into
+fixed-size blocks that are deflated independently, each one primed with the
+last 32 KiB of the previous block as its dictionary, and the raw deflate
+streams are concatenated, as pigz does. zlib releases the GIL while it
+compresses, so the blocks are compressed in parallel.
+
+The compressed bytes only depend on the data, the level and the block size,
+not on the number of workers, and the gzip header carries a fixed
+modification time and no file name, so identical archives are byte-identical.
+"""
+
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, NamedTuple, Optional, Union
+
+# Same default level as tarfile's "w:gz" mode
+DEFAULT_COMPRESSION_LEVEL = 9
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+# Size of the deflate window, i.e. the most of the previous block that can be
+# used as the dictionary of the next one
+_DICTIONARY_SIZE = 32 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+_GZIP_OS_UNKNOWN = 255
+
+
+class ArchiveCompression(NamedTuple):
+    """Compression options for the generated tar.gz archives."""
+    level: int = DEFAULT_COMPRESSION_LEVEL
+    # Number of threads compressing blocks; 1 compresses them in the calling thread
+    workers: int = 1
+    block_size: int = DEFAULT_BLOCK_SIZE
+
+    @staticmethod
+    def from_settings(level: Optional[int], workers: Optional[int]) -> "ArchiveCompression":
+        """Build the options from (optional) setting values, with the defaults for the unset ones."""
+        if level is not None and not 0 <= level <= 9:
+            raise ValueError(f"Invalid archive compression level {level}; it must be between 0 and 9")
+        return ArchiveCompression(DEFAULT_COMPRESSION_LEVEL if level is None else level,
+                                  max(workers or 1, 1))
+
+
+def _deflate_block(block: bytes, dictionary: bytes, level: int, last: bool) -> bytes:
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # A sync flush ends the block's deflate data on a byte boundary without
+    # ending the stream, so the next block's data can follow it.
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class GzipBlockWriter:
+    """
+    Writable file object that gzips the data written to it into ``fileobj``.
+
+    It can be used as the fileobj of an uncompressed ``tarfile`` in write mode.
+    ``close`` writes the end of the gzip stream, but doesn't close ``fileobj``.
+    """
+    def __init__(self,
+                 fileobj: BinaryIO,
+                 compression: ArchiveCompression = ArchiveCompression(),
+                 mtime: int = 0):
+        self.fileobj = fileobj
+        self.compression = compression
+        self.closed = False
+        self._pending = bytearray()
+        self._dictionary = b""
+        self._crc = 0
+        self._size = 0
+        self._executor = ThreadPoolExecutor(compression.workers) if compression.workers > 1 else None
+        self._futures: deque[Future] = deque()
+        if compression.level == 9:
+            extra_flags = 2
+        elif compression.level == 1:
+            extra_flags = 4
+        else:
+            extra_flags = 0
+        fileobj.write(_GZIP_MAGIC + struct.pack("<BBIBB", zlib.DEFLATED, 0, mtime, extra_flags, _GZIP_OS_UNKNOWN))
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        if self.closed:
+            raise ValueError("write to closed GzipBlockWriter")
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._pending += data
+        block_size = self.compression.block_size
+        if len(self._pending) >= block_size:
+            offset = 0
+            while len(self._pending) - offset >= block_size:
+                self._add_block(bytes(self._pending[offset:offset + block_size]), False)
+                offset += block_size
+            del self._pending[:offset]
+        return len(data)
+
+    def tell(self) -> int:
+        """Number of (uncompressed) bytes written so far."""
+        return self._size
+
+    def flush(self) -> None:
+        pass
+
+    def _add_block(self, block: bytes, last: bool) -> None:
+        dictionary = self._dictionary
+        self._dictionary = block[-_DICTIONARY_SIZE:]
+        level = self.compression.level
+        if self._executor is None:
+            self.fileobj.write(_deflate_block(block, dictionary, level, last))
+            return
+        self._futures.append(self._executor.submit(_deflate_block, block, dictionary, level, last))
+        # Bound the number of blocks held in memory
+        while len(self._futures) > 2 * self.compression.workers:
+            self.fileobj.write(self._futures.popleft().result())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._add_block(bytes(self._pending), True)
+            self._pending.clear()
+            while self._futures:
+                self.fileobj.write(self._futures.popleft().result())
+            self.fileobj.write(struct.pack("<II", self._crc & 0xffffffff, self._size & 0xffffffff))
+        finally:
+            self.closed = True
+            if self._executor is not None:
+                self._executor.shutdown()
+
+    def __enter__(self) -> "GzipBlockWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,255 @@
+"""
+Benchmark for the post-processing of the rendered output items in
+renderers.render_output_items.
+
+Compares the single-parse pipeline (post_process_rendered_output) with the
+previous implementation, which parsed and re-dumped the YAML text in
+deduplicate_secrets_provided and then parsed it again (and re-dumped it when
+an override matched) in apply_config_provided_overrides. The previous
+implementation is kept here as the reference for the benchmark and for the
+equivalence tests in renderers/test_render_post_processing.py.
+
+The rendered documents are read from a real workspace, either from the
+workspace_artifacts table of a resource store or from a rendered workspace
+directory. Without either, a synthetic workspace shaped like a rendered one
+(slx.yaml, sli.yaml and runbook.yaml per SLX) is used.
+
+Usage (from the src directory):
+
+    python -m benchmarks.render_post_processing [--resource-store ../output/resources.sqlite --workspace my-workspace]
+    python -m benchmarks.render_post_processing [--workspace-dir ../output/workspaces/my-workspace]
+    python -m benchmarks.render_post_processing [--slx-count 1000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, NamedTuple
+
+import yaml
+
+from renderers.render_output_items import (
+    PostProcessTask,
+    compute_resource_path_from_hierarchy,
+    post_process_rendered_output,
+    validate_rendered_yaml,
+)
+
+CODE_COLLECTION_URL = "https://github.com/runwhen-contrib/rw-cli-codecollection.git"
+CODE_BUNDLE = "k8s-deployment-healthcheck"
+
+
+def legacy_deduplicate_secrets_provided(yaml_text: str) -> str:
+    """The previous deduplicate_secrets_provided, parsing the text with the pure Python loader."""
+    data = yaml.safe_load(yaml_text)
+
+    validate_rendered_yaml(data, yaml_text)
+
+    if 'secretsProvided' in data['spec']:
+        secrets = data['spec']['secretsProvided']
+        unique_secrets = {secret['name']: secret for secret in secrets}.values()
+        data['spec']['secretsProvided'] = list(unique_secrets)
+
+    if 'spec' in data and 'tags' in data['spec']:
+        for tag in data['spec']['tags']:
+            if 'value' in tag:
+                tag['value'] = str(tag['value'])
+        seen_tags = {}
+        for tag in data['spec']['tags']:
+            tag_key = (tag.get('name'), tag.get('value'))
+            if tag_key not in seen_tags:
+                seen_tags[tag_key] = tag
+        data['spec']['tags'] = list(seen_tags.values())
+
+    compute_resource_path_from_hierarchy(data)
+
+    return yaml.dump(data, sort_keys=False, default_flow_style=False, allow_unicode=True)
+
+
+def legacy_apply_config_provided_overrides(overrides: dict[str, Any], output_text: str, output_item) -> str:
+    """The previous apply_config_provided_overrides, re-parsing the deduplicated text."""
+    try:
+        if not overrides or "codebundles" not in overrides:
+            return output_text
+        try:
+            parsed_yaml = yaml.safe_load(output_text)
+        except yaml.YAMLError:
+            return output_text
+        if not parsed_yaml or not isinstance(parsed_yaml, dict):
+            return output_text
+        spec = parsed_yaml.get('spec', {})
+        config_provided = spec.get('configProvided', [])
+        if not config_provided:
+            return output_text
+        template_vars = output_item.template_variables
+        current_repo_url = template_vars.get('repo_url', '')
+        generation_rule_path = template_vars.get('generation_rule_file_path', '')
+        if 'codebundles/' in generation_rule_path:
+            current_codebundle_dir = generation_rule_path.split('codebundles/')[1].split('/')[0]
+        else:
+            return output_text
+        file_kind = parsed_yaml.get('kind', '').lower()
+        if file_kind == 'runbook':
+            current_type = 'runbook'
+        elif file_kind == 'servicelevelindicator':
+            current_type = 'sli'
+        else:
+            return output_text
+        for override in overrides["codebundles"]:
+            if (override.get('repoURL', '') == current_repo_url and
+                    override.get('codebundleDirectory', '') == current_codebundle_dir and
+                    override.get('type', '').lower() == current_type):
+                for var_name, var_value in override.get('configProvided', {}).items():
+                    for config_item in config_provided:
+                        if config_item.get('name') == var_name:
+                            config_item['value'] = str(var_value)
+                            break
+                if 'spec' in parsed_yaml and 'tags' in parsed_yaml['spec']:
+                    for tag in parsed_yaml['spec']['tags']:
+                        if 'value' in tag:
+                            tag['value'] = str(tag['value'])
+                return yaml.dump(parsed_yaml, default_flow_style=False, sort_keys=False, allow_unicode=True)
+        return output_text
+    except Exception:
+        return output_text
+
+
+def legacy_post_process_rendered_output(overrides: dict[str, Any], output_item, output_text: str) -> str:
+    deduplicated_output = legacy_deduplicate_secrets_provided(output_text)
+    return legacy_apply_config_provided_overrides(overrides, deduplicated_output, output_item)
+
+
+class Workspace(NamedTuple):
+    description: str
+    overrides: dict[str, Any]
+    tasks: list[PostProcessTask]
+
+
+def _slx_documents(index: int) -> dict[str, str]:
+    name = f"deployment-{index}"
+    namespace = f"namespace-{index % 20}"
+    hierarchy = "\n".join(f"    - {entry}" for entry in ("platform", "cluster", "namespace", "resource_name"))
+    tags = "\n".join(f"  - name: {tag_name}\n    value: {tag_value}" for tag_name, tag_value in (
+        ("platform", "kubernetes"), ("cluster", "prod-cluster"), ("namespace", namespace),
+        ("resource_name", name), ("resource_type", "deployment"), ("replicas", index % 3 + 1),
+        ("namespace", namespace), ("access", "read-only")))
+    secrets = "\n".join(f"  - name: kubeconfig\n    workspaceKey: kubeconfig-{i}" for i in range(2))
+    config = "\n".join(f"  - name: {var_name}\n    value: {var_value}" for var_name, var_value in (
+        ("NAMESPACE", namespace), ("CONTEXT", "prod-cluster"), ("DEPLOYMENT_NAME", name),
+        ("KUBERNETES_DISTRIBUTION_BINARY", "kubectl"), ("CONTAINER_RESTART_THRESHOLD", 3),
+        ("ANOMALY_THRESHOLD", "5.0"), ("CONTAINER_RESTART_AGE", "30m")))
+    metadata = (f"metadata:\n  name: ws--{name}\n  labels:\n    workspace: ws\n    slx: ws--{name}\n"
+                f"  annotations:\n    internal.runwhen.com/manually-created: 'false'\n"
+                f"    internal.runwhen.com/resource-path: kubernetes/prod-cluster/{namespace}/{name}\n")
+    slx = (f"apiVersion: runwhen.com/v1\nkind: ServiceLevelX\n{metadata}spec:\n"
+           f"  imageURL: https://storage.googleapis.com/runwhen-nonprod-shared-images/icons/kubernetes/deploy.svg\n"
+           f"  alias: {name} Deployment Health\n  asMeasuredBy: Score based on the replica availability\n"
+           f"  configProvided:\n  - name: OBJECT_NAME\n    value: {name}\n  owners:\n  - owner@example.com\n"
+           f"  statement: Deployment {name} should have all replicas ready.\n"
+           f"  additionalContext:\n    namespace: {namespace}\n    hierarchy:\n{hierarchy}\n"
+           f"  tags:\n{tags}\n")
+    code_bundle = (f"  codeBundle:\n    repoUrl: {CODE_COLLECTION_URL}\n    ref: main\n"
+                   f"    pathToRobot: codebundles/{CODE_BUNDLE}/{{}}.robot\n")
+    sli = (f"apiVersion: runwhen.com/v1\nkind: ServiceLevelIndicator\n{metadata}spec:\n"
+           f"  displayUnitsLong: OK\n  displayUnitsShort: ok\n  locations:\n  - location-01\n"
+           f"  description: Measures the health of deployment {name}.\n"
+           f"{code_bundle.format('sli')}  intervalStrategy: intermezzo\n  intervalSeconds: 180\n"
+           f"  configProvided:\n{config}\n  secretsProvided:\n{secrets}\n"
+           f"  alerts:\n    warning:\n      operator: <\n      threshold: '1'\n      for: 20m\n")
+    runbook = (f"apiVersion: runwhen.com/v1\nkind: Runbook\n{metadata}spec:\n  location: location-01\n"
+               f"  description: Troubleshoot deployment {name}.\n{code_bundle.format('runbook')}"
+               f"  configProvided:\n{config}\n  secretsProvided:\n{secrets}\n")
+    return {"slx.yaml": slx, "sli.yaml": sli, "runbook.yaml": runbook}
+
+
+def make_workspace(slx_count: int) -> Workspace:
+    """Build a synthetic rendered workspace with ``slx_count`` SLXs, with overrides for every other SLX's runbook."""
+    template_variables = {"repo_url": CODE_COLLECTION_URL,
+                          "generation_rule_file_path": f"codebundles/{CODE_BUNDLE}/.runwhen/generation-rules/rule.yaml"}
+    overrides = {"codebundles": [{"repoURL": CODE_COLLECTION_URL, "codebundleDirectory": CODE_BUNDLE,
+                                  "type": "runbook", "configProvided": {"CONTAINER_RESTART_THRESHOLD": 5,
+                                                                        "ANOMALY_THRESHOLD": "2.5"}}]}
+    tasks = list()
+    for index in range(slx_count):
+        for file_name, text in _slx_documents(index).items():
+            tasks.append(PostProcessTask(f"workspaces/ws/slxs/slx-{index}/{file_name}", text,
+                                         template_variables if file_name != "slx.yaml" else {}))
+    return Workspace(f"synthetic workspace with {slx_count} SLXs", overrides, tasks)
+
+
+def _is_post_processed(relative_path: str) -> bool:
+    return relative_path.endswith((".yaml", ".yml")) and "/slxs/" in relative_path
+
+
+def read_workspace_dir(workspace_dir: str) -> Workspace:
+    tasks = list()
+    for root, _, file_names in os.walk(workspace_dir):
+        for file_name in sorted(file_names):
+            path = os.path.join(root, file_name)
+            relative_path = os.path.relpath(path, workspace_dir)
+            if _is_post_processed(f"/{relative_path}"):
+                with open(path, encoding="utf-8") as f:
+                    tasks.append(PostProcessTask(relative_path, f.read(), {}))
+    return Workspace(workspace_dir, {}, tasks)
+
+
+def read_resource_store(resource_store_path: str, workspace_name: str) -> Workspace:
+    with sqlite3.connect(resource_store_path) as conn:
+        rows = conn.execute("SELECT relative_path, content FROM workspace_artifacts "
+                            "WHERE workspace_name = ? ORDER BY relative_path", (workspace_name,)).fetchall()
+    tasks = [PostProcessTask(relative_path, content, {}) for relative_path, content in rows
+             if _is_post_processed(relative_path)]
+    return Workspace(f"{resource_store_path} ({workspace_name})", {}, tasks)
+
+
+def _time_post_processing(post_process, workspace: Workspace, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for task in workspace.tasks:
+            post_process(workspace.overrides, task, task.output_text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the post-processing of the rendered output items")
+    parser.add_argument("--resource-store", help="Path of a resources.sqlite file to read the rendered workspace from")
+    parser.add_argument("--workspace", help="Name of the workspace to read from the resource store")
+    parser.add_argument("--workspace-dir", help="Path of a rendered workspace directory (output/workspaces/<ws>)")
+    parser.add_argument("--slx-count", type=int, default=1000, help="Number of SLXs of the synthetic workspace")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed passes (the best is reported)")
+    args = parser.parse_args()
+
+    if args.resource_store:
+        if not args.workspace:
+            parser.error("--workspace is required with --resource-store")
+        workspace = read_resource_store(args.resource_store, args.workspace)
+    elif args.workspace_dir:
+        workspace = read_workspace_dir(args.workspace_dir)
+    else:
+        workspace = make_workspace(args.slx_count)
+    if not workspace.tasks:
+        raise SystemExit(f"No rendered SLX documents found in {workspace.description}")
+
+    # The override matches are logged at INFO level
+    logging.getLogger("renderers.render_output_items").setLevel(logging.WARNING)
+    for task in workspace.tasks:
+        if (post_process_rendered_output(workspace.overrides, task, task.output_text) !=
+                legacy_post_process_rendered_output(workspace.overrides, task, task.output_text)):
+            raise SystemExit(f"Post-processing mismatch for {task.path}")
+
+    count = len(workspace.tasks)
+    legacy_time = _time_post_processing(legacy_post_process_rendered_output, workspace, args.repeat)
+    current_time = _time_post_processing(post_process_rendered_output, workspace, args.repeat)
+    print(f"Post-processed {count} documents of {workspace.description} (best of {args.repeat} passes)")
+    print(f"  libyaml loader:    {'yes' if yaml.__with_libyaml__ else 'no'}")
+    print(f"  parse per step:    {legacy_time * 1000:8.1f} ms ({legacy_time / count * 1e6:7.1f} us/item)")
+    print(f"  single parse:      {current_time * 1000:8.1f} ms ({current_time / count * 1e6:7.1f} us/item)")
+    print(f"  speedup:           {legacy_time / current_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark for the searches of the SQLite resource store used by the explorer
+and the MCP tools (search_workspace_artifacts, count_workspace_artifacts,
+search_resources, count_resources and list_slx_bundles).
+
+Compares the searches with the FTS5 full-text indexes of the store with the
+LIKE '%q%' scans used before, on a copy of the store without the indexes
+(which is what the helpers fall back to).
+
+Usage (from the src directory):
+
+    python -m benchmarks.resource_store_search [--resource-count 50000] [--artifact-count 5000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.sqlite_store_persist import make_context
+from indexers.sqlite_resource_writer import (
+    ARTIFACTS_FTS_TABLE,
+    RESOURCES_FTS_TABLE,
+    count_workspace_artifacts,
+    open_database,
+    persist_sqlite_store,
+    search_workspace_artifacts,
+)
+from outputter import FileSystemOutputter
+from workspace_builder.resource_store_reader import count_resources, list_slx_bundles, search_resources
+
+QUERIES = ("slx-42", "resource-1234", "tags", "app-17")
+
+SEARCHES = {
+    "search_workspace_artifacts": lambda conn, q: search_workspace_artifacts(conn, q=q, limit=50),
+    "count_workspace_artifacts": lambda conn, q: count_workspace_artifacts(conn, q=q),
+    "search_resources": lambda conn, q: search_resources(conn, q=q, limit=50),
+    "count_resources": lambda conn, q: count_resources(conn, q=q),
+    "list_slx_bundles": lambda conn, q: list_slx_bundles(conn, q=q, limit=50),
+}
+
+
+def _measure(db_path: str, search, repeat: int) -> float:
+    conn = open_database(db_path)
+    try:
+        best_time = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for q in QUERIES:
+                search(conn, q)
+            elapsed = time.perf_counter() - start
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+        return best_time
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resource-count", type=int, default=50000)
+    parser.add_argument("--artifact-count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("indexers.sqlite_resource_writer").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        context = make_context(args.resource_count, args.artifact_count)
+        context.outputter = FileSystemOutputter(tmpdir)
+        persist_sqlite_store(context, db_path="fts.sqlite")
+        fts_path = os.path.join(tmpdir, "fts.sqlite")
+        like_path = os.path.join(tmpdir, "like.sqlite")
+        shutil.copyfile(fts_path, like_path)
+        conn = open_database(like_path)
+        for table in (ARTIFACTS_FTS_TABLE, RESOURCES_FTS_TABLE):
+            conn.execute(f"DROP TABLE {table}")
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+
+        print(f"{args.resource_count} resources, {args.artifact_count} workspace artifacts, "
+              f"{len(QUERIES)} queries per run; store {os.path.getsize(fts_path) / (1024 * 1024):.1f} MiB "
+              f"with the full-text indexes, {os.path.getsize(like_path) / (1024 * 1024):.1f} MiB without")
+        for name, search in SEARCHES.items():
+            like_time = _measure(like_path, search, args.repeat)
+            fts_time = _measure(fts_path, search, args.repeat)
+            print(f"{name:>28}: LIKE {like_time * 1000:8.1f} ms, FTS5 {fts_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Micro-benchmark for utils.kubernetes_resource_to_dict.
+
+Compares the single-pass converter with the previous implementation, which
+called to_dict(), re-walked the result to apply the attribute_map names and
+then round-tripped it through JSON to get rid of the datetime values. The
+previous implementation is kept here as the reference for the benchmark and
+for the equivalence tests in test_utils.py.
+
+Usage (from the src directory):
+
+    python -m benchmarks.resource_to_dict [--count 3000] [--repeat 5]
+"""
+import argparse
+import datetime
+import json
+import time
+from collections.abc import Sequence
+
+from kubernetes.client import (
+    V1Container,
+    V1ContainerPort,
+    V1Deployment,
+    V1DeploymentCondition,
+    V1DeploymentSpec,
+    V1DeploymentStatus,
+    V1EnvVar,
+    V1HTTPGetAction,
+    V1LabelSelector,
+    V1ManagedFieldsEntry,
+    V1ObjectMeta,
+    V1OwnerReference,
+    V1PodSpec,
+    V1PodTemplateSpec,
+    V1Probe,
+    V1ResourceRequirements,
+    V1Service,
+    V1ServicePort,
+    V1ServiceSpec,
+)
+
+from exceptions import WorkspaceBuilderException
+from utils import kubernetes_resource_to_dict
+
+
+def _apply_resource_attribute_map(resource, obj):
+    if isinstance(obj, str):
+        converted_obj = obj
+    elif isinstance(obj, dict):
+        try:
+            attribute_map = getattr(resource, "attribute_map")
+        except AttributeError:
+            attribute_map = None
+        converted_obj = dict()
+        for key, obj_value in obj.items():
+            converted_key = attribute_map[key] if attribute_map else key
+            try:
+                resource_value = getattr(resource, key)
+            except AttributeError:
+                try:
+                    resource_value = resource[key]
+                except (KeyError, TypeError):
+                    raise WorkspaceBuilderException("Error converting Kubernetes resource to dict")
+            converted_value = _apply_resource_attribute_map(resource_value, obj_value)
+            converted_obj[converted_key] = converted_value
+    elif isinstance(obj, Sequence):
+        converted_obj = list()
+        for i in range(len(obj)):
+            converted_item = _apply_resource_attribute_map(resource[i], obj[i])
+            converted_obj.append(converted_item)
+    else:
+        converted_obj = obj
+    return converted_obj
+
+
+def legacy_kubernetes_resource_to_dict(resource, use_attribute_map: bool = True) -> dict:
+    """The previous JSON round-trip implementation of kubernetes_resource_to_dict."""
+    class DateTimeEncoder(json.JSONEncoder):
+        def default(self, value):
+            if isinstance(value, datetime.datetime):
+                return value.astimezone(datetime.timezone.utc).isoformat()
+            else:
+                return super().default(value)
+    obj = resource.to_dict()
+    if use_attribute_map:
+        obj = _apply_resource_attribute_map(resource, obj)
+    json_str = json.dumps(obj, cls=DateTimeEncoder)
+    obj = json.loads(json_str)
+    if 'metadata' in obj:
+        metadata = obj['metadata']
+        if 'labels' in metadata and metadata['labels']:
+            for key, value in metadata['labels'].items():
+                metadata['labels'][key] = str(value)
+        if 'annotations' in metadata and metadata['annotations']:
+            for key, value in metadata['annotations'].items():
+                metadata['annotations'][key] = str(value)
+    return obj
+
+
+_BASE_TIME = datetime.datetime(2024, 5, 1, 12, 0, 0, tzinfo=datetime.timezone.utc)
+
+
+def _metadata(name: str, namespace: str, index: int) -> V1ObjectMeta:
+    timestamp = _BASE_TIME + datetime.timedelta(minutes=index)
+    return V1ObjectMeta(
+        name=name,
+        namespace=namespace,
+        uid=f"00000000-0000-0000-0000-{index:012d}",
+        resource_version=str(100000 + index),
+        generation=index % 7 + 1,
+        creation_timestamp=timestamp,
+        labels={"app": name, "tier": "backend", "app.kubernetes.io/version": f"1.{index % 10}.0"},
+        annotations={"deployment.kubernetes.io/revision": str(index % 5 + 1),
+                     "meta.helm.sh/release-name": name,
+                     "config.runwhen.com/lod": "detailed"},
+        owner_references=[V1OwnerReference(api_version="v1", kind="ConfigMap", name=f"{name}-owner",
+                                           uid=f"owner-{index}", controller=True)],
+        managed_fields=[V1ManagedFieldsEntry(api_version="apps/v1", fields_type="FieldsV1", manager="kubectl",
+                                             operation="Update", time=timestamp,
+                                             fields_v1={"f:metadata": {"f:labels": {".": {}, "f:app": {}}},
+                                                        "f:spec": {"f:replicas": {}}})],
+    )
+
+
+def make_deployment(index: int) -> V1Deployment:
+    name = f"service-{index}"
+    namespace = f"namespace-{index % 20}"
+    container = V1Container(
+        name=name,
+        image=f"registry.example.com/{name}:1.{index % 10}.0",
+        ports=[V1ContainerPort(container_port=8080, name="http", protocol="TCP")],
+        env=[V1EnvVar(name="LOG_LEVEL", value="info"), V1EnvVar(name="PORT", value="8080")],
+        resources=V1ResourceRequirements(limits={"cpu": "500m", "memory": "256Mi"},
+                                         requests={"cpu": "100m", "memory": "128Mi"}),
+        liveness_probe=V1Probe(http_get=V1HTTPGetAction(path="/healthz", port=8080),
+                               initial_delay_seconds=10, period_seconds=15),
+        readiness_probe=V1Probe(http_get=V1HTTPGetAction(path="/ready", port=8080), period_seconds=5),
+    )
+    return V1Deployment(
+        api_version="apps/v1",
+        kind="Deployment",
+        metadata=_metadata(name, namespace, index),
+        spec=V1DeploymentSpec(
+            replicas=index % 3 + 1,
+            selector=V1LabelSelector(match_labels={"app": name}),
+            template=V1PodTemplateSpec(metadata=V1ObjectMeta(labels={"app": name}),
+                                       spec=V1PodSpec(containers=[container], service_account_name=name)),
+        ),
+        status=V1DeploymentStatus(
+            replicas=index % 3 + 1,
+            ready_replicas=index % 3 + 1,
+            conditions=[V1DeploymentCondition(type="Available", status="True", reason="MinimumReplicasAvailable",
+                                              last_transition_time=_BASE_TIME, last_update_time=_BASE_TIME)],
+        ),
+    )
+
+
+def make_service(index: int) -> V1Service:
+    name = f"service-{index}"
+    return V1Service(
+        api_version="v1",
+        kind="Service",
+        metadata=_metadata(name, f"namespace-{index % 20}", index),
+        spec=V1ServiceSpec(selector={"app": name}, type="ClusterIP", cluster_ip=f"10.0.{index // 250}.{index % 250}",
+                           ports=[V1ServicePort(name="http", port=80, target_port=8080, protocol="TCP")]),
+    )
+
+
+def make_resources(count: int) -> list:
+    """Build ``count`` realistic resources, alternating deployments and services."""
+    return [make_deployment(i) if i % 2 == 0 else make_service(i) for i in range(count)]
+
+
+def _time_conversion(convert, resources, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for resource in resources:
+            convert(resource)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kubernetes_resource_to_dict")
+    parser.add_argument("--count", type=int, default=3000, help="Number of resources to convert")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed passes (the best is reported)")
+    args = parser.parse_args()
+
+    resources = make_resources(args.count)
+    for resource in resources:
+        if kubernetes_resource_to_dict(resource) != legacy_kubernetes_resource_to_dict(resource):
+            raise SystemExit(f"Conversion mismatch for {resource.kind} {resource.metadata.name}")
+
+    legacy_time = _time_conversion(legacy_kubernetes_resource_to_dict, resources, args.repeat)
+    current_time = _time_conversion(kubernetes_resource_to_dict, resources, args.repeat)
+    print(f"Converted {args.count} resources (best of {args.repeat} passes)")
+    print(f"  JSON round-trip: {legacy_time * 1000:8.1f} ms ({legacy_time / args.count * 1e6:6.1f} us/resource)")
+    print(f"  single pass:     {current_time * 1000:8.1f} ms ({current_time / args.count * 1e6:6.1f} us/resource)")
+    print(f"  speedup:         {legacy_time / current_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
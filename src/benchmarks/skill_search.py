@@ -0,0 +1,124 @@
+"""
+Benchmark for the ranking of the MCP skill search
+(workspace_builder.mcp.tools.search_skills and recommend_skills).
+
+Compares the ranking from the skill_tokens search token index of the store,
+over every bundle, with the ranking of stores without the index, which
+re-tokenizes the content of a candidate pool of bundles on every query: with
+the default pool of _SEARCH_CANDIDATE_POOL bundles, and with a pool of every
+bundle (what the index ranks). Also reports the size of the store with and
+without the index (as in the /run/ output archive), and the time run.py takes
+to build the index into the extracted store.
+
+Usage (from the src directory):
+
+    python -m benchmarks.skill_search [--bundle-count 2000] [--repeat 3]
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from component import Context, WORKSPACE_NAME_SETTING
+from indexers.resource_writer import RESOURCE_STORE_BACKEND_SETTING
+from indexers.sqlite_resource_writer import build_skill_token_index, open_database, persist_sqlite_store
+from outputter import FileSystemOutputter
+from renderers.rendered_artifacts import record_rendered_artifact
+from resources import REGISTRY_PROPERTY_NAME, Registry
+from workspace_builder.mcp import tools
+
+WORKSPACE_NAME = "benchmark-workspace"
+
+QUERIES = (
+    "rotate key vault secrets",
+    "failing pods crashloop in deployment",
+    "User reports: pods in the checkout namespace keep restarting with ImagePullBackOff errors "
+    "after the last deploy, and the ingress returns 502s. What runbooks should we run?",
+)
+
+
+def _persist_store(tmpdir: str, bundle_count: int) -> str:
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(5000)] + [
+        "pod", "pods", "deployment", "namespace", "restart", "crashloop", "image", "ingress",
+        "key", "vault", "secrets", "rotate", "certificate", "disk", "latency", "errors",
+    ]
+    context = Context({RESOURCE_STORE_BACKEND_SETTING.name: "sqlite", WORKSPACE_NAME_SETTING.name: WORKSPACE_NAME},
+                      FileSystemOutputter(tmpdir))
+    context.set_property(REGISTRY_PROPERTY_NAME, Registry())
+    for i in range(bundle_count):
+        slx_directory = f"workspaces/{WORKSPACE_NAME}/slxs/slx-{i}"
+        record_rendered_artifact(context, f"{slx_directory}/slx.yaml",
+                                 f"kind: ServiceLevelX\nspec:\n  alias: Check {' '.join(rng.sample(vocabulary, 4))}\n")
+        record_rendered_artifact(context, f"{slx_directory}/runbook.yaml",
+                                 "commands:\n" + "".join(f"  - description: {' '.join(rng.sample(vocabulary, 12))}\n"
+                                                         for _ in range(20)))
+        record_rendered_artifact(context, f"{slx_directory}/SKILL.md",
+                                 "# Skill\n\n" + " ".join(rng.sample(vocabulary, 150)) + "\n")
+    persist_sqlite_store(context, db_path="indexed.sqlite")
+    return os.path.join(tmpdir, "indexed.sqlite")
+
+
+def _measure(db_path: str, repeat: int) -> float:
+    conn = open_database(db_path)
+    try:
+        best_time = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for query in QUERIES:
+                tools._rank_skills(conn, query, None, 20)
+            elapsed = time.perf_counter() - start
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+        return best_time
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bundle-count", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("indexers.sqlite_resource_writer").setLevel(logging.WARNING)
+    # The warning of each query ranked without the index
+    logging.getLogger(tools.__name__).setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        indexed_path = _persist_store(tmpdir, args.bundle_count)
+        unindexed_path = os.path.join(tmpdir, "unindexed.sqlite")
+        shutil.copyfile(indexed_path, unindexed_path)
+        conn = open_database(unindexed_path)
+        conn.execute("DROP TABLE skill_tokens")
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        rebuilt_path = os.path.join(tmpdir, "rebuilt.sqlite")
+        shutil.copyfile(unindexed_path, rebuilt_path)
+        conn = open_database(rebuilt_path)
+        start = time.perf_counter()
+        build_skill_token_index(conn)
+        build_time = time.perf_counter() - start
+        conn.close()
+
+        print(f"{args.bundle_count} bundles, {len(QUERIES)} queries per run; store "
+              f"{os.path.getsize(indexed_path) / (1024 * 1024):.1f} MiB with the token index, "
+              f"{os.path.getsize(unindexed_path) / (1024 * 1024):.1f} MiB without "
+              f"(index built into it in {build_time * 1000:.0f} ms)")
+        index_time = _measure(indexed_path, args.repeat)
+        pool_time = _measure(unindexed_path, args.repeat)
+        default_pool = tools._SEARCH_CANDIDATE_POOL
+        tools._SEARCH_CANDIDATE_POOL = args.bundle_count
+        try:
+            full_pool_time = _measure(unindexed_path, args.repeat)
+        finally:
+            tools._SEARCH_CANDIDATE_POOL = default_pool
+        print(f"token index, every bundle: {index_time * 1000:8.1f} ms")
+        print(f"re-tokenized, pool of {default_pool}: {pool_time * 1000:8.1f} ms")
+        print(f"re-tokenized, every bundle: {full_pool_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark for the SLX bundle listings of the SQLite resource store
+(workspace_builder.resource_store_reader.list_slx_bundles), as used by the
+explorer, the overview page and the MCP candidate pools.
+
+Compares the listings served from the slx_bundles summaries written with the
+store with the listings summarized from the artifacts of each bundle (two
+queries and a YAML parse of the slx.yaml per bundle), on a copy of the store
+without the summaries (which is what the reader falls back to). The number of
+SQL statements per call is reported along with the time.
+
+Usage (from the src directory):
+
+    python -m benchmarks.slx_bundle_listing [--resource-count 1000] [--artifact-count 5000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.sqlite_store_persist import make_context
+from indexers.sqlite_resource_writer import open_database, persist_sqlite_store
+from outputter import FileSystemOutputter
+from workspace_builder.resource_store_reader import list_slx_bundles
+
+LISTINGS = {
+    "first page of 200": lambda conn: list_slx_bundles(conn, limit=200),
+    "page 10 of 200": lambda conn: list_slx_bundles(conn, limit=200, offset=2000),
+    "search pool of 100": lambda conn: list_slx_bundles(conn, q="slx", limit=100),
+}
+
+
+def _measure(db_path: str, listing, repeat: int) -> tuple[float, int]:
+    conn = open_database(db_path)
+    try:
+        statements = []
+        conn.set_trace_callback(statements.append)
+        listing(conn)
+        conn.set_trace_callback(None)
+        # Leave out the statements run by the full-text index itself
+        statement_count = len([sql for sql in statements if not sql.startswith("--") and "'main'" not in sql])
+        best_time = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            listing(conn)
+            elapsed = time.perf_counter() - start
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+        return best_time, statement_count
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resource-count", type=int, default=1000)
+    parser.add_argument("--artifact-count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("indexers.sqlite_resource_writer").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        context = make_context(args.resource_count, args.artifact_count)
+        context.outputter = FileSystemOutputter(tmpdir)
+        persist_sqlite_store(context, db_path="summaries.sqlite")
+        summaries_path = os.path.join(tmpdir, "summaries.sqlite")
+        artifacts_path = os.path.join(tmpdir, "artifacts.sqlite")
+        shutil.copyfile(summaries_path, artifacts_path)
+        conn = open_database(artifacts_path)
+        conn.execute("DROP TABLE slx_bundles")
+        conn.commit()
+        conn.close()
+
+        print(f"{args.artifact_count} SLX bundles")
+        for name, listing in LISTINGS.items():
+            artifacts_time, artifacts_statements = _measure(artifacts_path, listing, args.repeat)
+            summaries_time, summaries_statements = _measure(summaries_path, listing, args.repeat)
+            print(f"{name:>20}: per bundle {artifacts_time * 1000:8.1f} ms ({artifacts_statements} statements), "
+                  f"summaries {summaries_time * 1000:8.1f} ms ({summaries_statements} statements)")
+
+
+if __name__ == "__main__":
+    main()
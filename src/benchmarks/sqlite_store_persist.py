@@ -0,0 +1,159 @@
+"""
+Benchmark for persisting the SQLite resource store
+(indexers.sqlite_resource_writer.persist_sqlite_store).
+
+Compares the streaming implementation, which inserts the rows generated from
+the registry with batched executemany calls and hands the database file to the
+outputter by path, with the previous implementation, which inserted one row
+per execute call, read the whole database file into memory and passed the
+bytes to the outputter. The previous implementation is kept here as the
+reference for the benchmark and for the equivalence tests in
+indexers/test_sqlite_resource_writer.py.
+
+The store is written to a tar archive outputter, as in the REST service. The
+time and the peak of the memory allocated by Python while persisting (on top
+of the registry) are reported.
+
+Usage (from the src directory):
+
+    python -m benchmarks.sqlite_store_persist [--resource-count 50000] [--artifact-count 5000] [--repeat 3]
+"""
+import argparse
+import datetime as _dt
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from component import Context, WORKSPACE_NAME_SETTING
+from indexers.resource_writer import RESOURCE_STORE_BACKEND_SETTING
+from indexers.sqlite_resource_writer import (
+    _collect_resource_attributes,
+    _init_schema,
+    encode_attributes,
+    persist_sqlite_store,
+)
+from outputter import TarFileOutputter
+from renderers.rendered_artifacts import RENDERED_ARTIFACTS_PROPERTY
+from resources import REGISTRY_PROPERTY_NAME, Registry
+
+WORKSPACE_NAME = "benchmark-workspace"
+
+
+def make_context(resource_count: int, artifact_count: int) -> Context:
+    """A context with a registry of Kubernetes-like resources and rendered artifacts."""
+    context = Context({RESOURCE_STORE_BACKEND_SETTING.name: "sqlite", WORKSPACE_NAME_SETTING.name: WORKSPACE_NAME},
+                      TarFileOutputter())
+    registry = Registry()
+    for i in range(resource_count):
+        namespace = f"namespace-{i % 50}"
+        registry.add_resource("kubernetes", ("pod", "deployment", "service")[i % 3], f"resource-{i}",
+                              f"cluster/{namespace}/resource-{i}",
+                              {"namespace": namespace,
+                               "labels": {"app": f"app-{i % 200}", "tier": "backend"},
+                               "spec": {"containers": [{"name": "main", "image": f"registry/app:{i}"}],
+                                        "replicas": i % 5},
+                               "created": _dt.datetime(2024, 1, 1, tzinfo=_dt.timezone.utc)})
+    context.set_property(REGISTRY_PROPERTY_NAME, registry)
+    slx_yaml = "apiVersion: runwhen.com/v1\nkind: ServiceLevelX\nspec:\n" + "  tags: [a, b, c]\n" * 100
+    context.set_property(RENDERED_ARTIFACTS_PROPERTY, [
+        {"relative_path": f"workspaces/{WORKSPACE_NAME}/slxs/slx-{i}/slx.yaml", "artifact_kind": "slx",
+         "media_type": "application/yaml", "slx_directory": f"slx-{i}", "content": slx_yaml}
+        for i in range(artifact_count)
+    ])
+    return context
+
+
+# ---------------------------------------------------------------------------
+# Previous implementation (reference)
+# ---------------------------------------------------------------------------
+
+def legacy_snapshot_registry(conn: sqlite3.Connection, registry: Registry) -> None:
+    now = _dt.datetime.now(_dt.timezone.utc).isoformat()
+    conn.execute("DELETE FROM resources")
+    conn.execute("DELETE FROM resource_types")
+    conn.execute("DELETE FROM platforms")
+    for platform_name, platform in (registry.platforms or {}).items():
+        conn.execute("INSERT INTO platforms (name) VALUES (?)", (platform_name,))
+        for type_name, resource_type in (platform.resource_types or {}).items():
+            custom_attrs = sorted(resource_type.custom_attributes or [])
+            conn.execute("INSERT INTO resource_types (platform, name, custom_attributes) VALUES (?, ?, ?)",
+                         (platform_name, type_name, json.dumps(custom_attrs)))
+            for qualified_name, resource in (resource_type.instances or {}).items():
+                attrs = _collect_resource_attributes(resource, resource_type)
+                conn.execute("INSERT INTO resources (platform, resource_type, qualified_name, name, "
+                             " attributes_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (platform_name, type_name, qualified_name, getattr(resource, "name", ""),
+                              encode_attributes(attrs), now, now))
+
+
+def legacy_snapshot_workspace_artifacts(conn: sqlite3.Connection, workspace_name: str, artifacts: list) -> None:
+    now = _dt.datetime.now(_dt.timezone.utc).isoformat()
+    conn.execute("DELETE FROM workspace_artifacts WHERE workspace_name = ?", (workspace_name,))
+    for artifact in artifacts:
+        conn.execute("INSERT INTO workspace_artifacts (workspace_name, relative_path, artifact_kind, media_type, "
+                     "slx_directory, content, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (workspace_name, artifact["relative_path"], artifact["artifact_kind"], artifact["media_type"],
+                      artifact.get("slx_directory"), artifact["content"], now, now))
+
+
+def legacy_persist_sqlite_store(context: Context, db_path: str = "resources.sqlite") -> None:
+    """persist_sqlite_store before the rows were streamed (without the kubeapi list states)."""
+    registry = context.get_property(REGISTRY_PROPERTY_NAME)
+    workspace_name = context.get_setting(WORKSPACE_NAME_SETTING) or "workspace"
+    artifacts = context.get_property(RENDERED_ARTIFACTS_PROPERTY, [])
+    with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as tmp:
+        tmp_path = tmp.name
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            _init_schema(conn)
+            legacy_snapshot_registry(conn, registry)
+            legacy_snapshot_workspace_artifacts(conn, workspace_name, artifacts)
+            conn.commit()
+        finally:
+            conn.close()
+        with open(tmp_path, "rb") as fh:
+            payload = fh.read()
+        context.outputter.write_file(db_path, payload)
+    finally:
+        os.unlink(tmp_path)
+
+
+def _measure(persist, context: Context) -> tuple[float, int]:
+    context.outputter = TarFileOutputter()
+    tracemalloc.start()
+    start = time.perf_counter()
+    persist(context, db_path="resources.sqlite")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    context.outputter.close()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resource-count", type=int, default=50000)
+    parser.add_argument("--artifact-count", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("indexers.sqlite_resource_writer").setLevel(logging.WARNING)
+
+    context = make_context(args.resource_count, args.artifact_count)
+    print(f"{args.resource_count} resources, {args.artifact_count} workspace artifacts")
+    for label, persist in (("previous", legacy_persist_sqlite_store), ("streaming", persist_sqlite_store)):
+        # The first run imports the modules used by the store (e.g. the kubernetes client)
+        _measure(persist, context)
+        runs = [_measure(persist, context) for _ in range(args.repeat)]
+        best_time = min(elapsed for elapsed, _ in runs)
+        peak = max(peak for _, peak in runs)
+        print(f"{label:>10}: {best_time:.2f}s, peak allocated {peak / (1024 * 1024):.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
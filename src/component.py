@@ -413,3 +413,17 @@ WORKSPACE_OUTPUT_PATH_SETTING = Setting("WORKSPACE_OUTPUT_PATH",
                                         Setting.Type.STRING,
                                         "Output path to where the generated RunWhen workspace files should be written",
                                         "workspaces")
+
+ARCHIVE_COMPRESSION_LEVEL_SETTING = Setting("ARCHIVE_COMPRESSION_LEVEL",
+                                            "archiveCompressionLevel",
+                                            Setting.Type.INTEGER,
+                                            "gzip compression level (0-9) of the generated output archive. "
+                                            "Lower levels are faster but produce a larger archive. "
+                                            "Defaults to 9.")
+
+ARCHIVE_COMPRESSION_WORKERS_SETTING = Setting("ARCHIVE_COMPRESSION_WORKERS",
+                                              "archiveCompressionWorkers",
+                                              Setting.Type.INTEGER,
+                                              "Number of threads used to compress the generated output archive. "
+                                              "The archive is identical whatever the number of threads. "
+                                              "Defaults to 1.")
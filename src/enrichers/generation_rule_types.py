@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Any, Optional, Sequence, Union
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
 import yaml
 
 from component import Context
@@ -213,6 +213,17 @@ class PlatformHandler:
         """
         return None
 
+    def get_resource_property_values_function(self, property_name: str) \
+            -> Optional[Callable[[Resource], Optional[Iterable[Any]]]]:
+        """
+        Return a function that returns the values of the given property for a
+        resource, equivalent to calling get_resource_property_values. This is
+        used by the compiled match predicates, so platforms can override it to
+        resolve the property name once instead of on every call. Returns None if
+        the property is never one of the platform's special values.
+        """
+        return lambda resource: self.get_resource_property_values(resource, property_name)
+
     def get_standard_template_variables(self, resource: Resource) -> dict[str, Any]:
         """
         Add any platform-specific template variables to the dictionary that will be passed to jinja.
@@ -1,3 +1,4 @@
+import bisect
 import os
 import re
 import sys
@@ -42,11 +43,12 @@ from .runwhen_platform import RunWhenPlatformHandler, RUNWHEN_PLATFORM
 
 from renderers.render_output_items import OUTPUT_ITEMS_PROPERTY
 from renderers.render_output_items import OutputItem as RendererOutputItem
+from renderers.rendered_artifacts import record_slx_bindings
 from resources import (
     Resource,
     ResourceTypeSpec,
 )
-from template import render_template_string
+from template import TemplateLoaderKey, register_template_loader, render_template_string
 from . import code_collection as _code_collection_module
 from .code_collection import (
     GenerationRuleFileSpec,
@@ -58,8 +60,11 @@ from .map_customization_rules import MapCustomizationRules, SLXInfo, Relationshi
 from .match_predicate import (
     MatchPredicate,
     AndMatchPredicate,
+    CompiledMatchPredicate,
     StringMatchMode,
     base_construct_match_predicate_from_config,
+    compile_match_path,
+    compile_pattern_matcher,
     match_path,
     matches_pattern,
     Visitor as MatchPredicateVisitor
@@ -138,6 +143,8 @@ GROUPS_PROPERTY = "groups"
 SLXS_PROPERTY = "SLXS"
 SLX_RELATIONSHIPS_PROPERTY = "slx-relationships"
 GENERATION_RULES_PROPERTY = "generation-rules"
+# Keys of the code bundle template loaders registered in the current run
+TEMPLATE_LOADER_KEYS_PROPERTY = "template-loader-keys"
 # This is the dict key name for specifying the platform name in gen rules
 # and the associated resource types.
 PLATFORM_NAME_KEY_NAME = "platform"
@@ -185,6 +192,105 @@ def construct_resource_type_spec(resource_type_spec_config: Union[str, dict[str,
     return resource_type_spec
 
 
+# Context property holding the ResourcePropertyMatchCache for the current run
+RESOURCE_PROPERTY_MATCH_CACHE_PROPERTY = "resource-property-match-cache"
+
+# Properties of the resources of another resource type that can be looked up
+# through a ResourcePropertyIndex instead of scanning every resource.
+INDEXED_RESOURCE_PROPERTIES = ("name", "labels", "annotations")
+
+_REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+_REGEX_QUANTIFIER_CHARS = frozenset("*+?{")
+
+
+def get_literal_pattern_prefix(pattern: re.Pattern) -> str:
+    """
+    Return the literal text that every string matched by ``pattern.match`` must
+    start with, or "" if it can't be determined cheaply.
+    """
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE):
+        return ""
+    pattern_text = pattern.pattern
+    # An alternation anywhere in the pattern could allow a different prefix
+    if not isinstance(pattern_text, str) or "|" in pattern_text:
+        return ""
+    for index, c in enumerate(pattern_text):
+        if c in _REGEX_SPECIAL_CHARS:
+            # A quantifier makes the preceding character optional or repeatable
+            if c in _REGEX_QUANTIFIER_CHARS and index > 0:
+                index -= 1
+            return pattern_text[:index]
+    return pattern_text
+
+
+class ResourcePropertyIndex:
+    """
+    Sorted index of the values of one property (name, labels or annotations)
+    over all of the resources of a resource type. It finds the first resource
+    (in resource order) with a value matching an exact mode pattern by looking
+    up the values that start with the pattern's literal prefix.
+    """
+    def __init__(self, entries: list[tuple[str, int]]):
+        self.entries = sorted(entries)
+
+    @staticmethod
+    def build(resources: Sequence[Resource], prop: str, platform_handler: PlatformHandler) -> Optional["ResourcePropertyIndex"]:
+        """Build the index, or return None if some resource has values that can't be indexed."""
+        entries = list()
+        for position, resource in enumerate(resources):
+            if prop == "name":
+                values = [resource.name]
+            else:
+                values = platform_handler.get_resource_property_values(resource, prop)
+                if values is None:
+                    return None
+            for value in values:
+                if not isinstance(value, str):
+                    return None
+                entries.append((value, position))
+        return ResourcePropertyIndex(entries)
+
+    def find_first_match(self, pattern: re.Pattern, prefix: str) -> Optional[int]:
+        first_position = None
+        index = bisect.bisect_left(self.entries, (prefix,))
+        while index < len(self.entries):
+            value, position = self.entries[index]
+            if not value.startswith(prefix):
+                break
+            if (first_position is None or position < first_position) and pattern.match(value):
+                first_position = position
+            index += 1
+        return first_position
+
+
+class ResourcePropertyMatchCache:
+    """
+    Per-run memo of the cross-resource-type lookups made by
+    ResourcePropertyMatchPredicate. The lookup result doesn't depend on the
+    resource the generation rule is being evaluated for, so it's evaluated once
+    per (resource type spec, properties, pattern, mode) and reused. The
+    property indexes are built lazily for each resource type and property.
+    """
+    def __init__(self):
+        self.matches: dict[tuple, Optional[Resource]] = dict()
+        self.indexes: dict[tuple[ResourceTypeSpec, str], Optional[ResourcePropertyIndex]] = dict()
+
+    @staticmethod
+    def get(context: Context) -> "ResourcePropertyMatchCache":
+        cache = context.get_property(RESOURCE_PROPERTY_MATCH_CACHE_PROPERTY)
+        if cache is None:
+            cache = ResourcePropertyMatchCache()
+            context.set_property(RESOURCE_PROPERTY_MATCH_CACHE_PROPERTY, cache)
+        return cache
+
+    def get_index(self, resource_type_spec: ResourceTypeSpec, prop: str, resources: Sequence[Resource],
+                  platform_handler: PlatformHandler) -> Optional[ResourcePropertyIndex]:
+        key = (resource_type_spec, prop)
+        if key not in self.indexes:
+            self.indexes[key] = ResourcePropertyIndex.build(resources, prop, platform_handler)
+        return self.indexes[key]
+
+
 class ResourcePropertyMatchPredicate(MatchPredicate):
     """
     Match on one or more properties of the candidate resource.
@@ -267,18 +373,111 @@ class ResourcePropertyMatchPredicate(MatchPredicate):
                         return True
         return False
 
+    @property
+    def cost(self) -> int:
+        return sum(1 if prop == "name" else 3 for prop in self.properties)
+
+    @property
+    def reorderable(self) -> bool:
+        # The cross-resource-type lookups bind the matching resource in the variables
+        return not self.resource_type_spec
+
+    def compile(self) -> CompiledMatchPredicate:
+        if self.resource_type_spec:
+            return self.matches
+        value_matches = compile_pattern_matcher(self.pattern, self.string_match_mode)
+        properties = tuple(self.properties)
+        path_matchers = {prop: compile_match_path(prop, value_matches) for prop in properties if prop != "name"}
+        # The per-property matchers, resolved once per platform handler. A None
+        # entry is the name property.
+        property_matchers_by_handler: dict[PlatformHandler, list] = dict()
+
+        def get_property_matchers(platform_handler: PlatformHandler) -> list:
+            property_matchers = list()
+            for prop in properties:
+                if prop == "name":
+                    property_matchers.append(None)
+                else:
+                    property_matchers.append((platform_handler.get_resource_property_values_function(prop),
+                                              path_matchers[prop]))
+            property_matchers_by_handler[platform_handler] = property_matchers
+            return property_matchers
+
+        def matches(generation_rule_match_info: GenerationRuleMatchInfo) -> bool:
+            resource = generation_rule_match_info.resource
+            platform_handlers = generation_rule_match_info.context.get_property(PLATFORM_HANDLERS_PROPERTY_NAME)
+            platform_handler = platform_handlers[resource.resource_type.platform.name]
+            property_matchers = property_matchers_by_handler.get(platform_handler) or \
+                get_property_matchers(platform_handler)
+            for property_matcher in property_matchers:
+                if property_matcher is None:
+                    if value_matches(resource.name):
+                        return True
+                    continue
+                property_values_function, path_matcher = property_matcher
+                property_values = property_values_function(resource) if property_values_function else None
+                if property_values is not None:
+                    for value in property_values:
+                        if value_matches(value):
+                            return True
+                elif path_matcher(resource.resource):
+                    return True
+            return False
+        return matches
+
+    def find_indexed_match(self, resources: Sequence[Resource], context: Context,
+                           cache: ResourcePropertyMatchCache) -> tuple[bool, Optional[Resource]]:
+        """
+        Look up the first matching resource with the property indexes. Returns
+        ``(False, None)`` if the lookup can't be done with the indexes.
+        """
+        if self.string_match_mode != StringMatchMode.EXACT or not resources:
+            return False, None
+        if any(prop not in INDEXED_RESOURCE_PROPERTIES for prop in self.properties):
+            return False, None
+        prefix = get_literal_pattern_prefix(self.pattern)
+        if not prefix:
+            return False, None
+        platform_handlers: dict[str, PlatformHandler] = context.get_property(PLATFORM_HANDLERS_PROPERTY_NAME)
+        platform_handler = platform_handlers[resources[0].resource_type.platform.name]
+        first_position = None
+        for prop in self.properties:
+            index = cache.get_index(self.resource_type_spec, prop, resources, platform_handler)
+            if index is None:
+                return False, None
+            position = index.find_first_match(self.pattern, prefix)
+            if position is not None and (first_position is None or position < first_position):
+                first_position = position
+        return True, resources[first_position] if first_position is not None else None
+
+    def find_matching_resource(self, context: Context) -> Optional[Resource]:
+        """
+        Return the first resource of the predicate's resource type that matches,
+        or None. The result is memoized for the rest of the run.
+        """
+        cache = ResourcePropertyMatchCache.get(context)
+        key = (self.resource_type_spec, tuple(self.properties), self.pattern.pattern, self.string_match_mode)
+        if key in cache.matches:
+            return cache.matches[key]
+        resources = get_resources(context, self.resource_type_spec)
+        indexed, matching_resource = self.find_indexed_match(resources, context, cache)
+        if not indexed:
+            matching_resource = next((resource for resource in resources
+                                      if self.matches_resource(resource, context)), None)
+        cache.matches[key] = matching_resource
+        return matching_resource
+
     def matches(self, generation_rule_match_info: GenerationRuleMatchInfo):
         resource = generation_rule_match_info.resource
         variables = generation_rule_match_info.variables
         context = generation_rule_match_info.context
         if self.resource_type_spec:
-            resources = get_resources(context, self.resource_type_spec)
-            for resource in resources:
-                if self.matches_resource(resource, context):
-                    resource_type_name = self.resource_type_spec.get_resource_type_name()
-                    variables['resources'][resource_type_name] = resource
-                    return True
-            return False
+            matching_resource = self.find_matching_resource(context)
+            if matching_resource is None:
+                return False
+            resource_type_name = self.resource_type_spec.get_resource_type_name()
+            variables['resources'][resource_type_name] = matching_resource
+            return True
         else:
             return self.matches_resource(resource, context)
 
@@ -313,6 +512,20 @@ class ResourcePathExistsMatchPredicate(MatchPredicate):
         resource_data = getattr(resource, "resource")
         return match_path(resource_data, self.path, match_func)
 
+    cost = 3
+    reorderable = True
+
+    def compile(self) -> CompiledMatchPredicate:
+        match_empty = self.match_empty
+
+        def match_func(value: str) -> bool:
+            return (value is not None) or match_empty
+        path_matcher = compile_match_path(self.path, match_func)
+
+        def matches(generation_rule_match_info: GenerationRuleMatchInfo) -> bool:
+            return path_matcher(generation_rule_match_info.resource.resource)
+        return matches
+
 
 class CustomVariableMatchPredicate(MatchPredicate):
 
@@ -348,6 +561,15 @@ class CustomVariableMatchPredicate(MatchPredicate):
             return matches_pattern(v, self.pattern, self.string_match_mode)
         return match_path(generation_rule_match_info.variables, self.path, match_func)
 
+    cost = 3
+
+    def compile(self) -> CompiledMatchPredicate:
+        path_matcher = compile_match_path(self.path, compile_pattern_matcher(self.pattern, self.string_match_mode))
+
+        def matches(generation_rule_match_info: GenerationRuleMatchInfo) -> bool:
+            return path_matcher(generation_rule_match_info.variables)
+        return matches
+
 
 @dataclass
 class OutputItem:
@@ -455,6 +677,7 @@ class GenerationRule:
     """
     resource_type_specs: list[ResourceTypeSpec]
     match_predicate: MatchPredicate
+    compiled_match_predicate: CompiledMatchPredicate
     output_items: list[OutputItem]
     slxs: list[SLX]
 
@@ -464,6 +687,9 @@ class GenerationRule:
                  slxs: list[SLX]):
         self.resource_type_specs = resource_type_specs
         self.match_predicate = match_predicate
+        # The match predicate is evaluated for every candidate resource, so it's
+        # compiled once up front instead of interpreting the predicate tree.
+        self.compiled_match_predicate = match_predicate.compile()
         self.output_items = output_items
         self.slxs = slxs
 
@@ -814,6 +1040,28 @@ def should_emit_output_item(output_item: OutputItem, level_of_detail: LevelOfDet
         raise e
 
 
+def get_template_loader_key(generation_rule_info: GenerationRuleInfo, context: Context) -> Optional[TemplateLoaderKey]:
+    """
+    Return the key of the template loader for the code bundle of a generation
+    rule, registering the loader the first time it's used in this run.
+    """
+    code_collection = generation_rule_info.code_collection
+    if not code_collection:
+        return None
+    ref_name = generation_rule_info.generation_rule_file_spec.ref_name
+    code_bundle_name = generation_rule_info.generation_rule_file_spec.code_bundle_name
+    template_loader_key = (code_collection.repo_url, ref_name, code_bundle_name)
+    registered_template_loader_keys = context.get_property(TEMPLATE_LOADER_KEYS_PROPERTY)
+    if registered_template_loader_keys is None:
+        registered_template_loader_keys = set()
+        context.set_property(TEMPLATE_LOADER_KEYS_PROPERTY, registered_template_loader_keys)
+    if template_loader_key not in registered_template_loader_keys:
+        register_template_loader(template_loader_key,
+                                 lambda name: code_collection.get_template_text(ref_name, code_bundle_name, name))
+        registered_template_loader_keys.add(template_loader_key)
+    return template_loader_key
+
+
 def generate_output_item(generation_rule_info: GenerationRuleInfo,
                          output_item: OutputItem,
                          resource: Resource,
@@ -864,14 +1112,9 @@ def generate_output_item(generation_rule_info: GenerationRuleInfo,
             return False
 
         try:
-            code_collection = generation_rule_info.code_collection
-            if code_collection:
-                ref_name = generation_rule_info.generation_rule_file_spec.ref_name
-                code_bundle_name = generation_rule_info.generation_rule_file_spec.code_bundle_name
-                template_loader_func = lambda name: code_collection.get_template_text(ref_name, code_bundle_name, name)
-            else:
-                template_loader_func = None
-            output_item = RendererOutputItem(path, output_item.template_name, template_variables, template_loader_func)
+            template_loader_key = get_template_loader_key(generation_rule_info, context)
+            output_item = RendererOutputItem(path, output_item.template_name, template_variables,
+                                             template_loader_key=template_loader_key)
             renderer_output_items[path] = output_item
             return True
         except Exception as e:
@@ -970,7 +1213,7 @@ def collect_emitted_slxs(generation_rule_info: GenerationRuleInfo,
                     # all resource names that contributed to this SLX so that they can be
                     # surfaced to templates (e.g., as tags).
                     if 'resource' not in slx.qualifiers:
-                        existing_slx_info.add_child_resource_name(resource.name)
+                        existing_slx_info.add_child_resource(resource)
                         logger.debug(
                             f"DEBUG: Collect Emitted SLXs: aggregated child resource '{resource.name}' into existing SLX {existing_slx_info.full_name}"
                         )
@@ -1103,6 +1346,7 @@ def generate_slx_output_items(slx_info: SLXInfo,
             slx_directory_path = os.path.join(slxs_path, slx_info.qualified_name)
             slx_base_template_variables['slx_directory_path'] = slx_directory_path
             slx_base_template_variables['match_resource'] = resource
+            record_slx_bindings(context, slx_directory_path, resource, slx_info.child_resources)
         except Exception as e:
             logger.info(f"Error setting up base template variables: {e}")
             # Still continue with what we have
@@ -1430,6 +1674,132 @@ def _check_code_collection_clone_failures(
     )
 
 
+@dataclass
+class GenerationRuleMatch:
+    """
+    A resource matched by a generation rule entry in the evaluation pass, along
+    with the state needed to emit its output items and SLXs afterwards.
+    """
+    resource: Resource
+    platform_name: str
+    level_of_detail: LevelOfDetail
+    # Contents of the "resources" template variable when the resource matched
+    resources: dict[str, Resource]
+
+
+class GenerationRulePlanEntry:
+    """
+    A generation rule applied to one of its resource type specs. The entries are
+    kept in the order that the generation rules used to be evaluated in, which
+    is the order their outputs are emitted in.
+    """
+    generation_rule_info: GenerationRuleInfo
+    resource_type_spec: ResourceTypeSpec
+    resource_type_name: str
+    variables: dict[str, Any]
+    matches: list[GenerationRuleMatch]
+    final_resources: dict[str, Resource]
+
+    def __init__(self, generation_rule_info: GenerationRuleInfo,
+                 resource_type_spec: ResourceTypeSpec,
+                 base_template_variables: dict[str, Any]):
+        self.generation_rule_info = generation_rule_info
+        self.resource_type_spec = resource_type_spec
+        self.resource_type_name = resource_type_spec.get_resource_type_name()
+        # Each entry gets its own "resources" template variable, which is shared
+        # by all the output items emitted for the entry.
+        self.variables = base_template_variables.copy()
+        self.variables['resources'] = dict()
+        self.matches = list()
+        self.final_resources = dict()
+
+
+class GenerationRulePlan:
+    """
+    One-time evaluation plan for the generation rules. The (rule, resource type
+    spec) entries are grouped into buckets by resource type spec, so the
+    resources of each bucket are fetched once and every rule that targets them
+    is evaluated in a single pass over the resources.
+    """
+    entries: list[GenerationRulePlanEntry]
+    buckets: dict[ResourceTypeSpec, list[GenerationRulePlanEntry]]
+
+    def __init__(self, generation_rule_infos: list[GenerationRuleInfo], base_template_variables: dict[str, Any]):
+        self.entries = list()
+        self.buckets = dict()
+        for generation_rule_info in generation_rule_infos:
+            for resource_type_spec in generation_rule_info.generation_rule.resource_type_specs:
+                entry = GenerationRulePlanEntry(generation_rule_info, resource_type_spec, base_template_variables)
+                self.entries.append(entry)
+                self.buckets.setdefault(resource_type_spec, list()).append(entry)
+
+    def evaluate(self, context: Context, gen_stats: dict[str, Any]) -> None:
+        """
+        Evaluate the match predicates of every entry against the resources of
+        its bucket, recording the matches in the entries.
+        """
+        platform_handlers: dict[str, PlatformHandler] = context.get_property(PLATFORM_HANDLERS_PROPERTY_NAME)
+        gen_stats['rule_resource_type_specs'] += len(self.entries)
+        for resource_type_spec, entries in self.buckets.items():
+            resources = get_resources(context, resource_type_spec)
+            gen_stats['resource_buckets_fetched'] += 1
+            entry_matchers = [(entry,
+                               GenerationRuleMatchInfo(None, entry.variables, context),
+                               entry.generation_rule_info.generation_rule.compiled_match_predicate)
+                              for entry in entries]
+            for resource in resources:
+                platform_name = resource.resource_type.platform.name
+                platform_handler = platform_handlers[platform_name]
+                platform_stats = gen_stats['platforms'].setdefault(platform_name, {
+                    'resources_evaluated': 0,
+                    'resources_matched': 0,
+                    'slxs_generated': 0,
+                    'output_items_generated': 0
+                })
+                gen_stats['resource_visits'] += 1
+                level_of_detail = None
+                for entry, generation_rule_match_info, compiled_match_predicate in entry_matchers:
+                    gen_stats['total_resources_evaluated'] += 1
+                    platform_stats['resources_evaluated'] += 1
+                    generation_rule_match_info.resource = resource
+                    if compiled_match_predicate(generation_rule_match_info):
+                        gen_stats['total_resources_matched'] += 1
+                        platform_stats['resources_matched'] += 1
+                        if level_of_detail is None:
+                            level_of_detail = platform_handler.get_level_of_detail(resource)
+                        entry.variables['resources'][entry.resource_type_name] = resource
+                        entry.matches.append(GenerationRuleMatch(resource, platform_name, level_of_detail,
+                                                                 entry.variables['resources'].copy()))
+        for entry in self.entries:
+            entry.final_resources = entry.variables['resources'].copy()
+
+
+def get_allowed_generation_rule_infos(generation_rule_infos: list[GenerationRuleInfo],
+                                      context: Context) -> list[GenerationRuleInfo]:
+    """
+    Filter out the generation rules from code bundles with excluded task tags.
+    The decision is made once per code bundle, since a code bundle can have
+    several generation rule files.
+    """
+    if not context.get_setting("TASK_TAG_EXCLUSIONS"):
+        return list(generation_rule_infos)
+    code_bundle_access_allowed: dict[tuple[str, str, str], bool] = dict()
+    allowed_generation_rule_infos = list()
+    for generation_rule_info in generation_rule_infos:
+        file_spec = generation_rule_info.generation_rule_file_spec
+        code_collection = generation_rule_info.code_collection
+        key = (code_collection.repo_url if code_collection else None, file_spec.ref_name, file_spec.code_bundle_name)
+        allowed = code_bundle_access_allowed.get(key)
+        if allowed is None:
+            allowed = check_codebundle_access_allowed(generation_rule_info, context)
+            code_bundle_access_allowed[key] = allowed
+        if allowed:
+            allowed_generation_rule_infos.append(generation_rule_info)
+        else:
+            logger.debug(f"Skipping codebundle {file_spec.code_bundle_name} due to excluded tags")
+    return allowed_generation_rule_infos
+
+
 def enrich(context: Context) -> None:
     logger.debug("Beginning generation_rules.enrich")
     
@@ -1439,6 +1809,11 @@ def enrich(context: Context) -> None:
         'total_resources_matched': 0,
         'total_slxs_generated': 0,
         'total_output_items_generated': 0,
+        # Number of (rule, resource type) pairs, i.e. the resource fetches without the bucketing
+        'rule_resource_type_specs': 0,
+        'resource_buckets_fetched': 0,
+        # Number of resources visited across the buckets; each visit evaluates every rule in the bucket
+        'resource_visits': 0,
         'platforms': {},
         'start_time': time.time()
     }
@@ -1526,69 +1901,52 @@ def enrich(context: Context) -> None:
     except Exception as e:
         logger.info(f"Could not retrieve all settings: {e}")
     
-    for generation_rule_info in generation_rule_infos:
-        # Check if this codebundle is allowed based on tag exclusion list
-        logger.debug(f"Processing generation rule for codebundle: {generation_rule_info.generation_rule_file_spec.code_bundle_name}")
-        if not check_codebundle_access_allowed(generation_rule_info, context):
-            logger.debug(f"Skipping codebundle {generation_rule_info.generation_rule_file_spec.code_bundle_name} due to excluded tags")
-            continue
-            
+    # Evaluate the match predicates bucketed by resource type, then emit the
+    # outputs for the matches in the original rule order, so the SLXs and
+    # output items are collected in the same order as before.
+    generation_rule_plan = GenerationRulePlan(get_allowed_generation_rule_infos(generation_rule_infos, context),
+                                              base_template_variables)
+    generation_rule_plan.evaluate(context, gen_stats)
+    for entry in generation_rule_plan.entries:
+        generation_rule_info = entry.generation_rule_info
         generation_rule = generation_rule_info.generation_rule
-        for resource_type_spec in generation_rule.resource_type_specs:
-            resources = get_resources(context, resource_type_spec)
-            base_template_variables['resources'] = dict()
-            for resource in resources:
-                platform_name = resource.resource_type.platform.name
-                platform_handler = platform_handlers[platform_name]
-                level_of_detail = platform_handler.get_level_of_detail(resource)
-                resource_type_name = resource_type_spec.get_resource_type_name()
-                
-                # Track resource evaluation statistics
-                gen_stats['total_resources_evaluated'] += 1
-                platform_stats = gen_stats['platforms'].setdefault(platform_name, {
-                    'resources_evaluated': 0,
-                    'resources_matched': 0,
-                    'slxs_generated': 0,
-                    'output_items_generated': 0
-                })
-                platform_stats['resources_evaluated'] += 1
-                
-                generation_rule_match_info = GenerationRuleMatchInfo(resource, base_template_variables, context)
-                matches = generation_rule.match_predicate.matches(generation_rule_match_info)
-                if matches:
-                    # Track matched resource
-                    gen_stats['total_resources_matched'] += 1
-                    platform_stats['resources_matched'] += 1
-                    # Emit the non-SLX output items directly. We currently don't do any name/path config
-                    # detection/resolution for these. I actually don't think we're using these for
-                    # anything currently, so we might want to take out support for this to simplify
-                    # things a bit.
-                    #
-                    # standard_template_variables = platform_handler.get_standard_template_variables(resource)
-                    # resource_template_variables = base_template_variables.copy()
-                    # resource_template_variables.update(standard_template_variables)
-                    base_template_variables['resources'][resource_type_name] = resource
-                    for output_item in generation_rule.output_items:
-                        if should_emit_output_item(output_item, level_of_detail):
-                            generate_output_item(generation_rule_info,
-                                                 output_item,
-                                                 resource,
-                                                 renderer_output_items,
-                                                 base_template_variables,
-                                                 context)
-                            # Track generated output item
-                            gen_stats['total_output_items_generated'] += 1
-                            platform_stats['output_items_generated'] += 1
-
-                    # Count SLXs before collecting them
-                    slxs_before = len(slxs)
-                    collect_emitted_slxs(generation_rule_info, resource, level_of_detail, slxs, context)
-                    slxs_after = len(slxs)
-                    slxs_added = slxs_after - slxs_before
-                    
-                    # Track generated SLXs
-                    gen_stats['total_slxs_generated'] += slxs_added
-                    platform_stats['slxs_generated'] += slxs_added
+        entry_resources = entry.variables['resources']
+        for match in entry.matches:
+            platform_stats = gen_stats['platforms'][match.platform_name]
+            # Restore the "resources" template variable to its state when the resource
+            # matched, since it's used when rendering the output item paths.
+            #
+            # Emit the non-SLX output items directly. We currently don't do any name/path config
+            # detection/resolution for these. I actually don't think we're using these for
+            # anything currently, so we might want to take out support for this to simplify
+            # things a bit.
+            entry_resources.clear()
+            entry_resources.update(match.resources)
+            for output_item in generation_rule.output_items:
+                if should_emit_output_item(output_item, match.level_of_detail):
+                    generate_output_item(generation_rule_info,
+                                         output_item,
+                                         match.resource,
+                                         renderer_output_items,
+                                         entry.variables,
+                                         context)
+                    # Track generated output item
+                    gen_stats['total_output_items_generated'] += 1
+                    platform_stats['output_items_generated'] += 1
+
+            # Count SLXs before collecting them
+            slxs_before = len(slxs)
+            collect_emitted_slxs(generation_rule_info, match.resource, match.level_of_detail, slxs, context)
+            slxs_added = len(slxs) - slxs_before
+
+            # Track generated SLXs
+            gen_stats['total_slxs_generated'] += slxs_added
+            platform_stats['slxs_generated'] += slxs_added
+        entry_resources.clear()
+        entry_resources.update(entry.final_resources)
+    if generation_rule_plan.entries:
+        # The SLX output items share the "resources" of the last evaluated rule
+        base_template_variables['resources'] = generation_rule_plan.entries[-1].variables['resources']
 
     # Assign the shortened names to the enabled SLXs, including detecting and resolving any name conflicts.
     workspace_name = workspace["name"]
@@ -1635,6 +1993,10 @@ def enrich(context: Context) -> None:
     # Log summary statistics
     logger.info(f"Generation Rules Summary:")
     logger.info(f"  Total resources evaluated: {gen_stats['total_resources_evaluated']}")
+    logger.info(f"  Resource fetches: {gen_stats['resource_buckets_fetched']} "
+                f"(unbucketed: {gen_stats['rule_resource_type_specs']}); "
+                f"resource visits: {gen_stats['resource_visits']} "
+                f"(unbucketed: {gen_stats['total_resources_evaluated']})")
     logger.info(f"  Total resources matched: {gen_stats['total_resources_matched']}")
     logger.info(f"  Total SLXs generated: {gen_stats['total_slxs_generated']}")
     logger.info(f"  Total output items generated: {gen_stats['total_output_items_generated']}")
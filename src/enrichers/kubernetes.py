@@ -1,4 +1,5 @@
-from typing import Any, Optional, Sequence, Union
+from itertools import chain
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
 
 from component import Context
 from indexers.kubetypes import (
@@ -92,19 +93,26 @@ class KubernetesPlatformHandler(PlatformHandler):
         return self.get_common_resource_property_values(resource, qualifier_name)
 
     def get_resource_property_values(self, resource: Resource, property_name: str) -> Optional[list[Any]]:
+        property_values_function = self.get_resource_property_values_function(property_name)
+        if property_values_function is None:
+            return None
+        return list(property_values_function(resource))
+
+    def get_resource_property_values_function(self, property_name: str) \
+            -> Optional[Callable[[Resource], Optional[Iterable[Any]]]]:
         property_name = property_name.lower()
         if property_name == "labels":
-            return list(resource.labels.keys()) + list(resource.labels.values())
+            return lambda resource: chain(resource.labels.keys(), resource.labels.values())
         elif property_name == "label-keys":
-            return list(resource.labels.keys())
+            return lambda resource: resource.labels.keys()
         elif property_name == "label-values":
-            return list(resource.labels.values())
+            return lambda resource: resource.labels.values()
         elif property_name == "annotations":
-            return list(resource.annotations.keys()) + list(resource.annotations.values())
+            return lambda resource: chain(resource.annotations.keys(), resource.annotations.values())
         elif property_name == "annotation-keys":
-            return list(resource.annotations.keys())
+            return lambda resource: resource.annotations.keys()
         elif property_name == "annotation-values":
-            return list(resource.annotations.values())
+            return lambda resource: resource.annotations.values()
         else:
             return None
 
@@ -56,6 +56,9 @@ class SLXInfo:
     # the names of *all* matching resources so that templates can reference them (for
     # example, to publish them as SLX tags).
     child_resource_names: list[str]
+    # The resources behind child_resource_names, recorded as the SLX bindings of
+    # the resource store.
+    child_resources: list[Resource]
     full_name: str
     qualified_name: str
     resource: Resource
@@ -105,6 +108,7 @@ class SLXInfo:
         self.resource = resource
         # Track the initial resource; additional names may be aggregated later.
         self.child_resource_names = [resource.name]
+        self.child_resources = [resource]
         self.level_of_detail = level_of_detail
         # FIXME: It's a little kludgy to have this in the the SLX info, since it's
         # not really related to map customization rules and the evaluation of match
@@ -140,6 +144,12 @@ class SLXInfo:
         if name not in self.child_resource_names:
             self.child_resource_names.append(name)
 
+    def add_child_resource(self, resource: Resource):
+        """Add an additional child resource, and its name to the child resource names."""
+        if not any(child is resource for child in self.child_resources):
+            self.child_resources.append(resource)
+        self.add_child_resource_name(resource.name)
+
 
 class SLXPropertyMatchPredicate(MatchPredicate):
 
@@ -2,7 +2,7 @@ import re
 from abc import ABC, abstractmethod
 from collections.abc import Iterable
 from enum import Enum
-from typing import Any
+from typing import Any, Callable, Sequence
 
 from exceptions import WorkspaceBuilderException
 from resources import Resource
@@ -15,20 +15,52 @@ class StringMatchMode(Enum):
     SUBSTRING = "substring"
 
 
+# A match predicate compiled into a function of the match info
+CompiledMatchPredicate = Callable[[Any], bool]
+
+
 def matches_pattern(value: str, pattern: re.Pattern, string_match_mode: StringMatchMode) -> bool:
     match = pattern.match(value) if string_match_mode == StringMatchMode.EXACT else pattern.search(value)
     return match is not None
 
 
+def compile_pattern_matcher(pattern: re.Pattern, string_match_mode: StringMatchMode) -> Callable[[str], bool]:
+    """
+    Return a function that's equivalent to matches_pattern for the given pattern
+    and mode, with the match mode resolved up front.
+    """
+    match = pattern.match if string_match_mode == StringMatchMode.EXACT else pattern.search
+
+    def matches(value: str) -> bool:
+        return match(value) is not None
+    return matches
+
+
 class Visitor(ABC):
     @abstractmethod
     def visit(self, match_predicate: "MatchPredicate"): ...
 
 
 class MatchPredicate(ABC):
+    # Relative cost of evaluating the predicate. Compiled compound predicates
+    # evaluate their cheaper children first, where that can't change the result.
+    cost: int = 10
+    # Whether the predicate only depends on the candidate resource, i.e. it
+    # doesn't read or bind any match variables, so it can be evaluated in any
+    # order relative to its siblings.
+    reorderable: bool = False
+
     @abstractmethod
     def matches(self, match_info: Any) -> bool: ...
 
+    def compile(self) -> CompiledMatchPredicate:
+        """
+        Return a function that evaluates the predicate for a match info. The
+        compiled function must give the same result as the matches method.
+        Predicates that don't have a specialized version use matches.
+        """
+        return self.matches
+
     def accept(self, visitor: Visitor):
         """
         Implementation of the visitor pattern
@@ -43,6 +75,17 @@ class CompoundMatchPredicate(MatchPredicate):
     def __init__(self, predicates: list[MatchPredicate]):
         self.predicates = predicates
 
+    @property
+    def cost(self) -> int:
+        return sum(predicate.cost for predicate in self.predicates)
+
+    @property
+    def reorderable(self) -> bool:
+        return all(predicate.reorderable for predicate in self.predicates)
+
+    def compile_children(self) -> tuple[CompiledMatchPredicate, ...]:
+        return tuple(predicate.compile() for predicate in order_by_cost(self.predicates))
+
     def matches(self, match_info: Any) -> bool:
         """
         Subclasses should override this, so this should never be called, but we
@@ -84,6 +127,18 @@ class AndMatchPredicate(CompoundMatchPredicate):
                 return False
         return True
 
+    def compile(self) -> CompiledMatchPredicate:
+        compiled_predicates = self.compile_children()
+        if len(compiled_predicates) == 1:
+            return compiled_predicates[0]
+
+        def matches(match_info: Any) -> bool:
+            for compiled_predicate in compiled_predicates:
+                if not compiled_predicate(match_info):
+                    return False
+            return True
+        return matches
+
 
 class OrMatchPredicate(CompoundMatchPredicate):
     """
@@ -107,6 +162,18 @@ class OrMatchPredicate(CompoundMatchPredicate):
                 return True
         return False
 
+    def compile(self) -> CompiledMatchPredicate:
+        compiled_predicates = self.compile_children()
+        if len(compiled_predicates) == 1:
+            return compiled_predicates[0]
+
+        def matches(match_info: Any) -> bool:
+            for compiled_predicate in compiled_predicates:
+                if compiled_predicate(match_info):
+                    return True
+            return False
+        return matches
+
 
 class NotMatchPredicate(MatchPredicate):
     """
@@ -130,14 +197,48 @@ class NotMatchPredicate(MatchPredicate):
         child_predicate = parent_construct_from_config(child_predicate_config, parent_construct_from_config)
         return NotMatchPredicate(child_predicate)
 
+    @property
+    def cost(self) -> int:
+        return self.predicate.cost
+
+    @property
+    def reorderable(self) -> bool:
+        return self.predicate.reorderable
+
     def matches(self, match_info: Any):
         return not self.predicate.matches(match_info)
 
+    def compile(self) -> CompiledMatchPredicate:
+        compiled_predicate = self.predicate.compile()
+
+        def matches(match_info: Any) -> bool:
+            return not compiled_predicate(match_info)
+        return matches
+
     def accept(self, visitor: Visitor):
         super().accept(visitor)
         self.predicate.accept(visitor)
 
 
+def order_by_cost(predicates: Sequence[MatchPredicate]) -> list[MatchPredicate]:
+    """
+    Order the children of a compound predicate cheapest first. Predicates that
+    aren't reorderable (e.g. ones that bind match variables) keep their position,
+    so only the runs of reorderable predicates between them are sorted.
+    """
+    ordered_predicates = list()
+    run = list()
+    for predicate in predicates:
+        if predicate.reorderable:
+            run.append(predicate)
+        else:
+            ordered_predicates.extend(sorted(run, key=lambda p: p.cost))
+            ordered_predicates.append(predicate)
+            run = list()
+    ordered_predicates.extend(sorted(run, key=lambda p: p.cost))
+    return ordered_predicates
+
+
 def base_construct_match_predicate_from_config(predicate_config: dict[str, Any],
                                                parent_construct_from_config) -> MatchPredicate:
     match_predicate_type = predicate_config.get('type')
@@ -169,8 +270,8 @@ def path_to_components(path: str, separator_char=None) -> list[str]:
         components = path.split('/')
     return components
 
-def _match_path(data, path_components: list[str], match_func) -> bool:
-    at_end_of_path = len(path_components) == 0
+def _match_path(data, path_components: Sequence[str], match_func, index: int = 0) -> bool:
+    at_end_of_path = index == len(path_components)
 
     if isinstance(data, str):
         # If there are still more path components, but we've reached a scalar string,
@@ -181,15 +282,13 @@ def _match_path(data, path_components: list[str], match_func) -> bool:
     if isinstance(data, dict):
         if at_end_of_path:
             return False
-        next_component = path_components[0]
-        item = data.get(next_component)
+        item = data.get(path_components[index])
         if item is None:
             return False
-        remaining_components = path_components[1:]
-        return _match_path(item, remaining_components, match_func)
+        return _match_path(item, path_components, match_func, index + 1)
     if isinstance(data, Iterable):
         for item in data:
-            if _match_path(item, path_components, match_func):
+            if _match_path(item, path_components, match_func, index):
                 return True
         return False
     # If there are still more path components, but we've reached a scalar value,
@@ -201,3 +300,12 @@ def match_path(data: Any, path: str, match_func) -> bool:
     path_components = path_to_components(path)
     match = _match_path(data, path_components, match_func)
     return match
+
+
+def compile_match_path(path: str, match_func) -> Callable[[Any], bool]:
+    """Return a function that's equivalent to match_path with the path split up front."""
+    path_components = tuple(path_to_components(path))
+
+    def matches(data: Any) -> bool:
+        return _match_path(data, path_components, match_func)
+    return matches
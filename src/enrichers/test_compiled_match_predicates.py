@@ -0,0 +1,161 @@
+"""Unit tests for the compiled generation rule match predicates.
+
+``MatchPredicate.compile`` turns a predicate tree into a closure tree with the
+paths pre-split, the string match mode resolved and the cheaper checks first.
+These pin that the compiled predicates give the same results, and bind the
+same variables, as the interpreted ``matches`` methods.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import re
+import sys
+from unittest import TestCase
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.dirname(_THIS_DIR)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from component import Context  # noqa: E402
+from enrichers.generation_rule_types import PLATFORM_HANDLERS_PROPERTY_NAME  # noqa: E402
+from enrichers.generation_rules import (  # noqa: E402
+    CustomVariableMatchPredicate,
+    GenerationRuleMatchInfo,
+    ResourcePathExistsMatchPredicate,
+    ResourcePropertyMatchPredicate,
+    get_resources,
+)
+from enrichers.kubernetes import KubernetesPlatformHandler  # noqa: E402
+from enrichers.match_predicate import (  # noqa: E402
+    AndMatchPredicate,
+    NotMatchPredicate,
+    OrMatchPredicate,
+    StringMatchMode,
+    compile_match_path,
+    match_path,
+    order_by_cost,
+)
+from indexers.kubetypes import KUBERNETES_PLATFORM, KubernetesResourceType, KubernetesResourceTypeSpec  # noqa: E402
+from outputter import TarFileOutputter  # noqa: E402
+from resources import REGISTRY_PROPERTY_NAME, Registry  # noqa: E402
+
+DEPLOYMENT_SPEC = KubernetesResourceTypeSpec(KUBERNETES_PLATFORM, KubernetesResourceType.DEPLOYMENT.value,
+                                             None, None, None)
+SERVICE_SPEC = KubernetesResourceTypeSpec(KUBERNETES_PLATFORM, KubernetesResourceType.SERVICE.value,
+                                          None, None, None)
+
+
+def _make_context() -> Context:
+    registry = Registry()
+    for resource_type in (KubernetesResourceType.DEPLOYMENT, KubernetesResourceType.SERVICE):
+        for i in range(24):
+            name = f"{('web', 'api', 'db')[i % 3]}-{i:02d}"
+            spec = {"replicas": i % 4,
+                    "template": {"spec": {"containers": [{"image": f"repo/{name}:1.{i % 5}"},
+                                                         {"image": "repo/sidecar:2.0"}]}}}
+            if i % 2:
+                spec["paused"] = None
+            registry.add_resource(KUBERNETES_PLATFORM, resource_type.value, name, f"cluster/ns/{name}",
+                                  {"labels": {"app": name, "tier": ("frontend", "backend")[i % 2]},
+                                   "annotations": {"a/b": f"team-{i % 3}"} if i % 4 else {},
+                                   "resource": {"spec": spec, "metadata": {"annotations": {"a/b": "c"}}}})
+    context = Context({}, TarFileOutputter())
+    context.set_property(REGISTRY_PROPERTY_NAME, registry)
+    context.set_property(PLATFORM_HANDLERS_PROPERTY_NAME, {KUBERNETES_PLATFORM: KubernetesPlatformHandler()})
+    return context
+
+
+def _pattern(pattern, properties, mode=StringMatchMode.SUBSTRING, resource_type_spec=None):
+    return ResourcePropertyMatchPredicate(resource_type_spec, re.compile(pattern), properties, mode)
+
+
+LEAF_PREDICATES = (
+    lambda: _pattern("web", ["name"]),
+    lambda: _pattern("api-1", ["name"], StringMatchMode.EXACT),
+    lambda: _pattern("front", ["labels"]),
+    lambda: _pattern("backend", ["label-values", "name"], StringMatchMode.EXACT),
+    lambda: _pattern("team-1", ["annotations"]),
+    lambda: _pattern("a/b", ["annotation-keys"], StringMatchMode.EXACT),
+    lambda: _pattern("2", ["spec/replicas"]),
+    lambda: _pattern("1.3", ["spec/template/spec/containers/image"]),
+    lambda: _pattern("c", ["metadata/annotations/a//b"], StringMatchMode.EXACT),
+    lambda: _pattern("sidecar", ["name", "spec/template/spec/containers/image", "labels"]),
+    lambda: _pattern("db-0", ["name"], resource_type_spec=SERVICE_SPEC),
+    lambda: _pattern("nothing", ["name"], resource_type_spec=DEPLOYMENT_SPEC),
+    lambda: ResourcePathExistsMatchPredicate("spec/paused", False),
+    lambda: ResourcePathExistsMatchPredicate("spec/paused", True),
+    lambda: CustomVariableMatchPredicate("custom/env", re.compile("prod"), StringMatchMode.SUBSTRING),
+    lambda: CustomVariableMatchPredicate("resources/service", re.compile("x"), StringMatchMode.EXACT),
+)
+
+
+def _random_predicate(rng: random.Random, depth: int = 0):
+    if depth >= 3 or rng.random() < 0.35:
+        return rng.choice(LEAF_PREDICATES)()
+    kind = rng.choice(("and", "or", "not"))
+    if kind == "not":
+        return NotMatchPredicate(_random_predicate(rng, depth + 1))
+    children = [_random_predicate(rng, depth + 1) for _ in range(rng.randint(1, 4))]
+    return AndMatchPredicate(children) if kind == "and" else OrMatchPredicate(children)
+
+
+def _evaluate(match, resources, context):
+    results = list()
+    for custom in ({"env": "production"}, {"env": "dev"}):
+        variables = {"custom": custom, "resources": dict()}
+        for resource in resources:
+            matched = match(GenerationRuleMatchInfo(resource, variables, context))
+            results.append((matched, {k: r.name for k, r in variables["resources"].items()}))
+    return results
+
+
+class CompiledMatchPredicateTest(TestCase):
+
+    def test_compiled_predicates_match_interpreted(self):
+        context = _make_context()
+        resources = list(get_resources(context, DEPLOYMENT_SPEC))
+        rng = random.Random(1234)
+        for _ in range(300):
+            predicate = _random_predicate(rng)
+            self.assertEqual(_evaluate(predicate.compile(), resources, context),
+                             _evaluate(predicate.matches, resources, context))
+
+    def test_cheap_reorderable_predicates_are_evaluated_first(self):
+        path_predicate = _pattern("2", ["spec/replicas"])
+        name_predicate = _pattern("web", ["name"])
+        cross_type_predicate = _pattern("db", ["name"], resource_type_spec=SERVICE_SPEC)
+        variable_predicate = CustomVariableMatchPredicate("custom/env", re.compile("prod"), StringMatchMode.SUBSTRING)
+        exists_predicate = ResourcePathExistsMatchPredicate("spec/paused", False)
+        ordered = order_by_cost([path_predicate, name_predicate, cross_type_predicate,
+                                 exists_predicate, variable_predicate, path_predicate, name_predicate])
+        self.assertEqual(ordered, [name_predicate, path_predicate, cross_type_predicate,
+                                   exists_predicate, variable_predicate, name_predicate, path_predicate])
+
+    def test_compiled_path_matches_match_path(self):
+        data = {"a/b": {"c": ["x", {"d": 1}, ["y"]]}, "e": None, "f": 2.5}
+        match_funcs = (lambda v: v in ("x", "y", "1", "2.5"), lambda v: True)
+        for path in ("a//b/c", "a//b/c/d", "a//b/c/e", "a", "e", "f", "f/g", "missing/x"):
+            for match_func in match_funcs:
+                self.assertEqual(compile_match_path(path, match_func)(data), match_path(data, path, match_func), path)
+
+    def test_kubernetes_property_values(self):
+        handler = KubernetesPlatformHandler()
+        registry = _make_context().get_property(REGISTRY_PROPERTY_NAME)
+        resource = registry.lookup_resource(KUBERNETES_PLATFORM, KubernetesResourceType.DEPLOYMENT.value,
+                                            "cluster/ns/api-01")
+        expected = {
+            "Labels": ["app", "tier", "api-01", "backend"],
+            "label-keys": ["app", "tier"],
+            "label-values": ["api-01", "backend"],
+            "annotations": ["a/b", "team-1"],
+            "annotation-keys": ["a/b"],
+            "annotation-values": ["team-1"],
+            "name": None,
+        }
+        for property_name, values in expected.items():
+            self.assertEqual(handler.get_resource_property_values(resource, property_name), values, property_name)
+            values_function = handler.get_resource_property_values_function(property_name)
+            self.assertEqual(list(values_function(resource)) if values_function else None, values, property_name)
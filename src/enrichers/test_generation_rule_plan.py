@@ -0,0 +1,161 @@
+"""Unit tests for the bucketed evaluation of the generation rules in
+``enrichers.generation_rules.GenerationRulePlan``.
+
+The plan evaluates the rules grouped by resource type, but it must produce the
+same matches, in the same order and with the same "resources" template
+variable bindings, as evaluating every rule against every resource of each of
+its resource types in turn.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+from unittest import TestCase, mock
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.dirname(_THIS_DIR)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from component import Context  # noqa: E402
+from enrichers import generation_rules  # noqa: E402
+from enrichers.code_collection import GenerationRuleFileSpec  # noqa: E402
+from enrichers.generation_rule_types import PLATFORM_HANDLERS_PROPERTY_NAME  # noqa: E402
+from enrichers.generation_rules import (  # noqa: E402
+    GenerationRule,
+    GenerationRuleInfo,
+    GenerationRuleMatchInfo,
+    GenerationRulePlan,
+    ResourcePropertyMatchPredicate,
+    get_allowed_generation_rule_infos,
+)
+from enrichers.kubernetes import KubernetesPlatformHandler  # noqa: E402
+from enrichers.match_predicate import AndMatchPredicate, OrMatchPredicate, StringMatchMode  # noqa: E402
+from indexers.kubetypes import KUBERNETES_PLATFORM, KubernetesResourceType, KubernetesResourceTypeSpec  # noqa: E402
+from outputter import TarFileOutputter  # noqa: E402
+from resources import REGISTRY_PROPERTY_NAME, Registry  # noqa: E402
+
+
+def _spec(resource_type: KubernetesResourceType) -> KubernetesResourceTypeSpec:
+    return KubernetesResourceTypeSpec(KUBERNETES_PLATFORM, resource_type.value, None, None, None)
+
+
+DEPLOYMENT_SPEC = _spec(KubernetesResourceType.DEPLOYMENT)
+SERVICE_SPEC = _spec(KubernetesResourceType.SERVICE)
+
+
+def _make_context() -> Context:
+    registry = Registry()
+    for resource_type in (KubernetesResourceType.DEPLOYMENT, KubernetesResourceType.SERVICE):
+        for i in range(30):
+            name = f"{('web', 'api', 'db')[i % 3]}-{i:02d}"
+            registry.add_resource(KUBERNETES_PLATFORM, resource_type.value, name, f"cluster/ns/{name}",
+                                  {"labels": {"app": name, "tier": ("frontend", "backend")[i % 2]},
+                                   "annotations": {}, "resource": {}})
+    context = Context({}, TarFileOutputter())
+    context.set_property(REGISTRY_PROPERTY_NAME, registry)
+    context.set_property(PLATFORM_HANDLERS_PROPERTY_NAME, {KUBERNETES_PLATFORM: KubernetesPlatformHandler()})
+    return context
+
+
+def _pattern(pattern: str, properties: list[str], resource_type_spec=None,
+             mode: StringMatchMode = StringMatchMode.EXACT) -> ResourcePropertyMatchPredicate:
+    return ResourcePropertyMatchPredicate(resource_type_spec, re.compile(pattern), properties, mode)
+
+
+def _rule_info(name: str, resource_type_specs, match_predicate, code_bundle_name: str = "bundle"):
+    generation_rule = GenerationRule(resource_type_specs, match_predicate, [], [])
+    file_spec = GenerationRuleFileSpec("https://example.com/repo", "main", code_bundle_name, f"{name}.yaml", "")
+    return GenerationRuleInfo(generation_rule, file_spec)
+
+
+def _make_rule_infos():
+    return [
+        _rule_info("db", [DEPLOYMENT_SPEC], _pattern("db-", ["name"])),
+        _rule_info("frontend", [DEPLOYMENT_SPEC, SERVICE_SPEC], _pattern("frontend", ["labels"])),
+        _rule_info("with-service", [DEPLOYMENT_SPEC],
+                   AndMatchPredicate([_pattern("api", ["name"]), _pattern("db-0", ["name"], SERVICE_SPEC)])),
+        _rule_info("or-service", [SERVICE_SPEC],
+                   OrMatchPredicate([_pattern("web-0", ["name"]), _pattern("api-2", ["name"], DEPLOYMENT_SPEC)])),
+        _rule_info("none", [SERVICE_SPEC], _pattern("nothing", ["name"])),
+    ]
+
+
+def _evaluate_unbucketed(generation_rule_infos, context):
+    """The previous rule-major evaluation loop of generation_rules.enrich."""
+    matches = list()
+    variables = {"custom": {}}
+    for generation_rule_info in generation_rule_infos:
+        generation_rule = generation_rule_info.generation_rule
+        for resource_type_spec in generation_rule.resource_type_specs:
+            variables["resources"] = dict()
+            for resource in generation_rules.get_resources(context, resource_type_spec):
+                match_info = GenerationRuleMatchInfo(resource, variables, context)
+                if generation_rule.match_predicate.matches(match_info):
+                    variables["resources"][resource_type_spec.get_resource_type_name()] = resource
+                    matches.append((generation_rule_info, resource_type_spec, resource, dict(variables["resources"])))
+    return matches, variables.get("resources")
+
+
+def _resource_names(resources: dict) -> dict:
+    return {resource_type_name: resource.name for resource_type_name, resource in resources.items()}
+
+
+def _describe_matches(matches) -> list:
+    return [(info.generation_rule_file_spec.generation_rule_file_name, spec, resource.name, _resource_names(resources))
+            for info, spec, resource, resources in matches]
+
+
+def _new_gen_stats():
+    return {"total_resources_evaluated": 0, "total_resources_matched": 0, "rule_resource_type_specs": 0,
+            "resource_buckets_fetched": 0, "resource_visits": 0, "platforms": {}}
+
+
+class GenerationRulePlanTest(TestCase):
+
+    def test_matches_unbucketed_evaluation(self):
+        rule_infos = _make_rule_infos()
+        expected, expected_last_resources = _evaluate_unbucketed(rule_infos, _make_context())
+
+        plan = GenerationRulePlan(rule_infos, {"custom": {}})
+        plan.evaluate(_make_context(), _new_gen_stats())
+        actual = [(entry.generation_rule_info, entry.resource_type_spec, match.resource, match.resources)
+                  for entry in plan.entries for match in entry.matches]
+        self.assertEqual(_describe_matches(actual), _describe_matches(expected))
+        self.assertEqual(_resource_names(plan.entries[-1].final_resources), _resource_names(expected_last_resources))
+
+    def test_each_resource_type_is_fetched_once(self):
+        context = _make_context()
+        gen_stats = _new_gen_stats()
+        plan = GenerationRulePlan(_make_rule_infos(), {"custom": {}})
+        with mock.patch.object(generation_rules, "get_resources", wraps=generation_rules.get_resources) as get_resources:
+            plan.evaluate(context, gen_stats)
+        fetched_specs = [call.args[1] for call in get_resources.call_args_list]
+        # The cross-type predicates are looked up once each, on top of the buckets
+        self.assertEqual(fetched_specs.count(DEPLOYMENT_SPEC), 2)
+        self.assertEqual(fetched_specs.count(SERVICE_SPEC), 2)
+        self.assertEqual(gen_stats["rule_resource_type_specs"], 6)
+        self.assertEqual(gen_stats["resource_buckets_fetched"], 2)
+        self.assertEqual(gen_stats["resource_visits"], 60)
+        self.assertEqual(gen_stats["total_resources_evaluated"], 6 * 30)
+        self.assertEqual(gen_stats["platforms"][KUBERNETES_PLATFORM]["resources_evaluated"], 6 * 30)
+
+    def test_code_bundle_access_is_checked_once_per_code_bundle(self):
+        context = _make_context()
+        predicate = _pattern("web", ["name"])
+        rule_infos = [_rule_info("a", [DEPLOYMENT_SPEC], predicate, "bundle-a"),
+                      _rule_info("b", [DEPLOYMENT_SPEC], predicate, "bundle-b"),
+                      _rule_info("a2", [SERVICE_SPEC], predicate, "bundle-a")]
+        with mock.patch.object(generation_rules, "check_codebundle_access_allowed",
+                               side_effect=lambda info, ctx: info.generation_rule_file_spec.code_bundle_name != "bundle-b") \
+                as check, mock.patch.object(context, "get_setting", return_value=["excluded"]):
+            allowed = get_allowed_generation_rule_infos(rule_infos, context)
+        self.assertEqual(allowed, [rule_infos[0], rule_infos[2]])
+        self.assertEqual(check.call_count, 2)
+
+        with mock.patch.object(generation_rules, "check_codebundle_access_allowed") as check, \
+                mock.patch.object(context, "get_setting", return_value=None):
+            self.assertEqual(get_allowed_generation_rule_infos(rule_infos, context), rule_infos)
+        check.assert_not_called()
@@ -0,0 +1,123 @@
+"""Unit tests for the cross-resource-type lookups of
+``enrichers.generation_rules.ResourcePropertyMatchPredicate``.
+
+A ``pattern`` predicate with a ``resourceType`` matches if any resource of that
+type matches, independently of the resource the rule is evaluated for. These
+pin that the memoized / indexed lookup returns the same (first) resource as
+scanning every instance.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+from unittest import TestCase, mock
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.dirname(_THIS_DIR)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from component import Context  # noqa: E402
+from enrichers import generation_rules  # noqa: E402
+from enrichers.generation_rule_types import PLATFORM_HANDLERS_PROPERTY_NAME  # noqa: E402
+from enrichers.generation_rules import (  # noqa: E402
+    GenerationRuleMatchInfo,
+    ResourcePropertyMatchPredicate,
+    get_literal_pattern_prefix,
+)
+from enrichers.kubernetes import KubernetesPlatformHandler  # noqa: E402
+from enrichers.match_predicate import StringMatchMode  # noqa: E402
+from indexers.kubetypes import KUBERNETES_PLATFORM, KubernetesResourceType, KubernetesResourceTypeSpec  # noqa: E402
+from outputter import TarFileOutputter  # noqa: E402
+from resources import REGISTRY_PROPERTY_NAME, Registry  # noqa: E402
+
+DEPLOYMENT_SPEC = KubernetesResourceTypeSpec(KUBERNETES_PLATFORM, KubernetesResourceType.DEPLOYMENT.value,
+                                             None, None, None)
+
+
+def _make_context(count: int = 200) -> Context:
+    registry = Registry()
+    for i in range(count):
+        name = f"{('web', 'api', 'db', 'cache')[i % 4]}-{i:03d}"
+        registry.add_resource(KUBERNETES_PLATFORM, KubernetesResourceType.DEPLOYMENT.value, name,
+                              f"cluster/ns/{name}",
+                              {"labels": {"app": name, "tier": ("frontend", "backend")[i % 2]},
+                               "annotations": {"owner": f"team-{i % 7}"},
+                               "resource": {"spec": {"replicas": i % 5}}})
+    context = Context({}, TarFileOutputter())
+    context.set_property(REGISTRY_PROPERTY_NAME, registry)
+    context.set_property(PLATFORM_HANDLERS_PROPERTY_NAME, {KUBERNETES_PLATFORM: KubernetesPlatformHandler()})
+    return context
+
+
+def _scan(predicate: ResourcePropertyMatchPredicate, context: Context):
+    """The original lookup: scan every resource of the type in order."""
+    for resource in generation_rules.get_resources(context, predicate.resource_type_spec):
+        if predicate.matches_resource(resource, context):
+            return resource
+    return None
+
+
+def _matches(predicate: ResourcePropertyMatchPredicate, context: Context):
+    variables = {"resources": {}}
+    matched = predicate.matches(GenerationRuleMatchInfo(None, variables, context))
+    return matched, variables["resources"].get("deployment")
+
+
+class ResourcePropertyMatchTest(TestCase):
+    CASES = (
+        ("db-.*", ["name"], StringMatchMode.EXACT),
+        ("api-1", ["name"], StringMatchMode.EXACT),
+        ("cache-199", ["name", "labels"], StringMatchMode.EXACT),
+        ("backend", ["labels"], StringMatchMode.EXACT),
+        ("team-6", ["annotations"], StringMatchMode.EXACT),
+        ("owner", ["annotations"], StringMatchMode.EXACT),
+        ("web-00[5-9]", ["labels", "name"], StringMatchMode.EXACT),
+        ("nomatch", ["name", "labels", "annotations"], StringMatchMode.EXACT),
+        ("db|web", ["name"], StringMatchMode.EXACT),
+        ("-05", ["name"], StringMatchMode.SUBSTRING),
+        ("4", ["spec/replicas"], StringMatchMode.EXACT),
+        ("api", ["label-values"], StringMatchMode.EXACT),
+    )
+
+    def test_lookup_matches_full_scan(self):
+        context = _make_context()
+        for pattern, properties, mode in self.CASES:
+            predicate = ResourcePropertyMatchPredicate(DEPLOYMENT_SPEC, re.compile(pattern), properties, mode)
+            expected = _scan(predicate, context)
+            for _ in range(2):
+                matched, resource = _matches(predicate, context)
+                self.assertIs(resource, expected, (pattern, properties, mode))
+                self.assertEqual(matched, expected is not None)
+
+    def test_lookup_is_memoized_per_run(self):
+        context = _make_context()
+        with mock.patch.object(generation_rules, "get_resources", wraps=generation_rules.get_resources) as get_resources:
+            for _ in range(5):
+                # Equivalent predicates (e.g. from different rules) share the memo entry
+                predicate = ResourcePropertyMatchPredicate(DEPLOYMENT_SPEC, re.compile("db-"), ["name"],
+                                                           StringMatchMode.SUBSTRING)
+                self.assertTrue(_matches(predicate, context)[0])
+        self.assertEqual(get_resources.call_count, 1)
+        # A new run (context) starts with an empty memo
+        with mock.patch.object(generation_rules, "get_resources", wraps=generation_rules.get_resources) as get_resources:
+            _matches(predicate, _make_context())
+        self.assertEqual(get_resources.call_count, 1)
+
+    def test_exact_mode_lookup_uses_index(self):
+        context = _make_context()
+        predicate = ResourcePropertyMatchPredicate(DEPLOYMENT_SPEC, re.compile("cache-1"), ["name", "labels"],
+                                                   StringMatchMode.EXACT)
+        with mock.patch.object(ResourcePropertyMatchPredicate, "matches_resource") as matches_resource:
+            matched, resource = _matches(predicate, context)
+        matches_resource.assert_not_called()
+        self.assertTrue(matched)
+        self.assertEqual(resource.name, "cache-103")
+
+    def test_literal_pattern_prefix(self):
+        for pattern, prefix in (("abc", "abc"), ("frontend-.*", "frontend-"), ("abc*", "ab"), ("ab+", "a"),
+                                ("a\\.b", "a"), ("^x", ""), ("x|y", ""), ("(?i)foo", "")):
+            self.assertEqual(get_literal_pattern_prefix(re.compile(pattern)), prefix, pattern)
+        self.assertEqual(get_literal_pattern_prefix(re.compile("foo", re.IGNORECASE)), "")
@@ -72,6 +72,9 @@ def enrich(context: Context) -> None:
         logger.info("🎯 GENERATION RULES MATCHING:")
         logger.info(f"   Resources evaluated: {gen_stats.get('total_resources_evaluated', 0):,}")
         logger.info(f"   Resources matched: {gen_stats.get('total_resources_matched', 0):,}")
+        if gen_stats.get('resource_buckets_fetched'):
+            logger.info(f"   Resource type fetches: {gen_stats['resource_buckets_fetched']:,} "
+                        f"(for {gen_stats.get('rule_resource_type_specs', 0):,} rule/resource type pairs)")
         logger.info(f"   SLXs generated: {gen_stats.get('total_slxs_generated', 0):,}")
         logger.info(f"   Output items generated: {gen_stats.get('total_output_items_generated', 0):,}")
         logger.info(f"   Matching duration: {gen_stats.get('duration', 0):.2f}s")
@@ -95,6 +98,10 @@ def enrich(context: Context) -> None:
         logger.info(f"   Successfully rendered: {render_stats.get('successfully_rendered', 0):,}")
         logger.info(f"   Skipped due to errors: {render_stats.get('skipped', 0):,}")
         logger.info(f"   Rendering duration: {render_stats.get('duration', 0):.2f}s")
+        template_string_cache_stats = render_stats.get('template_string_cache')
+        if template_string_cache_stats:
+            logger.info(f"   Template string cache: {template_string_cache_stats['hits']:,} hits, "
+                        f"{template_string_cache_stats['misses']:,} misses")
         
         # Calculate success rate
         total_items = render_stats.get('total_output_items', 0)
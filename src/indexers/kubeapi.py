@@ -8,11 +8,16 @@ where possible.
 """
 
 import base64
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from tempfile import TemporaryDirectory
 import logging
 import os
 import yaml
-from typing import Any, Optional, List, Dict
+from typing import Any, Callable, Iterable, Iterator, Optional, List, Dict
 
 from kubernetes import client
 from kubernetes import config as kubernetes_config
@@ -45,6 +50,14 @@ from .kubetypes import KUBERNETES_PLATFORM, KubernetesResourceType, KubernetesRe
 from resources import Registry, REGISTRY_PROPERTY_NAME
 from name_utils import matches_namespace
 from . import kubeapi_parsers
+from .kubeapi_incremental import (
+    KUBEAPI_LIST_STATES_PROPERTY,
+    ClusterListStates,
+    KubeListStates,
+    get_incremental_baseline_path,
+    load_list_states,
+    watch_list_changes,
+)
 from .common import CLOUD_CONFIG_SETTING
 from utils import write_file
 
@@ -73,10 +86,98 @@ NAMESPACE_LODS_SETTING = Setting("NAMESPACE_LODS",
                                 Setting.Type.DICT,
                                 "Dictionary mapping namespace names to their level of detail settings")
 
+KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING = Setting(
+    "KUBEAPI_MAX_CONCURRENT_REQUESTS",
+    "kubeapiMaxConcurrentRequests",
+    Setting.Type.INTEGER,
+    "Maximum number of Kubernetes list requests the kubeapi indexer keeps in "
+    "flight per cluster while scanning namespaces. The default of 1 scans the "
+    "namespaces sequentially; larger values fan the per-namespace list calls "
+    "out across a bounded worker pool.",
+    1,
+)
+
+KUBEAPI_MAX_CONCURRENT_CLUSTERS_SETTING = Setting(
+    "KUBEAPI_MAX_CONCURRENT_CLUSTERS",
+    "kubeapiMaxConcurrentClusters",
+    Setting.Type.INTEGER,
+    "Maximum number of Kubernetes clusters indexed in parallel. Each cluster is "
+    "indexed into its own staging registry and the results are merged in "
+    "kubeconfig order, so the indexed resources are the same as with sequential "
+    "indexing. The default of 1 indexes the clusters one at a time.",
+    1,
+)
+
+KUBEAPI_LIST_PAGE_SIZE_SETTING = Setting(
+    "KUBEAPI_LIST_PAGE_SIZE",
+    "kubeapiListPageSize",
+    Setting.Type.INTEGER,
+    "Maximum number of resources requested per kube API list call. Larger "
+    "collections are fetched in chunks using the limit/continue list parameters "
+    "and indexed page by page, so memory use is bounded by the page size rather "
+    "than by the size of the collection. A value of 0 disables pagination.",
+    500,
+)
+
+KUBEAPI_RAW_JSON_SETTING = Setting(
+    "KUBEAPI_RAW_JSON",
+    "kubeapiRawJson",
+    Setting.Type.BOOLEAN,
+    "Fetch the built-in namespaced resource kinds (Deployments, DaemonSets, "
+    "StatefulSets, Jobs, CronJobs, Ingresses, Services and PersistentVolumeClaims) "
+    "as raw JSON and parse them directly, instead of deserializing them into the "
+    "Kubernetes client model objects and converting those back to dicts. This "
+    "matches how custom resources are handled; the indexed resource data then "
+    "only contains the fields returned by the API server.",
+    False,
+)
+
+KUBEAPI_INCREMENTAL_SETTING = Setting(
+    "KUBEAPI_INCREMENTAL",
+    "kubeapiIncremental",
+    Setting.Type.BOOLEAN,
+    "Re-discover Kubernetes resources incrementally. The resourceVersion and "
+    "items of each list call are saved in the SQLite resource store; the next "
+    "run watches for the changes since then instead of listing everything "
+    "again, falling back to a full list if the resourceVersion has expired "
+    "(410 Gone). Each watch stops once it has caught up, but one without any "
+    "changes takes about a second (at most 2), so each kind is watched once "
+    "per cluster: this implies kubeapiListStrategy 'cluster' (kinds the "
+    "context can't list cluster-wide are watched per namespace) and "
+    "kubeapiRawJson. Every item of each list, including the resources that "
+    "aren't indexed (e.g. in excluded namespaces), is held in memory until "
+    "the list completes and is saved as raw JSON in the resource store, so "
+    "memory use and the store size grow with the size of the cluster rather "
+    "than with kubeapiListPageSize.",
+    False,
+)
+
+KUBEAPI_LIST_STRATEGY_NAMESPACED = "namespaced"
+KUBEAPI_LIST_STRATEGY_CLUSTER = "cluster"
+KUBEAPI_LIST_STRATEGIES = (KUBEAPI_LIST_STRATEGY_NAMESPACED, KUBEAPI_LIST_STRATEGY_CLUSTER)
+
+KUBEAPI_LIST_STRATEGY_SETTING = Setting(
+    "KUBEAPI_LIST_STRATEGY",
+    "kubeapiListStrategy",
+    Setting.Type.STRING,
+    "Selects how the kubeapi indexer lists namespaced resources. 'namespaced' "
+    "(default) issues one list call per kind per namespace; 'cluster' lists each "
+    "kind once across all namespaces and partitions the results by namespace, "
+    "falling back to per-namespace listing for any kind the context can't list "
+    "cluster-wide (e.g. a 403 with namespace-scoped RBAC).",
+    KUBEAPI_LIST_STRATEGY_NAMESPACED,
+)
+
 SETTINGS = (
     SettingDependency(CLOUD_CONFIG_SETTING, False),
     SettingDependency(DEFAULT_LOD_SETTING, False),
     SettingDependency(NAMESPACE_LODS_SETTING, False),
+    SettingDependency(KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING, False),
+    SettingDependency(KUBEAPI_LIST_STRATEGY_SETTING, False),
+    SettingDependency(KUBEAPI_LIST_PAGE_SIZE_SETTING, False),
+    SettingDependency(KUBEAPI_MAX_CONCURRENT_CLUSTERS_SETTING, False),
+    SettingDependency(KUBEAPI_RAW_JSON_SETTING, False),
+    SettingDependency(KUBEAPI_INCREMENTAL_SETTING, False),
 )
 
 
@@ -156,7 +257,8 @@ def list_custom_resource_for_scope(custom_objects_api_client,
                                    plural: str,
                                    namespace_name: Optional[str],
                                    processed_key: tuple,
-                                   cluster_scoped_crds_processed: set):
+                                   cluster_scoped_crds_processed: set,
+                                   **list_kwargs):
     """Dispatch a CRD listing call according to scope, honoring a
     per-cluster "already processed" set for cluster-scoped resources.
 
@@ -171,6 +273,9 @@ def list_custom_resource_for_scope(custom_objects_api_client,
     cluster scan; leaving the marker unset lets subsequent namespace
     iterations retry. Persistent failures (e.g. missing RBAC) will
     re-log per namespace iteration, which is noisy but correct.
+
+    Any extra ``list_kwargs`` (e.g. the ``limit`` for a paginated list) are
+    passed through to the list call.
     """
     if scope == CRD_SCOPE_CLUSTER:
         if processed_key in cluster_scoped_crds_processed:
@@ -179,6 +284,7 @@ def list_custom_resource_for_scope(custom_objects_api_client,
             group=group,
             version=version,
             plural=plural,
+            **list_kwargs,
         )
         cluster_scoped_crds_processed.add(processed_key)
         return ret
@@ -187,14 +293,530 @@ def list_custom_resource_for_scope(custom_objects_api_client,
         version=version,
         namespace=namespace_name,
         plural=plural,
+        **list_kwargs,
     )
 
 
+def get_custom_resource_list_targets(accessed_resource_type_specs,
+                                     group_version_infos: dict) -> list[tuple[str, str, list[str]]]:
+    """Resolve the custom resource types referenced by the generation rules into
+    ``(group, plural_name, versions)`` tuples to list for each namespace.
+
+    A spec without an explicit version uses the group's preferred version (or
+    all available versions if there's no preferred one). A versioned spec is
+    skipped if there's also a wildcard spec for the same group/plural, since
+    the wildcard spec already covers it.
+    """
+    targets = []
+    for resource_type_spec in accessed_resource_type_specs:
+        if resource_type_spec.resource_type_name != KubernetesResourceType.CUSTOM.value:
+            continue
+        group = resource_type_spec.group
+        version = resource_type_spec.version
+        # FIXME: Some remaining inconsistencies between kind vs. plural_name.
+        # Should probably change the field in ResourceTypeSpec to be plural_name, since
+        # it's really not the same as the kind field of the resource.
+        plural_name = resource_type_spec.kind
+        if version:
+            wildcard_spec = KubernetesResourceTypeSpec(KUBERNETES_PLATFORM,
+                                                       KubernetesResourceType.CUSTOM.value,
+                                                       group,
+                                                       None,
+                                                       plural_name)
+            if wildcard_spec in accessed_resource_type_specs:
+                continue
+            versions = [version]
+        else:
+            group_version_info = group_version_infos.get(group)
+            if group_version_info:
+                preferred = group_version_info.preferred_version
+                if preferred:
+                    preferred_str = preferred.version if hasattr(preferred, 'version') else str(preferred)
+                    versions = [preferred_str]
+                else:
+                    versions = group_version_info.versions
+            else:
+                versions = list()
+        targets.append((group, plural_name, versions))
+    return targets
+
+
+class _DeferredListCall:
+    """
+    Future-like wrapper used when list calls are issued sequentially. The call
+    is made on the caller's thread the first time the result is requested, so
+    the request ordering (and peak memory) matches scanning inline.
+    """
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def result(self):
+        return self.fn(*self.args, **self.kwargs)
+
+
+def get_list_items(ret) -> list:
+    """Return the items of a list response (model object or raw custom object dict)."""
+    if isinstance(ret, dict):
+        return ret.get('items') or []
+    return ret.items or []
+
+
+def get_list_continue_token(ret) -> Optional[str]:
+    """Return the continue token of a list response, or None if it's the last page."""
+    if isinstance(ret, dict):
+        return (ret.get('metadata') or {}).get('continue') or None
+    metadata = getattr(ret, 'metadata', None)
+    return getattr(metadata, '_continue', None) or None
+
+
+def get_list_resource_version(ret) -> Optional[str]:
+    """Return the resourceVersion of a list response."""
+    if isinstance(ret, dict):
+        return (ret.get('metadata') or {}).get('resourceVersion') or None
+    metadata = getattr(ret, 'metadata', None)
+    return getattr(metadata, 'resource_version', None) or None
+
+
+def get_list_item_key(item) -> tuple[Optional[str], Optional[str]]:
+    if isinstance(item, dict):
+        metadata = item.get('metadata') or {}
+        return metadata.get('namespace'), metadata.get('name')
+    return item.metadata.namespace, item.metadata.name
+
+
+def get_resource_name(resource) -> Optional[str]:
+    """Return the name of a resource model object or raw (dict) resource."""
+    return get_list_item_key(resource)[1]
+
+
+class RawJsonListMethod:
+    """
+    Wraps a Kubernetes client list method so that the response is returned as
+    the parsed JSON (i.e. plain dicts/lists, like the custom objects API returns)
+    instead of being deserialized into the client's model objects.
+    """
+    def __init__(self, list_method: Callable):
+        self.list_method = list_method
+
+    def __call__(self, *args, **kwargs):
+        response = self.list_method(*args, _preload_content=False, **kwargs)
+        try:
+            return json.loads(response.data)
+        finally:
+            release_conn = getattr(response, 'release_conn', None)
+            if release_conn:
+                release_conn()
+
+
+class PagedListResult:
+    """
+    The result of a (possibly) paginated list call.
+
+    ``items`` is a one-shot iterator over the resources in the collection. The
+    first page is fetched when the list call is submitted; subsequent pages are
+    requested with the continue token from the previous page. The next page is
+    submitted to the scheduler while the current one is being processed, so at
+    most two pages of the collection are held in memory at a time.
+
+    If a continue token expires before the next page is requested (a 410 Gone
+    response, e.g. if processing a page took longer than the API server's
+    compaction interval), the list is restarted from the beginning and the
+    resources that were already returned are skipped. The items then don't
+    come from a single snapshot of the collection, so ``resource_version`` is
+    cleared.
+    """
+    def __init__(self, scheduler: "KubeListCallScheduler", first_page, list_method: Callable, args: tuple, kwargs: dict):
+        self.scheduler = scheduler
+        self.list_method = list_method
+        self.args = args
+        self.kwargs = kwargs
+        self.item_count = 0
+        self.page_count = 0
+        self.resource_version = get_list_resource_version(first_page)
+        self.items = self._iter_items(first_page)
+
+    def _fetch_page(self, continue_token: Optional[str]):
+        return self.list_method(*self.args, **self.kwargs, **self.scheduler.get_page_kwargs(continue_token))
+
+    def _iter_items(self, page):
+        returned_keys = None
+        skip_keys = None
+        while page is not None:
+            self.page_count += 1
+            continue_token = get_list_continue_token(page)
+            next_page = self.scheduler.submit(self._fetch_page, continue_token) if continue_token else None
+            if continue_token and returned_keys is None:
+                # Only multi-page lists need to remember what was returned,
+                # in case the list has to be restarted.
+                returned_keys = set()
+            for item in get_list_items(page):
+                if returned_keys is not None:
+                    key = get_list_item_key(item)
+                    if skip_keys and key in skip_keys:
+                        continue
+                    returned_keys.add(key)
+                self.item_count += 1
+                yield item
+            # Release the processed page before waiting on the next one
+            page = None
+            if next_page is not None:
+                try:
+                    page = next_page.result()
+                except ApiException as e:
+                    if e.status != 410:
+                        raise
+                    logger.info(f"Continue token expired while listing resources (status={e.status}); "
+                                f"restarting the list and skipping the {len(returned_keys)} resource(s) "
+                                f"already processed")
+                    skip_keys = returned_keys
+                    self.resource_version = None
+                    page = self.scheduler.submit(self._fetch_page, None).result()
+
+
+class _PagedListCall:
+    """Future-like handle for a paginated list call submitted to the scheduler."""
+    def __init__(self, scheduler: "KubeListCallScheduler", first_page, list_method: Callable, args: tuple, kwargs: dict):
+        self.scheduler = scheduler
+        self.first_page = first_page
+        self.list_method = list_method
+        self.args = args
+        self.kwargs = kwargs
+
+    def result(self) -> PagedListResult:
+        return PagedListResult(self.scheduler, self.first_page.result(), self.list_method, self.args, self.kwargs)
+
+
+class TrackedListResult:
+    """
+    Wraps the PagedListResult of a full list call, recording the items and the
+    resourceVersion of the list once all of the items have been consumed, so
+    the next run can re-discover the collection incrementally.
+
+    The items are buffered until the list completes, so unlike a plain
+    PagedListResult the whole collection is held in memory. The indexed
+    resources share their dicts with the registry; the extra memory is the
+    items that are filtered out.
+    """
+    def __init__(self, list_states: ClusterListStates, kind, namespace_name: Optional[str], result: PagedListResult):
+        self.list_states = list_states
+        self.kind = kind
+        self.namespace_name = namespace_name
+        self.result = result
+        self.items = self._iter_items()
+
+    @property
+    def item_count(self) -> int:
+        return self.result.item_count
+
+    def _iter_items(self):
+        items = []
+        for item in self.result.items:
+            items.append(item)
+            yield item
+        self.list_states.record(self.kind, self.namespace_name, self.result.resource_version, items)
+
+
+class _TrackedListCall:
+    """Future-like handle for a list call whose result is recorded for incremental re-discovery."""
+    def __init__(self, list_states: ClusterListStates, kind, namespace_name: Optional[str], list_call: _PagedListCall):
+        self.list_states = list_states
+        self.kind = kind
+        self.namespace_name = namespace_name
+        self.list_call = list_call
+
+    def result(self) -> TrackedListResult:
+        return TrackedListResult(self.list_states, self.kind, self.namespace_name, self.list_call.result())
+
+
+class _IncrementalListCall:
+    """
+    Future-like handle for a watch from the previous run's watermark. If the
+    watch fails (e.g. a 410 because the watermark is too old) the collection
+    is listed in full instead.
+    """
+    def __init__(self, scheduler: "KubeListCallScheduler", kind, namespace_name: Optional[str], watch_call,
+                 list_method: Callable, args: tuple, kwargs: dict):
+        self.scheduler = scheduler
+        self.kind = kind
+        self.namespace_name = namespace_name
+        self.watch_call = watch_call
+        self.list_method = list_method
+        self.args = args
+        self.kwargs = kwargs
+
+    def result(self):
+        list_states = self.scheduler.list_states
+        try:
+            state = self.watch_call.result()
+        except ApiException as e:
+            logger.info(f"Unable to watch {self.kind} in '{self.namespace_name or 'all namespaces'}' of cluster "
+                        f"'{list_states.cluster_name}' from the previous resourceVersion (status={e.status}); "
+                        f"listing it in full")
+            list_call = self.scheduler.submit_list(self.list_method, *self.args, **self.kwargs)
+            return TrackedListResult(list_states, self.kind, self.namespace_name, list_call.result())
+        list_states.record(self.kind, self.namespace_name, state.resource_version, state.items)
+        return NamespaceListSlice(state.items)
+
+
+class KubeListCallScheduler:
+    """
+    Issues the Kubernetes list calls for a single cluster scan.
+
+    With ``max_concurrent_requests`` <= 1 the calls are deferred and executed
+    inline when their result is requested, which is equivalent to the original
+    sequential scan. With a larger value the calls are dispatched to a bounded
+    thread pool as they're submitted, so up to ``max_concurrent_requests``
+    requests are in flight while the caller consumes the results.
+
+    Callers always consume the results on their own thread in submission order,
+    so all of the registry writes stay serialized and happen in the same order
+    as in the sequential scan.
+
+    List calls submitted with ``submit_list`` are paginated with ``list_page_size``
+    (see PagedListResult); a page size of 0 fetches each collection in one call.
+
+    With ``list_states`` set, the list calls submitted with ``submit_tracked_list``
+    are re-discovered incrementally: a collection that was listed by the previous
+    run is watched from its watermark rather than listed again, and the state of
+    every collection is recorded for the next run.
+    """
+    max_concurrent_requests: int
+    list_page_size: int
+    list_states: Optional[ClusterListStates]
+
+    def __init__(self, max_concurrent_requests: Optional[int], list_page_size: Optional[int] = 0,
+                 list_states: Optional[ClusterListStates] = None):
+        self.max_concurrent_requests = max(1, max_concurrent_requests or 1)
+        self.list_page_size = max(0, list_page_size or 0)
+        self.list_states = list_states
+        if self.max_concurrent_requests > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_requests,
+                                                thread_name_prefix="kubeapi-list")
+        else:
+            self._executor = None
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        if self._executor:
+            return self._executor.submit(fn, *args, **kwargs)
+        return _DeferredListCall(fn, args, kwargs)
+
+    def get_page_kwargs(self, continue_token: Optional[str] = None) -> dict:
+        """Return the pagination keyword arguments for a list call."""
+        page_kwargs = dict()
+        if self.list_page_size:
+            page_kwargs['limit'] = self.list_page_size
+        if continue_token:
+            page_kwargs['_continue'] = continue_token
+        return page_kwargs
+
+    def submit_list(self, list_method: Callable, *args, **kwargs) -> _PagedListCall:
+        """Submit the request for the first page of a list call."""
+        first_page = self.submit(list_method, *args, **kwargs, **self.get_page_kwargs())
+        return _PagedListCall(self, first_page, list_method, args, kwargs)
+
+    def submit_tracked_list(self, kind, namespace_name: Optional[str], list_method: Callable, *args, **kwargs):
+        """
+        Submit a list call for ``kind`` in ``namespace_name`` (None for a
+        cluster-wide list) that takes part in incremental re-discovery.
+        """
+        if self.list_states is None:
+            return self.submit_list(list_method, *args, **kwargs)
+        previous = self.list_states.get_previous(kind, namespace_name)
+        if previous is None:
+            return _TrackedListCall(self.list_states, kind, namespace_name,
+                                    self.submit_list(list_method, *args, **kwargs))
+        watch_call = self.submit(self._watch_list_changes, list_method, args, kwargs, previous)
+        return _IncrementalListCall(self, kind, namespace_name, watch_call, list_method, args, kwargs)
+
+    @staticmethod
+    def _watch_list_changes(list_method: Callable, args: tuple, kwargs: dict, previous):
+        # A one-item list returns the current resourceVersion of the
+        # collection, which is where the watch can stop.
+        current_resource_version = get_list_resource_version(list_method(*args, **kwargs, limit=1))
+        # Watches are streamed, so they bypass the raw JSON wrapper
+        watch_method = list_method.list_method if isinstance(list_method, RawJsonListMethod) else list_method
+        return watch_list_changes(watch_method, args, kwargs, previous, current_resource_version)
+
+    def submit_ahead(self, items: Iterable, submit_item: Callable[[Any], Any]) -> Iterator[tuple[Any, Any]]:
+        """
+        Yield ``(item, submit_item(item))`` in order, keeping the calls for up
+        to ``max_concurrent_requests`` items submitted ahead of the one being
+        consumed. This keeps the pool busy without buffering the list results
+        for every namespace in the cluster at once.
+        """
+        pending = deque()
+        for item in items:
+            pending.append((item, submit_item(item)))
+            if len(pending) > self.max_concurrent_requests:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def submit_namespace_list_calls(scheduler: KubeListCallScheduler,
+                                namespace_name: str,
+                                namespaced_list_methods: Iterable[tuple[str, Callable]],
+                                custom_objects_api_client,
+                                custom_resource_list_targets: list[tuple[str, str, list[str]]],
+                                custom_resource_scopes: dict) -> dict:
+    """
+    Submit all of the namespaced list calls for a single namespace, returning
+    a dict that maps the kind (or ``(group, version, plural)`` for custom
+    resources) to the future-like handle for the call. Cluster-scoped custom
+    resources are not submitted here; they're listed once per cluster by
+    ``list_custom_resource_for_scope``.
+    """
+    list_calls = dict()
+    for kind, list_method in namespaced_list_methods:
+        list_calls[kind] = scheduler.submit_tracked_list(kind, namespace_name, list_method, namespace_name)
+    for group, plural_name, versions in custom_resource_list_targets:
+        for version in versions:
+            if custom_resource_scopes.get((group, version, plural_name)) == CRD_SCOPE_CLUSTER:
+                continue
+            list_calls[(group, version, plural_name)] = scheduler.submit_tracked_list(
+                (group, version, plural_name),
+                namespace_name,
+                custom_objects_api_client.list_namespaced_custom_object,
+                group=group,
+                version=version,
+                namespace=namespace_name,
+                plural=plural_name,
+            )
+    return list_calls
+
+
+class NamespaceListSlice:
+    """
+    The items of a cluster-wide list response that belong to a single namespace
+    (or the items of an incrementally re-discovered list). Exposes the same
+    ``items`` and ``item_count`` attributes as PagedListResult, so it can be
+    consumed like a per-namespace list response.
+    """
+    def __init__(self, items: list):
+        self.items = items
+        self.item_count = len(items)
+
+
+class _PartitionedListCall:
+    """Future-like handle for one namespace's slice of a cluster-wide list."""
+    def __init__(self, partitioner: "ClusterWideListPartitioner", key, namespace_name: str):
+        self.partitioner = partitioner
+        self.key = key
+        self.namespace_name = namespace_name
+
+    def result(self):
+        return self.partitioner.get_namespace_result(self.key, self.namespace_name)
+
+
+class ClusterWideListPartitioner:
+    """
+    Implements the "cluster" list strategy: each kind is listed once across all
+    namespaces (``list_*_for_all_namespaces`` / ``list_cluster_custom_object``)
+    and the items are partitioned in memory by namespace. Only the namespaces
+    that are being indexed are kept, so items in namespaces excluded by the
+    namespace filters / LOD settings are dropped as soon as the list is read.
+
+    If the cluster-wide call for a kind fails (typically a 403 because the
+    context only has namespace-scoped RBAC) that kind falls back to the
+    per-namespace list calls. The registry contents are the same either way,
+    since the cluster-wide lists return the items for each namespace in the
+    same order as the per-namespace lists.
+
+    The cluster-wide calls are issued through the scheduler, so with a
+    concurrent scheduler the different kinds are listed in parallel.
+    Partitioning and fallback bookkeeping happen on the consuming thread.
+    """
+    def __init__(self,
+                 scheduler: KubeListCallScheduler,
+                 cluster_name: str,
+                 namespace_names: Iterable[str],
+                 list_targets: Iterable[tuple[Any, Callable, Callable]]):
+        """
+        :param list_targets: ``(key, list_all_method, list_namespaced_method)``
+            tuples; ``list_namespaced_method`` is called with a ``namespace``
+            keyword argument when the kind falls back to per-namespace listing.
+        """
+        self.scheduler = scheduler
+        self.cluster_name = cluster_name
+        self.namespace_names = set(namespace_names)
+        self.list_namespaced_methods = dict()
+        self.pending = dict()
+        self.partitions = dict()
+        self.fallback_keys = set()
+        for key, list_all_method, list_namespaced_method in list_targets:
+            self.list_namespaced_methods[key] = list_namespaced_method
+            self.pending[key] = scheduler.submit_tracked_list(key, None, list_all_method)
+
+    def submit_namespace_list_calls(self, namespace_name: str) -> dict:
+        list_calls = dict()
+        for key, list_namespaced_method in self.list_namespaced_methods.items():
+            if key in self.fallback_keys:
+                list_calls[key] = self.scheduler.submit_tracked_list(key, namespace_name, list_namespaced_method,
+                                                                     namespace=namespace_name)
+            else:
+                list_calls[key] = _PartitionedListCall(self, key, namespace_name)
+        return list_calls
+
+    def _partition(self, key):
+        partition = {namespace_name: [] for namespace_name in self.namespace_names}
+        try:
+            # Pages are partitioned as they arrive, so the items in namespaces
+            # that aren't being indexed are released page by page.
+            for item in self.pending.pop(key).result().items:
+                namespace_items = partition.get(get_list_item_key(item)[0])
+                if namespace_items is not None:
+                    namespace_items.append(item)
+        except ApiException as e:
+            logger.info(f"Unable to list {key} across all namespaces in cluster '{self.cluster_name}' "
+                        f"(status={e.status}); falling back to per-namespace listing")
+            self.fallback_keys.add(key)
+            return
+        self.partitions[key] = partition
+
+    def get_namespace_result(self, key, namespace_name: str):
+        if key in self.pending:
+            self._partition(key)
+        if key in self.fallback_keys:
+            return self.scheduler.submit_tracked_list(key, namespace_name, self.list_namespaced_methods[key],
+                                                      namespace=namespace_name).result()
+        # Each namespace's slice is consumed once, so release it as we go
+        return NamespaceListSlice(self.partitions[key].pop(namespace_name, []))
+
+
+def get_resource_metadata(resource) -> Optional[tuple[Optional[str], dict, dict]]:
+    """
+    Return the (name, labels, annotations) of a resource model object or raw
+    (dict) resource, or None if the resource has no metadata.
+    """
+    if isinstance(resource, dict):
+        metadata = resource.get('metadata')
+        if not isinstance(metadata, dict):
+            return None
+        return metadata.get('name'), metadata.get('labels') or {}, metadata.get('annotations') or {}
+    metadata = getattr(resource, 'metadata', None)
+    if metadata is None:
+        return None
+    return metadata.name, metadata.labels or {}, metadata.annotations or {}
+
+
 def get_lod_from_annotations(resource, lod_annotations: Dict[str, List[str]]) -> Optional[LevelOfDetail]:
-    if not hasattr(resource, 'metadata'):
+    resource_metadata = get_resource_metadata(resource)
+    if resource_metadata is None:
         return None
-    metadata = resource.metadata
-    annotations = metadata.annotations if metadata.annotations else {}
+    _, _, annotations = resource_metadata
 
     for key, values in lod_annotations.items():
         if key in annotations and annotations[key] in values:
@@ -209,17 +831,17 @@ def get_lod_from_annotations(resource, lod_annotations: Dict[str, List[str]]) ->
     return None
 
 def extract_owner_name(resource) -> Optional[str]:
-    if not hasattr(resource, 'metadata'):
+    resource_metadata = get_resource_metadata(resource)
+    if resource_metadata is None:
         return None
-    annotations = resource.metadata.annotations if resource.metadata.annotations else {}
+    _, _, annotations = resource_metadata
     return annotations.get(OWNER_ANNOTATION_KEY)
 
 def has_included_annotations_or_labels(resource, include_annotations: Dict[str, str], include_labels: Dict[str, Any]) -> bool:
-    if not hasattr(resource, 'metadata'):
+    resource_metadata = get_resource_metadata(resource)
+    if resource_metadata is None:
         return False
-    metadata = resource.metadata
-    annotations = metadata.annotations if metadata.annotations else {}
-    labels = metadata.labels if metadata.labels else {}
+    _, labels, annotations = resource_metadata
 
     # Check if any of the inclusion annotations match
     for key, value in include_annotations.items():
@@ -237,29 +859,28 @@ def has_included_annotations_or_labels(resource, include_annotations: Dict[str,
 
 
 def has_excluded_annotations_or_labels(resource, exclude_annotations: Dict[str, str], exclude_labels: Dict[str, Any]) -> bool:
-    if not hasattr(resource, 'metadata'):
+    resource_metadata = get_resource_metadata(resource)
+    if resource_metadata is None:
         return False
-    metadata = resource.metadata
-    annotations = metadata.annotations if metadata.annotations else {}
-    labels = metadata.labels if metadata.labels else {}
+    resource_name, labels, annotations = resource_metadata
 
     # FIXME - why is the Kind always None? we should be able to extract this for better logging / debugging without
     # complex code, but this is something that probably needs to be tackled in a longer term way - I suspect it's
     # just a factor of how the collection is performed on certain resource types.     
     for key, value in exclude_annotations.items():
         if annotations.get(key) == value:
-            logger.debug(f"Matched annotation {key} on {resource.metadata.name}, excluding from discovery.")
+            logger.debug(f"Matched annotation {key} on {resource_name}, excluding from discovery.")
             return True
     
     for key, values in exclude_labels.items():
         if key in labels:
             if isinstance(values, list):
                 if labels[key] in values:
-                    logger.debug(f"Matched label {key} on {resource.metadata.name}, excluding from discovery.")
+                    logger.debug(f"Matched label {key} on {resource_name}, excluding from discovery.")
                     return True
             else:
                 if labels[key] == values:
-                    logger.debug(f"Matched label {key} on {resource.metadata.name}, excluding from discovery.")
+                    logger.debug(f"Matched label {key} on {resource_name}, excluding from discovery.")
                     return True
     
     return False
@@ -358,6 +979,33 @@ def build_cluster_lod_maps(cloud_config_settings: Optional[dict],
     return cluster_lod_settings, cluster_namespace_lods, cluster_namespace_filters
 
 
+@dataclass
+class KubeapiIndexStats:
+    clusters: int = 0
+    namespaces: int = 0
+
+    def add(self, other: "KubeapiIndexStats"):
+        self.clusters += other.clusters
+        self.namespaces += other.namespaces
+
+
+def group_contexts_by_cluster(contexts: list[dict]) -> list[list[dict]]:
+    """
+    Group the kubeconfig contexts by the cluster they access, preserving the
+    kubeconfig order of the contexts within each group and ordering the groups
+    by the first context for each cluster.
+
+    Multiple contexts can access the same cluster (e.g. with different user
+    credentials); those are indexed together so that the later contexts can
+    extend the namespaces/resources found by the earlier ones.
+    """
+    groups: dict[Any, list[dict]] = dict()
+    for context in contexts:
+        context_info = context.get('context') or {}
+        groups.setdefault(context_info.get('cluster'), []).append(context)
+    return list(groups.values())
+
+
 def index(component_context: Context):
     logger.debug("Starting kube API scan")
 
@@ -391,6 +1039,43 @@ def index(component_context: Context):
     include_labels = {}
     lod_annotations = HARDCODED_LOD_ANNOTATIONS
     default_lod = component_context.get_setting(DEFAULT_LOD_SETTING)
+    max_concurrent_requests = max(1, component_context.get_setting(KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING) or 1)
+    max_concurrent_clusters = max(1, component_context.get_setting(KUBEAPI_MAX_CONCURRENT_CLUSTERS_SETTING) or 1)
+    list_states: Optional[KubeListStates] = None
+    if component_context.get_setting(KUBEAPI_INCREMENTAL_SETTING):
+        list_states = KubeListStates(load_list_states(get_incremental_baseline_path()))
+        logger.info(f"Incremental Kubernetes discovery enabled; loaded {len(list_states.previous)} list state(s) "
+                    f"from the previous run")
+        component_context.set_property(KUBEAPI_LIST_STATES_PROPERTY, list_states)
+    # The list states are saved and updated as raw JSON, so incremental discovery
+    # always uses the raw JSON parsers.
+    raw_json = bool(component_context.get_setting(KUBEAPI_RAW_JSON_SETTING)) or list_states is not None
+    if raw_json:
+        parse_app = kubeapi_parsers.parse_app_dict
+        parse_cronjob = kubeapi_parsers.parse_cronjob_dict
+        parse_ingress = kubeapi_parsers.parse_ingress_dict
+        parse_service = kubeapi_parsers.parse_service_dict
+        parse_pvc = kubeapi_parsers.parse_pvc_dict
+    else:
+        parse_app = kubeapi_parsers.parse_app
+        parse_cronjob = kubeapi_parsers.parse_cronjob
+        parse_ingress = kubeapi_parsers.parse_ingress
+        parse_service = kubeapi_parsers.parse_service
+        parse_pvc = kubeapi_parsers.parse_pvc
+    list_page_size = max(0, component_context.get_setting(KUBEAPI_LIST_PAGE_SIZE_SETTING) or 0)
+    list_strategy = (component_context.get_setting(KUBEAPI_LIST_STRATEGY_SETTING) or
+                     KUBEAPI_LIST_STRATEGY_NAMESPACED).strip().lower()
+    if list_strategy not in KUBEAPI_LIST_STRATEGIES:
+        logger.warning(f"Unknown kubeapiListStrategy '{list_strategy}'; expected one of "
+                       f"{', '.join(KUBEAPI_LIST_STRATEGIES)}. Using '{KUBEAPI_LIST_STRATEGY_NAMESPACED}'.")
+        list_strategy = KUBEAPI_LIST_STRATEGY_NAMESPACED
+    if list_states is not None and list_strategy != KUBEAPI_LIST_STRATEGY_CLUSTER:
+        # Each watch can take up to WATCH_TIMEOUT_SECONDS, so incremental
+        # discovery watches each kind once per cluster rather than once per
+        # namespace. Kinds that can't be listed cluster-wide still fall back
+        # to per-namespace watches.
+        logger.info(f"Incremental Kubernetes discovery uses the '{KUBEAPI_LIST_STRATEGY_CLUSTER}' list strategy")
+        list_strategy = KUBEAPI_LIST_STRATEGY_CLUSTER
     
     # Load the traditional namespaceLODs setting for backward compatibility
     namespace_lods = component_context.get_setting(NAMESPACE_LODS_SETTING) or {}
@@ -583,9 +1268,6 @@ def index(component_context: Context):
             contexts = kubeconfig.get('contexts', [])
             
             # Track indexing stats for summary
-            kubeapi_total_clusters = 0
-            kubeapi_total_namespaces = 0
-            kubeapi_total_resources = 0
             kubeapi_skipped_clusters = 0
             
             # Extract per-cluster LOD settings for managed clusters (AKS/GKE/EKS).
@@ -608,7 +1290,12 @@ def index(component_context: Context):
             if kube_context_namespace_lods:
                 logger.debug(f"Configured contexts with namespaceLODs: {list(kube_context_namespace_lods.keys())}")
             
-            for context in contexts:
+            def index_context(context: dict, registry: Registry, stats: KubeapiIndexStats):
+                """
+                Index the cluster accessed by a single kubeconfig context into the
+                specified registry. Errors are logged and the context is skipped,
+                so a failing cluster doesn't prevent the others from being indexed.
+                """
                 cluster_name = None
                 context_name = None
                 try:
@@ -668,11 +1355,25 @@ def index(component_context: Context):
 
                     # Try to create API client - if this fails, skip this cluster but continue with others
                     try:
-                        api_client = kubernetes_config.new_client_from_config(config_file=kubeconfig_path, context=context_name)
+                        client_configuration = None
+                        if max_concurrent_requests > 1:
+                            # Size the urllib3 connection pool so the worker pool's
+                            # concurrent list calls don't contend for connections.
+                            client_configuration = client.Configuration()
+                            client_configuration.connection_pool_maxsize = max(
+                                client_configuration.connection_pool_maxsize or 0,
+                                max_concurrent_requests,
+                            )
+                        # The client writes refreshed exec/oidc credentials back to the
+                        # kubeconfig file, which the cluster threads would do at the same time
+                        api_client = kubernetes_config.new_client_from_config(config_file=kubeconfig_path,
+                                                                              context=context_name,
+                                                                              persist_config=max_concurrent_clusters <= 1,
+                                                                              client_configuration=client_configuration)
                     except Exception as e:
                         logger.error(f"Failed to create API client for cluster '{cluster_name}' from context '{context_name}': {e}")
                         logger.info(f"Skipping cluster '{cluster_name}' due to API client creation failure and continuing with next cluster")
-                        continue
+                        return
 
                     with api_client:
                         # Pre-validate cluster connection and authentication
@@ -685,25 +1386,25 @@ def index(component_context: Context):
                             version_api = client.VersionApi(api_client=api_client)
                             version_info = version_api.get_code()
                             logger.info(f"Successfully connected to cluster '{cluster_name}' (Kubernetes {version_info.git_version})")
-                            kubeapi_total_clusters += 1
+                            stats.clusters += 1
                             
                         except ApiException as e:
                             if e.status == 401:
                                 logger.error(f"Authentication failed for cluster '{cluster_name}': Invalid or expired credentials. Error: {e}")
                                 logger.info(f"Skipping cluster '{cluster_name}' due to authentication failure and continuing with next cluster")
-                                continue
+                                return
                             elif e.status == 403:
                                 logger.error(f"Authorization failed for cluster '{cluster_name}': Insufficient permissions. Error: {e}")
                                 logger.info(f"Skipping cluster '{cluster_name}' due to authorization failure and continuing with next cluster")
-                                continue
+                                return
                             else:
                                 logger.error(f"API error connecting to cluster '{cluster_name}': {e}")
                                 logger.info(f"Skipping cluster '{cluster_name}' due to API error and continuing with next cluster")
-                                continue
+                                return
                         except Exception as e:
                             logger.error(f"Unexpected error connecting to cluster '{cluster_name}': {e}")
                             logger.info(f"Skipping cluster '{cluster_name}' due to connection error and continuing with next cluster")
-                            continue
+                            return
 
                         # Connection validation successful, proceed with cluster indexing
                         core_api_client = client.CoreV1Api(api_client=api_client)
@@ -736,11 +1437,11 @@ def index(component_context: Context):
                             if e.status == 401:
                                 logger.error(f"Authentication failed while getting API versions for cluster '{cluster_name}': Invalid or expired credentials. Error: {e}")
                                 logger.info(f"Skipping cluster '{cluster_name}' due to authentication failure and continuing with next cluster")
-                                continue
+                                return
                             elif e.status == 403:
                                 logger.error(f"Authorization failed while getting API versions for cluster '{cluster_name}': Insufficient permissions. Error: {e}")
                                 logger.info(f"Skipping cluster '{cluster_name}' due to authorization failure and continuing with next cluster")
-                                continue
+                                return
                             else:
                                 logger.error(f"API error while getting API versions for cluster '{cluster_name}': {e}")
                                 logger.info(f"Will continue with cluster '{cluster_name}' using limited API group information")
@@ -755,9 +1456,7 @@ def index(component_context: Context):
                             # FIXME: Following line is debugging code to simulate not having permissions
                             # to list the namespaces. Remove or comment out before committing!!!!
                             # raise ApiException()
-                            ret = core_api_client.list_namespace()
-                            logger.info(f"Discovered {len(ret.items)} namespaces in cluster '{cluster_name}'")
-                            logger.debug(f"kube API scan: {len(ret.items)} namespaces")
+                            ret = KubeListCallScheduler(1, list_page_size).submit_list(core_api_client.list_namespace).result()
                             for raw_resource in ret.items:
                                 # Check inclusion criteria directly
                                 if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
@@ -767,6 +1466,8 @@ def index(component_context: Context):
                                     continue
                                 namespace_name = raw_resource.metadata.name
                                 namespace_names.add(namespace_name)
+                            logger.info(f"Discovered {ret.item_count} namespaces in cluster '{cluster_name}'")
+                            logger.debug(f"kube API scan: {ret.item_count} namespaces")
                         except ApiException as e:
                             # FIXME: Should catch narrower exception corresponding to permissions error
                             # User didn't have permissions access to the namespaces.
@@ -866,7 +1567,7 @@ def index(component_context: Context):
 
                         if len(namespace_names) == 0:
                             logger.info("Unable to determine any namespace names, so can't index any Kubernetes resources")
-                            continue
+                            return
 
                         namespaces = dict()
                         # Update namespace_names with custom_namespace_names only if custom_namespace_names is defined
@@ -1096,324 +1797,381 @@ def index(component_context: Context):
                             namespaces[namespace_qualified_name] = namespace
                             logger.debug(f"Added namespace '{namespace_qualified_name}' to local namespaces dict for resource processing in context '{context_name}'")
                         logger.info(f"Context '{context_name}' will process {len(namespaces)} namespace(s) for resources: {list(namespaces.keys())}")
-                        ns_total = len(namespaces)
-                        ns_index = 0
-                        for namespace in namespaces.values():
-                            ns_index += 1
-                            namespace_qualified_name = namespace.qualified_name
-                            namespace_name = namespace.name
-                            logger.info(f"Scanning namespace {ns_index}/{ns_total} in cluster '{cluster_name}': '{namespace_name}'")
-                            logger.debug(f'Context "{context_name}" scanning for Kubernetes resources in namespace "{namespace_qualified_name}" with LOD:{namespace.lod}')
+                        # Hoist the per-kind list methods out of the namespace loop so
+                        # that the list calls for upcoming namespaces can be submitted
+                        # ahead of the namespace being indexed. The registry writes below
+                        # still happen on this thread, in namespace order.
+                        apps_api_client = client.AppsV1Api(api_client=api_client)
+                        batch_api_client = client.BatchV1Api(api_client=api_client)
+                        networking_api_client = client.NetworkingV1Api(api_client=api_client)
+                        app_info = (
+                            ('Deployment', KubernetesResourceType.DEPLOYMENT),
+                            ('DaemonSet', KubernetesResourceType.DAEMON_SET),
+                            ('StatefulSet', KubernetesResourceType.STATEFUL_SET),
+                        )
+                        batch_info = (
+                            ('Job', KubernetesResourceType.JOB, parse_app),
+                            ('CronJob', KubernetesResourceType.CRON_JOB, parse_cronjob),
+                        )
+                        namespaced_list_methods = (
+                            ('Deployment', apps_api_client.list_namespaced_deployment),
+                            ('DaemonSet', apps_api_client.list_namespaced_daemon_set),
+                            ('StatefulSet', apps_api_client.list_namespaced_stateful_set),
+                            ('Job', batch_api_client.list_namespaced_job),
+                            ('CronJob', batch_api_client.list_namespaced_cron_job),
+                            ('Ingress', networking_api_client.list_namespaced_ingress),
+                            ('Service', core_api_client.list_namespaced_service),
+                            ('PersistentVolumeClaim', core_api_client.list_namespaced_persistent_volume_claim),
+                        )
+                        if raw_json:
+                            namespaced_list_methods = tuple((kind, RawJsonListMethod(list_method))
+                                                            for kind, list_method in namespaced_list_methods)
+
+                        # Resolve the custom resource versions and scopes once per
+                        # cluster; neither depends on the namespace being scanned.
+                        custom_resource_list_targets = get_custom_resource_list_targets(accessed_resource_type_specs,
+                                                                                        group_version_infos)
+                        custom_resource_scopes = dict()
+                        for group, plural_name, versions in custom_resource_list_targets:
+                            for version in versions:
+                                custom_resource_scopes[(group, version, plural_name)] = get_custom_resource_scope(
+                                    api_client, group, version, plural_name, crd_scope_cache)
+
+                        def submit_list_calls(namespace):
+                            if cluster_list_partitioner is not None:
+                                return cluster_list_partitioner.submit_namespace_list_calls(namespace.name)
+                            return submit_namespace_list_calls(list_scheduler,
+                                                               namespace.name,
+                                                               namespaced_list_methods,
+                                                               custom_objects_api_client,
+                                                               custom_resource_list_targets,
+                                                               custom_resource_scopes)
+
+                        if max_concurrent_requests > 1:
+                            logger.info(f"Scanning namespaces in cluster '{cluster_name}' with up to "
+                                        f"{max_concurrent_requests} concurrent list requests")
+                        cluster_list_states = list_states.for_cluster(cluster_name) if list_states else None
+                        with KubeListCallScheduler(max_concurrent_requests, list_page_size,
+                                                   cluster_list_states) as list_scheduler:
+                            cluster_list_partitioner = None
+                            if list_strategy == KUBEAPI_LIST_STRATEGY_CLUSTER:
+                                logger.info(f"Listing namespaced resources across all namespaces in cluster "
+                                            f"'{cluster_name}' and partitioning them by namespace")
+                                all_namespaces_list_methods = {
+                                    'Deployment': apps_api_client.list_deployment_for_all_namespaces,
+                                    'DaemonSet': apps_api_client.list_daemon_set_for_all_namespaces,
+                                    'StatefulSet': apps_api_client.list_stateful_set_for_all_namespaces,
+                                    'Job': batch_api_client.list_job_for_all_namespaces,
+                                    'CronJob': batch_api_client.list_cron_job_for_all_namespaces,
+                                    'Ingress': networking_api_client.list_ingress_for_all_namespaces,
+                                    'Service': core_api_client.list_service_for_all_namespaces,
+                                    'PersistentVolumeClaim': core_api_client.list_persistent_volume_claim_for_all_namespaces,
+                                }
+                                if raw_json:
+                                    all_namespaces_list_methods = {kind: RawJsonListMethod(list_method)
+                                                                   for kind, list_method in all_namespaces_list_methods.items()}
+                                list_targets = [(kind, all_namespaces_list_methods[kind], list_method)
+                                                for kind, list_method in namespaced_list_methods]
+                                for group, plural_name, versions in custom_resource_list_targets:
+                                    for version in versions:
+                                        if custom_resource_scopes.get((group, version, plural_name)) == CRD_SCOPE_CLUSTER:
+                                            continue
+                                        list_targets.append((
+                                            (group, version, plural_name),
+                                            partial(custom_objects_api_client.list_cluster_custom_object,
+                                                    group=group, version=version, plural=plural_name),
+                                            partial(custom_objects_api_client.list_namespaced_custom_object,
+                                                    group=group, version=version, plural=plural_name),
+                                        ))
+                                cluster_list_partitioner = ClusterWideListPartitioner(list_scheduler,
+                                                                                      cluster_name,
+                                                                                      [namespace.name for namespace in namespaces.values()],
+                                                                                      list_targets)
+                            ns_total = len(namespaces)
+                            ns_index = 0
+                            for namespace, namespace_list_calls in list_scheduler.submit_ahead(namespaces.values(), submit_list_calls):
+                                ns_index += 1
+                                namespace_qualified_name = namespace.qualified_name
+                                namespace_name = namespace.name
+                                logger.info(f"Scanning namespace {ns_index}/{ns_total} in cluster '{cluster_name}': '{namespace_name}'")
+                                logger.debug(f'Context "{context_name}" scanning for Kubernetes resources in namespace "{namespace_qualified_name}" with LOD:{namespace.lod}')
             
-                            #
-                            # Index Deployments, DaemonSets and StatefulSets (the common app Kinds)
-                            #
-
-                            apps_api_client = client.AppsV1Api(api_client=api_client)
-                            app_info = (
-                                ('Deployment', apps_api_client.list_namespaced_deployment, KubernetesResourceType.DEPLOYMENT),
-                                ('DaemonSet', apps_api_client.list_namespaced_daemon_set, KubernetesResourceType.DAEMON_SET),
-                                ('StatefulSet', apps_api_client.list_namespaced_stateful_set, KubernetesResourceType.STATEFUL_SET),
-                            )
+                                #
+                                # Index Deployments, DaemonSets and StatefulSets (the common app Kinds)
+                                #
 
-                            # Query for the application instances.
-                            # We wrap these in try blocks so that any permissions error are just ignored instead
-                            # of resulting in fatal errors. So we just log that there was the error and continue.
-                            # FIXME: Should really refactor this code a bit to reduce code duplication.
+                                # Query for the application instances.
+                                # We wrap these in try blocks so that any permissions error are just ignored instead
+                                # of resulting in fatal errors. So we just log that there was the error and continue.
+                                # FIXME: Should really refactor this code a bit to reduce code duplication.
 
-                            for app_class_kind, app_class_list_method, app_resource_type in app_info:
+                                for app_class_kind, app_resource_type in app_info:
+                                    try:
+                                        ret = namespace_list_calls[app_class_kind].result()
+                                        for raw_resource in ret.items:
+                                            if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
+                                                continue  # Skip this resource if it doesn't meet inclusion criteria
+                                            if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
+                                                continue
+                                            owner_name = extract_owner_name(raw_resource)
+                                            app_name = get_resource_name(raw_resource)
+                                            app_qualified_name = get_qualified_name(namespace_qualified_name, app_name)
+                                            app_attributes = parse_app(raw_resource)
+                                            app_attributes['kind'] = app_class_kind
+                                            app_attributes['namespace'] = namespace
+                                            if owner_name:
+                                                app_attributes['owner'] = owner_name
+                                            app = registry.add_resource(KUBERNETES_PLATFORM,
+                                                                        app_resource_type.value,
+                                                                        app_name,
+                                                                        app_qualified_name,
+                                                                        app_attributes)
+                                    except ApiException as e:
+                                        logger.debug(f"Error scanning for deployment instances; skipping and continuing; error: {e}")
+
+                                #
+                                # Index Jobs and CronJobs (batch/v1)
+                                #
+                                for batch_kind, batch_resource_type, parse_batch_resource in batch_info:
+                                    try:
+                                        ret = namespace_list_calls[batch_kind].result()
+                                        for raw_resource in ret.items:
+                                            if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
+                                                continue
+                                            if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
+                                                continue
+                                            owner_name = extract_owner_name(raw_resource)
+                                            batch_name = get_resource_name(raw_resource)
+                                            batch_qualified_name = get_qualified_name(namespace_qualified_name, batch_name)
+                                            batch_attributes = parse_batch_resource(raw_resource)
+                                            batch_attributes['kind'] = batch_kind
+                                            batch_attributes['namespace'] = namespace
+                                            if owner_name:
+                                                batch_attributes['owner'] = owner_name
+                                            registry.add_resource(KUBERNETES_PLATFORM,
+                                                                  batch_resource_type.value,
+                                                                  batch_name,
+                                                                  batch_qualified_name,
+                                                                  batch_attributes)
+                                    except ApiException as e:
+                                        logger.debug(f"Error scanning for {batch_kind} instances; skipping and continuing; error: {e}")
+
+                                #
+                                # Index the namespace ingresses
+                                #
+
+                                ingresses = dict()
+                                ingresses_connected_services = dict()
                                 try:
-                                    ret = app_class_list_method(namespace_name)
+                                    ret = namespace_list_calls['Ingress'].result()
                                     for raw_resource in ret.items:
                                         if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
                                             continue  # Skip this resource if it doesn't meet inclusion criteria
+
                                         if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
                                             continue
                                         owner_name = extract_owner_name(raw_resource)
-                                        app_name = raw_resource.metadata.name
-                                        app_qualified_name = get_qualified_name(namespace_qualified_name, app_name)
-                                        app_attributes = kubeapi_parsers.parse_app(raw_resource)
-                                        app_attributes['kind'] = app_class_kind
-                                        app_attributes['namespace'] = namespace
+                                        ingress_name = get_resource_name(raw_resource)
+                                        ingress_qualified_name = get_qualified_name(namespace_qualified_name, ingress_name)
+                                        ingress_attributes = parse_ingress(raw_resource)
+                                        paths = ingress_attributes['paths']
+                                        ingress_attributes["namespace"] = namespace
                                         if owner_name:
-                                            app_attributes['owner'] = owner_name
-                                        app = registry.add_resource(KUBERNETES_PLATFORM,
-                                                                    app_resource_type.value,
-                                                                    app_name,
-                                                                    app_qualified_name,
-                                                                    app_attributes)
+                                            ingress_attributes['owner'] = owner_name
+                                        ingress = registry.add_resource(KUBERNETES_PLATFORM,
+                                                                        KubernetesResourceType.INGRESS.value,
+                                                                        ingress_name,
+                                                                        ingress_qualified_name,
+                                                                        ingress_attributes)
+                                        ingresses[ingress_qualified_name] = ingress
+                                        # Set this for wiring up services to ingresses later
+                                        # FIXME: Not sure what this is doing? (RobV)
+                                        for service_name in paths.values():
+                                            service_qualified_name = get_qualified_name(namespace_name, service_name)
+                                            ingresses_connected_services[service_qualified_name] = ingress
+                                    logger.debug(f"kube API scan: {ret.item_count} ingresses")
                                 except ApiException as e:
-                                    logger.debug(f"Error scanning for deployment instances; skipping and continuing; error: {e}")
-
-                            #
-                            # Index Jobs and CronJobs (batch/v1)
-                            #
-                            batch_api_client = client.BatchV1Api(api_client=api_client)
-                            batch_info = (
-                                ('Job', batch_api_client.list_namespaced_job, KubernetesResourceType.JOB, kubeapi_parsers.parse_app),
-                                ('CronJob', batch_api_client.list_namespaced_cron_job, KubernetesResourceType.CRON_JOB, kubeapi_parsers.parse_cronjob),
-                            )
-                            for batch_kind, batch_list_method, batch_resource_type, parse_batch_resource in batch_info:
+                                    logger.debug(f"Error scanning for Ingress instances; skipping and continuing; error: {e}")
+
+                                #
+                                # Index the namespace services
+                                #
+                                services = dict()
                                 try:
-                                    ret = batch_list_method(namespace_name)
+
+                                    ret = namespace_list_calls['Service'].result()
                                     for raw_resource in ret.items:
                                         if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
-                                            continue
+                                            continue  # Skip this resource if it doesn't meet inclusion criteria
+
                                         if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
                                             continue
                                         owner_name = extract_owner_name(raw_resource)
-                                        batch_name = raw_resource.metadata.name
-                                        batch_qualified_name = get_qualified_name(namespace_qualified_name, batch_name)
-                                        batch_attributes = parse_batch_resource(raw_resource)
-                                        batch_attributes['kind'] = batch_kind
-                                        batch_attributes['namespace'] = namespace
+                                        service_name = get_resource_name(raw_resource)
+                                        service_qualified_name = get_qualified_name(namespace_qualified_name, service_name)
+                                        service_attributes = parse_service(raw_resource)
+                                        namespace_name = service_attributes["namespace_name"]
+                                        service_attributes["namespace"] = namespace
                                         if owner_name:
-                                            batch_attributes['owner'] = owner_name
-                                        registry.add_resource(KUBERNETES_PLATFORM,
-                                                              batch_resource_type.value,
-                                                              batch_name,
-                                                              batch_qualified_name,
-                                                              batch_attributes)
+                                            service_attributes['owner'] = owner_name
+                                        if 'ingress' not in service_attributes:
+                                            ingress = ingresses_connected_services.get(service_qualified_name)
+                                            service_attributes['ingress'] = ingress
+                                        service = registry.add_resource(KUBERNETES_PLATFORM,
+                                                                        KubernetesResourceType.SERVICE.value,
+                                                                        service_name,
+                                                                        service_qualified_name,
+                                                                        service_attributes)
+                                        services[service_qualified_name] = service
+                                    logger.debug(f"kube API scan: {ret.item_count} services")
                                 except ApiException as e:
-                                    logger.debug(f"Error scanning for {batch_kind} instances; skipping and continuing; error: {e}")
-
-                            #
-                            # Index the namespace ingresses
-                            #
-
-                            ingresses = dict()
-                            ingresses_connected_services = dict()
-                            networking_api_client = client.NetworkingV1Api(api_client=api_client)
-                            try:
-                                ret = networking_api_client.list_namespaced_ingress(namespace_name)
-                                logger.debug(f"kube API scan: {len(ret.items)} ingresses")
-                                for raw_resource in ret.items:
-                                    if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
-                                        continue  # Skip this resource if it doesn't meet inclusion criteria
-
-                                    if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
-                                        continue
-                                    owner_name = extract_owner_name(raw_resource)
-                                    ingress_name = raw_resource.metadata.name
-                                    ingress_qualified_name = get_qualified_name(namespace_qualified_name, ingress_name)
-                                    ingress_attributes = kubeapi_parsers.parse_ingress(raw_resource)
-                                    paths = ingress_attributes['paths']
-                                    ingress_attributes["namespace"] = namespace
-                                    if owner_name:
-                                        ingress_attributes['owner'] = owner_name
-                                    ingress = registry.add_resource(KUBERNETES_PLATFORM,
-                                                                    KubernetesResourceType.INGRESS.value,
-                                                                    ingress_name,
-                                                                    ingress_qualified_name,
-                                                                    ingress_attributes)
-                                    ingresses[ingress_qualified_name] = ingress
-                                    # Set this for wiring up services to ingresses later
-                                    # FIXME: Not sure what this is doing? (RobV)
-                                    for service_name in paths.values():
-                                        service_qualified_name = get_qualified_name(namespace_name, service_name)
-                                        ingresses_connected_services[service_qualified_name] = ingress
-                            except ApiException as e:
-                                logger.debug(f"Error scanning for Ingress instances; skipping and continuing; error: {e}")
-
-                            #
-                            # Index the namespace services
-                            #
-                            services = dict()
-                            try:
-
-                                ret = core_api_client.list_namespaced_service(namespace_name)
-                                logger.debug(f"kube API scan: {len(ret.items)} services")
-                                for raw_resource in ret.items:
-                                    if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
-                                        continue  # Skip this resource if it doesn't meet inclusion criteria
-
-                                    if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
-                                        continue
-                                    owner_name = extract_owner_name(raw_resource)
-                                    service_name = raw_resource.metadata.name
-                                    service_qualified_name = get_qualified_name(namespace_qualified_name, service_name)
-                                    service_attributes = kubeapi_parsers.parse_service(raw_resource)
-                                    namespace_name = service_attributes["namespace_name"]
-                                    service_attributes["namespace"] = namespace
-                                    if owner_name:
-                                        service_attributes['owner'] = owner_name
-                                    if 'ingress' not in service_attributes:
-                                        ingress = ingresses_connected_services.get(service_qualified_name)
-                                        service_attributes['ingress'] = ingress
-                                    service = registry.add_resource(KUBERNETES_PLATFORM,
-                                                                    KubernetesResourceType.SERVICE.value,
-                                                                    service_name,
-                                                                    service_qualified_name,
-                                                                    service_attributes)
-                                    services[service_qualified_name] = service
-                            except ApiException as e:
-                                logger.debug(f"Error scanning for Service instances; skipping and continuing; error: {e}")
-                            #
-                            # Index the pvcs
-                            #
-                            try:
-                                ret = core_api_client.list_namespaced_persistent_volume_claim(namespace_name, watch=False)
-                                logger.debug(f"kube API scan for namespace {namespace_name}: {len(ret.items)} pvcs")
-                                for raw_resource in ret.items:
-                                    if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
-                                        continue  # Skip this resource if it doesn't meet inclusion criteria
-
-                                    if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
-                                        continue
-                                    owner_name = extract_owner_name(raw_resource)
-                                    pvc_name = raw_resource.metadata.name
-                                    pvc_qualified_name = get_qualified_name(namespace_qualified_name, pvc_name)
-                                    pvc_attributes = kubeapi_parsers.parse_pvc(raw_resource)
-                                    pvc_attributes["namespace"] = namespace
-                                    if owner_name:
-                                        pvc_attributes['owner'] = owner_name
-                                    persistentvolumeclaim = registry.add_resource(KUBERNETES_PLATFORM,
-                                                                                  KubernetesResourceType.PVC.value,
-                                                                                  pvc_name,
-                                                                                  pvc_qualified_name,
-                                                                                  pvc_attributes)
-                            except ApiException as e:
-                                logger.debug(f"Error scanning for PVC instances; skipping and continuing; error: {e}")
-                            ## Dropping this for now since the granularity of pod discovery isn't something
-                            ## we would typically add to a map.
-                            #
-                            # Index the pods
-                            #
-                            # try:
-                            #     ret = core_api_client.list_namespaced_pod(namespace_name, field_selector="status.phase=Running")
-                            #     logger.debug(f"kube API scan for namespace {namespace_name}: {len(ret.items)} pods")
-                            #     for raw_resource in ret.items:
-                            #         if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
-                            #             continue
-                            #         phase = raw_resource.status.phase
-                            #         if phase != "Running":
-                            #             continue
-                            #         owner_name = extract_owner_name(raw_resource)
-                            #         pod_name = raw_resource.metadata.name
-                            #         pod_qualified_name = get_qualified_name(namespace_qualified_name, pod_name)
-                            #         pod_attributes = kubeapi_parsers.parse_pod(raw_resource)
-                            #         pod_attributes["namespace"] = namespace
-                            #         if owner_name:
-                            #             pod_attributes['owner'] = owner_name
-                            #         pod = registry.add_resource(KUBERNETES_PLATFORM,
-                            #                                     KubernetesResourceType.POD.value,
-                            #                                     pod_name,
-                            #                                     pod_qualified_name,
-                            #                                     pod_attributes)
-                            # except ApiException as e:
-                            #     logger.info(f"Error scanning for Pod instances; skipping and continuing; error: {e}")
-
-
-                            #
-                            # Index the custom resources
-                            #
-                            for resource_type_spec in accessed_resource_type_specs:
-                                if resource_type_spec.resource_type_name != KubernetesResourceType.CUSTOM.value:
-                                    continue
-                                group = resource_type_spec.group
-                                version = resource_type_spec.version
-                                # FIXME: Some remaining inconsistencies between kind vs. plural_name.
-                                # Should probably change the field in ResourceTypeSpec to be plural_name, since
-                                # it's really not the same as the kind field of the resource.
-                                plural_name = resource_type_spec.kind
-                                logger.debug(f"Trying custom resource {plural_name}.{group}")
-                                if version:
-                                    wildcard_spec = KubernetesResourceTypeSpec(KUBERNETES_PLATFORM,
-                                                                               KubernetesResourceType.CUSTOM.value,
-                                                                               group,
-                                                                               None,
-                                                                               plural_name)
-                                    if wildcard_spec in accessed_resource_type_specs:
-                                        continue
-                                    versions = [version]
-                                else:
-                                    group_version_info = group_version_infos.get(group)
-                                    if group_version_info:
-                                        preferred = group_version_info.preferred_version
-                                        if preferred:
-                                            preferred_str = preferred.version if hasattr(preferred, 'version') else str(preferred)
-                                            versions = [preferred_str]
-                                        else:
-                                            versions = group_version_info.versions
-                                    else:
-                                        versions = list()
+                                    logger.debug(f"Error scanning for Service instances; skipping and continuing; error: {e}")
+                                #
+                                # Index the pvcs
+                                #
                                 try:
-                                    for version in versions:
-                                        # Determine CRD scope once per (group, version, plural).
-                                        # This lets us dispatch to the correct API and avoid
-                                        # re-listing cluster-scoped CRDs for every namespace.
-                                        scope = get_custom_resource_scope(api_client,
-                                                                          group,
-                                                                          version,
-                                                                          plural_name,
-                                                                          crd_scope_cache)
-
-                                        processed_key = (cluster_name, group, version, plural_name)
-                                        ret = list_custom_resource_for_scope(
-                                            custom_objects_api_client,
-                                            scope,
-                                            group,
-                                            version,
-                                            plural_name,
-                                            namespace_name,
-                                            processed_key,
-                                            cluster_scoped_crds_processed,
-                                        )
-                                        if ret is None:
-                                            # Cluster-scoped CRD already indexed for this
-                                            # cluster in a prior namespace iteration.
-                                            continue
-
-                                        # Every CRD gets its own resource_type bucket in the
-                                        # registry keyed by "{plural}.{group}" (e.g.
-                                        # "buckets.storage.gcp.upbound.io"). This replaces the
-                                        # earlier lump-everything-into-"custom" model, which
-                                        # forced a linear search-and-filter pass at enrichment
-                                        # time and produced opaque qualified names like
-                                        # ``ns/plural_group_version_name``.
-                                        crd_type_name = f"{plural_name}.{group}"
-
-                                        for raw_resource in ret['items']:
-                                            if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
-                                                continue  # Skip this resource if it doesn't meet inclusion criteria
+                                    ret = namespace_list_calls['PersistentVolumeClaim'].result()
+                                    for raw_resource in ret.items:
+                                        if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
+                                            continue  # Skip this resource if it doesn't meet inclusion criteria
 
-                                            if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
-                                                continue
-                                            owner_name = extract_owner_name(raw_resource)
-                                            resource_name = raw_resource['metadata']['name']
-                                            custom_attributes = kubeapi_parsers.parse_custom_resource(raw_resource,
-                                                                                                      group,
-                                                                                                      version,
-                                                                                                      plural_name)
+                                        if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
+                                            continue
+                                        owner_name = extract_owner_name(raw_resource)
+                                        pvc_name = get_resource_name(raw_resource)
+                                        pvc_qualified_name = get_qualified_name(namespace_qualified_name, pvc_name)
+                                        pvc_attributes = parse_pvc(raw_resource)
+                                        pvc_attributes["namespace"] = namespace
+                                        if owner_name:
+                                            pvc_attributes['owner'] = owner_name
+                                        persistentvolumeclaim = registry.add_resource(KUBERNETES_PLATFORM,
+                                                                                      KubernetesResourceType.PVC.value,
+                                                                                      pvc_name,
+                                                                                      pvc_qualified_name,
+                                                                                      pvc_attributes)
+                                    logger.debug(f"kube API scan for namespace {namespace_name}: {ret.item_count} pvcs")
+                                except ApiException as e:
+                                    logger.debug(f"Error scanning for PVC instances; skipping and continuing; error: {e}")
+                                ## Dropping this for now since the granularity of pod discovery isn't something
+                                ## we would typically add to a map.
+                                #
+                                # Index the pods
+                                #
+                                # try:
+                                #     ret = core_api_client.list_namespaced_pod(namespace_name, field_selector="status.phase=Running")
+                                #     logger.debug(f"kube API scan for namespace {namespace_name}: {len(ret.items)} pods")
+                                #     for raw_resource in ret.items:
+                                #         if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
+                                #             continue
+                                #         phase = raw_resource.status.phase
+                                #         if phase != "Running":
+                                #             continue
+                                #         owner_name = extract_owner_name(raw_resource)
+                                #         pod_name = raw_resource.metadata.name
+                                #         pod_qualified_name = get_qualified_name(namespace_qualified_name, pod_name)
+                                #         pod_attributes = kubeapi_parsers.parse_pod(raw_resource)
+                                #         pod_attributes["namespace"] = namespace
+                                #         if owner_name:
+                                #             pod_attributes['owner'] = owner_name
+                                #         pod = registry.add_resource(KUBERNETES_PLATFORM,
+                                #                                     KubernetesResourceType.POD.value,
+                                #                                     pod_name,
+                                #                                     pod_qualified_name,
+                                #                                     pod_attributes)
+                                # except ApiException as e:
+                                #     logger.info(f"Error scanning for Pod instances; skipping and continuing; error: {e}")
+
+
+                                #
+                                # Index the custom resources
+                                #
+                                for group, plural_name, versions in custom_resource_list_targets:
+                                    logger.debug(f"Trying custom resource {plural_name}.{group}")
+                                    try:
+                                        for version in versions:
+                                            # The CRD scope was resolved once per (group, version, plural)
+                                            # above. This lets us dispatch to the correct API and avoid
+                                            # re-listing cluster-scoped CRDs for every namespace.
+                                            scope = custom_resource_scopes[(group, version, plural_name)]
                                             if scope == CRD_SCOPE_CLUSTER:
-                                                # Cluster-scoped resources are parented directly
-                                                # to the cluster; they have no owning namespace.
-                                                # Qualified name shape:
-                                                #   <cluster>/<plural>.<group>/<name>
-                                                crd_type_qualified_name = get_qualified_name(cluster_name, crd_type_name)
-                                                custom_qualified_name = get_qualified_name(crd_type_qualified_name, resource_name)
-                                                custom_attributes["cluster"] = cluster
+                                                # Listed at most once per cluster, so this goes through
+                                                # the scheduler on demand (to stay within the request
+                                                # bound) rather than being submitted ahead.
+                                                processed_key = (cluster_name, group, version, plural_name)
+                                                first_page = list_scheduler.submit(
+                                                    list_custom_resource_for_scope,
+                                                    custom_objects_api_client,
+                                                    scope,
+                                                    group,
+                                                    version,
+                                                    plural_name,
+                                                    namespace_name,
+                                                    processed_key,
+                                                    cluster_scoped_crds_processed,
+                                                    **list_scheduler.get_page_kwargs(),
+                                                ).result()
+                                                if first_page is None:
+                                                    # Cluster-scoped CRD already indexed for this
+                                                    # cluster in a prior namespace iteration.
+                                                    continue
+                                                ret = PagedListResult(list_scheduler,
+                                                                      first_page,
+                                                                      custom_objects_api_client.list_cluster_custom_object,
+                                                                      (),
+                                                                      dict(group=group, version=version, plural=plural_name))
                                             else:
-                                                # Namespaced resources are parented under the
-                                                # namespace. Qualified name shape:
-                                                #   <cluster>/<namespace>/<plural>.<group>/<name>
-                                                crd_type_qualified_name = get_qualified_name(namespace_qualified_name, crd_type_name)
-                                                custom_qualified_name = get_qualified_name(crd_type_qualified_name, resource_name)
-                                                custom_attributes["namespace"] = namespace
-                                            if owner_name:
-                                                custom_attributes['owner'] = owner_name
-                                            custom_resource = registry.add_resource(KUBERNETES_PLATFORM,
-                                                                                    crd_type_name,
-                                                                                    resource_name,
-                                                                                    custom_qualified_name,
-                                                                                    custom_attributes)
-                                except ApiException as e:
-                                    # Just log and continue, instead of raising a fatal exception.
-                                    logger.debug(f"Error scanning for custom resource instances; skipping and continuing; "
-                                                f"error: {e}, group={group}, kind={plural_name}")
+                                                ret = namespace_list_calls[(group, version, plural_name)].result()
+
+                                            # Every CRD gets its own resource_type bucket in the
+                                            # registry keyed by "{plural}.{group}" (e.g.
+                                            # "buckets.storage.gcp.upbound.io"). This replaces the
+                                            # earlier lump-everything-into-"custom" model, which
+                                            # forced a linear search-and-filter pass at enrichment
+                                            # time and produced opaque qualified names like
+                                            # ``ns/plural_group_version_name``.
+                                            crd_type_name = f"{plural_name}.{group}"
+
+                                            for raw_resource in ret.items:
+                                                if (include_annotations or include_labels) and not has_included_annotations_or_labels(raw_resource, include_annotations, include_labels):
+                                                    continue  # Skip this resource if it doesn't meet inclusion criteria
+
+                                                if has_excluded_annotations_or_labels(raw_resource, exclude_annotations, exclude_labels):
+                                                    continue
+                                                owner_name = extract_owner_name(raw_resource)
+                                                resource_name = raw_resource['metadata']['name']
+                                                custom_attributes = kubeapi_parsers.parse_custom_resource(raw_resource,
+                                                                                                          group,
+                                                                                                          version,
+                                                                                                          plural_name)
+                                                if scope == CRD_SCOPE_CLUSTER:
+                                                    # Cluster-scoped resources are parented directly
+                                                    # to the cluster; they have no owning namespace.
+                                                    # Qualified name shape:
+                                                    #   <cluster>/<plural>.<group>/<name>
+                                                    crd_type_qualified_name = get_qualified_name(cluster_name, crd_type_name)
+                                                    custom_qualified_name = get_qualified_name(crd_type_qualified_name, resource_name)
+                                                    custom_attributes["cluster"] = cluster
+                                                else:
+                                                    # Namespaced resources are parented under the
+                                                    # namespace. Qualified name shape:
+                                                    #   <cluster>/<namespace>/<plural>.<group>/<name>
+                                                    crd_type_qualified_name = get_qualified_name(namespace_qualified_name, crd_type_name)
+                                                    custom_qualified_name = get_qualified_name(crd_type_qualified_name, resource_name)
+                                                    custom_attributes["namespace"] = namespace
+                                                if owner_name:
+                                                    custom_attributes['owner'] = owner_name
+                                                custom_resource = registry.add_resource(KUBERNETES_PLATFORM,
+                                                                                        crd_type_name,
+                                                                                        resource_name,
+                                                                                        custom_qualified_name,
+                                                                                        custom_attributes)
+                                    except ApiException as e:
+                                        # Just log and continue, instead of raising a fatal exception.
+                                        logger.debug(f"Error scanning for custom resource instances; skipping and continuing; "
+                                                    f"error: {e}, group={group}, kind={plural_name}")
 
                         logger.info(f"Context '{context_name}' finished scanning resources across {len(namespaces)} namespace(s)")
-                        kubeapi_total_namespaces += len(namespaces)
+                        stats.namespaces += len(namespaces)
 
                 except Exception as e:
                     # Handle cases where cluster_name or context_name might not be defined yet
@@ -1421,7 +2179,36 @@ def index(component_context: Context):
                     context_name_safe = context_name if context_name else 'unknown'
                     logger.error(f"Error processing cluster '{cluster_name_safe}' from context '{context_name_safe}': {e}")
                     logger.info(f"Skipping cluster '{cluster_name_safe}' and continuing with next cluster")
-                    continue
+
+            def index_cluster_contexts(cluster_contexts: list[dict]) -> tuple[Registry, KubeapiIndexStats]:
+                # The contexts for the same cluster are indexed one after the other into
+                # the same staging registry, so that later contexts extend the cluster
+                # and namespaces found by earlier ones, the same as in the sequential scan.
+                staging_registry = Registry()
+                cluster_stats = KubeapiIndexStats()
+                for context in cluster_contexts:
+                    index_context(context, staging_registry, cluster_stats)
+                return staging_registry, cluster_stats
+
+            stats = KubeapiIndexStats()
+            context_groups = group_contexts_by_cluster(contexts)
+            if max_concurrent_clusters > 1 and len(context_groups) > 1:
+                max_workers = min(max_concurrent_clusters, len(context_groups))
+                logger.info(f"Indexing {len(context_groups)} Kubernetes clusters with up to {max_workers} clusters in parallel")
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kubeapi-cluster") as executor:
+                    futures = [executor.submit(index_cluster_contexts, cluster_contexts)
+                               for cluster_contexts in context_groups]
+                    # Merge in kubeconfig order (not completion order) so the
+                    # registry contents don't depend on which cluster finished first.
+                    for future in futures:
+                        staging_registry, cluster_stats = future.result()
+                        registry.merge(staging_registry)
+                        stats.add(cluster_stats)
+            else:
+                for context in contexts:
+                    index_context(context, registry, stats)
+            kubeapi_total_clusters = stats.clusters
+            kubeapi_total_namespaces = stats.namespaces
 
     logger.info("Finished Kubernetes indexing")
     logger.info(
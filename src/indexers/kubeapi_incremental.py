@@ -0,0 +1,199 @@
+"""
+Incremental re-discovery support for the kubeapi indexer.
+
+For every list call made while indexing a cluster, the indexer records the
+``resourceVersion`` of the list (the watermark) along with the raw JSON items
+it returned. These list states are persisted in the SQLite resource store (see
+``indexers.sqlite_resource_writer``) next to the resource snapshot.
+
+On the next run with incremental discovery enabled, the list states are loaded
+from the previous snapshot and each list call is replaced with a one-item list,
+which reads the current resourceVersion of the collection, and a watch starting
+at the stored watermark. Only the adds, updates and deletes since the previous
+run are transferred; they're applied to the stored items, which are then
+indexed exactly as if they had come back from a full list. The watch is closed
+as soon as it reaches the current resourceVersion (an event or a bookmark from
+the API server), rather than being held open until its timeout. If the
+watermark has been compacted away (``410 Gone``), or the watch fails for any
+other reason, the indexer falls back to a full list for that call.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from kubernetes.client.rest import ApiException
+from kubernetes.watch.watch import iter_resp_lines
+
+logger = logging.getLogger(__name__)
+
+# Context property holding the KubeListStates for the current run, so that the
+# resource store can persist them.
+KUBEAPI_LIST_STATES_PROPERTY = "KUBEAPI_LIST_STATES"
+
+# How long the API server keeps a catch-up watch open. The events since the
+# watermark are sent immediately, and the watch is closed on the client side
+# once it reaches the current resourceVersion, so this is an upper bound. A
+# collection without any changes only reaches it with the bookmark that the
+# API server sends shortly before the timeout (about a second with this one).
+WATCH_TIMEOUT_SECONDS = 2
+
+# Kinds are either the built-in kind names or (group, version, plural) tuples
+# for custom resources.
+ListKind = Union[str, tuple]
+
+
+@dataclass
+class KubeListState:
+    """The resourceVersion watermark and the items of a list call."""
+    resource_version: str
+    items: list[dict]
+
+
+def get_list_state_kind(kind: ListKind) -> str:
+    if isinstance(kind, tuple):
+        group, version, plural = kind
+        return f"{plural}.{group}/{version}"
+    return kind
+
+
+def _get_item_key(item: dict) -> str:
+    # The API server returns list items in etcd key order (namespace/name), so
+    # the items are kept in that order to match the result of a full list.
+    metadata = item.get('metadata') or {}
+    return f"{metadata.get('namespace') or ''}/{metadata.get('name')}"
+
+
+class KubeListStates:
+    """
+    The list states from the previous run (``previous``) and the ones
+    recorded during this run (``current``), keyed by
+    ``(cluster, kind, namespace)``. The namespace is "" for the cluster-wide
+    list calls. Clusters may be indexed in parallel, so recording is locked.
+    """
+    def __init__(self, previous: Optional[dict[tuple[str, str, str], KubeListState]] = None):
+        self.previous = previous or dict()
+        self.current: dict[tuple[str, str, str], KubeListState] = dict()
+        self._lock = threading.Lock()
+
+    def for_cluster(self, cluster_name: str) -> "ClusterListStates":
+        return ClusterListStates(self, cluster_name)
+
+    def record(self, key: tuple[str, str, str], state: KubeListState) -> None:
+        with self._lock:
+            self.current[key] = state
+
+
+class ClusterListStates:
+    """View of the KubeListStates for a single cluster, keyed by ``(kind, namespace)``."""
+    def __init__(self, list_states: KubeListStates, cluster_name: str):
+        self.list_states = list_states
+        self.cluster_name = cluster_name
+
+    def _get_key(self, kind: ListKind, namespace_name: Optional[str]) -> tuple[str, str, str]:
+        return self.cluster_name, get_list_state_kind(kind), namespace_name or ""
+
+    def get_previous(self, kind: ListKind, namespace_name: Optional[str]) -> Optional[KubeListState]:
+        return self.list_states.previous.get(self._get_key(kind, namespace_name))
+
+    def record(self, kind: ListKind, namespace_name: Optional[str], resource_version: Optional[str],
+               items: list[dict]) -> None:
+        if resource_version:
+            self.list_states.record(self._get_key(kind, namespace_name), KubeListState(resource_version, items))
+
+
+def is_resource_version_reached(resource_version: Optional[str], target_resource_version: Optional[str]) -> bool:
+    """
+    Return whether ``resource_version`` is at or past ``target_resource_version``.
+    resourceVersions are opaque to clients, but the API server's are etcd
+    revisions; any other value is never considered reached.
+    """
+    try:
+        return int(resource_version) >= int(target_resource_version)
+    except (TypeError, ValueError):
+        return False
+
+
+def watch_list_changes(list_method: Callable, args: tuple, kwargs: dict, previous: KubeListState,
+                       target_resource_version: Optional[str] = None,
+                       timeout_seconds: int = WATCH_TIMEOUT_SECONDS) -> KubeListState:
+    """
+    Watch ``list_method`` from the ``previous`` watermark and apply the events
+    to the previous items, until the watch reaches ``target_resource_version``
+    (the current resourceVersion of the collection) or times out. Raises an
+    ApiException if the watch fails, including a 410 if the watermark is too
+    old.
+    """
+    if is_resource_version_reached(previous.resource_version, target_resource_version):
+        return previous
+    items = {_get_item_key(item): item for item in previous.items}
+    resource_version = previous.resource_version
+    response = list_method(*args,
+                           **kwargs,
+                           watch=True,
+                           resource_version=resource_version,
+                           allow_watch_bookmarks=True,
+                           timeout_seconds=timeout_seconds,
+                           _request_timeout=timeout_seconds + 10,
+                           _preload_content=False)
+    caught_up = False
+    try:
+        for line in iter_resp_lines(response):
+            if not line:
+                continue
+            event = json.loads(line)
+            event_type = event.get('type')
+            obj = event.get('object') or {}
+            if event_type == 'ERROR':
+                raise ApiException(status=obj.get('code'), reason=obj.get('message'))
+            if event_type in ('ADDED', 'MODIFIED'):
+                items[_get_item_key(obj)] = obj
+            elif event_type == 'DELETED':
+                items.pop(_get_item_key(obj), None)
+            resource_version = (obj.get('metadata') or {}).get('resourceVersion') or resource_version
+            if is_resource_version_reached(resource_version, target_resource_version):
+                caught_up = True
+                break
+    finally:
+        # A watch closed before its timeout still has an open stream, so its
+        # connection can't go back to the pool as is.
+        close = getattr(response, 'close', None) if caught_up else None
+        if close:
+            close()
+        release_conn = getattr(response, 'release_conn', None)
+        if release_conn:
+            release_conn()
+    return KubeListState(resource_version, [items[key] for key in sorted(items)])
+
+
+def load_list_states(db_path: str) -> dict[tuple[str, str, str], KubeListState]:
+    """
+    Load the list states from a previous SQLite resource store. Returns an
+    empty dict if the store is missing or doesn't have any list states.
+    """
+    from .sqlite_resource_writer import list_kubeapi_list_states, open_database
+
+    if not os.path.isfile(db_path):
+        logger.info(f"No previous resource store at {db_path}; doing a full discovery")
+        return dict()
+    conn = open_database(db_path)
+    try:
+        return {key: KubeListState(resource_version, items)
+                for key, (resource_version, items) in list_kubeapi_list_states(conn).items()}
+    except sqlite3.Error as e:
+        logger.info(f"Unable to load the kubeapi list states from {db_path} ({e}); doing a full discovery")
+        return dict()
+    finally:
+        conn.close()
+
+
+def get_incremental_baseline_path() -> str:
+    """Return the path of the resource store written by the previous run."""
+    from workspace_builder.resource_store_reader import resolve_resource_db_path
+    return str(resolve_resource_db_path())
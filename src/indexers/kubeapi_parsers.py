@@ -110,6 +110,88 @@ def parse_pvc(resource):
     ret = parse_namespaced_resource(resource)
     return ret
 
+#
+# Dict-based equivalents of the parsers above, for built-in kinds that were
+# fetched as raw JSON rather than deserialized into the Kubernetes client's
+# model objects. The parsed JSON is used directly as the "resource" attribute,
+# so, like custom resources, it contains only the fields that the API server
+# returned (i.e. unset fields are omitted rather than set to None).
+#
+
+def parse_resource_dict(resource):
+    metadata = resource.get('metadata') or {}
+    ret = {
+        'name': metadata.get('name'),
+        'uid': metadata.get('uid'),
+        'kind': resource.get('kind'),
+        'labels': metadata.get('labels') or dict(),
+        'annotations': metadata.get('annotations') or dict(),
+        'resource': resource,
+    }
+    owner = metadata.get('owner')
+    if isinstance(owner, dict):
+        ret['owner_uid'] = owner.get('uid')
+    return ret
+
+
+def parse_namespaced_resource_dict(resource):
+    ret = parse_resource_dict(resource)
+    ret['namespace_name'] = (resource.get('metadata') or {}).get('namespace')
+    return ret
+
+
+def _add_template_labels(ret, template):
+    template_metadata = (template or {}).get('metadata') or {}
+    for k, v in (template_metadata.get('labels') or {}).items():
+        fqk = f"template/{k}"
+        ret[f"{kube_escape(fqk)}"] = v
+    return ret
+
+
+def parse_service_dict(resource):
+    ret = parse_namespaced_resource_dict(resource)
+    selector = (resource.get('spec') or {}).get('selector')
+    if selector:
+        ret['selector'] = selector
+    return ret
+
+
+def parse_ingress_dict(resource):
+    ret = parse_namespaced_resource_dict(resource)
+    service_names = set()
+    paths = {}
+    for rule in (resource.get('spec') or {}).get('rules') or []:
+        host = rule.get('host')
+        for path_o in (rule.get('http') or {}).get('paths') or []:
+            service_name = ((path_o.get('backend') or {}).get('service') or {}).get('name')
+            if not service_name:
+                continue
+            service_names.add(service_name)
+            path = path_o.get('path')
+            paths[f'{host}{path}'] = service_name
+    ret['service_names'] = list(service_names)
+    ret['paths'] = paths
+    return ret
+
+
+def parse_app_dict(resource):
+    """Used for Deployments, StatefulSets, DaemonSets, and Jobs (pod template under spec.template)."""
+    ret = parse_namespaced_resource_dict(resource)
+    return _add_template_labels(ret, (resource.get('spec') or {}).get('template'))
+
+
+def parse_cronjob_dict(resource):
+    """CronJob pod template lives under spec.jobTemplate.spec.template."""
+    ret = parse_namespaced_resource_dict(resource)
+    job_template = (resource.get('spec') or {}).get('jobTemplate') or {}
+    return _add_template_labels(ret, (job_template.get('spec') or {}).get('template'))
+
+
+def parse_pvc_dict(resource):
+    ret = parse_namespaced_resource_dict(resource)
+    return ret
+
+
 def parse_custom_resource_common(resource):
     # Annoyingly, the results from the call to list the custom resources returns
     # the info in dict form, as opposed to all the other resource types, which
@@ -42,6 +42,31 @@ reserved markers (``$ref`` for inter-resource references, ``$lod`` for
 ``LevelOfDetail`` enums, ``$datetime`` / ``$date`` for date types). The full
 encoding is deterministic and round-trippable so a future REST service can
 reconstruct cross-resource references when needed.
+
+``resource_refs`` holds one edge per ``$ref`` marker in ``attributes_json``:
+the referencing resource, the dotted path of the attribute holding the marker
+(e.g. ``namespace`` or ``nics[0].subnet``) and the referenced resource, which
+may not be in the store. It's indexed in both directions, for the neighbour
+and multi-hop traversal queries (see :func:`walk_resource_refs`).
+
+``kubeapi_list_states`` holds the ``resourceVersion`` watermark and raw items
+of each Kubernetes list call made by the kubeapi indexer, keyed by
+``(cluster, kind, namespace)``. The next run loads them to re-discover the
+clusters incrementally (see ``indexers.kubeapi_incremental``).
+
+``workspace_artifacts_fts`` and ``resources_fts`` are FTS5 full-text
+indexes over the artifact path / SLX directory / content and over the resource
+name / qualified name / ``attributes_json``. They are external-content tables
+(the text is read from ``workspace_artifacts`` / ``resources`` by rowid), so
+they only add the index itself to the file. They're rebuilt after the
+snapshot; the search helpers below use them for ``MATCH`` queries ranked with
+``bm25`` and fall back to ``LIKE`` on stores without them (older stores, or a
+SQLite library built without FTS5).
+
+``upload_manifests`` holds the ``relative_path -> sha256`` manifest of the
+workspace files of the last successful upload to the platform. It's written
+by ``run.py`` (not by the snapshot), which uses it to upload only the files
+that changed since (see ``indexers.workspace_artifacts_tar``).
 """
 
 from __future__ import annotations
@@ -51,12 +76,24 @@ import enum
 import json
 import logging
 import os
+import re
 import sqlite3
 import tempfile
-from typing import TYPE_CHECKING, Any, Optional
+from itertools import groupby, islice
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+
+from search_tokens import FIELD_WEIGHTS, field_tokens
 
 from .resource_writer import InMemoryRegistryWriter
 
+try:
+    import yaml as _yaml  # PyYAML is already a runtime dep of workspace-builder
+except ImportError:  # pragma: no cover - PyYAML is a hard dep but be defensive
+    _yaml = None
+
+# The libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(_yaml, "CSafeLoader", None) or getattr(_yaml, "SafeLoader", None)
+
 if TYPE_CHECKING:
     from component import Context
     from resources import Registry, Resource
@@ -65,8 +102,41 @@ logger = logging.getLogger(__name__)
 
 
 # Bumped when the on-disk schema changes in a backwards-incompatible way.
-SCHEMA_VERSION = 2
+SCHEMA_VERSION = 7
+
+
+# Written by run.py into the store of a previous run, so it's also created on
+# its own (see replace_upload_manifest).
+_UPLOAD_MANIFESTS_SQL = """
+CREATE TABLE IF NOT EXISTS upload_manifests (
+    workspace_name TEXT NOT NULL,
+    relative_path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    PRIMARY KEY (workspace_name, relative_path)
+);
+"""
+
+# Full-text indexes over the text columns of workspace_artifacts and
+# resources. The column names must match the content tables.
+ARTIFACTS_FTS_TABLE = "workspace_artifacts_fts"
+RESOURCES_FTS_TABLE = "resources_fts"
+
+_FTS_SCHEMA_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {ARTIFACTS_FTS_TABLE} USING fts5(
+    relative_path, slx_directory, content,
+    content='workspace_artifacts', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS {RESOURCES_FTS_TABLE} USING fts5(
+    name, qualified_name, attributes_json,
+    content='resources', tokenize='unicode61 remove_diacritics 2'
+);
 
+-- The rank column orders by bm25, with path / name matches above content matches
+INSERT INTO {ARTIFACTS_FTS_TABLE}({ARTIFACTS_FTS_TABLE}, rank) VALUES ('rank', 'bm25(5.0, 5.0, 1.0)');
+INSERT INTO {RESOURCES_FTS_TABLE}({RESOURCES_FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)');
+"""
 
 _SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS schema_meta (
@@ -118,7 +188,67 @@ CREATE INDEX IF NOT EXISTS idx_workspace_artifacts_kind
     ON workspace_artifacts (workspace_name, artifact_kind);
 CREATE INDEX IF NOT EXISTS idx_workspace_artifacts_slx_dir
     ON workspace_artifacts (slx_directory);
-"""
+
+CREATE TABLE IF NOT EXISTS resource_refs (
+    src_platform TEXT NOT NULL,
+    src_type TEXT NOT NULL,
+    src_qn TEXT NOT NULL,
+    attr_path TEXT NOT NULL,
+    dst_platform TEXT NOT NULL,
+    dst_type TEXT NOT NULL,
+    dst_qn TEXT NOT NULL,
+    dst_name TEXT,
+    PRIMARY KEY (src_platform, src_type, src_qn, attr_path),
+    FOREIGN KEY (src_platform, src_type, src_qn)
+        REFERENCES resources(platform, resource_type, qualified_name) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- The index entries of a WITHOUT ROWID table carry the primary key, so
+-- reverse lookups don't need to go back to the table
+CREATE INDEX IF NOT EXISTS idx_resource_refs_dst
+    ON resource_refs (dst_platform, dst_type, dst_qn);
+
+-- One row per SLX directory of workspace_artifacts, with what the bundle
+-- listings show (so they don't query the files and parse the slx.yaml of
+-- each bundle)
+CREATE TABLE IF NOT EXISTS slx_bundles (
+    bundle_id INTEGER PRIMARY KEY,
+    workspace_name TEXT NOT NULL,
+    slx_directory TEXT NOT NULL,
+    slx_name TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    file_count INTEGER NOT NULL,
+    kinds_json TEXT NOT NULL,
+    files_json TEXT NOT NULL,
+    UNIQUE (workspace_name, slx_directory)
+);
+
+-- The resources each rendered SLX was generated for, recorded by the
+-- generation rules ("primary" for the resource that produced the SLX,
+-- "child" for the resources aggregated into it)
+CREATE TABLE IF NOT EXISTS slx_bindings (
+    workspace_name TEXT NOT NULL,
+    slx_directory TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    qualified_name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    PRIMARY KEY (workspace_name, slx_directory, platform, resource_type, qualified_name)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_slx_bindings_resource
+    ON slx_bindings (platform, resource_type, qualified_name);
+
+CREATE TABLE IF NOT EXISTS kubeapi_list_states (
+    cluster TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    resource_version TEXT NOT NULL,
+    items_json TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (cluster, kind, namespace)
+);
+""" + _UPLOAD_MANIFESTS_SQL
 
 
 # ---------------------------------------------------------------------------
@@ -295,14 +425,58 @@ class SqliteResourceWriter:
 # Schema / snapshot helpers (also used by tests)
 # ---------------------------------------------------------------------------
 
+# Rows are generated lazily and inserted with executemany in batches of this
+# size, so building the store doesn't need a copy of the whole registry (or of
+# all the rendered artifacts) as rows in memory.
+_INSERT_BATCH_SIZE = 1000
+
+# The store is built in a temporary file that's only handed to the outputter
+# once it's complete, so it doesn't need to be durable while it's being built.
+_BUILD_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = OFF",
+)
+
+
+def _batches(items: Iterable) -> Iterator[list]:
+    """Yield the items in lists of ``_INSERT_BATCH_SIZE``."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, _INSERT_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _executemany_batched(conn: sqlite3.Connection, sql: str, rows: Iterable[tuple]) -> int:
+    """Insert ``rows`` with ``executemany`` in batches; returns the number of rows."""
+    count = 0
+    for batch in _batches(rows):
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
 def _init_schema(conn: sqlite3.Connection) -> None:
     conn.executescript(_SCHEMA_SQL)
+    try:
+        conn.executescript(_FTS_SCHEMA_SQL)
+    except sqlite3.OperationalError as e:
+        # e.g. "no such module: fts5"; the search helpers fall back to LIKE
+        logger.warning("SQLite full-text search is not available, the store won't be indexed: %s", e)
     conn.execute(
         "INSERT OR REPLACE INTO schema_meta (key, value) VALUES (?, ?)",
         ("schema_version", str(SCHEMA_VERSION)),
     )
 
 
+def _rebuild_fts_indexes(conn: sqlite3.Connection) -> None:
+    """Re-index the content tables into their full-text indexes (if the store has them)."""
+    for table in (ARTIFACTS_FTS_TABLE, RESOURCES_FTS_TABLE):
+        if has_table(conn, table):
+            conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
 def _snapshot_workspace_artifacts(
     conn: sqlite3.Connection,
     workspace_name: str,
@@ -310,12 +484,13 @@ def _snapshot_workspace_artifacts(
 ) -> None:
     now = _dt.datetime.now(_dt.timezone.utc).isoformat()
     conn.execute("DELETE FROM workspace_artifacts WHERE workspace_name = ?", (workspace_name,))
-    for artifact in artifacts:
-        conn.execute(
-            "INSERT INTO workspace_artifacts "
-            "(workspace_name, relative_path, artifact_kind, media_type, slx_directory, "
-            " content, created_at, updated_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    _executemany_batched(
+        conn,
+        "INSERT INTO workspace_artifacts "
+        "(workspace_name, relative_path, artifact_kind, media_type, slx_directory, "
+        " content, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
             (
                 workspace_name,
                 artifact["relative_path"],
@@ -325,12 +500,246 @@ def _snapshot_workspace_artifacts(
                 artifact["content"],
                 now,
                 now,
-            ),
+            )
+            for artifact in artifacts
+        ),
+    )
+
+
+_ALIAS_REGEX = re.compile(
+    r'''^\s*["']?alias["']?\s*:\s*(?:"([^"\n]*)"|'([^'\n]*)'|([^\n#]+))''',
+    re.MULTILINE,
+)
+
+
+def extract_slx_display_name(slx_yaml_text: str) -> Optional[str]:
+    """Return the human-readable ``spec.alias`` from a rendered ``slx.yaml``.
+
+    Falls back to a permissive regex when PyYAML fails (e.g. truncated /
+    malformed content). Returns ``None`` when no alias can be recovered, in
+    which case callers should fall back to the on-disk SLX directory name.
+    """
+    if not slx_yaml_text or "alias" not in slx_yaml_text:
+        return None
+    if _yaml is not None:
+        try:
+            parsed = _yaml.load(slx_yaml_text, Loader=_YAML_LOADER)
+        except _yaml.YAMLError as exc:
+            logger.debug("slx.yaml parse failed; falling back to regex: %s", exc)
+            parsed = None
+        if isinstance(parsed, dict):
+            spec = parsed.get("spec")
+            if isinstance(spec, dict):
+                alias = spec.get("alias")
+                if isinstance(alias, str) and alias.strip():
+                    return alias.strip()
+    match = _ALIAS_REGEX.search(slx_yaml_text)
+    if match:
+        value = next((g for g in match.groups() if g is not None), None)
+        if value:
+            return value.strip().rstrip(",").strip()
+    return None
+
+
+def _snapshot_slx_bundles(conn: sqlite3.Connection, workspace_name: str) -> None:
+    """Summarize the SLX directories of the workspace artifacts into ``slx_bundles``."""
+    # The search token index is rebuilt from the new bundles
+    conn.execute("DROP TABLE IF EXISTS skill_tokens")
+    conn.execute("DELETE FROM slx_bundles WHERE workspace_name = ?", (workspace_name,))
+    rows = conn.execute(
+        "SELECT slx_directory, relative_path, artifact_kind, media_type, length(content), updated_at, "
+        "CASE WHEN artifact_kind = 'slx' THEN content END "
+        "FROM workspace_artifacts "
+        "WHERE workspace_name = ? AND slx_directory IS NOT NULL "
+        "ORDER BY slx_directory, artifact_kind, relative_path",
+        (workspace_name,),
+    )
+
+    def _bundle_rows() -> Iterator[tuple]:
+        for slx_directory, file_rows in groupby(rows, key=lambda row: row[0]):
+            files = []
+            display_name = None
+            for _, relative_path, artifact_kind, media_type, size_bytes, updated_at, slx_content in file_rows:
+                files.append(
+                    {
+                        "relative_path": relative_path,
+                        "artifact_kind": artifact_kind,
+                        "media_type": media_type,
+                        "size_bytes": size_bytes,
+                        "updated_at": updated_at,
+                    }
+                )
+                if slx_content and display_name is None:
+                    display_name = extract_slx_display_name(slx_content)
+            slx_name = os.path.basename(slx_directory)
+            yield (
+                workspace_name,
+                slx_directory,
+                slx_name,
+                display_name or slx_name,
+                len(files),
+                json.dumps(sorted({f["artifact_kind"] for f in files})),
+                json.dumps(files),
+            )
+
+    # The artifacts are read while the bundles are inserted (into another table)
+    _executemany_batched(
+        conn,
+        "INSERT INTO slx_bundles "
+        "(workspace_name, slx_directory, slx_name, display_name, file_count, kinds_json, files_json) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        _bundle_rows(),
+    )
+
+
+# Kinds of artifacts whose content the skill search scores, in the order they
+# are concatenated for the snippets
+SKILL_CONTENT_KINDS = ("skill", "runbook", "sli", "slx")
+
+
+# Inverted index of the tokens the MCP skill search scores the bundles on:
+# one row per distinct token of each field of a bundle, with the weight of
+# the field, so the score of a bundle is the sum of the weights of the rows
+# of the query tokens. It about doubles the size of the store, so it's left
+# out of the stores written into the /run/ output archive; run.py builds it
+# into the extracted store instead (see build_skill_token_index).
+_SKILL_TOKENS_DDL = """
+CREATE TABLE skill_tokens (
+    token TEXT NOT NULL,
+    bundle_id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (token, bundle_id, field)
+) WITHOUT ROWID
+"""
+
+
+def _snapshot_skill_tokens(conn: sqlite3.Connection) -> None:
+    """Index the tokens of every ``slx_bundles`` row into a new ``skill_tokens``."""
+    conn.execute(_SKILL_TOKENS_DDL)
+    kinds_sql = ", ".join("?" * len(SKILL_CONTENT_KINDS))
+    contents = groupby(
+        conn.execute(
+            f"SELECT workspace_name, slx_directory, content FROM workspace_artifacts "
+            f"WHERE slx_directory IS NOT NULL AND artifact_kind IN ({kinds_sql}) "
+            f"ORDER BY workspace_name, slx_directory",
+            SKILL_CONTENT_KINDS,
+        ),
+        key=lambda row: (row[0], row[1]),
+    )
+    bundles = conn.execute(
+        "SELECT bundle_id, workspace_name, slx_directory, slx_name, kinds_json FROM slx_bundles "
+        "ORDER BY workspace_name, slx_directory"
+    ).fetchall()
+
+    def _token_rows() -> Iterator[tuple]:
+        content_key, content_rows = next(contents, (None, iter(())))
+        for bundle_id, workspace_name, slx_directory, slx_name, kinds_json in bundles:
+            # Both are ordered by directory; the bundles have every directory
+            content = ""
+            if content_key == (workspace_name, slx_directory):
+                content = "\n\n".join(row[2] for row in content_rows)
+                content_key, content_rows = next(contents, (None, iter(())))
+            tokens = field_tokens(name=slx_name, path=slx_directory, kinds=json.loads(kinds_json), content=content)
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokens[field]:
+                    yield token, bundle_id, field, weight
+
+    # The postings are appended to a staging table and inserted in key order,
+    # which is much faster than inserting them in bundle order
+    conn.execute(
+        "CREATE TEMP TABLE skill_tokens_staging (token TEXT, bundle_id INTEGER, field TEXT, weight REAL)"
+    )
+    try:
+        _executemany_batched(
+            conn,
+            "INSERT INTO skill_tokens_staging (token, bundle_id, field, weight) VALUES (?, ?, ?, ?)",
+            _token_rows(),
         )
+        conn.execute(
+            "INSERT INTO skill_tokens (token, bundle_id, field, weight) "
+            "SELECT token, bundle_id, field, weight FROM skill_tokens_staging "
+            "ORDER BY token, bundle_id, field"
+        )
+    finally:
+        conn.execute("DROP TABLE skill_tokens_staging")
+
+
+def build_skill_token_index(conn: sqlite3.Connection) -> bool:
+    """Build the ``skill_tokens`` index into a store written without it (the
+    store of the /run/ output archive), in one transaction. Returns False if
+    the store already has it, or has no ``slx_bundles`` (before schema v6).
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if has_table(conn, "skill_tokens") or not has_table(conn, "slx_bundles"):
+            conn.rollback()
+            return False
+        _snapshot_skill_tokens(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return True
+
+
+def _snapshot_slx_bindings(
+    conn: sqlite3.Connection,
+    workspace_name: str,
+    bindings: list[dict[str, Any]],
+) -> None:
+    conn.execute("DELETE FROM slx_bindings WHERE workspace_name = ?", (workspace_name,))
+    _executemany_batched(
+        conn,
+        "INSERT OR IGNORE INTO slx_bindings "
+        "(workspace_name, slx_directory, platform, resource_type, qualified_name, role) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                workspace_name,
+                binding["slx_directory"],
+                binding["platform"],
+                binding["resource_type"],
+                binding["qualified_name"],
+                binding["role"],
+            )
+            for binding in bindings
+        ),
+    )
+
+
+def _snapshot_kubeapi_list_states(conn: sqlite3.Connection, list_states: dict) -> None:
+    """Replace the kubeapi list states with ``list_states`` (keyed by ``(cluster, kind, namespace)``)."""
+    now = _dt.datetime.now(_dt.timezone.utc).isoformat()
+    conn.execute("DELETE FROM kubeapi_list_states")
+    _executemany_batched(
+        conn,
+        "INSERT INTO kubeapi_list_states "
+        "(cluster, kind, namespace, resource_version, items_json, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (
+                cluster,
+                kind,
+                namespace,
+                state.resource_version,
+                json.dumps(state.items, separators=(",", ":")),
+                now,
+            )
+            for (cluster, kind, namespace), state in list_states.items()
+        ),
+    )
 
 
 def persist_sqlite_store(context: "Context", db_path: str | None = None) -> None:
-    """Write the SQLite store with discovered resources and rendered workspace artifacts."""
+    """Write the SQLite store with discovered resources and rendered workspace artifacts.
+
+    The rows are streamed from the registry into a temporary database, which is
+    then handed to the outputter as a file (copied, or streamed into the output
+    archive), so the store is never held in memory as a whole. The search token
+    index of the MCP skill search (``skill_tokens``) isn't written into the
+    output archive; see :func:`build_skill_token_index`.
+    """
     from component import WORKSPACE_NAME_SETTING
     from resources import REGISTRY_PROPERTY_NAME
     from indexers.resource_writer import (
@@ -339,7 +748,9 @@ def persist_sqlite_store(context: "Context", db_path: str | None = None) -> None
         RESOURCE_STORE_PATH_SETTING,
         _RESOURCE_STORE_FINALIZED_PROPERTY,
     )
-    from renderers.rendered_artifacts import RENDERED_ARTIFACTS_PROPERTY
+    from renderers.rendered_artifacts import RENDERED_ARTIFACTS_PROPERTY, SLX_BINDINGS_PROPERTY
+    from indexers.kubeapi_incremental import KUBEAPI_LIST_STATES_PROPERTY
+    from outputter import TarFileOutputter
 
     backend = (context.get_setting(RESOURCE_STORE_BACKEND_SETTING) or "").strip().lower()
     if backend != RESOURCE_STORE_BACKEND_SQLITE:
@@ -355,78 +766,144 @@ def persist_sqlite_store(context: "Context", db_path: str | None = None) -> None
 
     workspace_name = context.get_setting(WORKSPACE_NAME_SETTING) or "workspace"
     artifacts = context.get_property(RENDERED_ARTIFACTS_PROPERTY, [])
+    slx_bindings = context.get_property(SLX_BINDINGS_PROPERTY, [])
+    kubeapi_list_states = context.get_property(KUBEAPI_LIST_STATES_PROPERTY)
+    # The search token index is left out of the stores written into the /run/
+    # output archive; run.py builds it into the extracted store
+    with_skill_tokens = not isinstance(context.outputter, TarFileOutputter)
 
     with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as tmp:
         tmp_path = tmp.name
     try:
         conn = sqlite3.connect(tmp_path)
         try:
+            for pragma in _BUILD_PRAGMAS:
+                conn.execute(pragma)
             conn.execute("PRAGMA foreign_keys = ON")
             _init_schema(conn)
-            _snapshot_registry(conn, registry)
+            resource_count = _snapshot_registry(conn, registry)
             _snapshot_workspace_artifacts(conn, workspace_name, artifacts)
+            _snapshot_slx_bundles(conn, workspace_name)
+            if with_skill_tokens:
+                _snapshot_skill_tokens(conn)
+            _snapshot_slx_bindings(conn, workspace_name, slx_bindings)
+            if kubeapi_list_states is not None:
+                _snapshot_kubeapi_list_states(conn, kubeapi_list_states.current)
+            _rebuild_fts_indexes(conn)
             conn.commit()
+            # Checkpoint the WAL into the database file, so the store is a
+            # single self-contained file for the readers.
+            conn.execute("PRAGMA journal_mode = DELETE")
         finally:
             conn.close()
-        with open(tmp_path, "rb") as fh:
-            payload = fh.read()
-        context.outputter.write_file(db_path, payload)
+        context.outputter.write_file_from_path(db_path, tmp_path)
         logger.info(
             "persist_sqlite_store wrote %d byte DB to %s "
             "(%d resources in registry snapshot, %d workspace artifacts)",
-            len(payload),
+            os.path.getsize(tmp_path),
             db_path,
-            sum(
-                len(rt.instances or {})
-                for platform in (registry.platforms or {}).values()
-                for rt in (platform.resource_types or {}).values()
-            ),
+            resource_count,
             len(artifacts),
         )
         context.set_property(_RESOURCE_STORE_FINALIZED_PROPERTY, True)
     finally:
-        try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
+        for path in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
 
+def _snapshot_registry(conn: sqlite3.Connection, registry: "Registry") -> int:
+    """Replace the contents of the SQLite DB with a fresh snapshot of ``registry``.
 
-def _snapshot_registry(conn: sqlite3.Connection, registry: "Registry") -> None:
-    """Replace the contents of the SQLite DB with a fresh snapshot of ``registry``."""
+    The ``$ref`` markers of the encoded attributes are recorded in
+    ``resource_refs`` along the way. Returns the number of resources.
+    """
     now = _dt.datetime.now(_dt.timezone.utc).isoformat()
 
+    conn.execute("DELETE FROM resource_refs")
     conn.execute("DELETE FROM resources")
     conn.execute("DELETE FROM resource_types")
     conn.execute("DELETE FROM platforms")
 
-    for platform_name, platform in (registry.platforms or {}).items():
-        conn.execute(
-            "INSERT INTO platforms (name) VALUES (?)", (platform_name,)
+    platforms = registry.platforms or {}
+    conn.executemany(
+        "INSERT INTO platforms (name) VALUES (?)", ((platform_name,) for platform_name in platforms)
+    )
+    conn.executemany(
+        "INSERT INTO resource_types (platform, name, custom_attributes) "
+        "VALUES (?, ?, ?)",
+        (
+            (platform_name, type_name, json.dumps(sorted(resource_type.custom_attributes or [])))
+            for platform_name, platform in platforms.items()
+            for type_name, resource_type in (platform.resource_types or {}).items()
+        ),
+    )
+    count = 0
+    for batch in _batches(_resource_rows(platforms, now)):
+        conn.executemany(
+            "INSERT INTO resources "
+            "(platform, resource_type, qualified_name, name, "
+            " attributes_json, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [row for row, _ in batch],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO resource_refs "
+            "(src_platform, src_type, src_qn, attr_path, dst_platform, dst_type, dst_qn, dst_name) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [ref_row for _, ref_rows in batch for ref_row in ref_rows],
         )
+        count += len(batch)
+    return count
+
+
+def _resource_rows(platforms: dict, now: str) -> Iterator[tuple[tuple, list[tuple]]]:
+    """Yield the ``resources`` row of each resource with its ``resource_refs`` rows."""
+    for platform_name, platform in platforms.items():
         for type_name, resource_type in (platform.resource_types or {}).items():
-            custom_attrs = sorted(resource_type.custom_attributes or [])
-            conn.execute(
-                "INSERT INTO resource_types (platform, name, custom_attributes) "
-                "VALUES (?, ?, ?)",
-                (platform_name, type_name, json.dumps(custom_attrs)),
-            )
             for qualified_name, resource in (resource_type.instances or {}).items():
-                attrs = _collect_resource_attributes(resource, resource_type)
-                conn.execute(
-                    "INSERT INTO resources "
-                    "(platform, resource_type, qualified_name, name, "
-                    " attributes_json, created_at, updated_at) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                # Same as encode_attributes, with the refs picked from the encoded tree
+                encoded = _encode_value(_collect_resource_attributes(resource, resource_type))
+                row = (
+                    platform_name,
+                    type_name,
+                    qualified_name,
+                    getattr(resource, "name", ""),
+                    json.dumps(encoded, sort_keys=True),
+                    now,
+                    now,
+                )
+                ref_rows = [
                     (
                         platform_name,
                         type_name,
                         qualified_name,
-                        getattr(resource, "name", ""),
-                        encode_attributes(attrs),
-                        now,
-                        now,
-                    ),
-                )
+                        attr_path,
+                        ref["platform"],
+                        ref["resource_type"],
+                        ref["qualified_name"],
+                        ref.get("name"),
+                    )
+                    for attr_path, ref in _iter_encoded_refs(encoded)
+                    if ref.get("platform") and ref.get("resource_type") and ref.get("qualified_name")
+                ]
+                yield row, ref_rows
+
+
+def _iter_encoded_refs(value: Any, path: str = "") -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield ``(attr_path, ref)`` for the ``$ref`` markers in an encoded attribute tree."""
+    if isinstance(value, dict):
+        ref = value.get(_REF_KEY)
+        if isinstance(ref, dict) and len(value) == 1:
+            yield path, ref
+            return
+        for key in sorted(value):
+            yield from _iter_encoded_refs(value[key], f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _iter_encoded_refs(item, f"{path}[{index}]")
 
 
 def _collect_resource_attributes(
@@ -561,25 +1038,244 @@ def get_schema_version(conn: sqlite3.Connection) -> Optional[int]:
         return None
 
 
-def count_workspace_artifacts(
+def list_kubeapi_list_states(
+    conn: sqlite3.Connection,
+) -> dict[tuple[str, str, str], tuple[str, list[dict[str, Any]]]]:
+    """Return ``{(cluster, kind, namespace): (resource_version, items)}``."""
+    return {
+        (row[0], row[1], row[2]): (row[3], json.loads(row[4]))
+        for row in conn.execute(
+            "SELECT cluster, kind, namespace, resource_version, items_json "
+            "FROM kubeapi_list_states"
+        )
+    }
+
+
+# Edge columns of the node a walk starts from, of the node it moves to, and
+# the name recorded for the latter (referencing resources are always stored)
+_REF_DIRECTIONS = {
+    "forward": (("src_platform", "src_type", "src_qn"), ("dst_platform", "dst_type", "dst_qn"), "dst_name"),
+    "reverse": (("dst_platform", "dst_type", "dst_qn"), ("src_platform", "src_type", "src_qn"), "NULL"),
+}
+
+
+def walk_resource_refs(
+    conn: sqlite3.Connection,
+    platform: str,
+    resource_type: str,
+    qualified_name: str,
+    direction: str = "forward",
+    max_depth: int = 1,
+    limit: int = 100,
+) -> list[dict[str, Any]]:
+    """Return the resources reachable from a resource over ``resource_refs``.
+
+    ``forward`` follows the references the resource holds, ``reverse`` the
+    references pointing at it, up to ``max_depth`` hops (with a recursive CTE
+    over the indexed edges). Each resource is returned once, at its shortest
+    ``depth``, with the ``attr_path`` of the edge it was reached by; forward
+    references to resources that aren't in the store have ``resolved`` False.
+    """
+    if direction not in _REF_DIRECTIONS:
+        raise ValueError(f"Unknown direction: {direction!r}")
+    (from_platform, from_type, from_qn), (to_platform, to_type, to_qn), to_name = _REF_DIRECTIONS[direction]
+    sql = f"""
+        WITH RECURSIVE walk(platform, resource_type, qualified_name, attr_path, ref_name, depth) AS (
+            SELECT {to_platform}, {to_type}, {to_qn}, attr_path, {to_name}, 1
+            FROM resource_refs
+            WHERE {from_platform} = ? AND {from_type} = ? AND {from_qn} = ?
+            UNION
+            SELECT e.{to_platform}, e.{to_type}, e.{to_qn}, e.attr_path, {to_name}, walk.depth + 1
+            FROM resource_refs AS e
+            JOIN walk ON e.{from_platform} = walk.platform
+                AND e.{from_type} = walk.resource_type
+                AND e.{from_qn} = walk.qualified_name
+            WHERE walk.depth < ?
+        ),
+        nearest AS (
+            -- The other columns of an aggregate query with a single MIN()
+            -- come from the row with the minimum
+            SELECT platform, resource_type, qualified_name, attr_path, ref_name, MIN(depth) AS depth
+            FROM walk
+            WHERE NOT (platform = ? AND resource_type = ? AND qualified_name = ?)
+            GROUP BY platform, resource_type, qualified_name
+            ORDER BY depth, platform, resource_type, qualified_name
+            LIMIT ?
+        )
+        SELECT n.platform, n.resource_type, n.qualified_name, COALESCE(r.name, n.ref_name),
+               n.attr_path, n.depth, r.qualified_name IS NOT NULL
+        FROM nearest AS n
+        LEFT JOIN resources AS r ON r.platform = n.platform
+            AND r.resource_type = n.resource_type
+            AND r.qualified_name = n.qualified_name
+        ORDER BY n.depth, n.platform, n.resource_type, n.qualified_name
+    """
+    start = (platform, resource_type, qualified_name)
+    return [
+        {
+            "platform": row[0],
+            "resource_type": row[1],
+            "qualified_name": row[2],
+            "name": row[3],
+            "attr_path": row[4],
+            "depth": row[5],
+            "resolved": bool(row[6]),
+        }
+        for row in conn.execute(sql, (*start, max_depth, *start, limit))
+    ]
+
+
+def list_slx_bindings(
     conn: sqlite3.Connection,
     workspace_name: Optional[str] = None,
-    artifact_kind: Optional[str] = None,
-    q: Optional[str] = None,
-) -> int:
+    slx_directory: Optional[str] = None,
+    platform: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    qualified_name: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """Return the SLX-to-resource bindings matching the given columns.
+
+    Filter by the resource to get the SLXs generated for it, or by the SLX to
+    get the resources it was generated for (both directions are indexed). The
+    ``name`` of the bound resource comes from ``resources``.
+    """
+    where: list[str] = []
+    params: list[Any] = []
+    for column, value in (
+        ("workspace_name", workspace_name),
+        ("slx_directory", slx_directory),
+        ("platform", platform),
+        ("resource_type", resource_type),
+        ("qualified_name", qualified_name),
+    ):
+        if value is not None:
+            where.append(f"b.{column} = ?")
+            params.append(value)
+    sql = (
+        "SELECT b.workspace_name, b.slx_directory, b.platform, b.resource_type, "
+        "b.qualified_name, r.name, b.role "
+        "FROM slx_bindings AS b "
+        "LEFT JOIN resources AS r ON r.platform = b.platform "
+        "AND r.resource_type = b.resource_type AND r.qualified_name = b.qualified_name"
+    )
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY b.workspace_name, b.slx_directory, b.role DESC, b.platform, b.resource_type, b.qualified_name"
+    return [
+        {
+            "workspace_name": row[0],
+            "slx_directory": row[1],
+            "platform": row[2],
+            "resource_type": row[3],
+            "qualified_name": row[4],
+            "name": row[5],
+            "role": row[6],
+        }
+        for row in conn.execute(sql, tuple(params))
+    ]
+
+
+def list_upload_manifest(conn: sqlite3.Connection, workspace_name: str) -> dict[str, str]:
+    """Return the ``{relative_path: sha256}`` manifest of the last upload of a workspace."""
+    return {
+        row[0]: row[1]
+        for row in conn.execute(
+            "SELECT relative_path, sha256 FROM upload_manifests WHERE workspace_name = ?",
+            (workspace_name,),
+        )
+    }
+
+
+def replace_upload_manifest(
+    conn: sqlite3.Connection, workspace_name: str, manifest: dict[str, str]
+) -> None:
+    """Record ``manifest`` as the manifest of the last upload of a workspace."""
+    now = _dt.datetime.now(_dt.timezone.utc).isoformat()
+    # The store may have been written before the table was added to the schema
+    conn.executescript(_UPLOAD_MANIFESTS_SQL)
+    conn.execute("DELETE FROM upload_manifests WHERE workspace_name = ?", (workspace_name,))
+    conn.executemany(
+        "INSERT INTO upload_manifests (workspace_name, relative_path, sha256, uploaded_at) "
+        "VALUES (?, ?, ?, ?)",
+        [(workspace_name, relative_path, sha256, now) for relative_path, sha256 in sorted(manifest.items())],
+    )
+
+
+def has_table(conn: sqlite3.Connection, table: str) -> bool:
+    """Whether the store has ``table``; stores written by older versions may lack the
+    full-text indexes (before schema v3), ``resource_refs`` (before v4),
+    ``slx_bindings`` (before v5), ``slx_bundles`` (before v6) or ``skill_tokens``
+    (before v7, or the store of the /run/ output archive until run.py builds it)."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+_FTS_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def fts_match_query(q: Optional[str]) -> Optional[str]:
+    """Translate a free-text search box query into an FTS5 ``MATCH`` expression.
+
+    Each whitespace-separated word becomes a phrase of its tokens, with a
+    prefix match on the last one, and the phrases are ANDed: ``app-he db``
+    becomes ``"app he"* "db"*``, which matches ``app-health`` next to
+    ``db-latency`` the way a ``LIKE`` substring search would. Returns ``None``
+    when ``q`` has no indexable tokens (e.g. only punctuation), in which case
+    callers fall back to ``LIKE``.
+    """
+    phrases = []
+    for word in (q or "").split():
+        tokens = _FTS_TOKEN_RE.findall(word)
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"*')
+    return " ".join(phrases) or None
+
+
+# Columns are picked automatically (-1); matches are wrapped in ** like markdown bold
+ARTIFACTS_FTS_SNIPPET = f"snippet({ARTIFACTS_FTS_TABLE}, -1, '**', '**', '...', 16)"
+RESOURCES_FTS_SNIPPET = f"snippet({RESOURCES_FTS_TABLE}, -1, '**', '**', '...', 16)"
+
+
+def _workspace_artifacts_filter(
+    conn: sqlite3.Connection,
+    workspace_name: Optional[str],
+    artifact_kind: Optional[str],
+    q: Optional[str],
+) -> tuple[list[str], list[Any], Optional[str]]:
+    """Return the WHERE conditions and parameters on ``workspace_artifacts AS w``,
+    and the ``MATCH`` expression for ``q`` if it's searched with the full-text index."""
     where: list[str] = []
     params: list[Any] = []
     if workspace_name:
-        where.append("workspace_name = ?")
+        where.append("w.workspace_name = ?")
         params.append(workspace_name)
     if artifact_kind:
-        where.append("artifact_kind = ?")
+        where.append("w.artifact_kind = ?")
         params.append(artifact_kind)
+    match = None
     if q:
-        where.append("(relative_path LIKE ? OR content LIKE ?)")
-        pattern = f"%{q}%"
-        params.extend([pattern, pattern])
-    sql = "SELECT COUNT(*) FROM workspace_artifacts"
+        match = fts_match_query(q) if has_table(conn, ARTIFACTS_FTS_TABLE) else None
+        if match is None:
+            where.append("(w.relative_path LIKE ? OR w.content LIKE ?)")
+            pattern = f"%{q}%"
+            params.extend([pattern, pattern])
+    return where, params, match
+
+
+def count_workspace_artifacts(
+    conn: sqlite3.Connection,
+    workspace_name: Optional[str] = None,
+    artifact_kind: Optional[str] = None,
+    q: Optional[str] = None,
+) -> int:
+    where, params, match = _workspace_artifacts_filter(conn, workspace_name, artifact_kind, q)
+    if match is not None:
+        where.append(
+            f"w.rowid IN (SELECT rowid FROM {ARTIFACTS_FTS_TABLE} WHERE {ARTIFACTS_FTS_TABLE} MATCH ?)"
+        )
+        params.append(match)
+    sql = "SELECT COUNT(*) FROM workspace_artifacts AS w"
     if where:
         sql += " WHERE " + " AND ".join(where)
     return int(conn.execute(sql, tuple(params)).fetchone()[0])
@@ -611,28 +1307,36 @@ def search_workspace_artifacts(
     limit: int = 100,
     offset: int = 0,
 ) -> list[dict[str, Any]]:
-    where: list[str] = []
-    params: list[Any] = []
-    if workspace_name:
-        where.append("workspace_name = ?")
-        params.append(workspace_name)
-    if artifact_kind:
-        where.append("artifact_kind = ?")
-        params.append(artifact_kind)
-    if q:
-        where.append("(relative_path LIKE ? OR content LIKE ?)")
-        pattern = f"%{q}%"
-        params.extend([pattern, pattern])
-    sql = (
-        "SELECT workspace_name, relative_path, artifact_kind, media_type, "
-        "slx_directory, content, created_at, updated_at FROM workspace_artifacts"
+    """Return the matching artifacts.
+
+    With a full-text ``q``, the artifacts are ordered by relevance (``rank``)
+    and each one has a ``snippet`` of the text around the matches.
+    """
+    where, params, match = _workspace_artifacts_filter(conn, workspace_name, artifact_kind, q)
+    columns = (
+        "w.workspace_name, w.relative_path, w.artifact_kind, w.media_type, "
+        "w.slx_directory, w.content, w.created_at, w.updated_at"
     )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY workspace_name, slx_directory, relative_path LIMIT ? OFFSET ?"
+    if match is not None:
+        # The full-text index drives the query; its columns shadow the
+        # artifact columns of the same name, hence the ``w.`` qualifiers.
+        sql = (
+            f"SELECT {columns}, {ARTIFACTS_FTS_SNIPPET} FROM {ARTIFACTS_FTS_TABLE} "
+            f"JOIN workspace_artifacts AS w ON w.rowid = {ARTIFACTS_FTS_TABLE}.rowid "
+            f"WHERE " + " AND ".join([f"{ARTIFACTS_FTS_TABLE} MATCH ?"] + where)
+            + f" ORDER BY {ARTIFACTS_FTS_TABLE}.rank, w.workspace_name, w.slx_directory, w.relative_path"
+            " LIMIT ? OFFSET ?"
+        )
+        params.insert(0, match)
+    else:
+        sql = f"SELECT {columns} FROM workspace_artifacts AS w"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY w.workspace_name, w.slx_directory, w.relative_path LIMIT ? OFFSET ?"
     params.extend([limit, offset])
-    return [
-        {
+    items = []
+    for row in conn.execute(sql, tuple(params)):
+        item = {
             "workspace_name": row[0],
             "relative_path": row[1],
             "artifact_kind": row[2],
@@ -642,8 +1346,10 @@ def search_workspace_artifacts(
             "created_at": row[6],
             "updated_at": row[7],
         }
-        for row in conn.execute(sql, tuple(params))
-    ]
+        if match is not None:
+            item["snippet"] = row[8]
+        items.append(item)
+    return items
 
 
 def get_workspace_artifact(
@@ -681,9 +1387,21 @@ __all__ = [
     "list_resources",
     "get_resource",
     "get_schema_version",
+    "list_kubeapi_list_states",
+    "walk_resource_refs",
+    "list_upload_manifest",
+    "replace_upload_manifest",
+    "ARTIFACTS_FTS_TABLE",
+    "RESOURCES_FTS_TABLE",
+    "ARTIFACTS_FTS_SNIPPET",
+    "RESOURCES_FTS_SNIPPET",
+    "has_table",
+    "fts_match_query",
     "count_workspace_artifacts",
     "list_workspace_artifact_kinds",
     "search_workspace_artifacts",
     "get_workspace_artifact",
+    "extract_slx_display_name",
+    "build_skill_token_index",
     "persist_sqlite_store",
 ]
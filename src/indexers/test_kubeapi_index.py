@@ -0,0 +1,947 @@
+"""
+End-to-end tests for the namespace scan in ``indexers.kubeapi.index``.
+
+The Kubernetes client is replaced with an in-memory fake cluster built from the
+real ``kubernetes.client`` model classes, so the parsers see the same objects
+they do against a live API server. The tests pin that the optional scan modes
+produce exactly the same registry as the default sequential scan.
+"""
+
+from __future__ import annotations
+
+import base64
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+import yaml
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.dirname(_THIS_DIR)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+# Resolve the client package through its own module entry: other test modules
+# replace the top-level ``kubernetes`` package with a MagicMock, which would
+# otherwise hand us a mock for ``from kubernetes import client``.
+k8s = importlib.import_module("kubernetes.client")
+from kubernetes.client.rest import ApiException  # noqa: E402
+
+from component import Context  # noqa: E402
+from enrichers.generation_rules import RESOURCE_TYPE_SPECS_PROPERTY  # noqa: E402
+from indexers import kubeapi  # noqa: E402
+from indexers.common import CLOUD_CONFIG_SETTING  # noqa: E402
+from indexers.kubeapi_incremental import (  # noqa: E402
+    KUBEAPI_LIST_STATES_PROPERTY,
+    KubeListState,
+    watch_list_changes,
+)
+from indexers.kubetypes import (  # noqa: E402
+    KUBERNETES_PLATFORM,
+    KubernetesResourceType,
+    KubernetesResourceTypeSpec,
+)
+from indexers.sqlite_resource_writer import _init_schema, _snapshot_kubeapi_list_states  # noqa: E402
+from outputter import TarFileOutputter  # noqa: E402
+from resources import REGISTRY_PROPERTY_NAME, Registry, Resource  # noqa: E402
+
+CRD_GROUP = "example.com"
+CRD_VERSION = "v1"
+CRD_PLURAL = "widgets"
+CLUSTER_CRD_PLURAL = "gadgets"
+
+
+def _meta(name, namespace=None, labels=None, annotations=None):
+    return k8s.V1ObjectMeta(name=name, namespace=namespace, uid=f"uid-{namespace}-{name}",
+                            labels=labels, annotations=annotations)
+
+
+def _pod_template(app):
+    return k8s.V1PodTemplateSpec(metadata=k8s.V1ObjectMeta(labels={"app": app}),
+                                 spec=k8s.V1PodSpec(containers=[k8s.V1Container(name=app, image="nginx")]))
+
+
+class FakeCluster:
+    """
+    In-memory cluster contents plus fake API classes that serve them. The
+    ``call_delay`` lets the concurrency tests hold calls in flight long enough
+    to observe overlap.
+    """
+
+    def __init__(self, namespace_names, forbidden=(), call_delay=0.0, unlisted_namespace_names=(),
+                 expired_continue_tokens=0):
+        self.namespace_names = list(namespace_names)
+        # Namespaces whose resources show up in the all-namespaces lists, but
+        # which aren't returned by list_namespace (i.e. aren't being indexed)
+        self.unlisted_namespace_names = list(unlisted_namespace_names)
+        # Set of (kind, namespace) list calls that fail with a 403; a namespace
+        # of None forbids the kind's all-namespaces list call
+        self.forbidden = set(forbidden)
+        self.call_delay = call_delay
+        # Number of continued list calls that fail with a 410 (expired token)
+        self.expired_continue_tokens = expired_continue_tokens
+        self.calls = []
+        # (kind, namespace, limit, continue token) for every list call
+        self.page_requests = []
+        # (kind, namespace, resource version) for every watch call
+        self.watch_requests = []
+        # Changes made with change_item, as (kind, namespace, name) -> item (None if deleted)
+        self.changes = dict()
+        self.events = []
+        self.resource_version = 100
+        # Watches from a resource version older than this fail with a 410
+        self.compacted_resource_version = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------ bookkeeping
+    def _enter(self, kind, namespace):
+        with self._lock:
+            self.calls.append((kind, namespace))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.call_delay:
+                time.sleep(self.call_delay)
+            if (kind, namespace) in self.forbidden:
+                raise ApiException(status=403, reason="Forbidden")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    # ------------------------------------------------------------ resources
+    def namespaces(self):
+        return [k8s.V1Namespace(kind="Namespace", metadata=_meta(ns)) for ns in self.namespace_names]
+
+    def deployments(self, ns):
+        return [k8s.V1Deployment(kind="Deployment",
+                                 metadata=_meta(f"web-{i}", ns, labels={"app": f"web-{i}", "tier": "frontend"}),
+                                 spec=k8s.V1DeploymentSpec(selector=k8s.V1LabelSelector(match_labels={"app": f"web-{i}"}),
+                                                           template=_pod_template(f"web-{i}")))
+                for i in range(2)]
+
+    def daemon_sets(self, ns):
+        return [k8s.V1DaemonSet(kind="DaemonSet", metadata=_meta("agent", ns),
+                                spec=k8s.V1DaemonSetSpec(selector=k8s.V1LabelSelector(match_labels={"app": "agent"}),
+                                                         template=_pod_template("agent")))]
+
+    def stateful_sets(self, ns):
+        return [k8s.V1StatefulSet(kind="StatefulSet", metadata=_meta("db", ns),
+                                  spec=k8s.V1StatefulSetSpec(selector=k8s.V1LabelSelector(match_labels={"app": "db"}),
+                                                             service_name="db",
+                                                             template=_pod_template("db")))]
+
+    def jobs(self, ns):
+        return [k8s.V1Job(kind="Job", metadata=_meta("migrate", ns),
+                          spec=k8s.V1JobSpec(template=_pod_template("migrate")))]
+
+    def cron_jobs(self, ns):
+        return [k8s.V1CronJob(kind="CronJob", metadata=_meta("nightly", ns),
+                              spec=k8s.V1CronJobSpec(schedule="0 0 * * *",
+                                                     job_template=k8s.V1JobTemplateSpec(
+                                                         spec=k8s.V1JobSpec(template=_pod_template("nightly")))))]
+
+    def ingresses(self, ns):
+        backend = k8s.V1IngressBackend(service=k8s.V1IngressServiceBackend(
+            name="web-0", port=k8s.V1ServiceBackendPort(number=80)))
+        rule = k8s.V1IngressRule(host=f"{ns}.example.com", http=k8s.V1HTTPIngressRuleValue(
+            paths=[k8s.V1HTTPIngressPath(path="/", path_type="Prefix", backend=backend)]))
+        return [k8s.V1Ingress(kind="Ingress", metadata=_meta("web", ns), spec=k8s.V1IngressSpec(rules=[rule]))]
+
+    def services(self, ns):
+        return [k8s.V1Service(kind="Service", metadata=_meta(f"web-{i}", ns),
+                              spec=k8s.V1ServiceSpec(selector={"app": f"web-{i}"}))
+                for i in range(2)]
+
+    def pvcs(self, ns):
+        return [k8s.V1PersistentVolumeClaim(kind="PersistentVolumeClaim", metadata=_meta("data", ns),
+                                            spec=k8s.V1PersistentVolumeClaimSpec(access_modes=["ReadWriteOnce"]))]
+
+    def widgets(self, ns):
+        return [{"apiVersion": f"{CRD_GROUP}/{CRD_VERSION}", "kind": "Widget",
+                 "metadata": {"name": f"widget-{i}", "namespace": ns, "uid": f"w-{ns}-{i}"},
+                 "spec": {"size": i}}
+                for i in range(2)]
+
+    def gadgets(self):
+        return [{"apiVersion": f"{CRD_GROUP}/{CRD_VERSION}", "kind": "Gadget",
+                 "metadata": {"name": "gadget-0", "uid": "g-0"}}]
+
+    # ------------------------------------------------------------ changes
+    def change_item(self, kind, namespace, name, item):
+        """Add, replace or (with an ``item`` of None) delete a resource, recording the watch event."""
+        with self._lock:
+            key = (kind, namespace, name)
+            event_type = "DELETED" if item is None else ("MODIFIED" if key in self.changes else "ADDED")
+            self.changes[key] = item
+            self.resource_version += 1
+            if item is not None:
+                item.metadata.resource_version = str(self.resource_version)
+            self.events.append((self.resource_version, kind, namespace, name, event_type, item))
+
+    @staticmethod
+    def _item_key(item):
+        metadata = item["metadata"] if isinstance(item, dict) else item.metadata
+        if isinstance(metadata, dict):
+            return metadata.get("namespace"), metadata["name"]
+        return metadata.namespace, metadata.name
+
+    def _apply_changes(self, kind, namespace, items):
+        changed = {(ns, name): item for (k, ns, name), item in self.changes.items()
+                   if k == kind and (namespace is None or ns == namespace)}
+        current = {self._item_key(item): item for item in items}
+        current.update(changed)
+        return [item for key, item in sorted(current.items(), key=lambda kv: f"{kv[0][0] or ''}/{kv[0][1]}")
+                if item is not None]
+
+    def _watch(self, kind, namespace, resource_version=None, **kwargs):
+        with self._lock:
+            self.watch_requests.append((kind, namespace, resource_version))
+        if int(resource_version) < self.compacted_resource_version:
+            lines = [{"type": "ERROR", "object": {"kind": "Status", "code": 410, "message": "too old resource version"}}]
+        else:
+            lines = []
+            for event_rv, k, ns, name, event_type, item in self.events:
+                if k != kind or (namespace is not None and ns != namespace) or event_rv <= int(resource_version):
+                    continue
+                if item is None:
+                    obj = {"metadata": {"name": name, "namespace": ns}}
+                else:
+                    obj = k8s.ApiClient().sanitize_for_serialization(item)
+                obj["metadata"]["resourceVersion"] = str(event_rv)
+                lines.append({"type": event_type, "object": obj})
+            if kwargs.get("allow_watch_bookmarks"):
+                lines.append({"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": str(self.resource_version)}}})
+        data = b"".join(json.dumps(line).encode("utf-8") + b"\n" for line in lines)
+        return SimpleNamespace(stream=lambda amt=None, decode_content=True: iter([data]), release_conn=lambda: None)
+
+    # ------------------------------------------------------------ fake API
+    def _page(self, kind, namespace, items, limit=None, _continue=None, **kwargs):
+        """Return the requested page of ``items`` and the continue token for the next one."""
+        with self._lock:
+            self.page_requests.append((kind, namespace, limit, _continue))
+            expired = bool(_continue) and self.expired_continue_tokens > 0
+            if expired:
+                self.expired_continue_tokens -= 1
+        if expired:
+            raise ApiException(status=410, reason="Gone")
+        if not limit:
+            return items, None
+        start = int(_continue or 0)
+        end = start + limit
+        return items[start:end], (str(end) if end < len(items) else None)
+
+    def _list_response(self, items, continue_token, _preload_content=True):
+        """
+        Return the list response as the client does: deserialized into model
+        objects by default, or as the raw (undecoded) JSON response when
+        ``_preload_content`` is False.
+        """
+        resource_version = str(self.resource_version)
+        if _preload_content:
+            return SimpleNamespace(items=items, metadata=SimpleNamespace(_continue=continue_token,
+                                                                         resource_version=resource_version))
+        metadata = {"resourceVersion": resource_version}
+        if continue_token:
+            metadata["continue"] = continue_token
+        body = {"items": k8s.ApiClient().sanitize_for_serialization(items), "metadata": metadata}
+        return SimpleNamespace(data=json.dumps(body).encode("utf-8"), release_conn=lambda: None)
+
+    def _list(self, kind, namespace, items_fn, _preload_content=True, watch=False, **kwargs):
+        if watch:
+            return self._watch(kind, namespace, **kwargs)
+        self._enter(kind, namespace)
+        items = self._apply_changes(kind, namespace, items_fn(namespace))
+        items, continue_token = self._page(kind, namespace, items, **kwargs)
+        return self._list_response(items, continue_token, _preload_content)
+
+    def _list_all(self, kind, items_fn, _preload_content=True, watch=False, **kwargs):
+        if watch:
+            return self._watch(kind, None, **kwargs)
+        self._enter(kind, None)
+        items = [item for ns in self.unlisted_namespace_names + self.namespace_names for item in items_fn(ns)]
+        items = self._apply_changes(kind, None, items)
+        items, continue_token = self._page(kind, None, items, **kwargs)
+        return self._list_response(items, continue_token, _preload_content)
+
+    def _list_custom(self, plural, namespace, items, watch=False, **kwargs):
+        if watch:
+            kwargs.pop("_preload_content", None)
+            return self._watch(plural, namespace, **kwargs)
+        self._enter(plural, namespace)
+        items = self._apply_changes(plural, namespace, items)
+        items, continue_token = self._page(plural, namespace, items, **kwargs)
+        metadata = {"resourceVersion": str(self.resource_version)}
+        if continue_token:
+            metadata["continue"] = continue_token
+        return {"items": items, "metadata": metadata}
+
+    def client_module(self):
+        cluster = self
+
+        class CoreV1Api:
+            def __init__(self, api_client=None):
+                pass
+
+            def list_namespace(self, **kwargs):
+                cluster._enter("Namespace", None)
+                items, continue_token = cluster._page("Namespace", None, cluster.namespaces(), **kwargs)
+                return SimpleNamespace(items=items, metadata=SimpleNamespace(_continue=continue_token))
+
+            def read_namespace(self, name, **kwargs):
+                return k8s.V1Namespace(kind="Namespace", metadata=_meta(name))
+
+            def list_namespaced_service(self, namespace, **kwargs):
+                return cluster._list("Service", namespace, cluster.services, **kwargs)
+
+            def list_namespaced_persistent_volume_claim(self, namespace, **kwargs):
+                return cluster._list("PersistentVolumeClaim", namespace, cluster.pvcs, **kwargs)
+
+            def list_service_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("Service", cluster.services, **kwargs)
+
+            def list_persistent_volume_claim_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("PersistentVolumeClaim", cluster.pvcs, **kwargs)
+
+        class AppsV1Api:
+            def __init__(self, api_client=None):
+                pass
+
+            def list_namespaced_deployment(self, namespace, **kwargs):
+                return cluster._list("Deployment", namespace, cluster.deployments, **kwargs)
+
+            def list_namespaced_daemon_set(self, namespace, **kwargs):
+                return cluster._list("DaemonSet", namespace, cluster.daemon_sets, **kwargs)
+
+            def list_namespaced_stateful_set(self, namespace, **kwargs):
+                return cluster._list("StatefulSet", namespace, cluster.stateful_sets, **kwargs)
+
+            def list_deployment_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("Deployment", cluster.deployments, **kwargs)
+
+            def list_daemon_set_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("DaemonSet", cluster.daemon_sets, **kwargs)
+
+            def list_stateful_set_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("StatefulSet", cluster.stateful_sets, **kwargs)
+
+        class BatchV1Api:
+            def __init__(self, api_client=None):
+                pass
+
+            def list_namespaced_job(self, namespace, **kwargs):
+                return cluster._list("Job", namespace, cluster.jobs, **kwargs)
+
+            def list_namespaced_cron_job(self, namespace, **kwargs):
+                return cluster._list("CronJob", namespace, cluster.cron_jobs, **kwargs)
+
+            def list_job_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("Job", cluster.jobs, **kwargs)
+
+            def list_cron_job_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("CronJob", cluster.cron_jobs, **kwargs)
+
+        class NetworkingV1Api:
+            def __init__(self, api_client=None):
+                pass
+
+            def list_namespaced_ingress(self, namespace, **kwargs):
+                return cluster._list("Ingress", namespace, cluster.ingresses, **kwargs)
+
+            def list_ingress_for_all_namespaces(self, **kwargs):
+                return cluster._list_all("Ingress", cluster.ingresses, **kwargs)
+
+        class CustomObjectsApi:
+            def __init__(self, api_client=None):
+                pass
+
+            def list_namespaced_custom_object(self, group, version, namespace, plural, **kwargs):
+                return cluster._list_custom(plural, namespace, cluster.widgets(namespace), **kwargs)
+
+            def list_cluster_custom_object(self, group, version, plural, **kwargs):
+                if plural == CRD_PLURAL:
+                    items = [item for ns in cluster.unlisted_namespace_names + cluster.namespace_names
+                             for item in cluster.widgets(ns)]
+                else:
+                    items = cluster.gadgets()
+                return cluster._list_custom(plural, None, items, **kwargs)
+
+        class VersionApi:
+            def __init__(self, api_client=None):
+                pass
+
+            def get_code(self):
+                return SimpleNamespace(git_version="v1.30.0")
+
+        class ApisApi:
+            def __init__(self, api_client=None):
+                pass
+
+            def get_api_versions(self):
+                group_version = SimpleNamespace(version=CRD_VERSION)
+                return SimpleNamespace(groups=[SimpleNamespace(name=CRD_GROUP,
+                                                               preferred_version=group_version,
+                                                               versions=[group_version])])
+
+        return SimpleNamespace(CoreV1Api=CoreV1Api, AppsV1Api=AppsV1Api, BatchV1Api=BatchV1Api,
+                               NetworkingV1Api=NetworkingV1Api, CustomObjectsApi=CustomObjectsApi,
+                               VersionApi=VersionApi, ApisApi=ApisApi, Configuration=k8s.Configuration)
+
+
+class FakeApiClient:
+    """Stand-in for ``kubernetes.client.ApiClient`` that answers CRD discovery."""
+
+    def __init__(self, *args, **kwargs):
+        self.configuration = kwargs.get("client_configuration")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def call_api(self, resource_path, method, **kwargs):
+        return {"resources": [{"name": CRD_PLURAL, "namespaced": True},
+                              {"name": CLUSTER_CRD_PLURAL, "namespaced": False}]}
+
+
+def _context_name(cluster_names, index):
+    """Contexts are named "<cluster>-ctx", with a numeric suffix for repeated clusters."""
+    name = cluster_names[index]
+    repeats = cluster_names[:index].count(name)
+    return f"{name}-ctx{repeats + 1}" if repeats else f"{name}-ctx"
+
+
+def _kubeconfig(cluster_names):
+    """Build a kubeconfig with one context per entry in ``cluster_names``."""
+    return {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "clusters": [{"name": name, "cluster": {"server": f"https://{name}.example"}}
+                     for name in dict.fromkeys(cluster_names)],
+        "users": [{"name": "user", "user": {"token": "t"}}],
+        "contexts": [{"name": _context_name(cluster_names, i), "context": {"cluster": name, "user": "user"}}
+                     for i, name in enumerate(cluster_names)],
+        "current-context": _context_name(cluster_names, 0),
+    }
+
+
+def _accessed_resource_type_specs():
+    specs = {
+        KubernetesResourceTypeSpec(KUBERNETES_PLATFORM, resource_type.value, None, None, None): {}
+        for resource_type in (KubernetesResourceType.DEPLOYMENT, KubernetesResourceType.SERVICE)
+    }
+    for plural in (CRD_PLURAL, CLUSTER_CRD_PLURAL):
+        specs[KubernetesResourceTypeSpec(KUBERNETES_PLATFORM, KubernetesResourceType.CUSTOM.value,
+                                         CRD_GROUP, None, plural)] = {}
+    return {KUBERNETES_PLATFORM: specs}
+
+
+def run_index(cluster: FakeCluster, settings=None, cluster_names=("cluster-a",), kubernetes_settings=None) -> Registry:
+    """
+    Run ``kubeapi.index`` against the fake cluster and return the populated
+    registry. Every cluster in ``cluster_names`` is served by the same fake
+    cluster contents.
+    """
+    return run_index_with_context(cluster, settings, cluster_names, kubernetes_settings)[0]
+
+
+def run_index_with_context(cluster: FakeCluster, settings=None, cluster_names=("cluster-a",),
+                           kubernetes_settings=None) -> tuple[Registry, Context]:
+    """Like ``run_index``, but also returns the component context."""
+    kubeconfig_text = yaml.safe_dump(_kubeconfig(list(cluster_names)))
+    setting_values = {
+        CLOUD_CONFIG_SETTING.name: {
+            "kubernetes": {"kubeconfigFile": base64.b64encode(kubeconfig_text.encode("utf-8")).decode("utf-8"),
+                           **(kubernetes_settings or {})},
+        },
+    }
+    setting_values.update(settings or {})
+    context = Context(setting_values, TarFileOutputter())
+    registry = Registry()
+    context.set_property(REGISTRY_PROPERTY_NAME, registry)
+    context.set_property(RESOURCE_TYPE_SPECS_PROPERTY, _accessed_resource_type_specs())
+    with mock.patch.object(kubeapi, "client", cluster.client_module()), \
+            mock.patch.object(kubeapi.kubernetes_config, "new_client_from_config", FakeApiClient):
+        kubeapi.index(context)
+    return registry, context
+
+
+def snapshot_registry(registry: Registry) -> list:
+    """
+    Flatten the registry into comparable plain data, preserving the insertion
+    order of the resource types and instances. References to other resources
+    are replaced by their qualified names.
+    """
+    def plain(value):
+        if isinstance(value, Resource):
+            return ("$ref", value.resource_type.name, value.qualified_name)
+        if isinstance(value, dict):
+            return {k: plain(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [plain(v) for v in value]
+        return value
+
+    snapshot = []
+    for platform_name, platform in registry.platforms.items():
+        for type_name, resource_type in platform.resource_types.items():
+            instances = []
+            for qualified_name, resource in resource_type.instances.items():
+                attributes = {k: plain(v) for k, v in vars(resource).items() if k != "resource_type"}
+                instances.append((qualified_name, attributes))
+            snapshot.append((platform_name, type_name, sorted(resource_type.custom_attributes), instances))
+    return snapshot
+
+
+class ConcurrentNamespaceScanTest(TestCase):
+    NAMESPACES = [f"ns-{i:02d}" for i in range(12)]
+
+    def _settings(self, max_concurrent_requests):
+        return {kubeapi.KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING.name: max_concurrent_requests}
+
+    def test_sequential_scan_indexes_every_kind(self):
+        registry = run_index(FakeCluster(self.NAMESPACES[:2]))
+        platform = registry.platforms[KUBERNETES_PLATFORM]
+        for type_name in ("cluster", "namespace", "deployment", "daemonset", "statefulset", "job",
+                          "cronjob", "ingress", "service", "persistentvolumeclaim",
+                          f"{CRD_PLURAL}.{CRD_GROUP}", f"{CLUSTER_CRD_PLURAL}.{CRD_GROUP}"):
+            self.assertIn(type_name, platform.resource_types)
+        self.assertEqual(len(platform.resource_types["deployment"].instances), 4)
+        service = registry.lookup_resource(KUBERNETES_PLATFORM, "service", "cluster-a/ns-00/web-0")
+        self.assertEqual(service.namespace.qualified_name, "cluster-a/ns-00")
+        self.assertIn("cluster-a/gadgets.example.com/gadget-0",
+                      platform.resource_types[f"{CLUSTER_CRD_PLURAL}.{CRD_GROUP}"].instances)
+
+    def test_concurrent_scan_matches_sequential_registry(self):
+        sequential = run_index(FakeCluster(self.NAMESPACES), self._settings(1))
+        for max_concurrent_requests in (2, 4, 16):
+            concurrent = run_index(FakeCluster(self.NAMESPACES), self._settings(max_concurrent_requests))
+            self.assertEqual(snapshot_registry(concurrent), snapshot_registry(sequential),
+                             f"registry differs with {max_concurrent_requests} concurrent requests")
+
+    def test_concurrent_scan_matches_sequential_with_forbidden_lists(self):
+        forbidden = {("Service", "ns-03"), ("Deployment", "ns-05"), (CRD_PLURAL, "ns-07")}
+        sequential = run_index(FakeCluster(self.NAMESPACES, forbidden), self._settings(1))
+        concurrent = run_index(FakeCluster(self.NAMESPACES, forbidden), self._settings(4))
+        self.assertEqual(snapshot_registry(concurrent), snapshot_registry(sequential))
+        self.assertIsNone(concurrent.lookup_resource(KUBERNETES_PLATFORM, "service", "cluster-a/ns-03/web-0"))
+
+    def test_sequential_scan_has_one_request_in_flight(self):
+        cluster = FakeCluster(self.NAMESPACES[:3])
+        run_index(cluster, self._settings(1))
+        self.assertEqual(cluster.max_in_flight, 1)
+
+    def test_concurrent_scan_is_bounded_by_setting(self):
+        cluster = FakeCluster(self.NAMESPACES, call_delay=0.01)
+        run_index(cluster, self._settings(4))
+        self.assertGreater(cluster.max_in_flight, 1)
+        self.assertLessEqual(cluster.max_in_flight, 4)
+
+    def test_cluster_scoped_crd_listed_once_per_cluster(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        run_index(cluster, self._settings(4))
+        self.assertEqual(cluster.calls.count((CLUSTER_CRD_PLURAL, None)), 1)
+
+
+class ClusterWideListStrategyTest(TestCase):
+    NAMESPACES = [f"ns-{i:02d}" for i in range(6)]
+    NAMESPACED_KINDS = ("Deployment", "DaemonSet", "StatefulSet", "Job", "CronJob", "Ingress", "Service",
+                        "PersistentVolumeClaim", CRD_PLURAL)
+
+    def _settings(self, max_concurrent_requests=1):
+        return {kubeapi.KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING.name: max_concurrent_requests,
+                kubeapi.KUBEAPI_LIST_STRATEGY_SETTING.name: kubeapi.KUBEAPI_LIST_STRATEGY_CLUSTER}
+
+    def _namespaced_baseline(self, forbidden=()):
+        return snapshot_registry(run_index(FakeCluster(self.NAMESPACES, forbidden), {}))
+
+    def test_cluster_strategy_matches_namespaced_registry(self):
+        baseline = self._namespaced_baseline()
+        for max_concurrent_requests in (1, 4):
+            cluster = FakeCluster(self.NAMESPACES, unlisted_namespace_names=["kube-system"])
+            registry = run_index(cluster, self._settings(max_concurrent_requests))
+            self.assertEqual(snapshot_registry(registry), baseline)
+
+    def test_cluster_strategy_lists_each_kind_once(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        run_index(cluster, self._settings())
+        for kind in self.NAMESPACED_KINDS:
+            self.assertEqual(cluster.calls.count((kind, None)), 1, kind)
+        self.assertFalse([call for call in cluster.calls if call[1] is not None])
+
+    def test_forbidden_cluster_wide_list_falls_back_to_namespaces(self):
+        cluster = FakeCluster(self.NAMESPACES, forbidden={("Service", None), (CRD_PLURAL, None)})
+        registry = run_index(cluster, self._settings(4))
+        self.assertEqual(snapshot_registry(registry), self._namespaced_baseline())
+        for kind in ("Service", CRD_PLURAL):
+            self.assertEqual(sorted(ns for k, ns in cluster.calls if k == kind and ns is not None), self.NAMESPACES)
+        self.assertEqual([call for call in cluster.calls if call[0] == "Deployment"], [("Deployment", None)])
+
+    def test_fallback_preserves_per_namespace_forbidden_handling(self):
+        forbidden = {("Service", None), ("Service", "ns-02")}
+        registry = run_index(FakeCluster(self.NAMESPACES, forbidden), self._settings())
+        self.assertEqual(snapshot_registry(registry), self._namespaced_baseline({("Service", "ns-02")}))
+
+    def test_unknown_strategy_uses_namespaced_listing(self):
+        cluster = FakeCluster(self.NAMESPACES[:2])
+        run_index(cluster, {kubeapi.KUBEAPI_LIST_STRATEGY_SETTING.name: "bogus"})
+        self.assertIn(("Deployment", "ns-00"), cluster.calls)
+
+
+class PaginatedListTest(TestCase):
+    NAMESPACES = [f"ns-{i:02d}" for i in range(5)]
+
+    def _settings(self, list_page_size, max_concurrent_requests=1, **extra):
+        settings = {kubeapi.KUBEAPI_LIST_PAGE_SIZE_SETTING.name: list_page_size,
+                    kubeapi.KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING.name: max_concurrent_requests}
+        settings.update(extra)
+        return settings
+
+    def _unpaginated_baseline(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        registry = run_index(cluster, self._settings(0))
+        self.assertTrue(all(limit is None for _, _, limit, _ in cluster.page_requests))
+        return snapshot_registry(registry)
+
+    def test_paginated_scan_matches_unpaginated_registry(self):
+        baseline = self._unpaginated_baseline()
+        for list_page_size, max_concurrent_requests in ((1, 1), (1, 4), (2, 1), (500, 4)):
+            cluster = FakeCluster(self.NAMESPACES)
+            registry = run_index(cluster, self._settings(list_page_size, max_concurrent_requests))
+            self.assertEqual(snapshot_registry(registry), baseline, (list_page_size, max_concurrent_requests))
+
+    def test_list_calls_are_chunked_by_page_size(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        run_index(cluster, self._settings(1))
+        self.assertTrue(all(limit == 1 for _, _, limit, _ in cluster.page_requests))
+        # Two deployments per namespace means one continued request per namespace
+        deployment_pages = [(ns, token or "") for kind, ns, _, token in cluster.page_requests if kind == "Deployment"]
+        self.assertEqual(sorted(deployment_pages), [(ns, token) for ns in self.NAMESPACES for token in ("", "1")])
+        namespace_pages = [token for kind, _, _, token in cluster.page_requests if kind == "Namespace"]
+        self.assertEqual(len(namespace_pages), len(self.NAMESPACES))
+
+    def test_cluster_strategy_paginates_cluster_wide_lists(self):
+        cluster = FakeCluster(self.NAMESPACES, unlisted_namespace_names=["kube-system"])
+        settings = self._settings(3, 4, **{kubeapi.KUBEAPI_LIST_STRATEGY_SETTING.name: kubeapi.KUBEAPI_LIST_STRATEGY_CLUSTER})
+        registry = run_index(cluster, settings)
+        self.assertEqual(snapshot_registry(registry), self._unpaginated_baseline())
+        service_pages = [token for kind, _, _, token in cluster.page_requests if kind == "Service"]
+        self.assertEqual(service_pages, [None, "3", "6", "9"])
+
+    def test_expired_continue_token_restarts_list(self):
+        cluster = FakeCluster(self.NAMESPACES, expired_continue_tokens=3)
+        registry = run_index(cluster, self._settings(1, 2))
+        self.assertEqual(snapshot_registry(registry), self._unpaginated_baseline())
+        self.assertEqual(cluster.expired_continue_tokens, 0)
+
+    def test_pages_are_fetched_as_items_are_consumed(self):
+        requests = []
+
+        def list_numbers(limit=None, _continue=None):
+            requests.append(_continue)
+            start = int(_continue or 0)
+            end = min(start + limit, 5)
+            items = [{"metadata": {"name": f"item-{i}"}} for i in range(start, end)]
+            return {"items": items, "metadata": {"continue": str(end)} if end < 5 else {}}
+
+        with kubeapi.KubeListCallScheduler(1, 2) as scheduler:
+            ret = scheduler.submit_list(list_numbers).result()
+            self.assertEqual(next(ret.items)["metadata"]["name"], "item-0")
+            self.assertEqual(requests, [None])
+            self.assertEqual([item["metadata"]["name"] for item in ret.items], [f"item-{i}" for i in range(1, 5)])
+        self.assertEqual(requests, [None, "2", "4"])
+        self.assertEqual((ret.item_count, ret.page_count), (5, 3))
+
+
+class ParallelClusterIndexTest(TestCase):
+    NAMESPACES = [f"ns-{i:02d}" for i in range(4)]
+    CLUSTERS = ("cluster-a", "cluster-b", "cluster-c", "cluster-d")
+
+    def _settings(self, max_concurrent_clusters):
+        return {kubeapi.KUBEAPI_MAX_CONCURRENT_CLUSTERS_SETTING.name: max_concurrent_clusters}
+
+    def test_parallel_clusters_match_sequential_registry(self):
+        sequential = run_index(FakeCluster(self.NAMESPACES), self._settings(1), self.CLUSTERS)
+        for max_concurrent_clusters in (2, 8):
+            parallel = run_index(FakeCluster(self.NAMESPACES), self._settings(max_concurrent_clusters), self.CLUSTERS)
+            self.assertEqual(snapshot_registry(parallel), snapshot_registry(sequential))
+        cluster_type = parallel.lookup_resource_type(KUBERNETES_PLATFORM, "cluster")
+        self.assertEqual(list(cluster_type.instances), list(self.CLUSTERS))
+
+    def test_clusters_are_indexed_concurrently(self):
+        cluster = FakeCluster(self.NAMESPACES, call_delay=0.01)
+        run_index(cluster, self._settings(4), self.CLUSTERS)
+        self.assertGreater(cluster.max_in_flight, 1)
+        self.assertLessEqual(cluster.max_in_flight, 4)
+
+    def test_parallel_clusters_do_not_persist_kubeconfig(self):
+        persist_configs = []
+        fake_api_client_init = FakeApiClient.__init__
+
+        def init(api_client, *args, **kwargs):
+            persist_configs.append(kwargs.get("persist_config", True))
+            fake_api_client_init(api_client, *args, **kwargs)
+
+        with mock.patch.object(FakeApiClient, "__init__", init):
+            run_index(FakeCluster(self.NAMESPACES), self._settings(1), self.CLUSTERS)
+            self.assertEqual(persist_configs, [True] * len(self.CLUSTERS))
+            persist_configs.clear()
+            run_index(FakeCluster(self.NAMESPACES), self._settings(4), self.CLUSTERS)
+            self.assertEqual(persist_configs, [False] * len(self.CLUSTERS))
+
+    def test_contexts_for_same_cluster_are_combined(self):
+        # The two cluster-a contexts each see a different subset of the
+        # namespaces; the combined cluster resource must have all of them.
+        cluster_names = ("cluster-a", "cluster-b", "cluster-a")
+        kubernetes_settings = {"contexts": {"cluster-a-ctx": {"namespaces": ["ns-00", "ns-01"]},
+                                            "cluster-a-ctx2": {"namespaces": ["ns-02"]}}}
+
+        def normalized_snapshot(max_concurrent_clusters):
+            registry = run_index(FakeCluster(self.NAMESPACES), self._settings(max_concurrent_clusters),
+                                 cluster_names, kubernetes_settings)
+            snapshot = [(platform_name, type_name, custom_attributes, sorted(instances, key=lambda i: i[0]))
+                        for platform_name, type_name, custom_attributes, instances in snapshot_registry(registry)]
+            return registry, snapshot
+
+        sequential, sequential_snapshot = normalized_snapshot(1)
+        parallel, parallel_snapshot = normalized_snapshot(4)
+        self.assertEqual(parallel_snapshot, sequential_snapshot)
+        cluster = parallel.lookup_resource(KUBERNETES_PLATFORM, "cluster", "cluster-a")
+        self.assertEqual(sorted(cluster.namespaces),
+                         ["cluster-a/ns-00", "cluster-a/ns-01", "cluster-a/ns-02"])
+        self.assertEqual(cluster.context, "cluster-a-ctx")
+        namespace = parallel.lookup_resource(KUBERNETES_PLATFORM, "namespace", "cluster-a/ns-02")
+        self.assertIs(namespace.cluster, cluster)
+
+    def test_group_contexts_by_cluster(self):
+        contexts = _kubeconfig(["a", "b", "a", "c"])["contexts"]
+        groups = kubeapi.group_contexts_by_cluster(contexts)
+        self.assertEqual([[context["name"] for context in group] for group in groups],
+                         [["a-ctx", "a-ctx2"], ["b-ctx"], ["c-ctx"]])
+
+
+def _drop_none_values(value):
+    """Recursively drop the None-valued keys, i.e. the fields the API server wouldn't return."""
+    if isinstance(value, dict):
+        return {k: _drop_none_values(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_drop_none_values(v) for v in value]
+    return value
+
+
+class RawJsonListTest(TestCase):
+    NAMESPACES = [f"ns-{i:02d}" for i in range(4)]
+
+    def _settings(self, raw_json, **extra):
+        settings = {kubeapi.KUBEAPI_RAW_JSON_SETTING.name: raw_json}
+        settings.update(extra)
+        return settings
+
+    def _snapshot(self, settings):
+        return _drop_none_values(snapshot_registry(run_index(FakeCluster(self.NAMESPACES), settings)))
+
+    def test_raw_json_matches_model_registry(self):
+        self.assertEqual(self._snapshot(self._settings(True)), self._snapshot(self._settings(False)))
+
+    def test_raw_json_matches_model_registry_with_cluster_strategy_and_paging(self):
+        extra = {kubeapi.KUBEAPI_LIST_STRATEGY_SETTING.name: kubeapi.KUBEAPI_LIST_STRATEGY_CLUSTER,
+                 kubeapi.KUBEAPI_LIST_PAGE_SIZE_SETTING.name: 3,
+                 kubeapi.KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING.name: 4}
+        self.assertEqual(self._snapshot(self._settings(True, **extra)), self._snapshot(self._settings(False)))
+
+    def test_raw_json_resource_is_plain_data(self):
+        registry = run_index(FakeCluster(self.NAMESPACES[:1]), self._settings(True))
+        deployment = registry.lookup_resource(KUBERNETES_PLATFORM, "deployment", "cluster-a/ns-00/web-0")
+        self.assertEqual(deployment.resource["spec"]["template"]["metadata"]["labels"], {"app": "web-0"})
+        self.assertNotIn("status", deployment.resource)
+        self.assertEqual(getattr(deployment, "template_slash_app"), "web-0")
+
+    def test_exclude_labels_apply_to_raw_resources(self):
+        kubernetes_settings = {"excludeLabels": {"tier": "frontend"}}
+        for raw_json in (False, True):
+            registry = run_index(FakeCluster(self.NAMESPACES[:1]), self._settings(raw_json),
+                                 kubernetes_settings=kubernetes_settings)
+            self.assertIsNone(registry.lookup_resource(KUBERNETES_PLATFORM, "deployment", "cluster-a/ns-00/web-0"))
+            self.assertIsNotNone(registry.lookup_resource(KUBERNETES_PLATFORM, "service", "cluster-a/ns-00/web-0"))
+
+
+class IncrementalDiscoveryTest(TestCase):
+    NAMESPACES = [f"ns-{i:02d}" for i in range(3)]
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.db_path = os.path.join(temp_dir.name, "resources.sqlite")
+        patcher = mock.patch.dict(os.environ, {"RW_RESOURCE_STORE_PATH": self.db_path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _settings(self, **extra):
+        settings = {kubeapi.KUBEAPI_INCREMENTAL_SETTING.name: True}
+        settings.update(extra)
+        return settings
+
+    def _run(self, cluster, **extra):
+        """Run an incremental discovery and save its list states the way the resource store does."""
+        registry, context = run_index_with_context(cluster, self._settings(**extra))
+        conn = sqlite3.connect(self.db_path)
+        try:
+            _init_schema(conn)
+            _snapshot_kubeapi_list_states(conn, context.get_property(KUBEAPI_LIST_STATES_PROPERTY).current)
+            conn.commit()
+        finally:
+            conn.close()
+        return registry
+
+    def _full_snapshot(self, cluster, **extra):
+        settings = {kubeapi.KUBEAPI_RAW_JSON_SETTING.name: True}
+        settings.update(extra)
+        return snapshot_registry(run_index(cluster, settings))
+
+    def _change_cluster(self, cluster):
+        cluster.change_item("Deployment", "ns-00", "web-0",
+                            k8s.V1Deployment(kind="Deployment",
+                                             metadata=_meta("web-0", "ns-00", labels={"app": "web-0", "tier": "edge"}),
+                                             spec=k8s.V1DeploymentSpec(selector=k8s.V1LabelSelector(match_labels={"app": "web-0"}),
+                                                                       template=_pod_template("web-0"))))
+        cluster.change_item("Service", "ns-01", "web-1", None)
+        cluster.change_item("Deployment", "ns-02", "api",
+                            k8s.V1Deployment(kind="Deployment", metadata=_meta("api", "ns-02"),
+                                             spec=k8s.V1DeploymentSpec(selector=k8s.V1LabelSelector(match_labels={"app": "api"}),
+                                                                       template=_pod_template("api"))))
+        cluster.change_item(CRD_PLURAL, "ns-00", "widget-1", None)
+
+    def test_first_run_lists_and_records_watermarks(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        registry, context = run_index_with_context(cluster, self._settings())
+        self.assertEqual(snapshot_registry(registry), self._full_snapshot(FakeCluster(self.NAMESPACES)))
+        self.assertEqual(cluster.watch_requests, [])
+        # Each kind is listed (and later watched) once across all namespaces
+        list_states = context.get_property(KUBEAPI_LIST_STATES_PROPERTY).current
+        self.assertEqual(list_states[("cluster-a", "Deployment", "")].resource_version, "100")
+        self.assertEqual(len(list_states[("cluster-a", "Deployment", "")].items), 2 * len(self.NAMESPACES))
+        self.assertIn(("cluster-a", f"{CRD_PLURAL}.{CRD_GROUP}/{CRD_VERSION}", ""), list_states)
+        self.assertNotIn(("cluster-a", "Deployment", "ns-00"), list_states)
+
+    def _full_list_requests(self, cluster):
+        """The list requests other than the one-item lists that read the current resourceVersion."""
+        return [request for request in cluster.page_requests
+                if request[0] not in ("Namespace", CLUSTER_CRD_PLURAL) and request[2] != 1]
+
+    def test_second_run_applies_changes_from_watch(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        self._run(cluster)
+        self._change_cluster(cluster)
+        cluster.page_requests.clear()
+        registry = self._run(cluster)
+
+        self.assertEqual(self._full_list_requests(cluster), [])
+        self.assertEqual(snapshot_registry(registry), self._full_snapshot(cluster))
+        self.assertIn(("Deployment", None, "100"), cluster.watch_requests)
+        self.assertIsNone(registry.lookup_resource(KUBERNETES_PLATFORM, "service", "cluster-a/ns-01/web-1"))
+        self.assertIsNotNone(registry.lookup_resource(KUBERNETES_PLATFORM, "deployment", "cluster-a/ns-02/api"))
+        deployment = registry.lookup_resource(KUBERNETES_PLATFORM, "deployment", "cluster-a/ns-00/web-0")
+        self.assertEqual(deployment.labels["tier"], "edge")
+
+        # The watermarks advance to the current resourceVersion (with the
+        # bookmark for the kinds without changes), so a third run only sees
+        # the newer changes
+        cluster.watch_requests.clear()
+        cluster.change_item("Service", "ns-02", "web-0", None)
+        registry = self._run(cluster)
+        self.assertEqual(snapshot_registry(registry), self._full_snapshot(cluster))
+        self.assertIn(("Deployment", None, "104"), cluster.watch_requests)
+        self.assertIn(("Service", None, "104"), cluster.watch_requests)
+
+        # Nothing has changed since, so the collections aren't watched at all
+        cluster.watch_requests.clear()
+        registry = self._run(cluster)
+        self.assertEqual(snapshot_registry(registry), self._full_snapshot(cluster))
+        self.assertEqual(cluster.watch_requests, [])
+
+    def test_expired_watermark_falls_back_to_full_list(self):
+        cluster = FakeCluster(self.NAMESPACES)
+        self._run(cluster)
+        self._change_cluster(cluster)
+        cluster.compacted_resource_version = cluster.resource_version
+        cluster.page_requests.clear()
+        registry = self._run(cluster, **{kubeapi.KUBEAPI_MAX_CONCURRENT_REQUESTS_SETTING.name: 4})
+        self.assertEqual(snapshot_registry(registry), self._full_snapshot(cluster))
+        self.assertIn("Deployment", [request[0] for request in self._full_list_requests(cluster)])
+        self.assertTrue(cluster.watch_requests)
+
+    def test_watches_each_kind_once_with_either_strategy(self):
+        for strategy in kubeapi.KUBEAPI_LIST_STRATEGIES:
+            with self.subTest(strategy=strategy):
+                if os.path.exists(self.db_path):
+                    os.remove(self.db_path)
+                extra = {kubeapi.KUBEAPI_LIST_STRATEGY_SETTING.name: strategy}
+                cluster = FakeCluster(self.NAMESPACES, unlisted_namespace_names=["kube-system"])
+                self._run(cluster, **extra)
+                self._change_cluster(cluster)
+                cluster.page_requests.clear()
+                registry = self._run(cluster, **extra)
+                self.assertEqual(self._full_list_requests(cluster), [])
+                self.assertEqual(sorted(kind for kind, namespace, _ in cluster.watch_requests),
+                                 sorted(ClusterWideListStrategyTest.NAMESPACED_KINDS))
+                self.assertTrue(all(namespace is None for _, namespace, _ in cluster.watch_requests))
+                self.assertEqual(snapshot_registry(registry), self._full_snapshot(cluster, **extra))
+
+    def test_namespace_scoped_kinds_are_watched_per_namespace(self):
+        cluster = FakeCluster(self.NAMESPACES, forbidden=[("Service", None)])
+        self._run(cluster)
+        self._change_cluster(cluster)
+        cluster.page_requests.clear()
+        registry = self._run(cluster)
+        self.assertEqual(snapshot_registry(registry), self._full_snapshot(cluster))
+        self.assertIn(("Service", "ns-01", "100"), cluster.watch_requests)
+        self.assertIn(("Deployment", None, "100"), cluster.watch_requests)
+
+    def test_watch_stops_at_current_resource_version(self):
+        def stream(amt=None, decode_content=True):
+            for rv, event_type in ((101, "ADDED"), (102, "BOOKMARK")):
+                obj = {"metadata": {"name": f"item-{rv}", "namespace": "ns", "resourceVersion": str(rv)}}
+                yield json.dumps({"type": event_type, "object": obj}).encode("utf-8") + b"\n"
+            raise AssertionError("read past the current resourceVersion")
+
+        response = mock.Mock(stream=stream)
+        previous = KubeListState("100", [{"metadata": {"name": "item-0", "namespace": "ns"}}])
+        state = watch_list_changes(lambda *args, **kwargs: response, (), {}, previous, "102")
+        self.assertEqual(state.resource_version, "102")
+        self.assertEqual([item["metadata"]["name"] for item in state.items], ["item-0", "item-101"])
+        response.close.assert_called_once()
+        response.release_conn.assert_called_once()
+
+
+class KubeListCallSchedulerTest(TestCase):
+    def test_sequential_calls_are_deferred_until_result(self):
+        calls = []
+        with kubeapi.KubeListCallScheduler(1) as scheduler:
+            handle = scheduler.submit(calls.append, "a")
+            self.assertEqual(calls, [])
+            handle.result()
+        self.assertEqual(calls, ["a"])
+
+    def test_submit_ahead_preserves_order(self):
+        with kubeapi.KubeListCallScheduler(3) as scheduler:
+            results = [(item, handle.result())
+                       for item, handle in scheduler.submit_ahead(range(10), lambda i: scheduler.submit(pow, i, 2))]
+        self.assertEqual(results, [(i, i * i) for i in range(10)])
+
+    def test_exceptions_surface_from_result(self):
+        def fail():
+            raise ApiException(status=403)
+
+        for max_concurrent_requests in (1, 2):
+            with kubeapi.KubeListCallScheduler(max_concurrent_requests) as scheduler:
+                handle = scheduler.submit(fail)
+                with self.assertRaises(ApiException):
+                    handle.result()
@@ -43,12 +43,15 @@ from indexers.sqlite_resource_writer import (  # noqa: E402
     encode_attributes,
     get_resource,
     get_schema_version,
+    list_kubeapi_list_states,
     list_platforms,
     list_resource_types,
     list_resources,
+    list_slx_bindings,
     open_database,
     persist_sqlite_store,
     search_workspace_artifacts,
+    walk_resource_refs,
 )
 
 
@@ -505,6 +508,102 @@ class SelectorTests(TestCase):
             finally:
                 conn.close()
 
+    def test_persist_kubeapi_list_states(self):
+        from indexers.kubeapi_incremental import (
+            KUBEAPI_LIST_STATES_PROPERTY,
+            KubeListStates,
+            load_list_states,
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ctx = _make_context(tmpdir, sqlite=True)
+            list_states = KubeListStates()
+            items = [{"metadata": {"name": "web", "namespace": "ns", "resourceVersion": "41"}}]
+            list_states.for_cluster("c1").record("Deployment", "ns", "42", items)
+            list_states.for_cluster("c1").record("Service", None, "43", [])
+            ctx.set_property(KUBEAPI_LIST_STATES_PROPERTY, list_states)
+            persist_sqlite_store(ctx, db_path="resources.sqlite")
+
+            db_file = os.path.join(tmpdir, "resources.sqlite")
+            conn = open_database(db_file)
+            try:
+                self.assertEqual(
+                    list_kubeapi_list_states(conn),
+                    {
+                        ("c1", "Deployment", "ns"): ("42", items),
+                        ("c1", "Service", ""): ("43", []),
+                    },
+                )
+            finally:
+                conn.close()
+            loaded = load_list_states(db_file)
+            self.assertEqual(loaded[("c1", "Deployment", "ns")].items, items)
+            self.assertEqual(load_list_states(os.path.join(tmpdir, "missing.sqlite")), {})
+
+    def test_streamed_store_matches_previous_implementation(self):
+        # The rows are streamed in batches now; the stored content must be
+        # the same as with the previous row-by-row implementation (kept in
+        # the benchmark as the reference).
+        from benchmarks.sqlite_store_persist import legacy_persist_sqlite_store, make_context
+        from outputter import FileSystemOutputter
+
+        def _rows(db_file):
+            conn = sqlite3.connect(db_file)
+            try:
+                return {
+                    "resources": conn.execute(
+                        "SELECT rowid, platform, resource_type, qualified_name, name, attributes_json"
+                        " FROM resources ORDER BY rowid"
+                    ).fetchall(),
+                    "resource_types": conn.execute(
+                        "SELECT platform, name, custom_attributes FROM resource_types ORDER BY platform, name"
+                    ).fetchall(),
+                    "platforms": conn.execute("SELECT name FROM platforms ORDER BY name").fetchall(),
+                    "workspace_artifacts": conn.execute(
+                        "SELECT workspace_name, relative_path, artifact_kind, media_type, slx_directory, content"
+                        " FROM workspace_artifacts ORDER BY rowid"
+                    ).fetchall(),
+                }
+            finally:
+                conn.close()
+
+        ctx = make_context(resource_count=2500, artifact_count=1200)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ctx.outputter = FileSystemOutputter(tmpdir)
+            legacy_persist_sqlite_store(ctx, db_path="legacy.sqlite")
+            persist_sqlite_store(ctx, db_path="streamed.sqlite")
+            streamed = _rows(os.path.join(tmpdir, "streamed.sqlite"))
+            self.assertEqual(len(streamed["resources"]), 2500)
+            self.assertEqual(len(streamed["workspace_artifacts"]), 1200)
+            self.assertEqual(streamed, _rows(os.path.join(tmpdir, "legacy.sqlite")))
+
+    def test_persist_to_tar_outputter(self):
+        # The database file is added to the archive by path, in rollback
+        # journal mode so it's readable without its -wal file.
+        import io
+        import tarfile
+
+        from outputter import TarFileOutputter
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ctx = _make_context(tmpdir, sqlite=True)
+            ctx.outputter = TarFileOutputter()
+            writer = SqliteResourceWriter(ctx, db_path="resources.sqlite")
+            writer.add_resource("azure", "resource_group", "rg1", "rg1", {"subscription_id": "sub-1"})
+            writer.finalize()
+            persist_sqlite_store(ctx, db_path="resources.sqlite")
+            ctx.outputter.close()
+
+            with tarfile.open(fileobj=io.BytesIO(ctx.outputter.get_bytes()), mode="r") as archive:
+                self.assertEqual(archive.getnames(), ["resources.sqlite"])
+                archive.extractall(tmpdir)
+            conn = open_database(os.path.join(tmpdir, "resources.sqlite"))
+            try:
+                self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+                self.assertEqual([row["qualified_name"] for row in list_resources(conn)], ["rg1"])
+            finally:
+                conn.close()
+
 
 class ReadApiTests(TestCase):
     def test_list_resource_types_includes_custom_attributes(self):
@@ -540,6 +639,137 @@ class ReadApiTests(TestCase):
         self.assertEqual(first, second)
 
 
+class ResourceRefsTests(TestCase):
+    """The ``$ref`` markers are extracted into ``resource_refs`` and walked
+    with ``walk_resource_refs``."""
+
+    def _persist(self, tmpdir: str):
+        from resources import REGISTRY_PROPERTY_NAME, Registry
+
+        ctx = _make_context(tmpdir, sqlite=True)
+        registry = Registry()
+        ctx.set_property(REGISTRY_PROPERTY_NAME, registry)
+        rg = registry.add_resource("azure", "resource_group", "rg1", "rg1", {})
+        subnet = registry.add_resource("azure", "subnet", "sn1", "rg1/sn1", {"resource_group": rg})
+        missing = Registry().add_resource("azure", "resource_group", "rg-other", "rg-other", {})
+        registry.add_resource(
+            "azure",
+            "vm",
+            "vm1",
+            "rg1/vm1",
+            {
+                "resource_group": rg,
+                "nics": [{"name": "nic0"}, {"name": "nic1", "subnet": subnet}],
+                "backup_group": missing,
+            },
+        )
+        # A cycle back to the VM
+        rg.owner = registry.lookup_resource("azure", "vm", "rg1/vm1")
+        persist_sqlite_store(ctx, db_path="resources.sqlite")
+        return open_database(os.path.join(tmpdir, "resources.sqlite"))
+
+    def test_refs_are_extracted_with_their_attribute_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            conn = self._persist(tmpdir)
+            try:
+                rows = conn.execute(
+                    "SELECT src_qn, attr_path, dst_type, dst_qn, dst_name FROM resource_refs "
+                    "ORDER BY src_qn, attr_path"
+                ).fetchall()
+            finally:
+                conn.close()
+        self.assertEqual(
+            rows,
+            [
+                ("rg1", "owner", "vm", "rg1/vm1", "vm1"),
+                ("rg1/sn1", "resource_group", "resource_group", "rg1", "rg1"),
+                ("rg1/vm1", "backup_group", "resource_group", "rg-other", "rg-other"),
+                ("rg1/vm1", "nics[1].subnet", "subnet", "rg1/sn1", "sn1"),
+                ("rg1/vm1", "resource_group", "resource_group", "rg1", "rg1"),
+            ],
+        )
+
+    def test_walk(self):
+        def _walk(conn, qualified_name, resource_type, **kwargs):
+            return [
+                (item["qualified_name"], item["depth"], item["attr_path"], item["resolved"])
+                for item in walk_resource_refs(conn, "azure", resource_type, qualified_name, **kwargs)
+            ]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            conn = self._persist(tmpdir)
+            try:
+                self.assertEqual(
+                    _walk(conn, "rg1/vm1", "vm"),
+                    [
+                        ("rg-other", 1, "backup_group", False),
+                        ("rg1", 1, "resource_group", True),
+                        ("rg1/sn1", 1, "nics[1].subnet", True),
+                    ],
+                )
+                self.assertEqual(
+                    _walk(conn, "rg1", "resource_group", direction="reverse"),
+                    [("rg1/sn1", 1, "resource_group", True), ("rg1/vm1", 1, "resource_group", True)],
+                )
+                # The cycle through rg1 -> vm1 doesn't bring the start back, and
+                # each resource is returned at its shortest depth
+                self.assertEqual(
+                    _walk(conn, "rg1/sn1", "subnet", max_depth=5),
+                    [
+                        ("rg1", 1, "resource_group", True),
+                        ("rg1/vm1", 2, "owner", True),
+                        ("rg-other", 3, "backup_group", False),
+                    ],
+                )
+                self.assertEqual(_walk(conn, "rg1/sn1", "subnet", max_depth=5, limit=2)[-1][0], "rg1/vm1")
+                with self.assertRaises(ValueError):
+                    walk_resource_refs(conn, "azure", "vm", "rg1/vm1", direction="sideways")
+            finally:
+                conn.close()
+
+
+class SlxBindingsTests(TestCase):
+    """The resources each SLX was generated for are recorded in ``slx_bindings``."""
+
+    def test_bindings_in_both_directions(self):
+        from renderers.rendered_artifacts import record_slx_bindings
+        from resources import REGISTRY_PROPERTY_NAME, Registry
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ctx = _make_context(tmpdir, sqlite=True)
+            registry = Registry()
+            ctx.set_property(REGISTRY_PROPERTY_NAME, registry)
+            db1 = registry.add_resource("azure", "sql_database", "db1", "rg1/db1", {})
+            db2 = registry.add_resource("azure", "sql_database", "db2", "rg1/db2", {})
+            vault = registry.add_resource("azure", "key_vault", "kv1", "rg1/kv1", {})
+            # The primary resource is also the first of the child resources
+            record_slx_bindings(ctx, "workspaces/ws/slxs/sql-dbs", db1, [db1, db2])
+            record_slx_bindings(ctx, "workspaces/ws/slxs/kv1-health", vault)
+            persist_sqlite_store(ctx, db_path="resources.sqlite")
+            conn = open_database(os.path.join(tmpdir, "resources.sqlite"))
+            try:
+                self.assertEqual(
+                    [
+                        (binding["qualified_name"], binding["name"], binding["role"])
+                        for binding in list_slx_bindings(conn, slx_directory="workspaces/ws/slxs/sql-dbs")
+                    ],
+                    [("rg1/db1", "db1", "primary"), ("rg1/db2", "db2", "child")],
+                )
+                self.assertEqual(
+                    [
+                        (binding["workspace_name"], binding["slx_directory"], binding["role"])
+                        for binding in list_slx_bindings(
+                            conn, platform="azure", resource_type="sql_database", qualified_name="rg1/db2"
+                        )
+                    ],
+                    [("workspace", "workspaces/ws/slxs/sql-dbs", "child")],
+                )
+                self.assertEqual(len(list_slx_bindings(conn)), 3)
+                self.assertEqual(list_slx_bindings(conn, workspace_name="other-ws"), [])
+            finally:
+                conn.close()
+
+
 class SnapshotHelperTests(TestCase):
     """Cover the lower-level ``_snapshot_registry`` directly so debug scripts
     can re-use it without instantiating a writer."""
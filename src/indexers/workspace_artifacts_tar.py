@@ -13,6 +13,13 @@ This module lets those consumers reconstruct the workspace tree (or just count
 SLXs) directly from the DB, so the small-file IO + tar-from-disk walk can be
 skipped on large workspaces.
 
+It also builds the *delta uploads*: the ``relative_path -> sha256`` manifest of
+the last successful upload is recorded in the store (``upload_manifests``
+table), and a delta upload only carries the files added or modified since,
+the paths deleted since, and the full manifest of the new tree.
+:func:`apply_upload_delta` is the reference for how the receiving side
+reconstructs the tree from its copy of the previous upload.
+
 The produced archive is *behaviour-equivalent* to the disk-based tar that
 ``run.py`` builds today with ``archive.add(".")`` from
 ``output/workspaces/<workspace_name>``: it carries the same set of file members
@@ -24,14 +31,20 @@ contract; see :func:`tar_file_members` which both sides are compared through.)
 
 from __future__ import annotations
 
+import hashlib
 import io
+import json
 import sqlite3
 import tarfile
-from typing import Iterable, Optional
+from typing import Iterable, NamedTuple, Optional
+
+from archive_compression import ArchiveCompression, GzipBlockWriter
 
 # A fixed modification time keeps the generated archive deterministic. The
 # value is irrelevant to consumers (the platform reads file contents, not
 # mtimes) but determinism makes the builder easy to test and cache-friendly.
+# It's used for the gzip header too, so identical workspaces produce identical
+# bytes whatever the compression level and number of workers.
 _DETERMINISTIC_MTIME = 0
 
 
@@ -53,21 +66,26 @@ def build_tar_gz_from_artifacts(
     artifacts: Iterable[tuple[str, str | bytes]],
     *,
     mtime: int = _DETERMINISTIC_MTIME,
+    compression: ArchiveCompression = ArchiveCompression(),
 ) -> bytes:
     """Build an in-memory ``tar.gz`` from ``(member_path, content)`` pairs.
 
     Only file members are emitted (no explicit directory entries); tar
     extraction creates parent directories on demand, so the resulting tree is
     identical to the disk-based archive once extracted.
+
+    :param compression: gzip level and number of compression threads (see
+        :mod:`archive_compression`); the archive is a plain ``tar.gz`` either way.
     """
     buffer = io.BytesIO()
-    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
-        for member_path, content in artifacts:
-            data = content if isinstance(content, bytes) else content.encode("utf-8")
-            info = tarfile.TarInfo(_normalize_member_path(member_path))
-            info.size = len(data)
-            info.mtime = mtime
-            tar.addfile(info, io.BytesIO(data))
+    with GzipBlockWriter(buffer, compression, mtime) as gzip_writer:
+        with tarfile.open(fileobj=gzip_writer, mode="w") as tar:
+            for member_path, content in artifacts:
+                data = content if isinstance(content, bytes) else content.encode("utf-8")
+                info = tarfile.TarInfo(_normalize_member_path(member_path))
+                info.size = len(data)
+                info.mtime = mtime
+                tar.addfile(info, io.BytesIO(data))
     return buffer.getvalue()
 
 
@@ -83,12 +101,32 @@ def read_workspace_artifacts(
     return [(row[0], row[1]) for row in rows]
 
 
+def read_workspace_members(
+    conn: sqlite3.Connection,
+    workspace_name: str,
+    *,
+    strip_prefix: Optional[str] = None,
+) -> list[tuple[str, str]]:
+    """Return the ``(member_path, content)`` pairs of a workspace's archive.
+
+    :param strip_prefix: see :func:`build_workspace_tar_gz`.
+    """
+    members: list[tuple[str, str]] = []
+    for relative_path, content in read_workspace_artifacts(conn, workspace_name):
+        member = relative_path
+        if strip_prefix and member.startswith(strip_prefix):
+            member = member[len(strip_prefix):]
+        members.append((member, content))
+    return members
+
+
 def build_workspace_tar_gz(
     conn: sqlite3.Connection,
     workspace_name: str,
     *,
     strip_prefix: Optional[str] = None,
     mtime: int = _DETERMINISTIC_MTIME,
+    compression: ArchiveCompression = ArchiveCompression(),
 ) -> bytes:
     """Build a ``tar.gz`` of a workspace's rendered files from the DB.
 
@@ -99,13 +137,8 @@ def build_workspace_tar_gz(
         When ``None`` the stored ``relative_path`` is used verbatim (matching
         the ``/run`` response tar produced by the outputter).
     """
-    members: list[tuple[str, str]] = []
-    for relative_path, content in read_workspace_artifacts(conn, workspace_name):
-        member = relative_path
-        if strip_prefix and member.startswith(strip_prefix):
-            member = member[len(strip_prefix):]
-        members.append((member, content))
-    return build_tar_gz_from_artifacts(members, mtime=mtime)
+    members = read_workspace_members(conn, workspace_name, strip_prefix=strip_prefix)
+    return build_tar_gz_from_artifacts(members, mtime=mtime, compression=compression)
 
 
 def count_slxs(conn: sqlite3.Connection, workspace_name: str) -> int:
@@ -118,6 +151,79 @@ def count_slxs(conn: sqlite3.Connection, workspace_name: str) -> int:
     return int(row[0]) if row else 0
 
 
+# ---------------------------------------------------------------------------
+# Delta uploads
+# ---------------------------------------------------------------------------
+
+class UploadDelta(NamedTuple):
+    """The changes of a workspace's upload tree since the previous upload."""
+    # (member_path, content) of the added and modified files, ordered by path
+    changed_members: list[tuple[str, str | bytes]]
+    added: list[str]
+    modified: list[str]
+    deleted: list[str]
+    # Manifest of the whole new tree
+    manifest: dict[str, str]
+
+
+def artifact_sha256(content: str | bytes) -> str:
+    data = content if isinstance(content, bytes) else content.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_upload_manifest(members: Iterable[tuple[str, str | bytes]]) -> dict[str, str]:
+    """Return the ``{member_path: sha256}`` manifest of an upload tree."""
+    return {_normalize_member_path(member_path): artifact_sha256(content) for member_path, content in members}
+
+
+def upload_manifest_digest(manifest: dict[str, str]) -> str:
+    """Digest identifying a whole upload tree, e.g. to check the base of a delta."""
+    return artifact_sha256(json.dumps(manifest, sort_keys=True, separators=(",", ":")))
+
+
+def compute_upload_delta(
+    members: Iterable[tuple[str, str | bytes]], previous_manifest: dict[str, str]
+) -> UploadDelta:
+    """Diff an upload tree against the manifest of the previous upload."""
+    changed_members: list[tuple[str, str | bytes]] = []
+    added: list[str] = []
+    modified: list[str] = []
+    manifest: dict[str, str] = {}
+    for member_path, content in members:
+        member_path = _normalize_member_path(member_path)
+        digest = artifact_sha256(content)
+        manifest[member_path] = digest
+        previous_digest = previous_manifest.get(member_path)
+        if previous_digest == digest:
+            continue
+        (added if previous_digest is None else modified).append(member_path)
+        changed_members.append((member_path, content))
+    deleted = sorted(path for path in previous_manifest if path not in manifest)
+    changed_members.sort(key=lambda member: member[0])
+    return UploadDelta(changed_members, sorted(added), sorted(modified), deleted, manifest)
+
+
+def apply_upload_delta(
+    files: dict[str, bytes],
+    delta_tar_gz: bytes,
+    deleted: Iterable[str],
+    manifest: dict[str, str],
+) -> dict[str, bytes]:
+    """Reconstruct an upload tree from the previous one and a delta upload.
+
+    :param files: ``{member_path: content}`` of the previous upload.
+    :raises ValueError: if the result doesn't match ``manifest``, i.e. the
+        previous tree isn't the one the delta was computed against.
+    """
+    reconstructed = dict(files)
+    for path in deleted:
+        reconstructed.pop(_normalize_member_path(path), None)
+    reconstructed.update(tar_file_members(delta_tar_gz))
+    if build_upload_manifest(reconstructed.items()) != manifest:
+        raise ValueError("The delta upload doesn't apply to the previous upload")
+    return reconstructed
+
+
 # ---------------------------------------------------------------------------
 # Convenience wrappers that operate on a DB file path (used by run.py, which
 # only has the extracted sqlite file on disk, not a live connection).
@@ -127,6 +233,7 @@ def build_upload_tar_gz_from_db_file(
     db_file_path: str,
     workspace_name: str,
     workspace_output_path: str = "workspaces",
+    compression: ArchiveCompression = ArchiveCompression(),
 ) -> bytes:
     """Build the platform-upload ``tar.gz`` for ``workspace_name`` from a DB file.
 
@@ -137,7 +244,50 @@ def build_upload_tar_gz_from_db_file(
     strip_prefix = f"{workspace_output_path}/{workspace_name}/"
     conn = sqlite3.connect(db_file_path)
     try:
-        return build_workspace_tar_gz(conn, workspace_name, strip_prefix=strip_prefix)
+        return build_workspace_tar_gz(conn, workspace_name, strip_prefix=strip_prefix, compression=compression)
+    finally:
+        conn.close()
+
+
+def read_upload_members_from_db_file(
+    db_file_path: str,
+    workspace_name: str,
+    workspace_output_path: str = "workspaces",
+) -> list[tuple[str, str]]:
+    """Return the ``(member_path, content)`` pairs of the platform-upload tree from a DB file.
+
+    These are the members of :func:`build_upload_tar_gz_from_db_file`.
+    """
+    strip_prefix = f"{workspace_output_path}/{workspace_name}/"
+    conn = sqlite3.connect(db_file_path)
+    try:
+        return read_workspace_members(conn, workspace_name, strip_prefix=strip_prefix)
+    finally:
+        conn.close()
+
+
+def load_upload_manifest_from_db_file(db_file_path: str, workspace_name: str) -> dict[str, str]:
+    """Return the manifest of the last upload of ``workspace_name``, or ``{}`` if there's none."""
+    from .sqlite_resource_writer import list_upload_manifest
+
+    conn = sqlite3.connect(db_file_path)
+    try:
+        return list_upload_manifest(conn, workspace_name)
+    except sqlite3.OperationalError:
+        # A store written before the upload manifests were recorded
+        return {}
+    finally:
+        conn.close()
+
+
+def record_upload_manifest_in_db_file(db_file_path: str, workspace_name: str, manifest: dict[str, str]) -> None:
+    """Record ``manifest`` as the manifest of the last upload of ``workspace_name``."""
+    from .sqlite_resource_writer import replace_upload_manifest
+
+    conn = sqlite3.connect(db_file_path)
+    try:
+        replace_upload_manifest(conn, workspace_name, manifest)
+        conn.commit()
     finally:
         conn.close()
 
@@ -172,9 +322,19 @@ def tar_file_members(tar_bytes: bytes) -> dict[str, bytes]:
 __all__ = [
     "build_tar_gz_from_artifacts",
     "read_workspace_artifacts",
+    "read_workspace_members",
     "build_workspace_tar_gz",
     "count_slxs",
+    "UploadDelta",
+    "artifact_sha256",
+    "build_upload_manifest",
+    "upload_manifest_digest",
+    "compute_upload_delta",
+    "apply_upload_delta",
     "build_upload_tar_gz_from_db_file",
+    "read_upload_members_from_db_file",
+    "load_upload_manifest_from_db_file",
+    "record_upload_manifest_in_db_file",
     "count_slxs_from_db_file",
     "tar_file_members",
 ]
@@ -2,11 +2,22 @@ from abc import ABC, abstractmethod
 from enum import Enum
 
 from io import BytesIO
+import filecmp
+import hashlib
+import json
 import os
-from typing import AnyStr, Optional, Union
+import shutil
+import stat
+from typing import AnyStr, BinaryIO, Callable, Iterable, Iterator, Optional, Union
 import tarfile
+import tempfile
 import time
 
+from archive_compression import ArchiveCompression, GzipBlockWriter
+
+# Size of the chunks local files are read in when they're copied to an output
+COPY_CHUNK_SIZE = 1024 * 1024
+
 
 class Outputter(ABC):
     """
@@ -18,6 +29,15 @@ class Outputter(ABC):
     @abstractmethod
     def close(self) -> None: ...
 
+    def write_file_from_path(self, path: str, source_path: str) -> None:
+        """
+        Write the content of a local file, e.g. a database built in a temporary
+        file. Outputters that can copy or stream it override this to avoid
+        reading the whole file into memory.
+        """
+        with open(source_path, "rb") as f:
+            self.write_file(path, f.read())
+
 
 class FileSystemOutputter(Outputter):
     """
@@ -37,15 +57,176 @@ class FileSystemOutputter(Outputter):
         with open(full_path, mode=mode) as f:
             f.write(data)
 
+    def write_file_from_path(self, path: str, source_path: str) -> None:
+        full_path = os.path.join(self.root_directory_path, path)
+        directory_path, _ = os.path.split(full_path)
+        os.makedirs(directory_path, exist_ok=True)
+        shutil.copyfile(source_path, full_path)
+
     def close(self):
         pass
 
 
+class SyncFileSystemOutputter(FileSystemOutputter):
+    """
+    Output method that synchronizes the local file system with the written
+    files, instead of rewriting all of them.
+
+    A manifest of the content hash of each file written by the previous run is
+    kept in the root directory. A file is only written if its content differs
+    from the file that's on disk, and when the outputter is closed the files
+    from the previous run that weren't written again are deleted. Files that
+    aren't in the manifest are left alone, except in the managed directories,
+    which are pruned of any file that wasn't written by this run (as if they
+    had been deleted and rewritten).
+    """
+    MANIFEST_FILE_NAME = ".output-manifest.json"
+    MANIFEST_VERSION = 1
+
+    manifest_path: str
+    previous_manifest: dict[str, dict]
+    manifest: dict[str, dict]
+    stats: dict[str, int]
+
+    def __init__(self, root_directory_path: str, managed_directories: Iterable[str] = ()):
+        super().__init__(root_directory_path)
+        self.managed_directories = [os.path.normpath(directory) for directory in managed_directories]
+        self.manifest_path = os.path.join(root_directory_path, self.MANIFEST_FILE_NAME)
+        self.previous_manifest = self._load_manifest()
+        self.manifest = dict()
+        self.stats = {"written": 0, "unchanged": 0, "deleted": 0}
+
+    def _load_manifest(self) -> dict[str, dict]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest_data = json.load(f)
+        except FileNotFoundError:
+            return dict()
+        except ValueError:
+            # A corrupt manifest just means that everything is compared with the files on disk
+            return dict()
+        if not isinstance(manifest_data, dict) or manifest_data.get("version") != self.MANIFEST_VERSION:
+            return dict()
+        return manifest_data.get("files", dict())
+
+    def _normalize_path(self, path: str) -> str:
+        normalized_path = os.path.normpath(path)
+        if os.path.isabs(normalized_path) or normalized_path.split(os.sep)[0] == os.pardir:
+            raise ValueError(f"Output path {path} is outside of the output directory")
+        return normalized_path
+
+    @staticmethod
+    def _stat_entry(stat_result: os.stat_result) -> dict:
+        return {"size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+
+    def _is_unchanged(self, path: str, full_path: str, size: int, digest: str,
+                      has_content: Callable[[str], bool]) -> Optional[os.stat_result]:
+        try:
+            stat_result = os.stat(full_path)
+        except FileNotFoundError:
+            return None
+        if not stat.S_ISREG(stat_result.st_mode) or stat_result.st_size != size:
+            return None
+        previous_entry = self.previous_manifest.get(path)
+        if previous_entry and previous_entry.get("mtime_ns") == stat_result.st_mtime_ns \
+                and previous_entry.get("size") == stat_result.st_size:
+            return stat_result if previous_entry.get("sha256") == digest else None
+        # The file isn't the one from the manifest (or there's no manifest), so
+        # compare the content itself; reading is still cheaper than rewriting.
+        return stat_result if has_content(full_path) else None
+
+    def _record(self, path: str, full_path: str, digest: str, stat_result: Optional[os.stat_result]) -> None:
+        if stat_result is not None:
+            self.stats["unchanged"] += 1
+        else:
+            stat_result = os.stat(full_path)
+            self.stats["written"] += 1
+        self.manifest[path] = {"sha256": digest, **self._stat_entry(stat_result)}
+
+    def write_file(self, path: str, data: AnyStr) -> None:
+        path = self._normalize_path(path)
+        data_bytes = data if isinstance(data, bytes) else data.encode('utf-8')
+        digest = hashlib.sha256(data_bytes).hexdigest()
+        full_path = os.path.join(self.root_directory_path, path)
+
+        def has_content(file_path: str) -> bool:
+            with open(file_path, "rb") as f:
+                return f.read() == data_bytes
+
+        stat_result = self._is_unchanged(path, full_path, len(data_bytes), digest, has_content)
+        if stat_result is None:
+            super().write_file(path, data_bytes)
+        self._record(path, full_path, digest, stat_result)
+
+    def write_file_from_path(self, path: str, source_path: str) -> None:
+        path = self._normalize_path(path)
+        digest = hashlib.sha256()
+        with open(source_path, "rb") as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        full_path = os.path.join(self.root_directory_path, path)
+        stat_result = self._is_unchanged(path, full_path, os.path.getsize(source_path), digest.hexdigest(),
+                                         lambda file_path: filecmp.cmp(source_path, file_path, shallow=False))
+        if stat_result is None:
+            super().write_file_from_path(path, source_path)
+        self._record(path, full_path, digest.hexdigest(), stat_result)
+
+    def _delete_file(self, path: str) -> None:
+        full_path = os.path.join(self.root_directory_path, path)
+        try:
+            os.remove(full_path)
+        except FileNotFoundError:
+            return
+        self.stats["deleted"] += 1
+        # Remove the directories that are left empty, up to the root directory
+        directory_path = os.path.dirname(path)
+        while directory_path:
+            try:
+                os.rmdir(os.path.join(self.root_directory_path, directory_path))
+            except OSError:
+                break
+            directory_path = os.path.dirname(directory_path)
+
+    def close(self):
+        stale_paths = set(path for path in self.previous_manifest if path not in self.manifest)
+        for directory in self.managed_directories:
+            for directory_path, _, file_names in os.walk(os.path.join(self.root_directory_path, directory)):
+                for file_name in file_names:
+                    path = os.path.relpath(os.path.join(directory_path, file_name), self.root_directory_path)
+                    if path not in self.manifest:
+                        stale_paths.add(path)
+        for path in sorted(stale_paths):
+            self._delete_file(path)
+        manifest_data = {"version": self.MANIFEST_VERSION, "files": self.manifest}
+        temp_manifest_path = self.manifest_path + ".tmp"
+        os.makedirs(self.root_directory_path, exist_ok=True)
+        with open(temp_manifest_path, "w") as f:
+            json.dump(manifest_data, f, sort_keys=True)
+        os.replace(temp_manifest_path, self.manifest_path)
+
+
+def sync_tar_archive(archive: tarfile.TarFile, outputter: SyncFileSystemOutputter) -> dict[str, int]:
+    """
+    Apply the files of a tar archive to the local file system as a delta,
+    through a SyncFileSystemOutputter, and return its stats. The archive can be
+    opened in stream mode. Only regular file members are supported; directories
+    are created on demand.
+    """
+    for member in archive:
+        if member.isdir():
+            continue
+        if not member.isfile():
+            raise ValueError(f"Unsupported archive member type for {member.name}")
+        outputter.write_file(member.name, archive.extractfile(member).read())
+    outputter.close()
+    return outputter.stats
+
+
 class TarFileOutputter(Outputter):
     """
     Output method that writes file content to a tar archive.
     """
-    byte_stream: Optional[BytesIO]
+    byte_stream: Optional[BinaryIO]
     tar: tarfile.TarFile
     modification_time: float
 
@@ -54,18 +235,40 @@ class TarFileOutputter(Outputter):
         GZIP = "gz"
         LZMA = "z"
 
-    def __init__(self, file: AnyStr = None, compression: Optional[Compression] = Compression.GZIP):
-        mode = "x:" + (compression.value if compression else "")
+    def __init__(self,
+                 file: AnyStr = None,
+                 compression: Optional[Compression] = Compression.GZIP,
+                 fileobj: Optional[BinaryIO] = None,
+                 compression_options: ArchiveCompression = ArchiveCompression()):
+        # gzip archives are compressed by a GzipBlockWriter, so that the level
+        # and the number of compression threads can be configured.
+        self.gzip_writer = None
+        self.file_stream = None
+        if compression == TarFileOutputter.Compression.GZIP:
+            mode = "x:"
+        else:
+            mode = "x:" + (compression.value if compression else "")
         if file:
-            self.tar = tarfile.open(file, mode)
             self.byte_stream = None
+            if compression == TarFileOutputter.Compression.GZIP:
+                self.file_stream = open(file, "xb")
+                self.gzip_writer = GzipBlockWriter(self.file_stream, compression_options)
+                self.tar = tarfile.open(mode=mode, fileobj=self.gzip_writer)
+            else:
+                self.tar = tarfile.open(file, mode)
         else:
-            self.byte_stream = BytesIO()
-            self.tar = tarfile.open(mode=mode, fileobj=self.byte_stream)
+            self.byte_stream = fileobj if fileobj is not None else BytesIO()
+            if compression == TarFileOutputter.Compression.GZIP:
+                self.gzip_writer = GzipBlockWriter(self.byte_stream, compression_options)
+            self.tar = tarfile.open(mode=mode, fileobj=self.gzip_writer or self.byte_stream)
         self.modification_time = time.time()
 
     def close(self):
         self.tar.close()
+        if self.gzip_writer is not None:
+            self.gzip_writer.close()
+        if self.file_stream is not None:
+            self.file_stream.close()
 
     def write_file(self, path: str, data: AnyStr) -> None:
         data_bytes = data if isinstance(data, bytes) else data.encode('utf-8')
@@ -75,10 +278,64 @@ class TarFileOutputter(Outputter):
         info.mtime = self.modification_time
         self.tar.addfile(info, data_stream)
 
+    def write_file_from_path(self, path: str, source_path: str) -> None:
+        info = tarfile.TarInfo(path)
+        info.size = os.path.getsize(source_path)
+        info.mtime = self.modification_time
+        with open(source_path, "rb") as f:
+            self.tar.addfile(info, f)
+
     def get_bytes(self) -> bytes:
         if not self.byte_stream:
             raise Exception("get_bytes only supported for in-memory archives")
-        return self.byte_stream.getvalue()
+        if isinstance(self.byte_stream, BytesIO):
+            return self.byte_stream.getvalue()
+        return b"".join(self.iter_chunks())
+
+    def get_size(self) -> int:
+        """Size in bytes of the (closed) archive."""
+        if not self.byte_stream:
+            raise Exception("get_size only supported for in-memory or spooled archives")
+        self.byte_stream.seek(0, os.SEEK_END)
+        return self.byte_stream.tell()
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Iterate over the content of the (closed) archive in chunks, e.g. to
+        stream it in a response without a copy of the whole archive in memory.
+        """
+        if not self.byte_stream:
+            raise Exception("iter_chunks only supported for in-memory or spooled archives")
+        self.byte_stream.seek(0)
+        while True:
+            chunk = self.byte_stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class SpooledTarFileOutputter(TarFileOutputter):
+    """
+    Output method that writes file content to a tar archive that's kept in
+    memory until it grows past max_size, and then spooled to a temporary file.
+    The temporary file is deleted when the outputter is discarded.
+    """
+    DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+
+    def __init__(self,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 compression: Optional[TarFileOutputter.Compression] = TarFileOutputter.Compression.GZIP,
+                 directory: Optional[str] = None,
+                 compression_options: ArchiveCompression = ArchiveCompression()):
+        super().__init__(compression=compression,
+                         fileobj=tempfile.SpooledTemporaryFile(max_size=max_size, dir=directory),
+                         compression_options=compression_options)
+
+    def discard(self) -> None:
+        """Close the archive, if that hasn't been done yet, and delete its temporary file."""
+        if not self.tar.closed:
+            self.close()
+        self.byte_stream.close()
 
 
 class OutputItem:
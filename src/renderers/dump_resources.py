@@ -1,4 +1,5 @@
-from component import Context, Setting, SettingDependency
+from component import Context, Setting, SettingDependency, ARCHIVE_COMPRESSION_LEVEL_SETTING, \
+    ARCHIVE_COMPRESSION_WORKERS_SETTING
 from resources import Registry, REGISTRY_PROPERTY_NAME
 from enrichers.generation_rules import SLXS_PROPERTY  # for access to aggregated SLX info
 from indexers.resource_writer import (
@@ -21,6 +22,8 @@ SETTINGS = (
     SettingDependency(RESOURCE_DUMP_PATH_SETTING, False),
     SettingDependency(RESOURCE_STORE_BACKEND_SETTING, False),
     SettingDependency(RESOURCE_STORE_PATH_SETTING, False),
+    SettingDependency(ARCHIVE_COMPRESSION_LEVEL_SETTING, False),
+    SettingDependency(ARCHIVE_COMPRESSION_WORKERS_SETTING, False),
 )
 
 def render(context: Context):
@@ -1,12 +1,22 @@
+import multiprocessing
 import os
 import yaml
 import logging
 import time
-from typing import Any, Callable, Optional, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Any, Callable, Iterator, NamedTuple, Optional, List
 
 from component import Context, Setting, SettingDependency, WORKSPACE_NAME_SETTING, \
-    LOCATION_ID_SETTING, WORKSPACE_OUTPUT_PATH_SETTING
-from template import render_template_file
+    LOCATION_ID_SETTING, WORKSPACE_OUTPUT_PATH_SETTING, ARCHIVE_COMPRESSION_LEVEL_SETTING, \
+    ARCHIVE_COMPRESSION_WORKERS_SETTING
+from template import (
+    TEMPLATE_STRING_CACHE_STATS_PROPERTY,
+    TemplateLoaderKey,
+    get_template_string_cache_stats,
+    render_template_file,
+)
 from exceptions import WorkspaceBuilderException
 from workspace_builder.log_buffer import get_log_buffer
 from renderers.rendered_artifacts import init_rendered_artifacts, record_rendered_artifact
@@ -50,6 +60,22 @@ WRITE_WORKSPACE_FILES_TO_DISK_SETTING = Setting(
     False,
 )
 
+RENDER_WORKERS_SETTING = Setting(
+    "RENDER_WORKERS",
+    "renderWorkers",
+    Setting.Type.INTEGER,
+    "Number of worker processes used to post-process the rendered output items "
+    "(YAML validation, secretsProvided/tag deduplication and configProvided "
+    "overrides), sharded by SLX directory. The templates are still rendered in "
+    "the main process. The default of 0 renders everything sequentially.",
+    0,
+)
+
+# Number of SLX directories per render worker that are in flight at each stage
+# of the parallel render, enough to keep the workers busy while the templates
+# are rendered in the main process.
+_RENDER_WINDOW_PER_WORKER = 4
+
 # FIXME: Not sure these settings dependencies are still needed/valid?
 SETTINGS = (
     SettingDependency(LOCATION_ID_SETTING, True),
@@ -57,6 +83,9 @@ SETTINGS = (
     SettingDependency(WORKSPACE_OUTPUT_PATH_SETTING, True),
     SettingDependency(WRITE_WORKSPACE_FILES_TO_DISK_SETTING, False),
     SettingDependency(RESOURCE_STORE_BACKEND_SETTING, False),
+    SettingDependency(RENDER_WORKERS_SETTING, False),
+    SettingDependency(ARCHIVE_COMPRESSION_LEVEL_SETTING, False),
+    SettingDependency(ARCHIVE_COMPRESSION_WORKERS_SETTING, False),
 )
 
 OUTPUT_ITEMS_PROPERTY = "output_items"
@@ -66,6 +95,7 @@ class OutputItem:
     path: str
     template_name: str
     template_loader_func: Optional[Callable[[str], str]]
+    template_loader_key: Optional[TemplateLoaderKey]
     template_variables: dict[str, Any]
     raw_content: Optional[str]
 
@@ -73,10 +103,15 @@ class OutputItem:
                  template_name: str,
                  template_variables: dict[str, Any],
                  template_loader_func: Optional[Callable[[str], str]] = None,
-                 raw_content: Optional[str] = None):
+                 raw_content: Optional[str] = None,
+                 template_loader_key: Optional[TemplateLoaderKey] = None):
         self.path = path
         self.template_name = template_name
         self.template_loader_func = template_loader_func
+        # Key of a template loader registered with template.register_template_loader,
+        # e.g. for the templates of a codebundle. Items with the same key share a
+        # cached Jinja environment, so their templates are only compiled once.
+        self.template_loader_key = template_loader_key
         self.template_variables = template_variables
         # When ``raw_content`` is set, the renderer writes it verbatim to ``path``
         # without invoking Jinja or post-processing. Used for codebundle overlay
@@ -186,13 +221,26 @@ def validate_rendered_yaml(data: dict, yaml_text: str) -> None:
                 )
 
 
-def deduplicate_secrets_provided(yaml_text: str) -> str:
+# The rendered output is parsed with the libyaml based loader when PyYAML was
+# built with it. The output is still emitted with the pure Python dumper: the
+# libyaml emitter folds long scalars differently, which would change the
+# rendered artifacts.
+RENDERED_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_rendered_yaml(yaml_text: str) -> Any:
+    return yaml.load(yaml_text, Loader=RENDERED_YAML_LOADER)
+
+
+def dump_rendered_yaml(data: Any) -> str:
+    return yaml.dump(data, sort_keys=False, default_flow_style=False, allow_unicode=True)
+
+
+def normalize_rendered_data(data: Any, yaml_text: str) -> None:
     """
-    Post-processes rendered YAML: deduplicates secretsProvided and tags,
-    and computes resourcePath from hierarchy + tags.
+    Post-processes the parsed rendered YAML in place: validates it, deduplicates
+    secretsProvided and tags, and computes resourcePath from hierarchy + tags.
     """
-    data = yaml.safe_load(yaml_text)  # Load the YAML as a Python dictionary
-
     validate_rendered_yaml(data, yaml_text)
 
     if 'secretsProvided' in data['spec']:
@@ -222,35 +270,53 @@ def deduplicate_secrets_provided(yaml_text: str) -> str:
     
     # Compute resourcePath from hierarchy + tags (always in sync)
     compute_resource_path_from_hierarchy(data)
-    
-    # Use PyYAML to dump with proper YAML formatting
-    return yaml.dump(data, sort_keys=False, default_flow_style=False, allow_unicode=True)
+
+
+def deduplicate_secrets_provided(yaml_text: str) -> str:
+    """
+    Post-processes rendered YAML: deduplicates secretsProvided and tags,
+    and computes resourcePath from hierarchy + tags.
+    """
+    data = load_rendered_yaml(yaml_text)
+    normalize_rendered_data(data, yaml_text)
+    return dump_rendered_yaml(data)
+
 
 def apply_config_provided_overrides(context: Context, output_text: str, output_item: OutputItem) -> str:
     """
     Apply configProvided overrides to the rendered output by modifying the YAML content.
     """
     try:
-        overrides = context.get_property("overrides", {})
+        parsed_yaml = load_rendered_yaml(output_text)
+    except yaml.YAMLError:
+        logger.info(f"Could not parse YAML for override processing: {output_item.path}")
+        return output_text
+    if not apply_config_provided_overrides_to_data(context.get_property("overrides", {}), parsed_yaml, output_item):
+        return output_text
+    return dump_rendered_yaml(parsed_yaml)
+
+
+def apply_config_provided_overrides_to_data(overrides: dict[str, Any], parsed_yaml: Any, output_item) -> bool:
+    """
+    Apply the configProvided overrides matching the output item to its parsed
+    rendered YAML, in place. Returns whether an override matched, i.e. whether
+    the YAML needs to be re-serialized.
+
+    ``output_item`` is either an OutputItem or a PostProcessTask; only the path
+    and template variables are used.
+    """
+    try:
         if not overrides or "codebundles" not in overrides:
-            return output_text
-            
-        # Parse the rendered YAML
-        import yaml
-        try:
-            parsed_yaml = yaml.safe_load(output_text)
-        except yaml.YAMLError:
-            logger.info(f"Could not parse YAML for override processing: {output_item.path}")
-            return output_text
+            return False
             
         # Check if this is a file that has configProvided section
         if not parsed_yaml or not isinstance(parsed_yaml, dict):
-            return output_text
+            return False
             
         spec = parsed_yaml.get('spec', {})
         config_provided = spec.get('configProvided', [])
         if not config_provided:
-            return output_text
+            return False
             
         # Extract codebundle info from template variables
         template_vars = output_item.template_variables
@@ -260,7 +326,7 @@ def apply_config_provided_overrides(context: Context, output_text: str, output_i
         if 'codebundles/' in generation_rule_path:
             current_codebundle_dir = generation_rule_path.split('codebundles/')[1].split('/')[0]
         else:
-            return output_text
+            return False
             
         # Determine the type based on the file kind
         file_kind = parsed_yaml.get('kind', '').lower()
@@ -269,7 +335,7 @@ def apply_config_provided_overrides(context: Context, output_text: str, output_i
         elif file_kind == 'servicelevelindicator':
             current_type = 'sli'
         else:
-            return output_text
+            return False
             
         logger.debug(f"Post-render override check for: repo_url='{current_repo_url}', codebundle_dir='{current_codebundle_dir}', type='{current_type}'")
         
@@ -289,31 +355,94 @@ def apply_config_provided_overrides(context: Context, output_text: str, output_i
                 
                 logger.info(f"POST-RENDER MATCH FOUND! Applying overrides for {current_codebundle_dir}/{current_type}")
                 
-                # Apply variable overrides to configProvided section
+                # Find the configProvided entries to update and the tag values
+                # to coerce first, so that an error leaves the parsed YAML unmodified
+                updates = []
                 config_overrides = override.get('configProvided', {})
                 for var_name, var_value in config_overrides.items():
-                    # Find and update the configProvided entry
                     for config_item in config_provided:
                         if config_item.get('name') == var_name:
-                            old_value = config_item.get('value')
-                            config_item['value'] = str(var_value)
-                            logger.info(f"POST-RENDER Applied configProvided override: {var_name} = {var_value} (was: {old_value})")
+                            updates.append((config_item, var_name, str(var_value)))
                             break
-                
+
                 # CRITICAL FIX: Ensure all tag values remain as quoted strings before re-serializing
+                tag_values = []
                 if 'spec' in parsed_yaml and 'tags' in parsed_yaml['spec']:
                     for tag in parsed_yaml['spec']['tags']:
                         if 'value' in tag:
-                            tag['value'] = str(tag['value'])  # Force all tag values to strings
-                
-                # Re-serialize the YAML with proper formatting
-                return yaml.dump(parsed_yaml, default_flow_style=False, sort_keys=False, allow_unicode=True)
+                            tag_values.append((tag, str(tag['value'])))  # Force all tag values to strings
+
+                # Apply variable overrides to configProvided section
+                for config_item, var_name, var_value in updates:
+                    old_value = config_item.get('value')
+                    config_item['value'] = var_value
+                    logger.info(f"POST-RENDER Applied configProvided override: {var_name} = {var_value} (was: {old_value})")
+                for tag, tag_value in tag_values:
+                    tag['value'] = tag_value
+
+                return True
                 
-        return output_text
+        return False
         
     except Exception as e:
         logger.info(f"Error in post-render configProvided override processing: {e}")
-        return output_text
+        return False
+
+# The template variables used by the configProvided overrides post-processing
+OVERRIDE_TEMPLATE_VARIABLE_NAMES = ('repo_url', 'generation_rule_file_path')
+
+
+class PostProcessTask(NamedTuple):
+    """
+    The (picklable) subset of an output item that's needed to post-process its
+    rendered text in a render worker process.
+    """
+    path: str
+    output_text: str
+    template_variables: dict[str, Any]
+
+
+class RenderResult(NamedTuple):
+    """The post-processed text of an output item, or the error that skipped it."""
+    output_text: Optional[str]
+    error: Optional[str] = None
+    # Whether the error was a WorkspaceBuilderException (e.g. a template or
+    # validation error) rather than an unexpected exception
+    expected_error: bool = False
+
+
+def make_post_process_task(output_item: OutputItem, output_text: str) -> PostProcessTask:
+    template_variables = {name: output_item.template_variables[name]
+                          for name in OVERRIDE_TEMPLATE_VARIABLE_NAMES
+                          if name in output_item.template_variables}
+    return PostProcessTask(output_item.path, output_text, template_variables)
+
+
+def post_process_rendered_output(overrides: dict[str, Any], output_item, output_text: str) -> str:
+    """
+    Post-process the rendered text of an output item. The text is parsed once,
+    all the transforms are applied to the parsed YAML and it's serialized once.
+    """
+    data = load_rendered_yaml(output_text)
+    # Validate + deduplicate 'secretsProvided'
+    normalize_rendered_data(data, output_text)
+    # Apply configProvided overrides
+    apply_config_provided_overrides_to_data(overrides, data, output_item)
+    return dump_rendered_yaml(data)
+
+
+def post_process_rendered_outputs(overrides: dict[str, Any], tasks: list[PostProcessTask]) -> list[RenderResult]:
+    """Post-process a batch of rendered output items; run in the render worker processes."""
+    results = list()
+    for task in tasks:
+        try:
+            results.append(RenderResult(post_process_rendered_output(overrides, task, task.output_text)))
+        except WorkspaceBuilderException as e:
+            results.append(RenderResult(None, str(e), True))
+        except Exception as e:
+            results.append(RenderResult(None, str(e), False))
+    return results
+
 
 def _slx_first_sort_key(item: OutputItem) -> tuple:
     """Sort key that ensures slx.yaml is rendered before its siblings in the
@@ -356,11 +485,115 @@ def resolve_write_files_to_disk(context: Context) -> bool:
     return False
 
 
+def _render_template(output_item: OutputItem) -> RenderResult:
+    """Render the template of an output item, without the post-processing."""
+    try:
+        return RenderResult(render_template_file(output_item.template_name,
+                                                 output_item.template_variables,
+                                                 output_item.template_loader_func,
+                                                 output_item.template_loader_key))
+    except WorkspaceBuilderException as e:
+        return RenderResult(None, str(e), True)
+    except Exception as e:
+        return RenderResult(None, str(e), False)
+
+
+def _render_output_item(overrides: dict[str, Any], output_item: OutputItem) -> RenderResult:
+    if output_item.raw_content is not None:
+        return RenderResult(output_item.raw_content)
+    result = _render_template(output_item)
+    if result.output_text is None:
+        return result
+    return post_process_rendered_outputs(overrides, [make_post_process_task(output_item, result.output_text)])[0]
+
+
+def _render_output_items_in_parallel(overrides: dict[str, Any],
+                                     sorted_items: list[OutputItem],
+                                     render_workers: int) -> Iterator[Optional[RenderResult]]:
+    """
+    Render the output items, post-processing the rendered YAML across a pool of
+    worker processes, sharded by SLX directory. The templates themselves are
+    rendered in this process, since the codebundle templates are loaded through
+    the code collection git repos, which can't be shared with the workers.
+
+    Yields the results in the order of ``sorted_items``; None for the items that
+    are skipped because the slx.yaml in their directory failed to render. As
+    with sequential rendering, the siblings of an slx.yaml are only rendered
+    once the slx.yaml has rendered successfully.
+
+    Up to ``_RENDER_WINDOW_PER_WORKER`` directories per worker are in flight at
+    each of the two stages (the slx.yaml, then its siblings), and the results
+    of a directory are yielded as soon as they've been collected, so the caller
+    keeps reporting progress and only the texts of the window are held at once.
+    """
+    directories = (list(items) for _, items in groupby(sorted_items, key=lambda item: os.path.dirname(item.path)))
+    window_size = render_workers * _RENDER_WINDOW_PER_WORKER
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=render_workers, mp_context=mp_context) as executor:
+        def submit(items: list[OutputItem]) -> list:
+            # Render the templates here and submit the post-processing of the
+            # successfully rendered ones to the workers.
+            results = [RenderResult(item.raw_content) if item.raw_content is not None else _render_template(item)
+                       for item in items]
+            tasks = [make_post_process_task(item, result.output_text)
+                     for item, result in zip(items, results)
+                     if item.raw_content is None and result.output_text is not None]
+            future = executor.submit(post_process_rendered_outputs, overrides, tasks) if tasks else None
+            return [results, future]
+
+        def collect(items: list[OutputItem], pending: list) -> list[RenderResult]:
+            results, future = pending
+            post_processed_results = iter(future.result() if future else ())
+            return [next(post_processed_results) if item.raw_content is None and result.output_text is not None
+                    else result
+                    for item, result in zip(items, results)]
+
+        # Directories whose slx.yaml is being rendered, as (items, pending),
+        # and directories whose siblings are, as (items, slx results, pending).
+        # Directories move through both in order, so the oldest directory is
+        # at the head of siblings_window whenever it isn't empty.
+        slx_window = deque()
+        siblings_window = deque()
+
+        def advance_slx():
+            items, pending = slx_window.popleft()
+            if pending is None:
+                siblings_window.append((items, [], submit(items)))
+                return
+            slx_result = collect(items[:1], pending)[0]
+            if slx_result.output_text is None:
+                siblings_window.append((items, [slx_result], None))
+            else:
+                siblings_window.append((items, [slx_result], submit(items[1:])))
+
+        def finish_directory() -> list[Optional[RenderResult]]:
+            items, results, pending = siblings_window.popleft()
+            if pending is None:
+                return results + [None] * (len(items) - len(results))
+            return results + collect(items[len(results):], pending)
+
+        for items in directories:
+            has_slx = os.path.basename(items[0].path) == 'slx.yaml'
+            slx_window.append((items, submit(items[:1]) if has_slx else None))
+            if len(slx_window) > window_size:
+                advance_slx()
+            if len(siblings_window) > window_size:
+                yield from finish_directory()
+        while slx_window:
+            advance_slx()
+            if len(siblings_window) > window_size:
+                yield from finish_directory()
+        while siblings_window:
+            yield from finish_directory()
+
+
 def render(context: Context):
     output_items: dict[str, OutputItem] = context.get_property(OUTPUT_ITEMS_PROPERTY, {})
     skipped_templates: List[dict] = []
     failed_slx_dirs: set = set()
     write_files_to_disk = resolve_write_files_to_disk(context)
+    overrides = context.get_property("overrides", {})
+    render_workers = context.get_setting(RENDER_WORKERS_SETTING) or 0
     
     # Initialize render statistics tracking
     render_stats = {
@@ -370,12 +603,23 @@ def render(context: Context):
         'start_time': time.time()
     }
     context.set_property("RENDER_STATS", render_stats)
+    # The template string cache counters of the run (of the render, if the
+    # start of the run wasn't recorded)
+    template_string_cache_start = context.get_property(TEMPLATE_STRING_CACHE_STATS_PROPERTY)
+    if template_string_cache_start is None:
+        template_string_cache_start = get_template_string_cache_stats()
 
     sorted_items = sorted(output_items.values(), key=_slx_first_sort_key)
     total_items = len(sorted_items)
     last_progress_log = time.time()
     render_progress_interval = 15  # seconds between progress logs
 
+    if render_workers > 1 and total_items > 1:
+        logger.info(f"Rendering {total_items} output items with {render_workers} render workers")
+        results = _render_output_items_in_parallel(overrides, sorted_items, render_workers)
+    else:
+        results = None
+
     for idx, output_item in enumerate(sorted_items):
         # Report progress to the health tracker so the liveness probe can see
         # the render phase is advancing, even on very large workspaces.
@@ -400,6 +644,7 @@ def render(context: Context):
             last_progress_log = time.time()
 
         slx_dir = os.path.dirname(output_item.path)
+        result = next(results) if results is not None else None
 
         if slx_dir in failed_slx_dirs:
             logger.warning(
@@ -417,63 +662,38 @@ def render(context: Context):
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Template variables for {output_item.path}: {output_item.template_variables}")
 
-        try:
-            if output_item.raw_content is not None:
-                output_text = output_item.raw_content
+        if result is None:
+            result = _render_output_item(overrides, output_item)
+
+        if result.output_text is not None:
+            try:
+                # Write the deduplicated output to the file
                 if write_files_to_disk:
-                    context.write_file(output_item.path, output_text)
-                record_rendered_artifact(context, output_item.path, output_text)
+                    context.write_file(output_item.path, result.output_text)
+                record_rendered_artifact(context, output_item.path, result.output_text)
                 render_stats['successfully_rendered'] += 1
                 continue
+            except Exception as e:
+                result = RenderResult(None, str(e), isinstance(e, WorkspaceBuilderException))
 
-            # Render the template
-            output_text = render_template_file(output_item.template_name,
-                                              output_item.template_variables,
-                                              output_item.template_loader_func)
-
-            # Validate + deduplicate 'secretsProvided'
-            deduplicated_output = deduplicate_secrets_provided(output_text)
-
-            # Apply configProvided overrides
-            deduplicated_output = apply_config_provided_overrides(context, deduplicated_output, output_item)
-
-            # Write the deduplicated output to the file
-            if write_files_to_disk:
-                context.write_file(output_item.path, deduplicated_output)
-            record_rendered_artifact(context, output_item.path, deduplicated_output)
-            render_stats['successfully_rendered'] += 1
-        except WorkspaceBuilderException as e:
-            logger.info(f"Skipping template {output_item.template_name} for {output_item.path}: {str(e)}")
-            get_log_buffer().append({
-                "level": "ERROR",
-                "logger": __name__,
-                "message": f"Skipping template {output_item.template_name} for {output_item.path}: {e}",
-                "phase": "render",
-            })
-            skipped_templates.append({
-                "path": output_item.path,
-                "template": output_item.template_name,
-                "error": str(e)
-            })
-            render_stats['skipped'] += 1
-            if os.path.basename(output_item.path) == 'slx.yaml':
-                failed_slx_dirs.add(slx_dir)
-        except Exception as e:
-            logger.warning(f"Unexpected error rendering {output_item.template_name} for {output_item.path}: {str(e)}")
-            get_log_buffer().append({
-                "level": "ERROR",
-                "logger": __name__,
-                "message": f"Skipping template {output_item.template_name} for {output_item.path}: {e}",
-                "phase": "render",
-            })
-            skipped_templates.append({
-                "path": output_item.path,
-                "template": output_item.template_name,
-                "error": str(e)
-            })
-            render_stats['skipped'] += 1
-            if os.path.basename(output_item.path) == 'slx.yaml':
-                failed_slx_dirs.add(slx_dir)
+        if result.expected_error:
+            logger.info(f"Skipping template {output_item.template_name} for {output_item.path}: {result.error}")
+        else:
+            logger.warning(f"Unexpected error rendering {output_item.template_name} for {output_item.path}: {result.error}")
+        get_log_buffer().append({
+            "level": "ERROR",
+            "logger": __name__,
+            "message": f"Skipping template {output_item.template_name} for {output_item.path}: {result.error}",
+            "phase": "render",
+        })
+        skipped_templates.append({
+            "path": output_item.path,
+            "template": output_item.template_name,
+            "error": result.error
+        })
+        render_stats['skipped'] += 1
+        if os.path.basename(output_item.path) == 'slx.yaml':
+            failed_slx_dirs.add(slx_dir)
 
     if failed_slx_dirs:
         logger.info(f"SLX directories skipped due to errors: {sorted(failed_slx_dirs)}")
@@ -497,10 +717,15 @@ def render(context: Context):
     # Calculate and log render statistics
     render_stats['end_time'] = time.time()
     render_stats['duration'] = render_stats['end_time'] - render_stats['start_time']
+    # Compiled template string (paths, template variables, names) cache counters
+    render_stats['template_string_cache'] = get_template_string_cache_stats(since=template_string_cache_start)
     
     # Log summary statistics
     logger.info(f"Render Summary:")
     logger.info(f"  Total output items to render: {render_stats['total_output_items']}")
     logger.info(f"  Successfully rendered: {render_stats['successfully_rendered']}")
     logger.info(f"  Skipped due to errors: {render_stats['skipped']}")
-    logger.info(f"  Render duration: {render_stats['duration']:.2f} seconds")
\ No newline at end of file
+    logger.info(f"  Render duration: {render_stats['duration']:.2f} seconds")
+    template_string_cache_stats = render_stats['template_string_cache']
+    logger.info(f"  Template string cache: hits={template_string_cache_stats['hits']}, "
+                f"misses={template_string_cache_stats['misses']}, size={template_string_cache_stats['size']}")
\ No newline at end of file
@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 import os
-from typing import Any
+from typing import Any, Iterable
 
 from component import Context
+from resources import Resource
 
 RENDERED_ARTIFACTS_PROPERTY = "rendered_artifacts"
+SLX_BINDINGS_PROPERTY = "slx_bindings"
+
+SLX_BINDING_ROLE_PRIMARY = "primary"
+SLX_BINDING_ROLE_CHILD = "child"
 
 
 def init_rendered_artifacts(context: Context) -> None:
@@ -68,3 +73,37 @@ def record_rendered_artifact(context: Context, relative_path: str, content: str)
         }
     )
     context.set_property(RENDERED_ARTIFACTS_PROPERTY, artifacts)
+
+
+def record_slx_bindings(
+    context: Context,
+    slx_directory_path: str,
+    resource: Resource,
+    child_resources: Iterable[Resource] = (),
+) -> None:
+    """Record the resources an SLX was generated for: the resource that produced it,
+    and the other resources aggregated into it (when it isn't qualified by resource)."""
+    bindings: list[dict[str, Any]] = context.get_property(SLX_BINDINGS_PROPERTY, [])
+    slx_directory = slx_directory_path.replace("\\", "/")
+    seen = set()
+    for role, bound_resource in [(SLX_BINDING_ROLE_PRIMARY, resource)] + [
+        (SLX_BINDING_ROLE_CHILD, child) for child in child_resources
+    ]:
+        resource_type = bound_resource.resource_type
+        platform = resource_type.platform if resource_type else None
+        if platform is None:
+            continue
+        key = (platform.name, resource_type.name, bound_resource.qualified_name)
+        if key in seen:
+            continue
+        seen.add(key)
+        bindings.append(
+            {
+                "slx_directory": slx_directory,
+                "platform": platform.name,
+                "resource_type": resource_type.name,
+                "qualified_name": bound_resource.qualified_name,
+                "role": role,
+            }
+        )
+    context.set_property(SLX_BINDINGS_PROPERTY, bindings)
@@ -0,0 +1,185 @@
+"""
+Unit tests for the parallel render mode (``renderWorkers``) of
+``renderers.render_output_items``.
+
+The rendered artifacts, files, skipped templates report and render stats must
+be the same as with sequential rendering, including skipping the siblings of
+an slx.yaml that fails to render.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from unittest import TestCase, mock
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.dirname(_THIS_DIR)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from component import (  # noqa: E402
+    Context,
+    LOCATION_ID_SETTING,
+    WORKSPACE_NAME_SETTING,
+    WORKSPACE_OUTPUT_PATH_SETTING,
+)
+from exceptions import WorkspaceBuilderException  # noqa: E402
+from indexers.resource_writer import RESOURCE_STORE_BACKEND_SETTING  # noqa: E402
+from outputter import FileSystemOutputter  # noqa: E402
+from renderers import render_output_items  # noqa: E402
+from renderers.render_output_items import (  # noqa: E402
+    OUTPUT_ITEMS_PROPERTY,
+    OutputItem,
+    RENDER_WORKERS_SETTING,
+    WRITE_WORKSPACE_FILES_TO_DISK_SETTING,
+)
+from renderers.rendered_artifacts import RENDERED_ARTIFACTS_PROPERTY  # noqa: E402
+from template import (  # noqa: E402
+    TEMPLATE_STRING_CACHE_STATS_PROPERTY,
+    get_template_string_cache_stats,
+    render_template_string,
+)
+
+TEMPLATES = {
+    "slx.yaml": ("kind: ServiceLevelX\nspec:\n  alias: {{ name }}\n  tags:\n"
+                 "  - name: replicas\n    value: {{ replicas }}\n  - name: replicas\n    value: '{{ replicas }}'\n"),
+    "runbook.yaml": ("kind: Runbook\nspec:\n  secretsProvided:\n  - name: kubeconfig\n    workspaceKey: a\n"
+                     "  - name: kubeconfig\n    workspaceKey: b\n  configProvided:\n"
+                     "  - name: NAMESPACE\n    value: {{ name }}\n"),
+    "bad-tags.yaml": "kind: ServiceLevelX\nspec:\n  tags:\n  - just-a-string\n",
+    "no-spec.yaml": "kind: Other\n",
+}
+
+
+def _load_template(name: str) -> str:
+    try:
+        return TEMPLATES[name]
+    except KeyError:
+        raise WorkspaceBuilderException(f"Template not found: {name}")
+
+
+def _make_context(tmpdir: str, render_workers: int) -> Context:
+    setting_values = {
+        LOCATION_ID_SETTING.name: "loc1",
+        WORKSPACE_NAME_SETTING.name: "ws",
+        WORKSPACE_OUTPUT_PATH_SETTING.name: "workspaces",
+        RESOURCE_STORE_BACKEND_SETTING.name: "sqlite",
+        WRITE_WORKSPACE_FILES_TO_DISK_SETTING.name: True,
+        RENDER_WORKERS_SETTING.name: render_workers,
+    }
+    context = Context(setting_values=setting_values, outputter=FileSystemOutputter(tmpdir))
+    render_output_items.load(context)
+    context.set_property("overrides", {"codebundles": [{
+        "repoURL": "https://example.com/collection.git",
+        "codebundleDirectory": "k8s-health",
+        "type": "runbook",
+        "configProvided": {"NAMESPACE": "overridden"},
+    }]})
+    output_items = context.get_property(OUTPUT_ITEMS_PROPERTY)
+
+    def add(path: str, template_name: str, **template_variables):
+        template_variables.setdefault("name", os.path.basename(os.path.dirname(path)))
+        template_variables.setdefault("replicas", 3)
+        output_items[path] = OutputItem(path, template_name, template_variables, _load_template)
+
+    for i in range(12):
+        slx_dir = f"workspaces/ws/slxs/slx-{i:02d}"
+        if i % 4 == 1:
+            add(f"{slx_dir}/slx.yaml", "bad-tags.yaml")
+        elif i % 4 == 2:
+            add(f"{slx_dir}/slx.yaml", "missing.yaml")
+        else:
+            add(f"{slx_dir}/slx.yaml", "slx.yaml")
+        add(f"{slx_dir}/runbook.yaml", "runbook.yaml",
+            repo_url="https://example.com/collection.git",
+            generation_rule_file_path="codebundles/k8s-health/.runwhen/generation-rules/rule.yaml")
+        add(f"{slx_dir}/sli.yaml", "no-spec.yaml" if i % 4 == 3 else "slx.yaml")
+        output_items[f"{slx_dir}/Skill.md"] = OutputItem(f"{slx_dir}/Skill.md", "Skill.md", {},
+                                                         raw_content=f"# Skill {i}\n")
+    add("workspaces/ws/other/config.yaml", "runbook.yaml")
+    add("workspaces/ws/other/broken.yaml", "bad-tags.yaml")
+    return context
+
+
+def _render(render_workers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        context = _make_context(tmp, render_workers)
+        render_output_items.render(context)
+        files = dict()
+        for root, _, file_names in os.walk(os.path.join(tmp, "workspaces", "ws")):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                with open(path) as f:
+                    files[os.path.relpath(path, tmp)] = f.read()
+        render_stats = context.get_property("RENDER_STATS")
+        return {
+            "artifacts": context.get_property(RENDERED_ARTIFACTS_PROPERTY),
+            "files": files,
+            "stats": {key: render_stats[key] for key in ("total_output_items", "successfully_rendered", "skipped")},
+            "failed_slx_dirs": context.get_property("FAILED_SLX_DIRS"),
+        }
+
+
+class ParallelRenderTest(TestCase):
+
+    def test_parallel_render_matches_sequential_render(self):
+        sequential = _render(0)
+        parallel = _render(3)
+        self.assertEqual(parallel, sequential)
+
+        rendered_paths = [artifact["relative_path"] for artifact in sequential["artifacts"]]
+        self.assertEqual(rendered_paths, sorted(rendered_paths, key=lambda p: (os.path.dirname(p),
+                                                                               os.path.basename(p) != "slx.yaml",
+                                                                               os.path.basename(p))))
+        # All the siblings of a failed slx.yaml are skipped, including the raw content
+        self.assertEqual(sequential["failed_slx_dirs"],
+                         {f"workspaces/ws/slxs/slx-{i:02d}" for i in range(12) if i % 4 in (1, 2)})
+        self.assertNotIn("workspaces/ws/slxs/slx-01/runbook.yaml", rendered_paths)
+        self.assertNotIn("workspaces/ws/slxs/slx-02/Skill.md", rendered_paths)
+        self.assertNotIn("workspaces/ws/slxs/slx-03/sli.yaml", rendered_paths)
+        self.assertIn("workspaces/ws/slxs/slx-03/runbook.yaml", rendered_paths)
+        self.assertEqual(sequential["stats"], {"total_output_items": 50, "successfully_rendered": 22, "skipped": 28})
+        runbook = sequential["files"]["workspaces/ws/slxs/slx-00/runbook.yaml"]
+        self.assertEqual(runbook.count("name: kubeconfig"), 1)
+        self.assertIn("value: overridden", runbook)
+
+    def test_template_string_cache_stats_are_for_the_run(self):
+        # Template strings compiled before the run don't count
+        render_template_string("{{ name }}#before-the-run", {"name": "x"})
+        with tempfile.TemporaryDirectory() as tmp:
+            context = _make_context(tmp, 0)
+            context.set_property(TEMPLATE_STRING_CACHE_STATS_PROPERTY, get_template_string_cache_stats())
+            for i in range(3):
+                render_template_string("{{ name }}#during-the-run", {"name": f"slx-{i}"})
+            render_output_items.render(context)
+            template_string_cache_stats = context.get_property("RENDER_STATS")["template_string_cache"]
+        self.assertEqual((template_string_cache_stats["hits"], template_string_cache_stats["misses"]), (2, 1))
+
+    def test_parallel_render_yields_before_rendering_every_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            context = _make_context(tmp, 1)
+            sorted_items = sorted(context.get_property(OUTPUT_ITEMS_PROPERTY).values(),
+                                  key=render_output_items._slx_first_sort_key)
+            rendered = []
+            render_template = render_output_items._render_template
+
+            def record_render(output_item):
+                rendered.append(output_item.path)
+                return render_template(output_item)
+
+            with mock.patch.object(render_output_items, "_RENDER_WINDOW_PER_WORKER", 2), \
+                    mock.patch.object(render_output_items, "_render_template", side_effect=record_render):
+                results = render_output_items._render_output_items_in_parallel(
+                    context.get_property("overrides"), sorted_items, 1)
+                first_result = next(results)
+                rendered_before_first_result = len(rendered)
+                remaining_results = list(results)
+
+        self.assertIsInstance(first_result, render_output_items.RenderResult)
+        self.assertEqual(len(remaining_results), len(sorted_items) - 1)
+        # Only the window of directories around the first one has been rendered
+        rendered_directories = {os.path.dirname(path) for path in rendered[:rendered_before_first_result]}
+        self.assertLessEqual(len(rendered_directories), 5)
+        self.assertLess(rendered_before_first_result, len(rendered))
@@ -0,0 +1,117 @@
+"""
+Unit tests for the single-parse post-processing of the rendered output items
+in ``renderers.render_output_items``.
+
+``post_process_rendered_output`` parses the rendered text once and applies the
+validation, the secretsProvided / tags deduplication and the configProvided
+overrides to the parsed YAML. These pin that the output, and the errors, are
+the same as parsing and re-dumping the text in each step.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import sys
+from unittest import TestCase
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.dirname(_THIS_DIR)
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from benchmarks.render_post_processing import (  # noqa: E402
+    CODE_BUNDLE,
+    CODE_COLLECTION_URL,
+    legacy_post_process_rendered_output,
+    make_workspace,
+)
+from exceptions import WorkspaceBuilderException  # noqa: E402
+from renderers.render_output_items import (  # noqa: E402
+    PostProcessTask,
+    apply_config_provided_overrides_to_data,
+    post_process_rendered_output,
+)
+
+TEMPLATE_VARIABLES = {"repo_url": CODE_COLLECTION_URL,
+                      "generation_rule_file_path": f"codebundles/{CODE_BUNDLE}/.runwhen/generation-rules/rule.yaml"}
+
+OVERRIDES = {"codebundles": [
+    {"repoURL": CODE_COLLECTION_URL, "codebundleDirectory": CODE_BUNDLE, "type": "sli",
+     "configProvided": {"NAMESPACE": "overridden", "MISSING": 1}},
+    {"repoURL": CODE_COLLECTION_URL, "codebundleDirectory": CODE_BUNDLE, "type": "runbook",
+     "configProvided": {"NAMESPACE": "first", "THRESHOLD": 3.5}},
+]}
+
+DOCUMENTS = (
+    # Tags with non-string and duplicate values, and a hierarchy
+    "kind: ServiceLevelX\nspec:\n  additionalContext:\n    hierarchy: [platform, namespace]\n"
+    "  tags:\n  - {name: platform, value: kubernetes}\n  - {name: namespace, value: 12}\n"
+    "  - {name: namespace, value: '12'}\n  - {name: flag, value: true}\n",
+    # An override with a bad configProvided entry after a matching one
+    "kind: Runbook\nspec:\n  configProvided:\n  - name: NAMESPACE\n    value: a\n  - just-a-string\n"
+    "  - name: THRESHOLD\n    value: 1\n",
+    # Anchors and aliases, unicode, long strings and dates
+    "kind: ServiceLevelIndicator\nspec:\n  common: &common {name: NAMESPACE, value: ns}\n"
+    "  configProvided:\n  - *common\n  - {name: OTHER, value: 'é中 " + "x" * 120 + "'}\n"
+    "  since: 2024-01-02\n  secretsProvided:\n  - {name: a, workspaceKey: x}\n  - {name: a, workspaceKey: y}\n",
+    # Non-mapping spec keys and an empty spec
+    "kind: Runbook\nspec: {}\n",
+    "kind: 12\nspec:\n  configProvided:\n  - name: NAMESPACE\n    value: x\n",
+)
+
+INVALID_DOCUMENTS = (
+    "kind: ServiceLevelX\n",
+    "",
+    "- a\n- b\n",
+    "kind: ServiceLevelX\nspec:\n  tags:\n  - just-a-string\n",
+    "kind: ServiceLevelX\nspec:\n  additionalContext:\n    hierarchy:\n    - {a: b}\n",
+    "kind: Runbook\nspec:\n  secretsProvided:\n  - workspaceKey: no-name\n",
+    "kind: Runbook\nspec: [unclosed\n",
+)
+
+
+def _outcome(post_process, overrides, task):
+    try:
+        return post_process(overrides, task, task.output_text)
+    except WorkspaceBuilderException as e:
+        return WorkspaceBuilderException, str(e)
+    except Exception as e:
+        return type(e)
+
+
+class RenderPostProcessingTest(TestCase):
+
+    def test_matches_parsing_in_each_step(self):
+        tasks = make_workspace(20).tasks
+        tasks += [PostProcessTask(f"doc-{i}.yaml", text, TEMPLATE_VARIABLES) for i, text in enumerate(DOCUMENTS)]
+        for overrides in ({}, OVERRIDES, make_workspace(0).overrides):
+            for task in tasks:
+                self.assertEqual(post_process_rendered_output(overrides, task, task.output_text),
+                                 legacy_post_process_rendered_output(overrides, task, task.output_text), task.path)
+
+    def test_errors_match_parsing_in_each_step(self):
+        for text in INVALID_DOCUMENTS:
+            task = PostProcessTask("invalid.yaml", text, TEMPLATE_VARIABLES)
+            outcome = _outcome(post_process_rendered_output, OVERRIDES, task)
+            self.assertNotIsInstance(outcome, str, text)
+            if isinstance(outcome, tuple):
+                self.assertEqual(outcome, _outcome(legacy_post_process_rendered_output, OVERRIDES, task), text)
+            else:
+                self.assertIsInstance(_outcome(legacy_post_process_rendered_output, OVERRIDES, task), type, text)
+
+    def test_overrides_are_applied(self):
+        task = PostProcessTask("runbook.yaml", DOCUMENTS[1].replace("  - just-a-string\n", ""), TEMPLATE_VARIABLES)
+        output_text = post_process_rendered_output(OVERRIDES, task, task.output_text)
+        self.assertIn("value: first", output_text)
+        self.assertIn("value: '3.5'", output_text)
+
+    def test_failed_override_leaves_data_unmodified(self):
+        # A tag the tag value coercion can't handle, after the overridden configProvided entry
+        data = {"kind": "Runbook", "spec": {"configProvided": [{"name": "NAMESPACE", "value": "a"}],
+                                            "tags": [{"name": "flag", "value": True}, 12]}}
+        expected = copy.deepcopy(data)
+        task = PostProcessTask("runbook.yaml", "", TEMPLATE_VARIABLES)
+        self.assertFalse(apply_config_provided_overrides_to_data(OVERRIDES, data, task))
+        self.assertEqual(data, expected)
+        self.assertIs(data["spec"]["tags"][0]["value"], True)
@@ -193,6 +193,17 @@ class Registry:
         if type(resource_type_name) != str:
             raise WorkspaceBuilderException(f"Expected string value for resource type name, got {type(resource_type_name)} instead.")
 
+    def _get_or_add_resource_type(self, platform_name: str, resource_type_name: str) -> ResourceType:
+        platform = self.platforms.get(platform_name)
+        if not platform:
+            platform = Platform(platform_name)
+            self.platforms[platform_name] = platform
+        resource_type = platform.resource_types.get(resource_type_name)
+        if not resource_type:
+            resource_type = ResourceType(resource_type_name, platform)
+            platform.resource_types[resource_type_name] = resource_type
+        return resource_type
+
     def add_resource(self,
                      platform_name: str,
                      resource_type_name: str,
@@ -207,14 +218,7 @@ class Registry:
         shouldn't make any subsequent modifications to it.
         """
         self.check_resource_type_is_string(resource_type_name)
-        platform = self.platforms.get(platform_name)
-        if not platform:
-            platform = Platform(platform_name)
-            self.platforms[platform_name] = platform
-        resource_type = platform.resource_types.get(resource_type_name)
-        if not resource_type:
-            resource_type = ResourceType(resource_type_name, platform)
-            platform.resource_types[resource_type_name] = resource_type
+        resource_type = self._get_or_add_resource_type(platform_name, resource_type_name)
         custom_attributes = set(resource_attributes.keys())
         resource_type.update_custom_attributes(custom_attributes)
         # Check if there's an existing resource with the same qualified name.
@@ -264,6 +268,33 @@ class Registry:
             resource_type.instances[resource_qualified_name] = resource
         return resource
 
+    def merge(self, other: "Registry"):
+        """
+        Move the resources from another registry into this one, e.g. to combine
+        the results of indexers that ran concurrently into their own staging
+        registries. The resources are moved rather than copied, so references
+        between resources in the other registry remain valid. Platforms, resource
+        types and resources are added in the other registry's order.
+
+        If a resource with the same qualified name already exists, its attributes
+        are updated from the other resource, the same as with add_resource. The
+        other registry is empty afterwards.
+        """
+        for platform_name, other_platform in other.platforms.items():
+            for resource_type_name, other_resource_type in other_platform.resource_types.items():
+                resource_type = self._get_or_add_resource_type(platform_name, resource_type_name)
+                resource_type.update_custom_attributes(other_resource_type.custom_attributes)
+                for resource_qualified_name, resource in other_resource_type.instances.items():
+                    existing_resource = resource_type.instances.get(resource_qualified_name)
+                    if existing_resource:
+                        logger.debug(f"Updating existing resource with name {resource_qualified_name}")
+                        existing_resource.set_attributes({key: value for key, value in vars(resource).items()
+                                                          if key not in ("name", "qualified_name", "resource_type")})
+                    else:
+                        resource.resource_type = resource_type
+                        resource_type.instances[resource_qualified_name] = resource
+        other.platforms = dict()
+
     def lookup_resource(self,
                         platform_name: str,
                         resource_type_name: str,
@@ -7,11 +7,12 @@ import sys
 import tarfile
 import time
 import shutil
+import sqlite3
 import subprocess
 import tempfile
 from argparse import ArgumentParser
 from http import HTTPStatus
-from typing import Union
+from typing import Optional, Union
 
 import requests
 import yaml
@@ -22,6 +23,14 @@ from utils import get_request_verify
 from azure_utils import generate_kubeconfig_for_aks
 from aws_utils import generate_kubeconfig_for_eks
 from gcp_utils import generate_kubeconfig_for_gke
+from archive_compression import ArchiveCompression
+from outputter import SyncFileSystemOutputter, sync_tar_archive
+from workspace_builder.serialization import (
+    ARCHIVE_MEDIA_TYPE,
+    RUN_REQUEST_DATA_PART,
+    RUN_RESULT_HEADER,
+    deserialize_run_result_header,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +58,10 @@ UPLOAD_COMMAND = 'upload'
 
 CUSTOMIZATION_RULES_DEFAULT = "map-customization-rules"
 
+# The uploadType of a delta upload, which the platform echoes back in its
+# response when it has applied the upload as a delta
+DELTA_UPLOAD_TYPE = "delta"
+
 
 def read_file(file_path: bytes, mode="r") -> Union[str, bytes]:
     with open(file_path, mode) as f:
@@ -86,6 +99,191 @@ def check_rest_service_error(response: requests.Response, command: str, verbose:
         fatal(f'Error {response.status_code} from {SERVICE_NAME} service for command "{command}": '
               f'{response_data.get("message")}')
 
+def extract_output_archive(archive: tarfile.TarFile, output_path: str, sync_output: bool) -> None:
+    """
+    Extract the output archive of a run to the output directory.
+
+    By default the workspaces subdirectory is deleted and the archive is
+    extracted over the output directory. With sync_output the archive is
+    applied as a delta instead: only the files that changed since the previous
+    run are written, and the ones that are gone are deleted.
+    """
+    workspaces_path = os.path.join(output_path, "workspaces")
+    if sync_output:
+        outputter = SyncFileSystemOutputter(output_path, managed_directories=["workspaces"])
+        stats = sync_tar_archive(archive, outputter)
+        logger.info("Synchronized output directory: %d files written, %d unchanged, %d deleted",
+                    stats["written"], stats["unchanged"], stats["deleted"])
+        return
+    if os.path.exists(workspaces_path):
+        shutil.rmtree(workspaces_path)
+    archive.extractall(output_path)
+
+
+def extract_streamed_archive(response: requests.Response, output_path: str, sync_output: bool = False) -> None:
+    """Extract a tar archive streamed in a response body, one member at a time."""
+    # Undo any transfer content encoding; the archive's own compression is
+    # handled by tarfile's stream mode.
+    response.raw.decode_content = True
+    with tarfile.open(fileobj=response.raw, mode="r|*") as archive:
+        extract_output_archive(archive, output_path, sync_output)
+
+def post_workspace_upload(upload_url: str, upload_token: str, upload_request_data: dict) -> requests.Response:
+    """POST an upload request to the platform."""
+    # We want the request body to be JSON, not form-encoded, so we need to
+    # do the conversion to JSON ourselves.
+    upload_request_text = json.dumps(upload_request_data)
+    headers = {
+        "Authorization": f"Bearer {upload_token}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+    try:
+        return requests.post(upload_url, data=upload_request_text, headers=headers, verify=get_request_verify())
+    except requests.exceptions.ConnectionError as e:
+        fatal(f"Upload of map builder data failed, because the PAPI upload URL is invalid or unavailable; {e}")
+
+
+def check_upload_response(response: requests.Response) -> None:
+    if response.status_code != HTTPStatus.OK:
+        # NB: The error response format from PAPI is not guaranteed to be the same
+        # as what we get from the workspace builder REST service (even though
+        # the WB error handler is derived from the PAPI error handler, so, at least
+        # currently, they're mostly the same), so we don't use
+        # handle_rest_service_error here.
+        try:
+            # Check if response has JSON content-type
+            content_type = response.headers.get('content-type', '').lower()
+            if 'application/json' not in content_type:
+                fatal(f"Error uploading map builder data; Non-JSON response (Content-Type: {content_type}); "
+                      f"status={response.status_code}; Response body: {response.text[:500]}")
+
+            # Check if response body is empty
+            if not response.text.strip():
+                fatal(f"Error uploading map builder data; Empty response body; status={response.status_code}")
+
+            response_data = response.json()
+            detail = response_data.get('detail')
+            code = response_data.get('code')
+            fatal(f"Error uploading map builder data; {detail}; status={response.status_code}; code={code}")
+        except requests.exceptions.JSONDecodeError as e:
+            fatal(f"Error uploading map builder data; Invalid JSON response: {e}; "
+                  f"status={response.status_code}; Response body: {response.text[:500]}")
+
+
+def load_previous_upload_manifest(store_db_path: Optional[str], workspace_name: str) -> dict[str, str]:
+    """Return the manifest of the last upload recorded in the resource store, if any."""
+    if not store_db_path:
+        return {}
+    try:
+        from indexers.workspace_artifacts_tar import load_upload_manifest_from_db_file
+        return load_upload_manifest_from_db_file(store_db_path, workspace_name)
+    except Exception as e:
+        logger.warning("could not load the manifest of the last upload from resource store DB: %s", e)
+        return {}
+
+
+def record_upload_manifest(store_db_path: Optional[str], workspace_name: str, manifest: dict[str, str]) -> None:
+    """Record the manifest of an upload in the resource store, for the next delta upload."""
+    if not store_db_path:
+        return
+    try:
+        from indexers.workspace_artifacts_tar import record_upload_manifest_in_db_file
+        record_upload_manifest_in_db_file(store_db_path, workspace_name, manifest)
+    except Exception as e:
+        logger.warning("could not record the upload manifest in resource store DB: %s", e)
+
+
+def build_skill_search_index(store_db_path: Optional[str]) -> None:
+    """
+    Build the search token index of the MCP skill search into the extracted
+    resource store; it's left out of the output archive, where it would about
+    double the size of the store.
+    """
+    if not store_db_path:
+        return
+    try:
+        from indexers.sqlite_resource_writer import build_skill_token_index
+        start_time = time.time()
+        conn = sqlite3.connect(store_db_path)
+        try:
+            built = build_skill_token_index(conn)
+        finally:
+            conn.close()
+        if built:
+            logger.info("Built the skill search index of the resource store in %.2f seconds",
+                        time.time() - start_time)
+    except Exception as e:
+        logger.warning("could not build the skill search index of the resource store DB: %s; "
+                       "the MCP skill search only ranks a candidate pool of the skills", e)
+
+
+def build_delta_upload_request(upload_request_data: dict, delta, previous_manifest: dict[str, str],
+                               compression: ArchiveCompression = ArchiveCompression()) -> dict:
+    """
+    Build the request data of a delta upload. The archive only has the added and
+    modified files; the deleted paths and the manifest of the whole new tree are
+    sent alongside, plus the digest of the manifest of the previous upload, so the
+    platform can check that the delta applies to the tree it has.
+    """
+    from indexers.workspace_artifacts_tar import build_tar_gz_from_artifacts, upload_manifest_digest
+
+    archive_bytes = build_tar_gz_from_artifacts(delta.changed_members, compression=compression)
+    return {
+        **upload_request_data,
+        "output": base64.b64encode(archive_bytes).decode('utf-8'),
+        "uploadType": DELTA_UPLOAD_TYPE,
+        "baseManifestDigest": upload_manifest_digest(previous_manifest),
+        "manifest": delta.manifest,
+        "deletedPaths": delta.deleted,
+        # A platform that doesn't support delta uploads would take the partial
+        # archive for the whole tree, and prune everything that's not in it.
+        # The deleted paths already carry what was removed.
+        "pruneStaleSlxs": False,
+        "pruneStaleResources": False,
+    }
+
+
+def is_delta_upload_acknowledged(response: requests.Response) -> bool:
+    """
+    Return whether the platform applied an upload as a delta, which it
+    acknowledges by echoing the uploadType in the response. A platform without
+    delta uploads accepts the request as a full upload of the partial archive.
+    """
+    try:
+        response_data = response.json()
+    except ValueError:
+        return False
+    return isinstance(response_data, dict) and response_data.get("uploadType") == DELTA_UPLOAD_TYPE
+
+
+def upload_workspace_delta(upload_url: str, upload_token: str, upload_request_data: dict,
+                           upload_members: list, previous_manifest: dict[str, str],
+                           compression: ArchiveCompression = ArchiveCompression()) -> bool:
+    """
+    Upload the changes since the previous upload. Returns False if the platform
+    rejected the delta, e.g. because it doesn't have the previous upload, or
+    didn't acknowledge it as a delta, in which case the caller should fall back
+    to a full upload.
+    """
+    from indexers.workspace_artifacts_tar import compute_upload_delta
+
+    delta = compute_upload_delta(upload_members, previous_manifest)
+    logger.info("Uploading workspace changes: %d added, %d modified, %d deleted (of %d files)",
+                len(delta.added), len(delta.modified), len(delta.deleted), len(delta.manifest))
+    response = post_workspace_upload(upload_url, upload_token,
+                                     build_delta_upload_request(upload_request_data, delta, previous_manifest,
+                                                                compression))
+    if response.status_code == HTTPStatus.OK:
+        if is_delta_upload_acknowledged(response):
+            return True
+        logger.warning("The platform didn't acknowledge the upload as a delta; falling back to a full upload")
+        return False
+    logger.warning("Delta upload was rejected (status=%s: %s); falling back to a full upload",
+                   response.status_code, response.text[:500])
+    return False
+
+
 def call_rest_service_with_retries(rest_call_proc, max_attempts=10, retry_delay=5) -> requests.Response:
     attempts = 0
     while True:
@@ -100,6 +298,60 @@ def call_rest_service_with_retries(rest_call_proc, max_attempts=10, retry_delay=
             logger.info("Workspace builder REST service isn't available yet; waiting and trying again.")
             time.sleep(retry_delay)
 
+# The errors of an older service parsing a multipart /run/ body as JSON
+_BODY_DECODE_ERROR_TYPES = ("JSONDecodeError", "UnicodeDecodeError")
+
+
+def is_multipart_run_request_rejected(response: requests.Response) -> bool:
+    """
+    Whether the service rejected a multipart /run/ request because it only
+    accepts a JSON body. Older services parse the body as JSON before doing
+    anything else, so the multipart body fails with a 500 error response for
+    the JSONDecodeError (or the UnicodeDecodeError of binary parts) and the run
+    isn't started; a proxy or another service may also reject it with a 415
+    or 422.
+    """
+    if response.status_code in (415, 422):
+        return True
+    if response.status_code != 500:
+        return False
+    try:
+        error_data = response.json()
+    except ValueError:
+        return False
+    if not isinstance(error_data, dict):
+        return False
+    exception_type = str(error_data.get("exceptionType", ""))
+    return any(name in exception_type for name in _BODY_DECODE_ERROR_TYPES)
+
+
+def post_run_request(run_url: str, request_data: dict, request_files: dict, headers: dict) -> requests.Response:
+    """
+    POST a /run/ request. The file settings in ``request_files`` (setting name
+    -> (file name, bytes)) are sent as binary parts of a multipart request,
+    instead of base64 in the JSON request data, which is sent in its own part.
+    An older service only accepts a JSON body and rejects the multipart request
+    (see is_multipart_run_request_rejected), in which case it's sent again as
+    JSON with the file settings base64-encoded in the request data.
+    """
+    proxies = get_proxy_config(run_url)
+    if request_files:
+        run_files = {RUN_REQUEST_DATA_PART: ("request.json", json.dumps(request_data), "application/json")}
+        run_files.update(request_files)
+        response = call_rest_service_with_retries(lambda: requests.post(run_url, files=run_files, headers=headers,
+                                                                        stream=True, proxies=proxies))
+        if not is_multipart_run_request_rejected(response):
+            return response
+        response.close()
+        logger.info("The workspace builder REST service didn't accept the multipart request (status %d); "
+                    "sending the file settings base64-encoded in a JSON request", response.status_code)
+        request_data = dict(request_data)
+        for name, (_, data) in request_files.items():
+            request_data[name] = base64.b64encode(data).decode('utf-8')
+    return call_rest_service_with_retries(lambda: requests.post(run_url, json=request_data, headers=headers,
+                                                                stream=True, proxies=proxies))
+
+
 def _projected_service_account_token() -> str:
     with open("/var/run/secrets/kubernetes.io/serviceaccount/token", "r") as f:
         return f.read().strip()
@@ -462,6 +714,10 @@ def main():
                              "made available to templates. Format of the argument is: <key>=<value>. "
                              "Multiple definitions are allowed.")
     parser.add_argument('-u', '--upload', action='store_true', dest="upload_data")
+    parser.add_argument('--sync-output', action='store_true', dest='sync_output', default=False,
+                        help="Apply the generated files to the output directory as a delta: only write "
+                             "the files that changed since the previous run and delete the ones that are "
+                             "gone, instead of deleting and re-extracting the workspaces directory.")
     parser.add_argument('--papi-url', action='store', dest='papi_url')
     parser.add_argument('--namespace-lods', action='store', dest="namespace_lods")
     parser.add_argument('--workspace-name', action='store', dest="workspace_name",
@@ -484,6 +740,12 @@ def main():
                         help='On upload, how to merge conflicting SLXs; valid values are:\n'
                              '  "keep-existing": Use the existing content of the SLX from the repo\n'
                              '  "keep-uploaded": Use the uploaded content of the SLX')
+    parser.add_argument('--upload-mode', action='store', dest='upload_mode', choices=['full', 'delta'],
+                        help='How to upload the generated workspace; valid values are:\n'
+                             '  "full": Upload all of the workspace files (the default)\n'
+                             '  "delta": Only upload the files that were added, modified or deleted since the\n'
+                             '  last successful upload, as recorded in the resource store. Falls back to a\n'
+                             '  full upload if there is no previous upload or the platform rejects the delta.')
     parser.add_argument('--prune-stale-resources', action='store_true', dest='prune_stale_resources', default=False,
                         help='On upload, prune from the repo any old/stale resources from previous uploads that\n'
                              'are no longer active/valid in the current uploaded data.')
@@ -684,6 +946,49 @@ def main():
         workspace_info.get("writeWorkspaceFilesToDisk"),
         os.getenv("WB_WRITE_WORKSPACE_FILES_TO_DISK"),
     )
+    kubeapi_max_concurrent_requests = coalesce(
+        workspace_info.get("kubeapiMaxConcurrentRequests"),
+        os.getenv("WB_KUBEAPI_MAX_CONCURRENT_REQUESTS"),
+    )
+    kubeapi_list_strategy = coalesce(
+        workspace_info.get("kubeapiListStrategy"),
+        os.getenv("WB_KUBEAPI_LIST_STRATEGY"),
+    )
+    kubeapi_list_page_size = coalesce(
+        workspace_info.get("kubeapiListPageSize"),
+        os.getenv("WB_KUBEAPI_LIST_PAGE_SIZE"),
+    )
+    kubeapi_max_concurrent_clusters = coalesce(
+        workspace_info.get("kubeapiMaxConcurrentClusters"),
+        os.getenv("WB_KUBEAPI_MAX_CONCURRENT_CLUSTERS"),
+    )
+    kubeapi_raw_json = coalesce(
+        workspace_info.get("kubeapiRawJson"),
+        os.getenv("WB_KUBEAPI_RAW_JSON"),
+    )
+    kubeapi_incremental = coalesce(
+        workspace_info.get("kubeapiIncremental"),
+        os.getenv("WB_KUBEAPI_INCREMENTAL"),
+    )
+    render_workers = coalesce(
+        workspace_info.get("renderWorkers"),
+        os.getenv("WB_RENDER_WORKERS"),
+    )
+    archive_compression_level = coalesce(
+        workspace_info.get("archiveCompressionLevel"),
+        os.getenv("WB_ARCHIVE_COMPRESSION_LEVEL"),
+    )
+    archive_compression_workers = coalesce(
+        workspace_info.get("archiveCompressionWorkers"),
+        os.getenv("WB_ARCHIVE_COMPRESSION_WORKERS"),
+    )
+    sync_output = args.sync_output or os.getenv("WB_SYNC_OUTPUT") == "true"
+    upload_mode = str(coalesce(
+        args.upload_mode,
+        workspace_info.get("uploadMode"),
+        os.getenv("WB_UPLOAD_MODE"),
+        "full",
+    )).strip().lower()
 
     # ------------------------------------------------------------------ 4. validation guards
     missing = []
@@ -920,6 +1225,7 @@ def main():
 
     if args.command == RUN_COMMAND:
         request_data = dict()
+        request_files = dict()
 
         # If a map customization rules path was specified, then encode the contents of
         # the file or directory and add it as a request data field.
@@ -942,8 +1248,7 @@ def main():
                     map_customization_rules_data = tar_bytes.getvalue()
                 else:
                     map_customization_rules_data = read_file(map_customization_rules_path, "rb")
-                encoded_map_customization_rules = base64.b64encode(map_customization_rules_data).decode('utf-8')
-                request_data['mapCustomizationRules'] = encoded_map_customization_rules
+                request_files['mapCustomizationRules'] = ("mapCustomizationRules", map_customization_rules_data)
             elif map_customization_rules != CUSTOMIZATION_RULES_DEFAULT:
                 fatal("Error: Map customization rules path does not exist")
 
@@ -953,8 +1258,7 @@ def main():
         if final_kubeconfig_path and os.path.exists(final_kubeconfig_path):
             logger.info("Indexing Kubernetes with kubeconfig from %s", final_kubeconfig_path)
             kubeconfig_data = read_file(final_kubeconfig_path, "rb")
-            encoded_kubeconfig_data = base64.b64encode(kubeconfig_data).decode('utf-8')
-            request_data['kubeconfig'] = encoded_kubeconfig_data
+            request_files['kubeconfig'] = ("kubeconfig", kubeconfig_data)
         else:
             logger.info("Kubernetes discovery not completed due to missing or invalid kubeconfig.")
         if wb_version: 
@@ -990,8 +1294,7 @@ def main():
         if resource_load_file:
             resource_load_path = os.path.join(base_directory, resource_load_file)
             resource_load_data = read_file(resource_load_path, "rb")
-            encoded_resource_load_data = base64.b64encode(resource_load_data).decode('utf-8')
-            request_data['resourceLoadFile'] = encoded_resource_load_data
+            request_files['resourceLoadFile'] = ("resourceLoadFile", resource_load_data)
         if resource_store_backend:
             request_data['resourceStoreBackend'] = resource_store_backend
         if resource_store_path:
@@ -1006,14 +1309,40 @@ def main():
             # Accept bool or a "true"/"false" string from workspaceInfo/env; the
             # server's Setting.convert_value handles both representations.
             request_data['writeWorkspaceFilesToDisk'] = write_workspace_files_to_disk
+        if kubeapi_max_concurrent_requests is not None:
+            request_data['kubeapiMaxConcurrentRequests'] = kubeapi_max_concurrent_requests
+        if kubeapi_list_strategy is not None:
+            request_data['kubeapiListStrategy'] = kubeapi_list_strategy
+        if kubeapi_list_page_size is not None:
+            request_data['kubeapiListPageSize'] = kubeapi_list_page_size
+        if kubeapi_max_concurrent_clusters is not None:
+            request_data['kubeapiMaxConcurrentClusters'] = kubeapi_max_concurrent_clusters
+        if kubeapi_raw_json is not None:
+            request_data['kubeapiRawJson'] = kubeapi_raw_json
+        if kubeapi_incremental is not None:
+            request_data['kubeapiIncremental'] = kubeapi_incremental
+        if render_workers is not None:
+            request_data['renderWorkers'] = render_workers
+        if archive_compression_level is not None:
+            request_data['archiveCompressionLevel'] = archive_compression_level
+        if archive_compression_workers is not None:
+            request_data['archiveCompressionWorkers'] = archive_compression_workers
 
         # Invoke the workspace builder /run REST endpoint
         run_url = f"http://{rest_service_host}:{rest_service_port}/run/"
-        response = call_rest_service_with_retries(lambda: requests.post(run_url, json=request_data, proxies=get_proxy_config(run_url)))
+        # Ask for the output archive to be streamed in the response body, so it can be
+        # extracted incrementally instead of being decoded from a base64 JSON string
+        # in memory. An older service ignores the Accept header and returns JSON.
+        run_headers = {"Accept": f"{ARCHIVE_MEDIA_TYPE}, application/json"}
+        response = post_run_request(run_url, request_data, request_files, run_headers)
         # FIXME: The current fatal error handling approach is a little iffy, in case there's ever a
         # a case where there's some final cleanup we want to do. But for now that's not an issue.
         check_rest_service_error(response, args.command, args.verbose)
-        response_data = response.json()
+        streamed_archive = response.headers.get("Content-Type", "").startswith(ARCHIVE_MEDIA_TYPE)
+        if streamed_archive:
+            response_data = deserialize_run_result_header(response.headers.get(RUN_RESULT_HEADER))
+        else:
+            response_data = response.json()
         # Process the output
         # FIXME: Currently this only handles the case where the output is an archive,
         # but that's the only output supported by the REST service. Eventually, both
@@ -1031,14 +1360,22 @@ def main():
         # other data. Maybe a safer approach would be to delete the workspaces
         # subdirectory instead of wiping the top-level output directory.
         os.makedirs(output_path, exist_ok=True)
-        workspaces_path = os.path.join(output_path, "workspaces")
-        if os.path.exists(workspaces_path):
-            shutil.rmtree(workspaces_path)
-        archive_text = response_data["output"]
-        archive_bytes = base64.b64decode(archive_text)
-        archive_file_obj = io.BytesIO(archive_bytes)
-        archive = tarfile.open(fileobj=archive_file_obj, mode="r")
-        archive.extractall(output_path)
+        # The output has a new resource store, so the manifest of the last upload
+        # is carried over from the previous one for the next delta upload.
+        previous_upload_manifest = load_previous_upload_manifest(
+            resource_store_db_file(output_path, resource_store_backend, resource_store_path), workspace_name)
+        if streamed_archive:
+            extract_streamed_archive(response, output_path, sync_output)
+        else:
+            archive_text = response_data["output"]
+            archive_bytes = base64.b64decode(archive_text)
+            archive_file_obj = io.BytesIO(archive_bytes)
+            archive = tarfile.open(fileobj=archive_file_obj, mode="r")
+            extract_output_archive(archive, output_path, sync_output)
+        if previous_upload_manifest:
+            record_upload_manifest(resource_store_db_file(output_path, resource_store_backend, resource_store_path),
+                                    workspace_name, previous_upload_manifest)
+        build_skill_search_index(resource_store_db_file(output_path, resource_store_backend, resource_store_path))
 
         message = response_data.get("message", "Workspace data generated successfully.")
         warnings = response_data.get("warnings", list())
@@ -1101,42 +1438,26 @@ def main():
         # contents of the output directory. So access the workload directory
         # and archive the data to be included in upload data.
         workspace_dir = os.path.join(output_path, "workspaces", workspace_name)
-        archive_bytes = None
+        upload_compression = ArchiveCompression.from_settings(
+            int(archive_compression_level) if archive_compression_level is not None else None,
+            int(archive_compression_workers) if archive_compression_workers is not None else None,
+        )
 
         # Prefer building the upload tar directly from the sqlite resource store
         # (the workspace_artifacts table holds the full rendered content). This
         # avoids the disk read + tar-from-disk walk and works even when the
         # per-file disk writes were skipped (writeWorkspaceFilesToDisk=False).
+        # The store also records the manifest of the last upload, which is
+        # needed for delta uploads.
+        upload_members = None
         store_db_path = resource_store_db_file(output_path, resource_store_backend, resource_store_path)
         if store_db_path:
             try:
-                from indexers.workspace_artifacts_tar import build_upload_tar_gz_from_db_file
-                archive_bytes = build_upload_tar_gz_from_db_file(store_db_path, workspace_name)
+                from indexers.workspace_artifacts_tar import read_upload_members_from_db_file
+                upload_members = read_upload_members_from_db_file(store_db_path, workspace_name)
             except Exception as e:
                 logger.warning("could not build upload archive from resource store DB: %s; falling back to on-disk archive", e)
-                archive_bytes = None
-
-        if archive_bytes is None:
-            # Fall back to the on-disk tree. We only send the workspace
-            # subdirectory, so we tar relative to the workspace dir.
-            tar_bytes = io.BytesIO()
-            archive = tarfile.open(mode="x:gz", fileobj=tar_bytes)
-            # We need to set the working directory to the output directory for the tarfile
-            # to use the correct relative paths for the entries. Just to be safe, we
-            # save and restore the working directory even though, at least currently,
-            # I don't think anything else is affected by the working directory.
-            saved_working_directory = os.getcwd()
-            os.chdir(workspace_dir)
-            try:
-                archive.add(".")
-            except Exception as e:
-                fatal(f"Error creating archive from output directory contents: {e}")
-            finally:
-                os.chdir(saved_working_directory)
-            archive.close()
-            archive_bytes = tar_bytes.getvalue()
-
-        archive_text = base64.b64encode(archive_bytes).decode('utf-8')
+                upload_members = None
 
         if not upload_token:
             fatal('An uploadInfo.yaml file corresponding to an existing workspace in the '
@@ -1144,58 +1465,59 @@ def main():
                   'base directory to enable upload of the generated workspace content.')
         merge_mode = "keepexisting" if args.upload_merge_mode.lower() == "keep-existing" else "keepuploaded"
         upload_request_data = {
-            "output": archive_text,
             "mergeMode": merge_mode,
             "pruneStaleSlxs": args.prune_stale_slxs,
             "pruneStaleResources": args.prune_stale_resources,
             "message": "Updated workspace from map builder.",
             "finalizeAction": "mergeToMain",
         }
-        # We want the request body to be JSON, not form-encoded, so we need to
-        # do the conversion to JSON ourselves.
-        upload_request_text = json.dumps(upload_request_data)
-        headers = {
-            "Authorization": f"Bearer {upload_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
         upload_url = f"{papi_url}/api/v3/workspaces/{workspace_name}/upload"
-        try:
-            response = requests.post(upload_url, data=upload_request_text, headers=headers, verify=get_request_verify())
-        except requests.exceptions.ConnectionError as e:
-            fatal("Upload of map builder data failed, because the PAPI upload URL is invalid or unavailable; {e}")
-            # NB: The fatal call will already have exited, so this return call isn't really
-            # necessary, but it makes the linting code happy so that it doesn't complain
-            # about possibly uninitialized variables, e.g. response
-            return
 
-        if response.status_code != HTTPStatus.OK:
-            # NB: The error response format from PAPI is not guaranteed to be the same
-            # as what we get from the workspace builder REST service (even though
-            # the WB error handler is derived from the PAPI error handler, so, at least
-            # currently, they're mostly the same), so we don't use
-            # handle_rest_service_error here.
-            try:
-                # Check if response has JSON content-type
-                content_type = response.headers.get('content-type', '').lower()
-                if 'application/json' not in content_type:
-                    fatal(f"Error uploading map builder data; Non-JSON response (Content-Type: {content_type}); "
-                          f"status={response.status_code}; Response body: {response.text[:500]}")
-                
-                # Check if response body is empty
-                if not response.text.strip():
-                    fatal(f"Error uploading map builder data; Empty response body; status={response.status_code}")
-                
-                response_data = response.json()
-                detail = response_data.get('detail')
-                code = response_data.get('code')
-                fatal(f"Error uploading map builder data; {detail}; status={response.status_code}; code={code}")
-            except requests.exceptions.JSONDecodeError as e:
-                fatal(f"Error uploading map builder data; Invalid JSON response: {e}; "
-                      f"status={response.status_code}; Response body: {response.text[:500]}")
+        uploaded = False
+        if upload_mode == "delta":
+            previous_upload_manifest = None
+            if upload_members is not None:
+                previous_upload_manifest = load_previous_upload_manifest(store_db_path, workspace_name)
+            if previous_upload_manifest:
+                uploaded = upload_workspace_delta(upload_url, upload_token, upload_request_data,
+                                                  upload_members, previous_upload_manifest, upload_compression)
+            else:
+                logger.info("No manifest of a previous upload in the resource store; doing a full upload")
 
-        logger.info("Workspace builder data uploaded successfully in %.1fs", time.time() - upload_start)
+        if not uploaded:
+            if upload_members is not None:
+                from indexers.workspace_artifacts_tar import build_tar_gz_from_artifacts
+                archive_bytes = build_tar_gz_from_artifacts(upload_members, compression=upload_compression)
+            else:
+                # Fall back to the on-disk tree. We only send the workspace
+                # subdirectory, so we tar relative to the workspace dir.
+                tar_bytes = io.BytesIO()
+                archive = tarfile.open(mode="x:gz", fileobj=tar_bytes)
+                # We need to set the working directory to the output directory for the tarfile
+                # to use the correct relative paths for the entries. Just to be safe, we
+                # save and restore the working directory even though, at least currently,
+                # I don't think anything else is affected by the working directory.
+                saved_working_directory = os.getcwd()
+                os.chdir(workspace_dir)
+                try:
+                    archive.add(".")
+                except Exception as e:
+                    fatal(f"Error creating archive from output directory contents: {e}")
+                finally:
+                    os.chdir(saved_working_directory)
+                archive.close()
+                archive_bytes = tar_bytes.getvalue()
+
+            archive_text = base64.b64encode(archive_bytes).decode('utf-8')
+            response = post_workspace_upload(upload_url, upload_token, {"output": archive_text, **upload_request_data})
+            check_upload_response(response)
 
+        # Record what was uploaded, so the next delta upload can be computed against it
+        if upload_members is not None:
+            from indexers.workspace_artifacts_tar import build_upload_manifest
+            record_upload_manifest(store_db_path, workspace_name, build_upload_manifest(upload_members))
+
+        logger.info("Workspace builder data uploaded successfully in %.1fs", time.time() - upload_start)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,88 @@
+"""Tokenization of the SLX bundles for the skill search.
+
+The MCP skill search (:mod:`workspace_builder.mcp.search`) scores bundles on
+the distinct tokens of their name, path, kinds and content, and the search
+token index of the resource store (``skill_tokens``, built by
+:func:`indexers.sqlite_resource_writer.build_skill_token_index`) records the
+same tokens, so both sides import them from here.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+# Field weights for token-overlap scoring. Heuristic, not learned: matches
+# in the SLX name should dominate matches in the long-form runbook body.
+_NAME_WEIGHT = 4.0
+_PATH_WEIGHT = 2.0
+_KIND_WEIGHT = 1.5
+_CONTENT_WEIGHT = 1.0
+
+# The same weights by the name of the field, as recorded in the search token
+# index of the resource store (``skill_tokens``).
+FIELD_WEIGHTS = {
+    "name": _NAME_WEIGHT,
+    "path": _PATH_WEIGHT,
+    "kinds": _KIND_WEIGHT,
+    "content": _CONTENT_WEIGHT,
+}
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "but",
+        "by",
+        "for",
+        "from",
+        "in",
+        "is",
+        "it",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "this",
+        "to",
+        "was",
+        "with",
+    }
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Return a lowercased, stopword-filtered token list for ``text``."""
+    if not text:
+        return []
+    return [
+        tok.lower()
+        for tok in _TOKEN_RE.findall(text)
+        if tok.lower() not in _STOPWORDS
+    ]
+
+
+def field_tokens(
+    *,
+    name: str | None,
+    path: str | None,
+    kinds: Iterable[str] | None,
+    content: str | None,
+) -> dict[str, set[str]]:
+    """Return the distinct tokens of each scored field of a bundle."""
+    return {
+        "name": set(tokenize(name)) if name else set(),
+        "path": set(tokenize(path)) if path else set(),
+        "kinds": set(tokenize(" ".join(kinds))) if kinds else set(),
+        "content": set(tokenize(content)) if content else set(),
+    }
+
+
+__all__ = ["FIELD_WEIGHTS", "tokenize", "field_tokens"]
@@ -1,12 +1,14 @@
+import functools
 import logging
 import threading
+from collections import OrderedDict
 from typing import Any, Callable, Optional
 
 from jinja2.loaders import FileSystemLoader
 from jinja2.sandbox import SandboxedEnvironment
 from jinja2.loaders import BaseLoader, ChoiceLoader
 from jinja2.exceptions import TemplateNotFound, TemplateError
-from jinja2 import Undefined
+from jinja2 import Template, Undefined
 
 from exceptions import WorkspaceBuilderException
 from workspace_builder.log_buffer import get_log_buffer
@@ -20,35 +22,93 @@ logger = logging.getLogger(__name__)
 # re-parses from disk.
 #
 # We cache one environment for the DEFAULT (no custom loader) path — this
-# covers the majority of render_template_file calls (built-in templates like
-# kubernetes-auth.yaml, gcp-auth.yaml, etc.). Custom-loader paths
-# (codecollection templates) get fresh environments since each
-# generate_output_item call creates a new lambda closure, making
-# function-object-based caching O(num_output_items).
+# covers the built-in templates like kubernetes-auth.yaml, gcp-auth.yaml, etc.
+#
+# Codecollection templates are loaded through a template loader that's
+# registered once per (repo_url, ref, code_bundle) key with
+# register_template_loader. Output items carry the key instead of a loader
+# closure, so there's one cached environment per code bundle, and each
+# environment keeps a bounded LRU of compiled templates (Jinja's own template
+# cache). That way the slx.yaml/runbook.yaml templates of a code bundle are
+# read from git and compiled once, not once per SLX. Ad hoc loader functions
+# still get fresh environments.
 # ---------------------------------------------------------------------------
 
+# (repo_url, ref, code_bundle)
+TemplateLoaderKey = tuple[str, str, str]
+
+# Maximum number of compiled templates kept per code bundle environment
+TEMPLATE_CACHE_SIZE = 64
+# Maximum number of code bundle environments kept
+CODE_BUNDLE_ENVIRONMENT_CACHE_SIZE = 256
+
 _env_cache: SandboxedEnvironment | None = None
 _env_cache_lock = threading.Lock()
 
+_template_loaders: dict[TemplateLoaderKey, Callable[[str], str]] = dict()
+_code_bundle_env_cache: OrderedDict[TemplateLoaderKey, SandboxedEnvironment] = OrderedDict()
+
+
+def _create_environment(template_loader_func: Optional[Callable] = None, **kwargs) -> SandboxedEnvironment:
+    loaders: list = [FileSystemLoader("templates")]
+    if template_loader_func is not None:
+        loaders.insert(0, CustomTemplateLoader(template_loader_func))
+    return SandboxedEnvironment(
+        loader=ChoiceLoader(loaders),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        undefined=CustomUndefined,
+        **kwargs,
+    )
+
+
+def register_template_loader(template_loader_key: TemplateLoaderKey,
+                             template_loader_func: Callable[[str], str]) -> None:
+    """Register the template loader function for a code bundle.
+
+    Registering a loader for a key again (e.g. on the next run, after the
+    code collection has been updated) drops the cached environment, so the
+    templates are reloaded.
+    """
+    with _env_cache_lock:
+        if _template_loaders.get(template_loader_key) is not template_loader_func:
+            _template_loaders[template_loader_key] = template_loader_func
+            _code_bundle_env_cache.pop(template_loader_key, None)
+
+
+def _get_code_bundle_environment(template_loader_key: TemplateLoaderKey) -> SandboxedEnvironment:
+    with _env_cache_lock:
+        env = _code_bundle_env_cache.get(template_loader_key)
+        if env is not None:
+            _code_bundle_env_cache.move_to_end(template_loader_key)
+            return env
+        template_loader_func = _template_loaders.get(template_loader_key)
+        if template_loader_func is None:
+            raise WorkspaceBuilderException(f"No template loader registered for code bundle: "
+                                            f"repo={template_loader_key[0]}; ref={template_loader_key[1]}; "
+                                            f"code-bundle={template_loader_key[2]}")
+        env = _create_environment(template_loader_func, cache_size=TEMPLATE_CACHE_SIZE)
+        _code_bundle_env_cache[template_loader_key] = env
+        if len(_code_bundle_env_cache) > CODE_BUNDLE_ENVIRONMENT_CACHE_SIZE:
+            _code_bundle_env_cache.popitem(last=False)
+        return env
 
-def _get_environment(template_loader_func: Optional[Callable] = None) -> SandboxedEnvironment:
+
+def _get_environment(template_loader_func: Optional[Callable] = None,
+                     template_loader_key: Optional[TemplateLoaderKey] = None) -> SandboxedEnvironment:
     """Return a (possibly cached) SandboxedEnvironment.
 
-    Only the default loader configuration (``template_loader_func is None``)
-    is cached — it's the hot path used for every built-in template. Custom
-    loaders get fresh environments to avoid unbounded cache growth from the
-    per-output-item lambdas created by ``generate_output_item``.
+    The default loader configuration and the registered code bundle loaders
+    (``template_loader_key``) are cached. Ad hoc loader functions get fresh
+    environments to avoid unbounded cache growth.
     """
     global _env_cache
 
+    if template_loader_key is not None:
+        return _get_code_bundle_environment(template_loader_key)
+
     if template_loader_func is not None:
-        loaders: list = [CustomTemplateLoader(template_loader_func), FileSystemLoader("templates")]
-        return SandboxedEnvironment(
-            loader=ChoiceLoader(loaders),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            undefined=CustomUndefined,
-        )
+        return _create_environment(template_loader_func)
 
     # Default path — cached.
     env = _env_cache
@@ -58,12 +118,7 @@ def _get_environment(template_loader_func: Optional[Callable] = None) -> Sandbox
         env = _env_cache
         if env is not None:
             return env
-        env = SandboxedEnvironment(
-            loader=ChoiceLoader([FileSystemLoader("templates")]),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            undefined=CustomUndefined,
-        )
+        env = _create_environment()
         _env_cache = env
         return env
 
@@ -97,13 +152,52 @@ class CustomTemplateLoader(BaseLoader):
             raise TemplateNotFound(name) from e
 
 
+# ---------------------------------------------------------------------------
+# render_template_string is called for every output path, template variable and
+# group/relationship name, so tens of thousands of times per run, mostly with
+# the same handful of template strings. The strings are compiled with a shared
+# environment and the compiled templates are kept in an LRU cache keyed by the
+# template string.
+# ---------------------------------------------------------------------------
+
+# Maximum number of compiled template strings kept
+STRING_TEMPLATE_CACHE_SIZE = 4096
+
+# FIXME: Should probably support a custom template loader here, but
+# currently this is only used for path expansion, which is unlikely
+# to require template inclusion.
+_string_env = SandboxedEnvironment(trim_blocks=True, lstrip_blocks=True, undefined=CustomUndefined)
+
+
+@functools.lru_cache(maxsize=STRING_TEMPLATE_CACHE_SIZE)
+def _compile_template_string(template_string: str) -> Template:
+    return _string_env.from_string(template_string)
+
+
+# Context property with the template string cache counters at the start of
+# the run, so the run stats report the hits and misses of the run
+TEMPLATE_STRING_CACHE_STATS_PROPERTY = "TEMPLATE_STRING_CACHE_STATS_AT_START"
+
+
+def get_template_string_cache_stats(since: Optional[dict[str, int]] = None) -> dict[str, int]:
+    """Return the hit/miss counters of the compiled template string cache.
+
+    The cache lives for the whole process, so the counters are cumulative
+    across runs; with the stats taken at the start of a run as ``since``, the
+    hits and misses are the ones since then.
+    """
+    cache_info = _compile_template_string.cache_info()
+    return {
+        "hits": cache_info.hits - (since["hits"] if since else 0),
+        "misses": cache_info.misses - (since["misses"] if since else 0),
+        "size": cache_info.currsize,
+        "max_size": cache_info.maxsize,
+    }
+
+
 def render_template_string(template_string: str, template_variables: dict[str, Any]) -> str:
     try:
-        # FIXME: Should probably support a custom template loader here, but
-        # currently this is only used for path expansion, which is unlikely
-        # to require template inclusion.
-        env = SandboxedEnvironment(trim_blocks=True, lstrip_blocks=True, undefined=CustomUndefined)
-        result = env.from_string(template_string).render(**template_variables)
+        result = _compile_template_string(template_string).render(**template_variables)
         return result
     except TemplateNotFound as e:
         # This could have come from loading the top-level template or another
@@ -143,9 +237,10 @@ def render_template_string(template_string: str, template_variables: dict[str, A
 
 def render_template_file(template_file_name: str,
                          template_variables: dict[str, Any],
-                         template_loader_func = None) -> str:
+                         template_loader_func = None,
+                         template_loader_key: Optional[TemplateLoaderKey] = None) -> str:
     try:
-        env = _get_environment(template_loader_func)
+        env = _get_environment(template_loader_func, template_loader_key)
         template = env.get_template(template_file_name)
         return template.render(**template_variables)
     except TemplateNotFound as e:
@@ -0,0 +1,103 @@
+"""
+Unit tests for the block gzip compression in ``archive_compression``.
+
+The generated archives are compressed in independent blocks, possibly in
+parallel. These pin that the result is a standard gzip file, and that it only
+depends on the data and the compression level, not on the number of threads
+or on when it was built.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import os
+import random
+import sys
+import tarfile
+from unittest import TestCase
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from archive_compression import ArchiveCompression, GzipBlockWriter  # noqa: E402
+from indexers.workspace_artifacts_tar import build_tar_gz_from_artifacts  # noqa: E402
+from outputter import TarFileOutputter  # noqa: E402
+
+# Compressible, but not trivially so, and larger than a few small blocks
+_random = random.Random(17)
+DATA = b"".join(f"kind: ServiceLevelX\nname: slx-{_random.randrange(10 ** 6)}\n".encode("utf-8")
+                for _ in range(20000))
+
+ARTIFACTS = [(f"slxs/slx-{i}/slx.yaml", f"kind: ServiceLevelX\nname: slx-{i}\n" * 50) for i in range(200)]
+
+
+def _compress(data: bytes, compression: ArchiveCompression, chunk_size: int = 10000) -> bytes:
+    output = io.BytesIO()
+    with GzipBlockWriter(output, compression) as writer:
+        for offset in range(0, len(data), chunk_size):
+            writer.write(data[offset:offset + chunk_size])
+    return output.getvalue()
+
+
+class GzipBlockWriterTest(TestCase):
+
+    def test_round_trip(self):
+        for level in (0, 1, 6, 9):
+            compressed = _compress(DATA, ArchiveCompression(level, block_size=64 * 1024))
+            self.assertEqual(gzip.decompress(compressed), DATA, level)
+
+    def test_independent_of_worker_count(self):
+        expected = _compress(DATA, ArchiveCompression(6, workers=1, block_size=32 * 1024))
+        for workers in (2, 4, 8):
+            self.assertEqual(_compress(DATA, ArchiveCompression(6, workers=workers, block_size=32 * 1024)),
+                             expected, workers)
+        # ... and of how the data is split into writes
+        self.assertEqual(_compress(DATA, ArchiveCompression(6, workers=3, block_size=32 * 1024), 777), expected)
+
+    def test_blocks_reuse_the_previous_block_as_dictionary(self):
+        single_block = _compress(DATA, ArchiveCompression(9))
+        small_blocks = _compress(DATA, ArchiveCompression(9, block_size=64 * 1024))
+        self.assertEqual(gzip.decompress(small_blocks), DATA)
+        self.assertLess(len(small_blocks), len(single_block) * 1.02)
+
+    def test_empty_input(self):
+        for workers in (1, 2):
+            self.assertEqual(gzip.decompress(_compress(b"", ArchiveCompression(workers=workers))), b"")
+
+    def test_levels(self):
+        self.assertLess(len(_compress(DATA, ArchiveCompression(9))), len(_compress(DATA, ArchiveCompression(1))))
+        self.assertGreater(len(_compress(DATA, ArchiveCompression(0))), len(DATA))
+
+    def test_from_settings(self):
+        self.assertEqual(ArchiveCompression.from_settings(None, None), ArchiveCompression())
+        self.assertEqual(ArchiveCompression.from_settings(0, 4), ArchiveCompression(0, 4))
+        self.assertEqual(ArchiveCompression.from_settings(3, 0), ArchiveCompression(3, 1))
+        for level in (-1, 10):
+            with self.assertRaises(ValueError):
+                ArchiveCompression.from_settings(level, None)
+
+
+class ArchiveCompressionTest(TestCase):
+
+    def test_artifacts_archive_is_deterministic(self):
+        expected = build_tar_gz_from_artifacts(ARTIFACTS)
+        self.assertEqual(build_tar_gz_from_artifacts(ARTIFACTS), expected)
+        self.assertEqual(build_tar_gz_from_artifacts(ARTIFACTS, compression=ArchiveCompression(workers=4)),
+                         expected)
+        fast = build_tar_gz_from_artifacts(ARTIFACTS, compression=ArchiveCompression(1, workers=2))
+        for archive_bytes in (expected, fast):
+            with tarfile.open(fileobj=io.BytesIO(archive_bytes), mode="r:gz") as archive:
+                self.assertEqual({member.name: archive.extractfile(member).read().decode("utf-8")
+                                  for member in archive.getmembers()}, dict(ARTIFACTS))
+
+    def test_outputter_archive(self):
+        for compression in (TarFileOutputter.Compression.GZIP, None):
+            outputter = TarFileOutputter(compression=compression, compression_options=ArchiveCompression(1, 2))
+            for path, content in ARTIFACTS:
+                outputter.write_file(path, content)
+            outputter.close()
+            with tarfile.open(fileobj=io.BytesIO(outputter.get_bytes()), mode="r") as archive:
+                self.assertEqual({member.name: archive.extractfile(member).read().decode("utf-8")
+                                  for member in archive.getmembers()}, dict(ARTIFACTS), compression)
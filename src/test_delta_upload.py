@@ -0,0 +1,253 @@
+"""
+Tests for the delta upload of a workspace to the platform (``run.py`` with
+``--upload-mode delta``).
+
+A local stand-in for the platform upload endpoint keeps the uploaded tree of
+each workspace and applies the delta uploads to it the way the platform is
+expected to, so the protocol can be verified end to end without a platform.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from base64 import b64decode, b64encode
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from indexers.sqlite_resource_writer import persist_sqlite_store  # noqa: E402
+from indexers.workspace_artifacts_tar import (  # noqa: E402
+    apply_upload_delta,
+    build_tar_gz_from_artifacts,
+    build_upload_manifest,
+    compute_upload_delta,
+    load_upload_manifest_from_db_file,
+    read_upload_members_from_db_file,
+    record_upload_manifest_in_db_file,
+    tar_file_members,
+    upload_manifest_digest,
+)
+from run import check_upload_response, post_workspace_upload, upload_workspace_delta  # noqa: E402
+
+WORKSPACE_NAME = "my-workspace"
+UPLOAD_TOKEN = "test-token"
+UPLOAD_OPTIONS = {"mergeMode": "keepexisting", "pruneStaleSlxs": False, "pruneStaleResources": False,
+                  "message": "Updated workspace from map builder.", "finalizeAction": "mergeToMain"}
+
+FILES = {
+    f"workspaces/{WORKSPACE_NAME}/workspace.yaml": "kind: Workspace\n",
+    f"workspaces/{WORKSPACE_NAME}/slxs/app-health/slx.yaml": "kind: ServiceLevelX\nname: app-health\n",
+    f"workspaces/{WORKSPACE_NAME}/slxs/app-health/sli.yaml": "kind: ServiceLevelIndicator\n",
+    f"workspaces/{WORKSPACE_NAME}/slxs/db-latency/slx.yaml": "kind: ServiceLevelX\nname: db-latency\n",
+    f"workspaces/{WORKSPACE_NAME}/slxs/db-latency/Skill.md": "# Skill\nUnicode: café ✓\n",
+}
+
+
+class LegacyUploadHandler(BaseHTTPRequestHandler):
+    """An upload endpoint without delta uploads: every upload replaces the tree."""
+
+    def do_POST(self):
+        request_data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(request_data)
+        self.server.trees[WORKSPACE_NAME] = tar_file_members(b64decode(request_data["output"]))
+        body = json.dumps({"detail": "Uploaded", "code": "ok"}).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInUploadHandler(BaseHTTPRequestHandler):
+    """The platform upload endpoint: full uploads replace the tree, delta uploads are applied to it."""
+
+    def do_POST(self):
+        prefix, suffix = "/api/v3/workspaces/", "/upload"
+        if not (self.path.startswith(prefix) and self.path.endswith(suffix)):
+            return self._respond(HTTPStatus.NOT_FOUND, "Not found", "not-found")
+        if self.headers.get("Authorization") != f"Bearer {UPLOAD_TOKEN}":
+            return self._respond(HTTPStatus.UNAUTHORIZED, "Invalid token", "unauthorized")
+        workspace_name = self.path[len(prefix):-len(suffix)]
+        request_data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(request_data)
+        archive_bytes = b64decode(request_data["output"])
+        if request_data.get("uploadType") != "delta":
+            self.server.trees[workspace_name] = tar_file_members(archive_bytes)
+            return self._respond(HTTPStatus.OK, "Uploaded")
+        base_tree = self.server.trees.get(workspace_name)
+        if base_tree is None or \
+                upload_manifest_digest(build_upload_manifest(base_tree.items())) != request_data["baseManifestDigest"]:
+            return self._respond(HTTPStatus.CONFLICT, "The delta doesn't apply to the current tree", "delta-base")
+        self.server.trees[workspace_name] = apply_upload_delta(
+            base_tree, archive_bytes, request_data["deletedPaths"], request_data["manifest"])
+        return self._respond(HTTPStatus.OK, "Uploaded", uploadType="delta")
+
+    def _respond(self, status: HTTPStatus, detail: str, code: str = "ok", **extra):
+        body = json.dumps({"detail": detail, "code": code, **extra}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_store(output_path: str, files: dict) -> str:
+    """Write the resource store of a run that rendered ``files``."""
+    from component import Context, WORKSPACE_NAME_SETTING
+    from indexers.resource_writer import RESOURCE_STORE_BACKEND_SETTING
+    from outputter import FileSystemOutputter
+    from renderers.rendered_artifacts import init_rendered_artifacts, record_rendered_artifact
+    from resources import REGISTRY_PROPERTY_NAME, Registry
+
+    context = Context(setting_values={RESOURCE_STORE_BACKEND_SETTING.name: "sqlite",
+                                      WORKSPACE_NAME_SETTING.name: WORKSPACE_NAME},
+                      outputter=FileSystemOutputter(output_path))
+    context.set_property(REGISTRY_PROPERTY_NAME, Registry())
+    init_rendered_artifacts(context)
+    for path, content in files.items():
+        record_rendered_artifact(context, path, content)
+    persist_sqlite_store(context, db_path="resources.sqlite")
+    return os.path.join(output_path, "resources.sqlite")
+
+
+def _upload_tree(files: dict) -> dict:
+    prefix = f"workspaces/{WORKSPACE_NAME}/"
+    return {path[len(prefix):]: content.encode("utf-8") for path, content in files.items()}
+
+
+class UploadServerTestCase(TestCase):
+    """Runs an upload endpoint served by ``handler_class`` for each test."""
+    handler_class = StandInUploadHandler
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class)
+        self.server.trees = dict()
+        self.server.requests = list()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.upload_url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v3/workspaces/{WORKSPACE_NAME}/upload"
+        output_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(output_directory.cleanup)
+        self.output_path = output_directory.name
+
+    def _full_upload(self, db_file: str) -> None:
+        members = read_upload_members_from_db_file(db_file, WORKSPACE_NAME)
+        archive_text = b64encode(build_tar_gz_from_artifacts(members)).decode("utf-8")
+        response = post_workspace_upload(self.upload_url, UPLOAD_TOKEN, {"output": archive_text, **UPLOAD_OPTIONS})
+        check_upload_response(response)
+        record_upload_manifest_in_db_file(db_file, WORKSPACE_NAME, build_upload_manifest(members))
+
+
+class DeltaUploadTest(UploadServerTestCase):
+
+    def test_delta_upload_reconstructs_the_tree(self):
+        db_file = _write_store(self.output_path, FILES)
+        self._full_upload(db_file)
+        previous_manifest = load_upload_manifest_from_db_file(db_file, WORKSPACE_NAME)
+        self.assertEqual(previous_manifest, build_upload_manifest(_upload_tree(FILES).items()))
+
+        files = dict(FILES)
+        files[f"workspaces/{WORKSPACE_NAME}/slxs/app-health/slx.yaml"] = "kind: ServiceLevelX\nname: app-health-2\n"
+        files[f"workspaces/{WORKSPACE_NAME}/slxs/new-slx/slx.yaml"] = "kind: ServiceLevelX\nname: new-slx\n"
+        del files[f"workspaces/{WORKSPACE_NAME}/slxs/db-latency/Skill.md"]
+        # The next run writes a new store, and run.py carries the manifest over
+        db_file = _write_store(self.output_path, files)
+        record_upload_manifest_in_db_file(db_file, WORKSPACE_NAME, previous_manifest)
+
+        members = read_upload_members_from_db_file(db_file, WORKSPACE_NAME)
+        self.assertTrue(upload_workspace_delta(self.upload_url, UPLOAD_TOKEN, UPLOAD_OPTIONS, members,
+                                               load_upload_manifest_from_db_file(db_file, WORKSPACE_NAME)))
+        self.assertEqual(self.server.trees[WORKSPACE_NAME], _upload_tree(files))
+        delta_request = self.server.requests[-1]
+        self.assertEqual(set(tar_file_members(b64decode(delta_request["output"]))),
+                         {"slxs/app-health/slx.yaml", "slxs/new-slx/slx.yaml"})
+        self.assertEqual(delta_request["deletedPaths"], ["slxs/db-latency/Skill.md"])
+        self.assertEqual(delta_request["mergeMode"], "keepexisting")
+
+    def test_delta_upload_never_prunes(self):
+        db_file = _write_store(self.output_path, FILES)
+        self._full_upload(db_file)
+        members = read_upload_members_from_db_file(db_file, WORKSPACE_NAME)
+        options = dict(UPLOAD_OPTIONS, pruneStaleSlxs=True, pruneStaleResources=True)
+        self.assertTrue(upload_workspace_delta(self.upload_url, UPLOAD_TOKEN, options, members,
+                                               load_upload_manifest_from_db_file(db_file, WORKSPACE_NAME)))
+        delta_request = self.server.requests[-1]
+        self.assertEqual((delta_request["pruneStaleSlxs"], delta_request["pruneStaleResources"]), (False, False))
+
+    def test_rejected_delta(self):
+        # The platform doesn't have the tree the delta was computed against
+        db_file = _write_store(self.output_path, FILES)
+        members = read_upload_members_from_db_file(db_file, WORKSPACE_NAME)
+        previous_manifest = build_upload_manifest(_upload_tree(FILES).items())
+        self.assertFalse(upload_workspace_delta(self.upload_url, UPLOAD_TOKEN, UPLOAD_OPTIONS, members,
+                                                previous_manifest))
+        self.assertNotIn(WORKSPACE_NAME, self.server.trees)
+
+
+class LegacyPlatformDeltaUploadTest(UploadServerTestCase):
+    """A platform without delta uploads takes the delta for a full upload, without acknowledging it."""
+    handler_class = LegacyUploadHandler
+
+    def test_unacknowledged_delta(self):
+        db_file = _write_store(self.output_path, FILES)
+        self._full_upload(db_file)
+        files = dict(FILES)
+        files[f"workspaces/{WORKSPACE_NAME}/slxs/new-slx/slx.yaml"] = "kind: ServiceLevelX\nname: new-slx\n"
+        db_file = _write_store(self.output_path, files)
+        record_upload_manifest_in_db_file(db_file, WORKSPACE_NAME, build_upload_manifest(_upload_tree(FILES).items()))
+        members = read_upload_members_from_db_file(db_file, WORKSPACE_NAME)
+        options = dict(UPLOAD_OPTIONS, pruneStaleSlxs=True)
+        # Not acknowledged, so the caller falls back to a full upload; the
+        # partial upload didn't ask the platform to prune anything
+        self.assertFalse(upload_workspace_delta(self.upload_url, UPLOAD_TOKEN, options, members,
+                                                load_upload_manifest_from_db_file(db_file, WORKSPACE_NAME)))
+        self.assertFalse(self.server.requests[-1]["pruneStaleSlxs"])
+
+
+class UploadManifestTest(TestCase):
+
+    def test_delta_of_unchanged_tree_is_empty(self):
+        tree = _upload_tree(FILES)
+        delta = compute_upload_delta(tree.items(), build_upload_manifest(tree.items()))
+        self.assertEqual((delta.changed_members, delta.added, delta.modified, delta.deleted), ([], [], [], []))
+        self.assertEqual(delta.manifest, build_upload_manifest(tree.items()))
+
+    def test_apply_upload_delta_checks_the_base(self):
+        tree = _upload_tree(FILES)
+        changed = dict(tree)
+        changed["workspace.yaml"] = b"kind: Workspace\nname: changed\n"
+        delta = compute_upload_delta(changed.items(), build_upload_manifest(tree.items()))
+        delta_tar_gz = build_tar_gz_from_artifacts(delta.changed_members)
+        self.assertEqual(apply_upload_delta(tree, delta_tar_gz, delta.deleted, delta.manifest), changed)
+        stale_tree = dict(tree)
+        del stale_tree["slxs/app-health/sli.yaml"]
+        with self.assertRaises(ValueError):
+            apply_upload_delta(stale_tree, delta_tar_gz, delta.deleted, delta.manifest)
+
+    def test_store_without_upload_manifests(self):
+        with tempfile.TemporaryDirectory() as output_path:
+            db_file = _write_store(output_path, FILES)
+            conn = sqlite3.connect(db_file)
+            conn.execute("DROP TABLE upload_manifests")
+            conn.commit()
+            conn.close()
+            self.assertEqual(load_upload_manifest_from_db_file(db_file, WORKSPACE_NAME), {})
+            record_upload_manifest_in_db_file(db_file, WORKSPACE_NAME, {"workspace.yaml": "abc"})
+            self.assertEqual(load_upload_manifest_from_db_file(db_file, WORKSPACE_NAME), {"workspace.yaml": "abc"})
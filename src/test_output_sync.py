@@ -0,0 +1,175 @@
+"""
+Unit tests for ``outputter.SyncFileSystemOutputter`` and the delta extraction
+of the output archive in ``run``.
+
+These pin that only the files whose content changed are rewritten, that the
+files that are gone since the previous run are deleted, and that the result
+is the same tree as deleting the workspaces directory and extracting the
+archive.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+from unittest import TestCase
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from outputter import SyncFileSystemOutputter, TarFileOutputter, sync_tar_archive  # noqa: E402
+from run import extract_output_archive  # noqa: E402
+
+FILES = {
+    "workspaces/ws/workspace.yaml": "kind: Workspace\n",
+    "workspaces/ws/slxs/slx-a/slx.yaml": "kind: ServiceLevelX\nname: a\n",
+    "workspaces/ws/slxs/slx-a/sli.yaml": "kind: ServiceLevelIndicator\n",
+    "workspaces/ws/slxs/slx-b/slx.yaml": "kind: ServiceLevelX\nname: b\n",
+    "resources.sqlite": b"\x00sqlite\xff",
+}
+
+
+def _write(root: str, files: dict, managed_directories=("workspaces",)) -> dict:
+    outputter = SyncFileSystemOutputter(root, managed_directories=managed_directories)
+    for path, data in files.items():
+        outputter.write_file(path, data)
+    outputter.close()
+    return outputter.stats
+
+
+def _read_tree(root: str) -> dict:
+    tree = dict()
+    for directory_path, _, file_names in os.walk(root):
+        for file_name in file_names:
+            full_path = os.path.join(directory_path, file_name)
+            with open(full_path, "rb") as f:
+                tree[os.path.relpath(full_path, root)] = f.read()
+    return tree
+
+
+def _expected_tree(files: dict) -> dict:
+    return {path: data if isinstance(data, bytes) else data.encode("utf-8") for path, data in files.items()}
+
+
+def _mtimes(root: str) -> dict:
+    return {path: os.stat(os.path.join(root, path)).st_mtime_ns for path in _read_tree(root)
+            if path != SyncFileSystemOutputter.MANIFEST_FILE_NAME}
+
+
+def _make_archive(files: dict) -> bytes:
+    outputter = TarFileOutputter()
+    for path, data in files.items():
+        outputter.write_file(path, data)
+    outputter.close()
+    return outputter.get_bytes()
+
+
+class SyncFileSystemOutputterTest(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def _tree(self) -> dict:
+        tree = _read_tree(self.root)
+        del tree[SyncFileSystemOutputter.MANIFEST_FILE_NAME]
+        return tree
+
+    def test_unchanged_files_are_not_rewritten(self):
+        self.assertEqual(_write(self.root, FILES), {"written": 5, "unchanged": 0, "deleted": 0})
+        mtimes = _mtimes(self.root)
+        self.assertEqual(_write(self.root, FILES), {"written": 0, "unchanged": 5, "deleted": 0})
+        self.assertEqual(_mtimes(self.root), mtimes)
+        self.assertEqual(self._tree(), _expected_tree(FILES))
+
+    def test_changes_are_applied(self):
+        _write(self.root, FILES)
+        files = dict(FILES)
+        files["workspaces/ws/slxs/slx-a/slx.yaml"] = "kind: ServiceLevelX\nname: a2\n"
+        files["workspaces/ws/slxs/slx-c/slx.yaml"] = "kind: ServiceLevelX\nname: c\n"
+        del files["workspaces/ws/slxs/slx-b/slx.yaml"]
+        self.assertEqual(_write(self.root, files), {"written": 2, "unchanged": 3, "deleted": 1})
+        self.assertEqual(self._tree(), _expected_tree(files))
+        # The emptied SLX directory is removed too
+        self.assertFalse(os.path.exists(os.path.join(self.root, "workspaces/ws/slxs/slx-b")))
+
+    def test_files_modified_outside_of_the_outputter_are_rewritten(self):
+        _write(self.root, FILES)
+        with open(os.path.join(self.root, "workspaces/ws/workspace.yaml"), "w") as f:
+            f.write("kind: Workspacf\n")
+        self.assertEqual(_write(self.root, FILES), {"written": 1, "unchanged": 4, "deleted": 0})
+        self.assertEqual(self._tree(), _expected_tree(FILES))
+
+    def test_unmanaged_files_are_kept(self):
+        os.makedirs(os.path.join(self.root, "workspaces/ws/slxs/old"))
+        unmanaged = {"workspaces/ws/slxs/old/slx.yaml": b"kind: ServiceLevelX\n", "notes.txt": b"mine\n",
+                     "workspaces/ws/workspace.yaml": b"kind: Workspace\n"}
+        for path, data in unmanaged.items():
+            with open(os.path.join(self.root, path), "wb") as f:
+                f.write(data)
+        # Without a manifest, identical files on disk aren't rewritten either
+        self.assertEqual(_write(self.root, FILES), {"written": 4, "unchanged": 1, "deleted": 1})
+        self.assertEqual(self._tree(), {**_expected_tree(FILES), "notes.txt": b"mine\n"})
+        # Outside of the managed directories, only files from the manifest are deleted
+        self.assertEqual(_write(self.root, {"workspaces/ws/workspace.yaml": "kind: Workspace\n"}, ()),
+                         {"written": 0, "unchanged": 1, "deleted": 4})
+        self.assertEqual(self._tree(), {"workspaces/ws/workspace.yaml": b"kind: Workspace\n", "notes.txt": b"mine\n"})
+
+    def test_write_file_from_path(self):
+        source_path = os.path.join(self.root, "source.sqlite")
+        with open(source_path, "wb") as f:
+            f.write(FILES["resources.sqlite"])
+        for expected_stats in ({"written": 1, "unchanged": 0, "deleted": 0},
+                               {"written": 0, "unchanged": 1, "deleted": 0}):
+            outputter = SyncFileSystemOutputter(os.path.join(self.root, "output"))
+            outputter.write_file_from_path("resources.sqlite", source_path)
+            outputter.close()
+            self.assertEqual(outputter.stats, expected_stats)
+        # Same content as when the data is written from memory, and the same manifest entry
+        self.assertEqual(_write(os.path.join(self.root, "output"), {"resources.sqlite": FILES["resources.sqlite"]}),
+                         {"written": 0, "unchanged": 1, "deleted": 0})
+        with open(os.path.join(self.root, "output", "resources.sqlite"), "rb") as f:
+            self.assertEqual(f.read(), FILES["resources.sqlite"])
+
+    def test_paths_outside_of_the_root_are_rejected(self):
+        outputter = SyncFileSystemOutputter(self.root)
+        for path in ("../escape.yaml", "/etc/escape.yaml", "workspaces/../../escape.yaml"):
+            with self.assertRaises(ValueError):
+                outputter.write_file(path, "x")
+
+
+class DeltaExtractionTest(TestCase):
+
+    def test_matches_full_extraction(self):
+        updated_files = dict(FILES)
+        updated_files["workspaces/ws/slxs/slx-a/slx.yaml"] = "kind: ServiceLevelX\nname: a2\n"
+        del updated_files["workspaces/ws/slxs/slx-b/slx.yaml"]
+        with tempfile.TemporaryDirectory() as full_root, tempfile.TemporaryDirectory() as sync_root:
+            for files in (FILES, updated_files):
+                archive_bytes = _make_archive(files)
+                with tarfile.open(fileobj=io.BytesIO(archive_bytes), mode="r") as archive:
+                    extract_output_archive(archive, full_root, False)
+                # The delta is applied from a stream, as for a streamed /run/ response
+                with tarfile.open(fileobj=io.BytesIO(archive_bytes), mode="r|*") as archive:
+                    extract_output_archive(archive, sync_root, True)
+                sync_tree = _read_tree(sync_root)
+                del sync_tree[SyncFileSystemOutputter.MANIFEST_FILE_NAME]
+                self.assertEqual(sync_tree, _read_tree(full_root))
+                self.assertEqual(sync_tree, _expected_tree(files))
+
+    def test_unsupported_members(self):
+        archive_file = io.BytesIO()
+        with tarfile.open(fileobj=archive_file, mode="w") as archive:
+            info = tarfile.TarInfo("workspaces/link")
+            info.type = tarfile.SYMTYPE
+            info.linkname = "/etc/passwd"
+            archive.addfile(info)
+        archive_file.seek(0)
+        with tempfile.TemporaryDirectory() as root, tarfile.open(fileobj=archive_file, mode="r") as archive:
+            with self.assertRaises(ValueError):
+                sync_tar_archive(archive, SyncFileSystemOutputter(root))
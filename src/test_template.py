@@ -0,0 +1,127 @@
+"""
+Unit tests for the Jinja environment caching in ``template``.
+
+Codebundle templates are rendered through a template loader registered per
+(repo_url, ref, code_bundle) key. These pin that each template is loaded and
+compiled once per registered loader, however many output items render it.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from unittest import TestCase, mock
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+import template  # noqa: E402
+from exceptions import WorkspaceBuilderException  # noqa: E402
+from template import register_template_loader, render_template_file  # noqa: E402
+
+TEMPLATES = {
+    "slx.yaml": "name: {{ slx_name }}\n{% include 'labels.yaml' %}",
+    "labels.yaml": "labels: {{ labels }}\n",
+}
+
+
+class CountingLoader:
+    def __init__(self, templates: dict[str, str]):
+        self.templates = templates
+        self.loads: list[str] = []
+
+    def __call__(self, name: str) -> str:
+        self.loads.append(name)
+        try:
+            return self.templates[name]
+        except KeyError:
+            raise WorkspaceBuilderException(f"Template not found: {name}")
+
+
+class CodeBundleEnvironmentCacheTest(TestCase):
+
+    def setUp(self):
+        patchers = [mock.patch.object(template, "_template_loaders", dict()),
+                    mock.patch.object(template, "_code_bundle_env_cache", template.OrderedDict())]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_templates_are_loaded_once_per_code_bundle(self):
+        key = ("https://example.com/collection.git", "main", "k8s-deployment-health")
+        loader = CountingLoader(TEMPLATES)
+        register_template_loader(key, loader)
+        for i in range(50):
+            text = render_template_file("slx.yaml", {"slx_name": f"slx-{i}", "labels": i},
+                                        template_loader_key=key)
+            self.assertEqual(text, f"name: slx-{i}\nlabels: {i}")
+        self.assertEqual(sorted(loader.loads), ["labels.yaml", "slx.yaml"])
+
+    def test_code_bundles_have_separate_environments(self):
+        key_a = ("https://example.com/collection.git", "main", "bundle-a")
+        key_b = ("https://example.com/collection.git", "main", "bundle-b")
+        register_template_loader(key_a, CountingLoader({"slx.yaml": "a"}))
+        register_template_loader(key_b, CountingLoader({"slx.yaml": "b"}))
+        self.assertEqual(render_template_file("slx.yaml", {}, template_loader_key=key_a), "a")
+        self.assertEqual(render_template_file("slx.yaml", {}, template_loader_key=key_b), "b")
+
+    def test_registering_a_new_loader_reloads_the_templates(self):
+        key = ("https://example.com/collection.git", "main", "bundle")
+        loader = CountingLoader({"slx.yaml": "v1"})
+        register_template_loader(key, loader)
+        self.assertEqual(render_template_file("slx.yaml", {}, template_loader_key=key), "v1")
+        # Registering the same loader again keeps the cached environment
+        register_template_loader(key, loader)
+        self.assertEqual(render_template_file("slx.yaml", {}, template_loader_key=key), "v1")
+        self.assertEqual(loader.loads, ["slx.yaml"])
+        # e.g. the next run, after the code collection has been updated
+        register_template_loader(key, CountingLoader({"slx.yaml": "v2"}))
+        self.assertEqual(render_template_file("slx.yaml", {}, template_loader_key=key), "v2")
+
+    def test_environment_cache_is_bounded(self):
+        with mock.patch.object(template, "CODE_BUNDLE_ENVIRONMENT_CACHE_SIZE", 2):
+            keys = [("repo", "main", f"bundle-{i}") for i in range(3)]
+            for key in keys:
+                register_template_loader(key, CountingLoader({"slx.yaml": key[2]}))
+                render_template_file("slx.yaml", {}, template_loader_key=key)
+            self.assertEqual(list(template._code_bundle_env_cache), keys[1:])
+            # An evicted environment is recreated from the registered loader
+            self.assertEqual(render_template_file("slx.yaml", {}, template_loader_key=keys[0]), "bundle-0")
+
+    def test_unregistered_key_raises(self):
+        with self.assertRaises(WorkspaceBuilderException):
+            render_template_file("slx.yaml", {}, template_loader_key=("repo", "main", "missing"))
+
+    def test_missing_template_raises(self):
+        key = ("repo", "main", "bundle")
+        register_template_loader(key, CountingLoader({}))
+        with self.assertRaises(WorkspaceBuilderException):
+            render_template_file("missing.yaml", {}, template_loader_key=key)
+
+
+class TemplateStringCacheTest(TestCase):
+
+    def test_template_strings_are_compiled_once(self):
+        template_string = "{{ workspace_path }}/slxs/{{ slx_name }}/slx.yaml#cache-test"
+        before = template.get_template_string_cache_stats()
+        for i in range(10):
+            self.assertEqual(template.render_template_string(template_string,
+                                                             {"workspace_path": "ws", "slx_name": f"slx-{i}"}),
+                             f"ws/slxs/slx-{i}/slx.yaml#cache-test")
+        after = template.get_template_string_cache_stats()
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 9)
+
+    def test_stats_since_the_start_of_a_run(self):
+        start = template.get_template_string_cache_stats()
+        for i in range(3):
+            template.render_template_string("{{ slx_name }}#since-test", {"slx_name": f"slx-{i}"})
+        stats = template.get_template_string_cache_stats(since=start)
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertEqual(stats["size"], template.get_template_string_cache_stats()["size"])
+
+    def test_invalid_template_string_raises(self):
+        for _ in range(2):
+            with self.assertRaises(WorkspaceBuilderException):
+                template.render_template_string("{{ unclosed", {})
@@ -0,0 +1,59 @@
+import datetime
+import json
+from unittest import TestCase
+
+from kubernetes.client import V1ConfigMap, V1ObjectMeta
+
+from benchmarks.resource_to_dict import legacy_kubernetes_resource_to_dict, make_resources
+from exceptions import WorkspaceBuilderException
+from utils import kubernetes_resource_to_dict
+
+
+def _set_unvalidated(model, name, value):
+    """Set a model attribute, bypassing the model validation in newer client versions."""
+    try:
+        setattr(model, name, value)
+    except ValueError:
+        model.__dict__[name] = value
+
+
+class KubernetesResourceToDictTest(TestCase):
+
+    def test_matches_json_round_trip_conversion(self):
+        for resource in make_resources(40):
+            for use_attribute_map in (True, False):
+                self.assertEqual(kubernetes_resource_to_dict(resource, use_attribute_map),
+                                 legacy_kubernetes_resource_to_dict(resource, use_attribute_map))
+
+    def test_result_is_json_serializable_with_camel_case_keys(self):
+        resource = make_resources(1)[0]
+        obj = kubernetes_resource_to_dict(resource)
+        self.assertEqual(json.loads(json.dumps(obj)), obj)
+        self.assertEqual(obj["apiVersion"], "apps/v1")
+        self.assertEqual(obj["metadata"]["creationTimestamp"], "2024-05-01T12:00:00+00:00")
+        self.assertEqual(obj["spec"]["template"]["spec"]["containers"][0]["livenessProbe"]["httpGet"]["path"],
+                         "/healthz")
+        self.assertNotIn("api_version", obj)
+
+    def test_datetimes_are_converted_to_utc(self):
+        tz = datetime.timezone(datetime.timedelta(hours=2))
+        resource = V1ConfigMap(kind="ConfigMap",
+                               metadata=V1ObjectMeta(name="cm", creation_timestamp=datetime.datetime(2024, 1, 1, 2, 0, tzinfo=tz)))
+        obj = kubernetes_resource_to_dict(resource)
+        self.assertEqual(obj["metadata"]["creationTimestamp"], "2024-01-01T00:00:00+00:00")
+
+    def test_label_and_annotation_values_are_strings(self):
+        resource = V1ConfigMap(kind="ConfigMap", metadata=V1ObjectMeta(name="cm"), data={"replicas": "3"})
+        # Simulate the non-string values that can show up in the raw label/annotation data
+        _set_unvalidated(resource.metadata, "labels", {"version": 2})
+        _set_unvalidated(resource.metadata, "annotations", {"enabled": True})
+        obj = kubernetes_resource_to_dict(resource)
+        self.assertEqual(obj["metadata"]["labels"], {"version": "2"})
+        self.assertEqual(obj["metadata"]["annotations"], {"enabled": "True"})
+        self.assertEqual(obj["data"], {"replicas": "3"})
+
+    def test_unexpected_value_type_raises(self):
+        resource = V1ConfigMap(kind="ConfigMap", metadata=V1ObjectMeta(name="cm"))
+        _set_unvalidated(resource, "data", {"key": object()})
+        with self.assertRaises(WorkspaceBuilderException):
+            kubernetes_resource_to_dict(resource)
@@ -11,6 +11,7 @@ from exceptions import (
     WorkspaceBuilderUserException,
     INVALID_GIT_REPO_MESSAGE
 )
+from resources import Registry
 from name_utils import make_qualified_slx_name, make_slx_name, make_slx_name_and_qualified, shorten_name, matches_namespace
 from git_utils import (
     get_repo_name,
@@ -120,6 +121,34 @@ class PathTest(TestCase):
         self.assertListEqual(["foo", "bar", "abc/def"], components)
 
 
+class RegistryTest(TestCase):
+
+    def test_merge_moves_resources_and_keeps_references(self):
+        registry = Registry()
+        registry.add_resource("kubernetes", "cluster", "a", "a", {"context": "a-ctx"})
+        staging_registry = Registry()
+        cluster = staging_registry.add_resource("kubernetes", "cluster", "b", "b", {"context": "b-ctx"})
+        namespace = staging_registry.add_resource("kubernetes", "namespace", "ns", "b/ns", {"cluster": cluster})
+        registry.merge(staging_registry)
+        self.assertEqual(list(registry.platforms["kubernetes"].resource_types), ["cluster", "namespace"])
+        self.assertEqual(list(registry.platforms["kubernetes"].resource_types["cluster"].instances), ["a", "b"])
+        merged_namespace = registry.lookup_resource("kubernetes", "namespace", "b/ns")
+        self.assertIs(merged_namespace, namespace)
+        self.assertIs(merged_namespace.cluster, registry.lookup_resource("kubernetes", "cluster", "b"))
+        self.assertIs(merged_namespace.resource_type, registry.lookup_resource_type("kubernetes", "namespace"))
+        self.assertEqual(staging_registry.platforms, {})
+
+    def test_merge_updates_existing_resource(self):
+        registry = Registry()
+        existing = registry.add_resource("kubernetes", "cluster", "a", "a", {"context": "a-ctx"})
+        staging_registry = Registry()
+        staging_registry.add_resource("kubernetes", "cluster", "a", "a", {"context": "a2-ctx", "region": "r1"})
+        registry.merge(staging_registry)
+        self.assertIs(registry.lookup_resource("kubernetes", "cluster", "a"), existing)
+        self.assertEqual((existing.context, existing.region), ("a2-ctx", "r1"))
+        self.assertEqual(registry.lookup_resource_type("kubernetes", "cluster").custom_attributes, {"context", "region"})
+
+
 class NameUtilsTest(TestCase):
     def test_qualifier_with_underscore(self):
         qualifiers = ["my_cl", "dev_ns"]
@@ -5,8 +5,7 @@ import os
 import fnmatch
 from urllib.parse import urlparse
 
-from collections.abc import Sequence
-from typing import Any, AnyStr, Union
+from typing import Any, AnyStr, Optional, Union
 
 from kubernetes.dynamic.resource import ResourceInstance
 
@@ -19,55 +18,51 @@ class Style:
   RESET = "\033[0m"
 
 
-def _apply_resource_attribute_map(resource, obj):
-    """
-    The Kubernetes Python module converts the field names from the Kubernetes YAML file
-    from the YAML camel-case standard to the Python snake-case standard. For presenting
-    data to the user we want to use the camel-case naming convention that they're used
-    to from authoring Kubernetes resource files. That name mapping is available via the
-    attribute_map field in the nested resource data. Unfortunately the to_dict method
-    doesn't respect the attribute map, so we need to do the remapping ourselves by
-    walking the nested data and applying the attribute map to rename the keys in any
-    dict object.
+# Per model class cache of the (python attribute name, JSON key name) pairs
+# for the attributes of the Kubernetes client model classes.
+_model_attributes_cache: dict[type, Optional[tuple[tuple[str, str], ...]]] = dict()
 
-    :param resource:
-    :param obj:
-    :return:
+
+def _get_model_attributes(model_class: type) -> Optional[tuple[tuple[str, str], ...]]:
     """
-    if isinstance(obj, str):
-        converted_obj = obj
-    elif isinstance(obj, dict):
-        try:
-            attribute_map = getattr(resource, "attribute_map")
-        except AttributeError:
-            # I think there should always be an attribute_map but just to be safe...
-            attribute_map = None
-        converted_obj = dict()
-        for key, obj_value in obj.items():
-            converted_key = attribute_map[key] if attribute_map else key
-            try:
-                # The corresponding obj in the resource is an object with attributes
-                # corresponding to the key names
-                resource_value = getattr(resource, key)
-            except AttributeError:
-                try:
-                    # The corresponding object in the resource is a dict with keys
-                    # corresponding to the key names
-                    resource_value = resource[key]
-                except (KeyError, TypeError):
-                    # There's some unexpected non-object or non-dict in the resource data
-                    # I don't think this should ever happen, but just in case...
-                    raise WorkspaceBuilderException("Error converting Kubernetes resource to dict")
-            converted_value = _apply_resource_attribute_map(resource_value, obj_value)
-            converted_obj[converted_key] = converted_value
-    elif isinstance(obj, Sequence):
-        converted_obj = list()
-        for i in range(len(obj)):
-            converted_item = _apply_resource_attribute_map(resource[i], obj[i])
-            converted_obj.append(converted_item)
+    Return the (attribute name, JSON key name) pairs for a Kubernetes client
+    model class, in the same order that the model's to_dict method uses, or
+    None if the class isn't a Kubernetes client model.
+    """
+    try:
+        return _model_attributes_cache[model_class]
+    except KeyError:
+        pass
+    attribute_map = getattr(model_class, "attribute_map", None)
+    openapi_types = getattr(model_class, "openapi_types", None)
+    if isinstance(attribute_map, dict) and isinstance(openapi_types, dict):
+        attributes = tuple((name, attribute_map.get(name, name)) for name in openapi_types)
     else:
-        converted_obj = obj
-    return converted_obj
+        attributes = None
+    _model_attributes_cache[model_class] = attributes
+    return attributes
+
+
+def _convert_kubernetes_value(value, use_attribute_map: bool):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        # Match the key conversion that JSON serialization does
+        return {(key if isinstance(key, str) else json.dumps(key)): _convert_kubernetes_value(item, use_attribute_map)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_convert_kubernetes_value(item, use_attribute_map) for item in value]
+    if isinstance(value, datetime.datetime):
+        return value.astimezone(datetime.timezone.utc).isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    attributes = _get_model_attributes(type(value))
+    if attributes is None:
+        raise WorkspaceBuilderException(f"Error converting Kubernetes resource to dict; "
+                                        f"unexpected value of type {type(value).__name__}")
+    return {(json_name if use_attribute_map else name): _convert_kubernetes_value(getattr(value, name, None),
+                                                                                   use_attribute_map)
+            for name, json_name in attributes}
 
 
 def kubernetes_resource_to_dict(resource: ResourceInstance, use_attribute_map: bool = True) -> dict[str, Any]:
@@ -77,20 +72,15 @@ def kubernetes_resource_to_dict(resource: ResourceInstance, use_attribute_map: b
     dicts, and lists, so that the object is suitable for JSON/YAML serialization.
     In theory, this is what you'd think the resource.to_dict() method would do,
     but the problem is that that returns data that contains datetime objects
-    that can't be directly serialized to JSON/YAML. To work around that issue
-    we use a custom JSON encoder that converts the datetime objects to strings
-    during JSON serialization, so that the data only contains simple data types.
-
-    Note: this implementation is sort of hacky and not super efficient, because
-    it round-trips a conversion from the object to JSON and back to objects (minus
-    the datetime objects). But we're typically doing this to get an object that
-    can then be re-serialized back to JSON or YAML, so not so efficient. There's
-    probably a better/cleaner way to do this (e.g. maybe support a similar
-    method that converts directly to JSON and then pass the JSON text directly
-    to the consumer instead of relying on it to do the JSON serialization, or
-    something like that...). But for now, in the context of the map generator
-    tool, these small inefficiencies aren't a big deal, so it's not worth
-    trying to optimize it at this point.
+    that can't be directly serialized to JSON/YAML and uses the Python snake-case
+    attribute names instead of the camel-case names from the resource YAML.
+
+    This walks the resource once, using the model classes' attribute_map to
+    name the keys and converting datetime values to UTC ISO 8601 strings. The
+    attribute lists are cached per model class. It runs once per indexed
+    Kubernetes resource, so it's worth keeping it cheap. The result is the same
+    as converting with to_dict, applying the attribute_map names and
+    round-tripping through JSON, which is what this used to do.
 
     :param resource:
         Resource obtained from the Kubernetes python module
@@ -100,21 +90,8 @@ def kubernetes_resource_to_dict(resource: ResourceInstance, use_attribute_map: b
         Dict object that contains only simple, built-in objects that
         is suitable for JSON serialization
     """
-    class DateTimeEncoder(json.JSONEncoder):
-        def default(self, value):
-            if isinstance(value, datetime.datetime):
-                return value.astimezone(datetime.timezone.utc).isoformat()
-            else:
-                return super().default(value)
-    obj = resource.to_dict()
-    if use_attribute_map:
-        # Convert it again to apply the attribute_map names so that the keys in the
-        # dicts use the camel-case naming conventions that the user expects.
-        # Again, this is not super efficient, but we don't need to be super performant.
-        obj = _apply_resource_attribute_map(resource, obj)
-    json_str = json.dumps(obj, cls=DateTimeEncoder)
-    obj = json.loads(json_str)
-    
+    obj = _convert_kubernetes_value(resource, use_attribute_map)
+
     # CRITICAL FIX: Convert all metadata label and annotation values to strings
     # to prevent K8s CRD reconciliation errors with numeric values
     if 'metadata' in obj:
@@ -125,7 +102,7 @@ def kubernetes_resource_to_dict(resource: ResourceInstance, use_attribute_map: b
         if 'annotations' in metadata and metadata['annotations']:
             for key, value in metadata['annotations'].items():
                 metadata['annotations'][key] = str(value)
-    
+
     return obj
 
 def read_file(file_path: AnyStr, mode="r", encoding=None) -> Union[str, bytes]:
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import tempfile
 import threading
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
@@ -10,8 +12,9 @@ from pathlib import Path
 from typing import Any
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 
 from component import Stage, get_all_settings
 from utils import get_version_info
@@ -21,9 +24,15 @@ from .exceptions import build_error_response
 from .explorer import router as explorer_router
 from .home import router as home_router
 from .mcp.server import build_mcp_lifespan, build_streamable_http_app, is_mcp_enabled
-from .models import InfoResult
-from .run_handler import execute_run
-from .serialization import serialize_info, serialize_run_result
+from .models import InfoResult, StreamingArchiveRunResult
+from .run_handler import execute_run, save_multipart_run_request
+from .serialization import (
+    ARCHIVE_MEDIA_TYPE,
+    RUN_RESULT_HEADER,
+    serialize_info,
+    serialize_run_result,
+    serialize_run_result_header,
+)
 from .startup import configure_uvicorn_loggers
 
 startup.bootstrap()
@@ -81,6 +90,10 @@ else:
 # ---------------------------------------------------------------------------
 _run_lock = threading.Lock()
 
+# Size limit of the non-file parts of a multipart /run/ request, i.e. the JSON
+# request data if it's not sent as a file part (file parts aren't limited).
+MAX_RUN_REQUEST_PART_SIZE = 64 * 1024 * 1024
+
 
 @app.get("/info/")
 def info() -> dict[str, Any]:
@@ -99,26 +112,69 @@ def info() -> dict[str, Any]:
 
 @app.post("/run/")
 async def run(request: Request) -> dict[str, Any]:
-    request_data = await request.json()
-    # Serialise /run/ calls — overlapping discovery/rendering races on the
-    # health tracker state file, combined kubeconfig (~/.kube/), and
-    # per-run resource registry. A second request returns 503.
-    if not _run_lock.acquire(blocking=False):
-        return JSONResponse(
-            status_code=503,
-            content={"detail": "A workspace build is already running; try again later."},
-        )
+    # File settings can be uploaded as binary parts of a multipart request
+    # instead of base64 in the JSON body; see save_multipart_run_request.
+    upload_directory = None
+    request_files = None
     try:
-        # execute_run is a long-running synchronous call (discovery +
-        # rendering can take minutes). Running it in the event loop would
-        # block /health/ and other endpoints, causing the liveness probe
-        # to kill the pod. Delegate to a thread so the event loop stays
-        # responsive.
-        import asyncio
-        result = await asyncio.to_thread(execute_run, request_data)
-        return serialize_run_result(result)
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            upload_directory = tempfile.TemporaryDirectory()
+            async with request.form(max_part_size=MAX_RUN_REQUEST_PART_SIZE) as form:
+                request_data, request_files = await asyncio.to_thread(
+                    save_multipart_run_request, form, upload_directory.name
+                )
+        else:
+            request_data = await request.json()
+        # Serialise /run/ calls — overlapping discovery/rendering races on the
+        # health tracker state file, combined kubeconfig (~/.kube/), and
+        # per-run resource registry. A second request returns 503.
+        if not _run_lock.acquire(blocking=False):
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "A workspace build is already running; try again later."},
+            )
+        try:
+            # execute_run is a long-running synchronous call (discovery +
+            # rendering can take minutes). Running it in the event loop would
+            # block /health/ and other endpoints, causing the liveness probe
+            # to kill the pod. Delegate to a thread so the event loop stays
+            # responsive.
+            stream_output = ARCHIVE_MEDIA_TYPE in request.headers.get("accept", "")
+            result = await asyncio.to_thread(execute_run, request_data, stream_output, request_files)
+            if stream_output:
+                return _streaming_run_response(result)
+            return serialize_run_result(result)
+        finally:
+            _run_lock.release()
     finally:
-        _run_lock.release()
+        if upload_directory is not None:
+            upload_directory.cleanup()
+
+
+def _iter_archive_chunks(result: StreamingArchiveRunResult):
+    try:
+        yield from result.outputter.iter_chunks()
+    finally:
+        result.outputter.discard()
+
+
+def _streaming_run_response(result: StreamingArchiveRunResult) -> StreamingResponse:
+    """
+    Stream the output archive of a run in the response body, so it's never
+    held in memory as a whole (let alone base64-encoded in a JSON response).
+    The spooled archive is deleted once it has been sent, or if the client
+    goes away before that.
+    """
+    headers = {
+        RUN_RESULT_HEADER: serialize_run_result_header(result),
+        "Content-Length": str(result.outputter.get_size()),
+    }
+    return StreamingResponse(
+        _iter_archive_chunks(result),
+        media_type=ARCHIVE_MEDIA_TYPE,
+        headers=headers,
+        background=BackgroundTask(result.outputter.discard),
+    )
 
 
 @app.get("/health/")
@@ -1,11 +1,16 @@
 """Lightweight token-overlap ranking for SLX bundle search.
 
-We deliberately keep this dependency-free for v1: SQL ``LIKE`` filters in
-:mod:`workspace_builder.resource_store_reader` get us to a candidate set,
+We deliberately keep this dependency-free for v1: SQL full-text (or ``LIKE``)
+filters in :mod:`workspace_builder.resource_store_reader` get us to a candidate set,
 and this module re-ranks the candidates by tokenised overlap with the
 query so an agent's natural-language phrasing ("failing pods", "key vault
 rotation") surfaces the most relevant Skill bundle first.
 
+The per-field tokens (:func:`search_tokens.field_tokens`) are shared with
+the ``skill_tokens`` index of the resource store, so stores that have it
+rank every bundle with a single query instead of re-scoring a candidate
+pool here; both paths give the same scores.
+
 A future iteration can swap this out for embeddings/semantic search
 without changing the tool contract that clients see, because the only
 thing this returns is a stable ``score`` + ``snippet`` pair attached to
@@ -14,44 +19,9 @@ each candidate dict.
 
 from __future__ import annotations
 
-import re
 from typing import Iterable
 
-# Field weights for token-overlap scoring. Heuristic, not learned: matches
-# in the SLX name should dominate matches in the long-form runbook body.
-_NAME_WEIGHT = 4.0
-_PATH_WEIGHT = 2.0
-_KIND_WEIGHT = 1.5
-_CONTENT_WEIGHT = 1.0
-
-_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
-_STOPWORDS = frozenset(
-    {
-        "a",
-        "an",
-        "and",
-        "are",
-        "as",
-        "at",
-        "be",
-        "but",
-        "by",
-        "for",
-        "from",
-        "in",
-        "is",
-        "it",
-        "of",
-        "on",
-        "or",
-        "that",
-        "the",
-        "this",
-        "to",
-        "was",
-        "with",
-    }
-)
+from search_tokens import FIELD_WEIGHTS, field_tokens, tokenize
 
 # Chars to scan around the first match when building a snippet. Roughly two
 # lines of context, enough for an agent to verify relevance before fetching
@@ -59,17 +29,6 @@ _STOPWORDS = frozenset(
 _SNIPPET_RADIUS = 120
 
 
-def tokenize(text: str) -> list[str]:
-    """Return a lowercased, stopword-filtered token list for ``text``."""
-    if not text:
-        return []
-    return [
-        tok.lower()
-        for tok in _TOKEN_RE.findall(text)
-        if tok.lower() not in _STOPWORDS
-    ]
-
-
 def score_candidate(
     query_tokens: Iterable[str],
     *,
@@ -88,20 +47,8 @@ def score_candidate(
     if not query_set:
         return 0.0
 
-    score = 0.0
-    if name:
-        name_tokens = set(tokenize(name))
-        score += _NAME_WEIGHT * len(query_set & name_tokens)
-    if path:
-        path_tokens = set(tokenize(path))
-        score += _PATH_WEIGHT * len(query_set & path_tokens)
-    if kinds:
-        kind_tokens = set(tokenize(" ".join(kinds)))
-        score += _KIND_WEIGHT * len(query_set & kind_tokens)
-    if content:
-        content_tokens = set(tokenize(content))
-        score += _CONTENT_WEIGHT * len(query_set & content_tokens)
-    return score
+    tokens = field_tokens(name=name, path=path, kinds=kinds, content=content)
+    return sum(FIELD_WEIGHTS[field] * len(query_set & tokens[field]) for field in FIELD_WEIGHTS)
 
 
 def make_snippet(content: str, query: str) -> str:
@@ -125,4 +72,4 @@ def make_snippet(content: str, query: str) -> str:
     return head + ("..." if len(content) > 2 * _SNIPPET_RADIUS else "")
 
 
-__all__ = ["tokenize", "score_candidate", "make_snippet"]
+__all__ = ["FIELD_WEIGHTS", "tokenize", "field_tokens", "score_candidate", "make_snippet"]
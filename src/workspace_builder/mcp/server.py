@@ -124,7 +124,8 @@ def _build_mcp_server() -> FastMCP:
             "(as returned by list_skills / search_skills). Includes the "
             "SLX yaml, SLI yaml, runbook yaml, and SKILL.md markdown so "
             "the agent can reason about what the Skill does and how to "
-            "describe or invoke it."
+            "describe or invoke it, and the resources the Skill was "
+            "generated for."
         ),
     )
     def get_skill(slx_name: str) -> dict[str, Any]:
@@ -184,10 +185,10 @@ def _build_mcp_server() -> FastMCP:
         description=(
             "Return Skill bundles bound to a specific resource - the "
             "agent's natural \"I'm looking at this Pod / Key Vault / "
-            "Deployment, what runbooks apply?\" entry point. Matches "
-            "are best-effort against SLX directory names and rendered "
-            "content; future iterations will use an explicit binding "
-            "stored at render time."
+            "Deployment, what runbooks apply?\" entry point. Uses the "
+            "SLX-to-resource bindings recorded at generation time; on "
+            "older stores, matches are best-effort against SLX directory "
+            "names and rendered content."
         ),
     )
     def get_skills_for_resource(
@@ -236,12 +237,13 @@ def _build_mcp_server() -> FastMCP:
     @mcp.tool(
         name="get_resource_neighbors",
         description=(
-            "Walk one hop in the indexed resource graph. Returns "
+            "Walk the indexed resource graph, one hop by default. Returns "
             "forward references (resources this one points at, e.g. a "
             "Deployment -> its Service / Pods / ReplicaSet) and reverse "
             "references (resources that point at it, e.g. a Namespace's "
-            "members). Useful for grounding a multi-resource "
-            "investigation."
+            "members). Pass depth (up to 5) to follow references over "
+            "several hops; each result has the depth it was reached at. "
+            "Useful for grounding a multi-resource investigation."
         ),
     )
     def get_resource_neighbors(
@@ -249,12 +251,14 @@ def _build_mcp_server() -> FastMCP:
         resource_type: str,
         qualified_name: str,
         limit: Optional[int] = None,
+        depth: Optional[int] = None,
     ) -> dict[str, Any]:
         return _tools.get_resource_neighbors(
             platform=platform,
             resource_type=resource_type,
             qualified_name=qualified_name,
             limit=limit,
+            depth=depth,
         )
 
     # ---- Smarter Skill recommendation ------------------------------------
@@ -14,28 +14,37 @@ sees in the explorer UI.
 
 from __future__ import annotations
 
+import logging
 import os
 from typing import Any, Optional
 
 from indexers.sqlite_resource_writer import (
+    SKILL_CONTENT_KINDS,
     get_resource as _get_resource,
     get_workspace_artifact,
+    has_table,
     list_resource_types,
-    search_workspace_artifacts,
+    list_slx_bindings,
+    walk_resource_refs,
 )
 from utils import get_version_info
 
 from ..resource_store_reader import (
     count_resources,
     get_store_summary,
+    has_slx_bindings,
     json_safe,
     list_slx_bundles,
+    list_slx_bundles_for_resource,
+    rank_slx_bundles,
     resource_db_connection,
     resolve_resource_db_path,
     search_resources,
 )
 from .search import make_snippet, score_candidate, tokenize
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_LIMIT = 20
 MAX_LIMIT = 100
 
@@ -44,11 +53,15 @@ MAX_LIMIT = 100
 # above this and capping prevents one giant SLX from blowing up a request.
 MAX_CONTENT_CHARS = 32_000
 
-# Pool of bundle candidates we re-rank inside ``search_skills``. Big enough
+# Pool of bundle candidates we re-rank inside ``search_skills`` and
+# ``recommend_skills`` on stores without the search token index. Big enough
 # that LIKE matches anywhere in a runbook can still surface a precise hit,
 # small enough that ranking stays O(few-hundred) per query.
 _SEARCH_CANDIDATE_POOL = 100
 
+# Maximum number of hops ``get_resource_neighbors`` walks in each direction.
+MAX_NEIGHBOR_DEPTH = 5
+
 
 # ---------------------------------------------------------------------------
 # Errors
@@ -194,11 +207,12 @@ def search_skills(
 ) -> dict[str, Any]:
     """Rank-search rendered Skill bundles by ``query``.
 
-    Combines an SQL ``LIKE`` filter against the SLX directory / file path
-    / content (cheap, narrows to a candidate pool) with token-overlap
-    re-ranking against the SLX name + skill markdown body. Returns at
-    most ``limit`` bundles ordered by score, each with a short snippet
-    around the first query match.
+    Combines an optional SQL filter against the SLX directory / file
+    path / content (narrows the candidates) with token-overlap ranking
+    against the SLX name, path, kinds and artifact contents, looked up
+    in the search token index of the store. Returns at most ``limit``
+    bundles ordered by score, each with a short snippet around the
+    first query match.
     """
     limit = _clip_limit(limit)
     if not query or not query.strip():
@@ -208,44 +222,18 @@ def search_skills(
     # narrowing of the candidate pool. Using the free-text query as a LIKE
     # forces all words to appear contiguously, which is wrong for natural-
     # language queries ("rotate key vault secrets" rarely appears verbatim).
-    # Token-overlap ranking below does the real relevance work; the pool
-    # cap (_SEARCH_CANDIDATE_POOL) keeps this O(few-hundred) per query.
+    # Token-overlap ranking below does the real relevance work.
     extra_terms = [t for t in (platform, resource_type) if t]
     pool_query = " ".join(extra_terms) if extra_terms else None
 
     with resource_db_connection() as conn:
-        pool = list_slx_bundles(
-            conn,
-            q=pool_query,
-            limit=_SEARCH_CANDIDATE_POOL,
-            offset=0,
-        )
-        query_tokens = tokenize(query)
-        ranked: list[tuple[float, dict[str, Any]]] = []
-        for bundle in pool["items"]:
-            content = _bundle_content_for_ranking(conn, bundle)
-            score = score_candidate(
-                query_tokens,
-                name=bundle.get("slx_name"),
-                path=bundle.get("slx_directory"),
-                kinds=bundle.get("kinds"),
-                content=content,
-            )
-            if score <= 0.0:
-                continue
-            summary = _summarize_bundle(bundle)
-            summary["score"] = score
-            summary["snippet"] = make_snippet(content, query)
-            ranked.append((score, summary))
-
-        ranked.sort(key=lambda pair: pair[0], reverse=True)
-        items = [item for _, item in ranked[:limit]]
+        ranked = _rank_skills(conn, query, pool_query, limit)
 
     return {
-        "total": len(ranked),
-        "candidate_pool": pool["total"],
+        "total": ranked["total"],
+        "candidate_pool": ranked["candidate_pool"],
         "limit": limit,
-        "items": items,
+        "items": ranked["items"],
     }
 
 
@@ -256,7 +244,8 @@ def get_skill(slx_name: str) -> dict[str, Any]:
     what ``list_skills`` reports as ``slx_name``). Content is clipped
     per artifact at :data:`MAX_CONTENT_CHARS` to stay within agent
     context budgets; the explorer REST API is the escape hatch for full
-    content.
+    content. Stores with SLX bindings also list the ``resources`` the
+    SLX was generated for.
     """
     if not slx_name:
         raise ValueError("slx_name is required")
@@ -294,7 +283,7 @@ def get_skill(slx_name: str) -> dict[str, Any]:
                 }
             )
 
-        return {
+        result = {
             "workspace_name": match["workspace_name"],
             "slx_name": match["slx_name"],
             "slx_directory": match["slx_directory"],
@@ -304,6 +293,14 @@ def get_skill(slx_name: str) -> dict[str, Any]:
             "has_runbook": match["has_runbook"],
             "files": files,
         }
+        if has_slx_bindings(conn):
+            result["resources"] = [
+                {key: binding[key] for key in ("platform", "resource_type", "qualified_name", "name", "role")}
+                for binding in list_slx_bindings(
+                    conn, workspace_name=match["workspace_name"], slx_directory=match["slx_directory"]
+                )
+            ]
+        return result
 
 
 # ---------------------------------------------------------------------------
@@ -388,33 +385,84 @@ def _summarize_bundle(bundle: dict[str, Any]) -> dict[str, Any]:
 
 
 def _bundle_content_for_ranking(conn, bundle: dict[str, Any]) -> str:
-    """Concatenate skill + runbook + sli content for a bundle.
+    """Concatenate skill + runbook + sli + slx content for a bundle.
 
     We score against the union so a query that matches a runbook
     snippet still surfaces the bundle even when the SLX name itself is
-    generic. Skill markdown is weighted highest by ordering it first
-    (only matters if we ever truncate; harmless otherwise).
+    generic. Skill markdown comes first, so the snippets prefer it.
     """
     workspace_name = bundle.get("workspace_name")
-    if not workspace_name:
+    slx_dir = bundle.get("slx_directory")
+    if not workspace_name or not slx_dir:
         return ""
-    slx_dir = bundle.get("slx_directory") or ""
-    parts: list[str] = []
-    for kind in ("skill", "runbook", "sli", "slx"):
-        rows = search_workspace_artifacts(
-            conn,
-            workspace_name=workspace_name,
-            artifact_kind=kind,
-            limit=10,
-            offset=0,
+    kinds_sql = ", ".join("?" * len(SKILL_CONTENT_KINDS))
+    # The unary + keeps the planner on the slx_directory index rather than
+    # scanning the workspace's artifacts through the primary key
+    rows = conn.execute(
+        f"SELECT artifact_kind, content FROM workspace_artifacts "
+        f"WHERE +workspace_name = ? AND slx_directory = ? AND artifact_kind IN ({kinds_sql}) "
+        f"ORDER BY relative_path",
+        (workspace_name, slx_dir, *SKILL_CONTENT_KINDS),
+    ).fetchall()
+    rows.sort(key=lambda row: SKILL_CONTENT_KINDS.index(row[0]))
+    return "\n\n".join(content for _, content in rows if content)
+
+
+def _rank_skills(conn, query_text: str, pool_query: Optional[str], limit: int) -> dict[str, Any]:
+    """Rank the Skill bundles by token overlap with ``query_text``, restricted
+    to the bundles matching ``pool_query`` (when given).
+
+    Stores with the search token index are ranked there, over every bundle.
+    Stores without it (older stores, or a /run/ output archive that wasn't
+    extracted by run.py) re-tokenize the content of a candidate pool of up to
+    ``_SEARCH_CANDIDATE_POOL`` bundles. Only the returned bundles have their
+    content read, for the snippets.
+    """
+    query_tokens = tokenize(query_text)
+    if has_table(conn, "skill_tokens"):
+        data = rank_slx_bundles(conn, query_tokens, q=pool_query, limit=limit)
+        items = []
+        for bundle in data["items"]:
+            summary = _summarize_bundle(bundle)
+            summary["score"] = bundle["score"]
+            summary["snippet"] = make_snippet(_bundle_content_for_ranking(conn, bundle), query_text)
+            items.append(summary)
+        return {"total": data["total"], "candidate_pool": data["candidate_pool"], "items": items}
+
+    pool = list_slx_bundles(
+        conn,
+        q=pool_query,
+        limit=_SEARCH_CANDIDATE_POOL,
+        offset=0,
+    )
+    logger.warning(
+        "The resource store has no skill search token index; ranking only the first %d of %d "
+        "candidate bundles. Re-run discovery to rebuild the store with the index.",
+        len(pool["items"]),
+        pool["total"],
+    )
+    ranked: list[tuple[float, dict[str, Any]]] = []
+    for bundle in pool["items"]:
+        content = _bundle_content_for_ranking(conn, bundle)
+        score = score_candidate(
+            query_tokens,
+            name=bundle.get("slx_name"),
+            path=bundle.get("slx_directory"),
+            kinds=bundle.get("kinds"),
+            content=content,
         )
-        for row in rows:
-            if not row.get("relative_path", "").startswith(slx_dir):
-                continue
-            content = row.get("content")
-            if content:
-                parts.append(content)
-    return "\n\n".join(parts)
+        if score <= 0.0:
+            continue
+        summary = _summarize_bundle(bundle)
+        summary["score"] = score
+        summary["snippet"] = make_snippet(content, query_text)
+        ranked.append((score, summary))
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return {
+        "total": len(ranked),
+        "candidate_pool": pool["total"],
+        "items": [item for _, item in ranked[:limit]],
+    }
 
 
 # Resource-availability helper for the server module so it can decide
@@ -444,16 +492,20 @@ def get_skills_for_resource(
 ) -> dict[str, Any]:
     """Return Skill bundles that reference a specific resource.
 
-    The workspace-builder doesn't store an explicit "this SLX is bound
-    to this resource" link in the SQLite store today; instead, the
-    binding is encoded into the rendered artifacts (``slx_directory``
-    name, runbook ``configProvided`` values, SKILL.md prose). We do a
-    best-effort match by scanning artifact content + paths for the
-    resource's ``qualified_name`` and ``name``.
+    The store records which resources each SLX was generated for in
+    ``slx_bindings``; each bundle carries the ``role`` of the resource
+    in it (``primary`` for the resource the SLX was generated from,
+    ``child`` for resources aggregated into it).
+
+    Stores without the bindings (written before schema v5) only have
+    the binding encoded into the rendered artifacts (``slx_directory``
+    name, runbook ``configProvided`` values, SKILL.md prose). For those
+    we do a best-effort match by scanning artifact content + paths for
+    the resource's ``qualified_name`` and ``name``, and each bundle
+    carries the ``matched_terms`` instead.
 
     This is the agent's natural "I'm looking at this Pod, what runbooks
-    apply?" entry point. Future iterations can swap the content scan
-    for an explicit binding once the renderer records one.
+    apply?" entry point.
     """
     if not platform or not resource_type or not qualified_name:
         raise ValueError("platform, resource_type and qualified_name are required")
@@ -472,6 +524,27 @@ def get_skills_for_resource(
             )
 
         short_name = resource.get("name") or qualified_name.rsplit("/", 1)[-1]
+        resource_summary = {
+            "platform": platform,
+            "resource_type": resource_type,
+            "qualified_name": qualified_name,
+            "name": short_name,
+        }
+        if has_slx_bindings(conn):
+            data = list_slx_bundles_for_resource(
+                conn, platform, resource_type, qualified_name, limit=limit, offset=0
+            )
+            items = []
+            for bundle in data["items"]:
+                summary = _summarize_bundle(bundle)
+                summary["role"] = bundle["role"]
+                items.append(summary)
+            return {
+                "resource": resource_summary,
+                "total": data["total"],
+                "items": items,
+            }
+
         match_terms = {qualified_name, short_name}
         # SLX directories are usually slugified; basename of qualified_name
         # often appears in directory names verbatim or with separators
@@ -509,12 +582,7 @@ def get_skills_for_resource(
         items.sort(key=lambda b: (-len(b["matched_terms"]), b.get("slx_name") or ""))
 
     return {
-        "resource": {
-            "platform": platform,
-            "resource_type": resource_type,
-            "qualified_name": qualified_name,
-            "name": short_name,
-        },
+        "resource": resource_summary,
         "total": len(items),
         "items": items[:limit],
     }
@@ -620,29 +688,35 @@ def get_resource_neighbors(
     resource_type: str,
     qualified_name: str,
     limit: Optional[int] = None,
+    depth: Optional[int] = None,
 ) -> dict[str, Any]:
-    """Return resources directly related to the given resource.
-
-    Two passes:
-
-    * **Forward refs**: walk the resource's attributes for ``$ref`` markers
-      (the encoder in :mod:`indexers.sqlite_resource_writer` records every
-      Resource cross-reference as a stable JSON marker) and resolve each
-      to a real row in the resource store.
-    * **Reverse refs**: SQL ``LIKE`` over ``attributes_json`` for the
-      resource's qualified name to find anything that points back at it.
-
-    Both directions are bounded by ``limit`` so an agent can't run away
-    on a hub resource (e.g. a Resource Group with hundreds of
-    descendants).
+    """Return resources related to the given resource.
+
+    Two directions:
+
+    * **Forward refs**: resources this one points at. The encoder in
+      :mod:`indexers.sqlite_resource_writer` records every Resource
+      cross-reference as a stable ``$ref`` JSON marker, and the snapshot
+      extracts each one into the ``resource_refs`` edge table; references
+      to resources that aren't in the store are returned unresolved.
+    * **Reverse refs**: resources that point back at it, from the same
+      edges looked up by their target.
+
+    ``depth`` (1 by default, at most :data:`MAX_NEIGHBOR_DEPTH`) follows the
+    edges for that many hops; each item carries the ``depth`` it was
+    reached at and the ``attr_path`` of the reference. Both directions are
+    bounded by ``limit`` so an agent can't run away on a hub resource (e.g.
+    a Resource Group with hundreds of descendants).
+
+    Stores written before the edge table existed fall back to walking the
+    attributes for forward refs and a ``LIKE`` over ``attributes_json`` for
+    reverse refs, one hop only.
     """
     if not platform or not resource_type or not qualified_name:
         raise ValueError("platform, resource_type and qualified_name are required")
 
     limit = _clip_limit(limit)
-
-    forward: list[dict[str, Any]] = []
-    reverse: list[dict[str, Any]] = []
+    depth = max(1, min(int(depth or 1), MAX_NEIGHBOR_DEPTH))
 
     with resource_db_connection() as conn:
         resource = _get_resource(conn, platform, resource_type, qualified_name)
@@ -652,67 +726,21 @@ def get_resource_neighbors(
                 f"resource_type={resource_type!r} qualified_name={qualified_name!r}"
             )
 
-        # --- Forward refs: walk attributes for $ref markers --------------
-        seen_forward: set[tuple[str, str, str]] = set()
-        for ref in _walk_refs(resource.get("attributes")):
-            key = (
-                ref.get("platform") or "",
-                ref.get("resource_type") or "",
-                ref.get("qualified_name") or "",
-            )
-            if not all(key) or key in seen_forward:
-                continue
-            seen_forward.add(key)
-            target = _get_resource(conn, key[0], key[1], key[2])
-            if target is None:
-                # Reference to something not in the store (e.g. cross-
-                # subscription Azure RG or a referenced K8s resource we
-                # didn't index). Surface the marker so the agent can see
-                # the link even though we can't resolve it.
-                forward.append(
-                    {
-                        "platform": key[0],
-                        "resource_type": key[1],
-                        "qualified_name": key[2],
-                        "name": ref.get("name"),
-                        "resolved": False,
-                    }
-                )
-            else:
-                forward.append(
-                    {
-                        "platform": target["platform"],
-                        "resource_type": target["resource_type"],
-                        "qualified_name": target["qualified_name"],
-                        "name": target.get("name"),
-                        "resolved": True,
-                    }
+        if has_table(conn, "resource_refs"):
+            forward, reverse = (
+                walk_resource_refs(
+                    conn,
+                    platform,
+                    resource_type,
+                    qualified_name,
+                    direction=direction,
+                    max_depth=depth,
+                    limit=limit,
                 )
-            if len(forward) >= limit:
-                break
-
-        # --- Reverse refs: who references this resource? -----------------
-        # We escape SQL LIKE wildcards so qualified_names containing
-        # underscores ("default/api_v2") don't match as wildcards.
-        like_pattern = "%" + qualified_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
-        rows = conn.execute(
-            "SELECT platform, resource_type, qualified_name, name "
-            "FROM resources "
-            "WHERE attributes_json LIKE ? ESCAPE '\\' "
-            "  AND NOT (platform = ? AND resource_type = ? AND qualified_name = ?) "
-            "LIMIT ?",
-            (like_pattern, platform, resource_type, qualified_name, limit),
-        ).fetchall()
-        for row in rows:
-            reverse.append(
-                {
-                    "platform": row[0],
-                    "resource_type": row[1],
-                    "qualified_name": row[2],
-                    "name": row[3],
-                    "resolved": True,
-                }
+                for direction in ("forward", "reverse")
             )
+        else:
+            forward, reverse = _neighbors_from_attributes(conn, resource, limit)
 
     return {
         "resource": {
@@ -726,6 +754,86 @@ def get_resource_neighbors(
     }
 
 
+def _neighbors_from_attributes(
+    conn, resource: dict[str, Any], limit: int
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """One hop of forward / reverse refs for stores without ``resource_refs``."""
+    platform = resource["platform"]
+    resource_type = resource["resource_type"]
+    qualified_name = resource["qualified_name"]
+    forward: list[dict[str, Any]] = []
+    reverse: list[dict[str, Any]] = []
+
+    # --- Forward refs: walk attributes for $ref markers ------------------
+    seen_forward: set[tuple[str, str, str]] = set()
+    for ref in _walk_refs(resource.get("attributes")):
+        key = (
+            ref.get("platform") or "",
+            ref.get("resource_type") or "",
+            ref.get("qualified_name") or "",
+        )
+        if not all(key) or key in seen_forward:
+            continue
+        seen_forward.add(key)
+        target = _get_resource(conn, key[0], key[1], key[2])
+        if target is None:
+            # Reference to something not in the store (e.g. cross-
+            # subscription Azure RG or a referenced K8s resource we
+            # didn't index). Surface the marker so the agent can see
+            # the link even though we can't resolve it.
+            forward.append(
+                {
+                    "platform": key[0],
+                    "resource_type": key[1],
+                    "qualified_name": key[2],
+                    "name": ref.get("name"),
+                    "attr_path": None,
+                    "depth": 1,
+                    "resolved": False,
+                }
+            )
+        else:
+            forward.append(
+                {
+                    "platform": target["platform"],
+                    "resource_type": target["resource_type"],
+                    "qualified_name": target["qualified_name"],
+                    "name": target.get("name"),
+                    "attr_path": None,
+                    "depth": 1,
+                    "resolved": True,
+                }
+            )
+        if len(forward) >= limit:
+            break
+
+    # --- Reverse refs: who references this resource? ---------------------
+    # We escape SQL LIKE wildcards so qualified_names containing
+    # underscores ("default/api_v2") don't match as wildcards.
+    like_pattern = "%" + qualified_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rows = conn.execute(
+        "SELECT platform, resource_type, qualified_name, name "
+        "FROM resources "
+        "WHERE attributes_json LIKE ? ESCAPE '\\' "
+        "  AND NOT (platform = ? AND resource_type = ? AND qualified_name = ?) "
+        "LIMIT ?",
+        (like_pattern, platform, resource_type, qualified_name, limit),
+    ).fetchall()
+    for row in rows:
+        reverse.append(
+            {
+                "platform": row[0],
+                "resource_type": row[1],
+                "qualified_name": row[2],
+                "name": row[3],
+                "attr_path": None,
+                "depth": 1,
+                "resolved": True,
+            }
+        )
+    return forward, reverse
+
+
 def _walk_refs(value: Any):
     """Yield ``$ref`` marker dicts found anywhere inside a decoded
     attribute tree.
@@ -763,8 +871,8 @@ def recommend_skills(
 
     * Accepts longer free-text input, not a curated query string.
     * Token-overlap scoring is run against every bundle (not gated by
-      the SQL ``LIKE`` pre-filter), so a long stack trace can still
-      surface a Skill whose relevance lives only in the runbook body.
+      the SQL pre-filter), so a long stack trace can still surface a
+      Skill whose relevance lives only in the runbook body.
     * The default ``max_results`` is small (5) because this is meant
       to feed an agent's "consider these next" list, not a browse.
 
@@ -778,36 +886,12 @@ def recommend_skills(
     max_results = max(1, min(int(max_results or 5), MAX_LIMIT))
 
     with resource_db_connection() as conn:
-        pool = list_slx_bundles(
-            conn,
-            q=None,
-            limit=_SEARCH_CANDIDATE_POOL,
-            offset=0,
-        )
-        query_tokens = tokenize(context_text)
-        ranked: list[tuple[float, dict[str, Any]]] = []
-        for bundle in pool["items"]:
-            content = _bundle_content_for_ranking(conn, bundle)
-            score = score_candidate(
-                query_tokens,
-                name=bundle.get("slx_name"),
-                path=bundle.get("slx_directory"),
-                kinds=bundle.get("kinds"),
-                content=content,
-            )
-            if score <= 0.0:
-                continue
-            summary = _summarize_bundle(bundle)
-            summary["score"] = score
-            summary["snippet"] = make_snippet(content, context_text)
-            ranked.append((score, summary))
-        ranked.sort(key=lambda pair: pair[0], reverse=True)
-        items = [item for _, item in ranked[:max_results]]
+        ranked = _rank_skills(conn, context_text, None, max_results)
 
     return {
-        "total": len(ranked),
-        "candidate_pool": pool["total"],
-        "items": items,
+        "total": ranked["total"],
+        "candidate_pool": ranked["candidate_pool"],
+        "items": ranked["items"],
     }
 
 
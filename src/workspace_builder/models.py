@@ -1,5 +1,5 @@
 from component import Component, Setting
-from outputter import DirectoryItem
+from outputter import DirectoryItem, TarFileOutputter
 from typing import Optional
 from dataclasses import dataclass
 
@@ -56,6 +56,20 @@ class ArchiveRunResult(CommonRunResult):
         self.output = output
 
 
+class StreamingArchiveRunResult(CommonRunResult):
+    """
+    Model for the result variant for the /run endpoint that streams the
+    output archive in the response body, instead of base64-encoding it in the
+    JSON response. The archive is read from the (closed) outputter, which
+    must be discarded once the response has been sent.
+    """
+    outputter: TarFileOutputter
+
+    def __init__(self, message: str, warnings: list[str], outputter: TarFileOutputter):
+        super().__init__(message, warnings, "archive")
+        self.outputter = outputter
+
+
 class FileItemRunResult(CommonRunResult):
     """
     Model for the result variant for the /run endpoint that returns
@@ -5,23 +5,24 @@ from __future__ import annotations
 import json
 import logging
 import os
-import re
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Iterator, Optional
 
-try:
-    import yaml as _yaml  # PyYAML is already a runtime dep of workspace-builder
-except ImportError:  # pragma: no cover - PyYAML is a hard dep but be defensive
-    _yaml = None
-
 logger = logging.getLogger(__name__)
 
 from indexers.sqlite_resource_writer import (
+    ARTIFACTS_FTS_SNIPPET,
+    ARTIFACTS_FTS_TABLE,
+    RESOURCES_FTS_SNIPPET,
+    RESOURCES_FTS_TABLE,
     count_workspace_artifacts,
+    extract_slx_display_name,
+    fts_match_query,
     get_resource,
     get_schema_version,
+    has_table,
     list_platforms,
     list_resource_types,
     list_resources,
@@ -87,25 +88,53 @@ def get_store_summary(conn: sqlite3.Connection) -> dict[str, Any]:
     }
 
 
-def count_resources(
+def _resources_filter(
     conn: sqlite3.Connection,
-    platform: Optional[str] = None,
-    resource_type: Optional[str] = None,
-    q: Optional[str] = None,
-) -> int:
+    platform: Optional[str],
+    resource_type: Optional[str],
+    q: Optional[str],
+    search_attributes: bool,
+) -> tuple[list[str], list[Any], Optional[str]]:
+    """Return the WHERE conditions and parameters on ``resources AS r``, and
+    the ``MATCH`` expression for ``q`` if it's searched with the full-text index.
+
+    ``q`` is matched against the name and qualified name, and also against the
+    attribute values with ``search_attributes`` (full-text index only).
+    """
     where: list[str] = []
     params: list[Any] = []
     if platform:
-        where.append("platform = ?")
+        where.append("r.platform = ?")
         params.append(platform)
     if resource_type:
-        where.append("resource_type = ?")
+        where.append("r.resource_type = ?")
         params.append(resource_type)
+    match = None
     if q:
-        where.append("(name LIKE ? OR qualified_name LIKE ?)")
-        pattern = f"%{q}%"
-        params.extend([pattern, pattern])
-    sql = "SELECT COUNT(*) FROM resources"
+        match = fts_match_query(q) if has_table(conn, RESOURCES_FTS_TABLE) else None
+        if match is None:
+            where.append("(r.name LIKE ? OR r.qualified_name LIKE ?)")
+            pattern = f"%{q}%"
+            params.extend([pattern, pattern])
+        elif not search_attributes:
+            match = f"{{name qualified_name}} : ({match})"
+    return where, params, match
+
+
+def count_resources(
+    conn: sqlite3.Connection,
+    platform: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    q: Optional[str] = None,
+    search_attributes: bool = False,
+) -> int:
+    where, params, match = _resources_filter(conn, platform, resource_type, q, search_attributes)
+    if match is not None:
+        where.append(
+            f"r.rowid IN (SELECT rowid FROM {RESOURCES_FTS_TABLE} WHERE {RESOURCES_FTS_TABLE} MATCH ?)"
+        )
+        params.append(match)
+    sql = "SELECT COUNT(*) FROM resources AS r"
     if where:
         sql += " WHERE " + " AND ".join(where)
     return int(conn.execute(sql, tuple(params)).fetchone()[0])
@@ -118,33 +147,41 @@ def search_resources(
     q: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    search_attributes: bool = False,
 ) -> list[dict[str, Any]]:
-    where: list[str] = []
-    params: list[Any] = []
-    if platform:
-        where.append("platform = ?")
-        params.append(platform)
-    if resource_type:
-        where.append("resource_type = ?")
-        params.append(resource_type)
-    if q:
-        where.append("(name LIKE ? OR qualified_name LIKE ?)")
-        pattern = f"%{q}%"
-        params.extend([pattern, pattern])
+    """Return the matching resources.
 
-    sql = (
-        "SELECT platform, resource_type, qualified_name, name, "
-        "attributes_json, created_at, updated_at FROM resources"
+    With a full-text ``q``, the resources are ordered by relevance (``rank``)
+    and each one has a ``snippet`` of the text around the matches.
+    """
+    where, params, match = _resources_filter(conn, platform, resource_type, q, search_attributes)
+    columns = (
+        "r.platform, r.resource_type, r.qualified_name, r.name, "
+        "r.attributes_json, r.created_at, r.updated_at"
     )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY platform, resource_type, qualified_name LIMIT ? OFFSET ?"
+    if match is not None:
+        # The full-text index drives the query; its columns shadow the
+        # resource columns of the same name, hence the ``r.`` qualifiers.
+        sql = (
+            f"SELECT {columns}, {RESOURCES_FTS_SNIPPET} FROM {RESOURCES_FTS_TABLE} "
+            f"JOIN resources AS r ON r.rowid = {RESOURCES_FTS_TABLE}.rowid "
+            f"WHERE " + " AND ".join([f"{RESOURCES_FTS_TABLE} MATCH ?"] + where)
+            + f" ORDER BY {RESOURCES_FTS_TABLE}.rank, r.platform, r.resource_type, r.qualified_name"
+            " LIMIT ? OFFSET ?"
+        )
+        params.insert(0, match)
+    else:
+        sql = f"SELECT {columns} FROM resources AS r"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.platform, r.resource_type, r.qualified_name LIMIT ? OFFSET ?"
     params.extend([limit, offset])
 
     from indexers.sqlite_resource_writer import decode_attributes
 
-    return [
-        {
+    items = []
+    for row in conn.execute(sql, tuple(params)):
+        item = {
             "platform": row[0],
             "resource_type": row[1],
             "qualified_name": row[2],
@@ -153,8 +190,10 @@ def search_resources(
             "created_at": row[5],
             "updated_at": row[6],
         }
-        for row in conn.execute(sql, tuple(params))
-    ]
+        if match is not None:
+            item["snippet"] = row[7]
+        items.append(item)
+    return items
 
 
 def json_safe(value: Any) -> Any:
@@ -172,39 +211,130 @@ def json_safe(value: Any) -> Any:
 # The renderer always emits the field as ``"alias": "<value>"`` (double-quoted
 # key and value) inside the ``"spec":`` block, but we keep the regex permissive
 # so unquoted keys / single-quoted values are still recognized.
-_ALIAS_REGEX = re.compile(
-    r'''^\s*["']?alias["']?\s*:\s*(?:"([^"\n]*)"|'([^'\n]*)'|([^\n#]+))''',
-    re.MULTILINE,
-)
+def _slx_bundle_summary(
+    ws: str,
+    slx_dir: str,
+    slx_name: Optional[str],
+    display_name: Optional[str],
+    file_count: int,
+    kinds: list[str],
+    files: list[dict[str, Any]],
+) -> dict[str, Any]:
+    return {
+        "workspace_name": ws,
+        "slx_directory": slx_dir,
+        "slx_name": slx_name,
+        "display_name": display_name,
+        "file_count": file_count,
+        "kinds": kinds,
+        "has_slx": "slx" in kinds,
+        "has_sli": "sli" in kinds,
+        "has_runbook": "runbook" in kinds,
+        "has_skill": "skill" in kinds,
+        "files": files,
+    }
 
 
-def extract_slx_display_name(slx_yaml_text: str) -> Optional[str]:
-    """Return the human-readable ``spec.alias`` from a rendered ``slx.yaml``.
+# Columns of ``slx_bundles`` (aliased ``b``) read by :func:`_slx_bundle_from_row`
+_SLX_BUNDLE_COLUMNS = "b.workspace_name, b.slx_directory, b.slx_name, b.display_name, b.kinds_json, b.files_json"
+
+
+def _slx_bundle_from_row(row: tuple, file_count: int) -> dict[str, Any]:
+    ws, slx_dir, slx_name, display_name, kinds_json, files_json = row[:6]
+    return _slx_bundle_summary(
+        ws, slx_dir, slx_name, display_name, file_count, json.loads(kinds_json), json.loads(files_json)
+    )
 
-    Falls back to a permissive regex when PyYAML fails (e.g. truncated /
-    malformed content). Returns ``None`` when no alias can be recovered, in
-    which case callers should fall back to the on-disk SLX directory name.
-    """
-    if not slx_yaml_text:
-        return None
-    if _yaml is not None:
-        try:
-            parsed = _yaml.safe_load(slx_yaml_text)
-        except _yaml.YAMLError as exc:
-            logger.debug("slx.yaml parse failed; falling back to regex: %s", exc)
-            parsed = None
-        if isinstance(parsed, dict):
-            spec = parsed.get("spec")
-            if isinstance(spec, dict):
-                alias = spec.get("alias")
-                if isinstance(alias, str) and alias.strip():
-                    return alias.strip()
-    match = _ALIAS_REGEX.search(slx_yaml_text)
-    if match:
-        value = next((g for g in match.groups() if g is not None), None)
-        if value:
-            return value.strip().rstrip(",").strip()
-    return None
+
+def _slx_bundle_from_artifacts(conn: sqlite3.Connection, ws: str, slx_dir: str, file_count: int) -> dict[str, Any]:
+    """Describe the SLX bundle in ``slx_dir`` from its artifacts, for stores
+    without ``slx_bundles`` (written before schema v6)."""
+    files_sql = (
+        "SELECT relative_path, artifact_kind, media_type, "
+        "length(content) AS size_bytes, updated_at "
+        "FROM workspace_artifacts "
+        "WHERE workspace_name = ? AND slx_directory = ? "
+        "ORDER BY artifact_kind, relative_path"
+    )
+    files = [
+        {
+            "relative_path": row[0],
+            "artifact_kind": row[1],
+            "media_type": row[2],
+            "size_bytes": row[3],
+            "updated_at": row[4],
+        }
+        for row in conn.execute(files_sql, (ws, slx_dir))
+    ]
+    kinds = sorted({f["artifact_kind"] for f in files})
+    slx_name = os.path.basename(slx_dir) if slx_dir else None
+
+    # Pull just the SLX artifact's content (small string) so we can parse
+    # the ``spec.alias`` for display. Anything else would be too big to
+    # eagerly materialize in a list view.
+    display_name: Optional[str] = None
+    if "slx" in kinds:
+        alias_row = conn.execute(
+            "SELECT content FROM workspace_artifacts "
+            "WHERE workspace_name = ? AND slx_directory = ? "
+            "AND artifact_kind = 'slx' LIMIT 1",
+            (ws, slx_dir),
+        ).fetchone()
+        if alias_row and alias_row[0]:
+            display_name = extract_slx_display_name(alias_row[0])
+    if not display_name:
+        display_name = slx_name
+
+    return _slx_bundle_summary(ws, slx_dir, slx_name, display_name, file_count, kinds, files)
+
+
+def _slx_bundle_matches(
+    conn: sqlite3.Connection,
+    workspace_name: Optional[str],
+    q: Optional[str],
+) -> tuple[str, list[Any], Optional[str]]:
+    """Return the query grouping the artifacts matching ``q`` by bundle (with
+    ``file_count``, ``best_rank`` and ``best_rowid``), its parameters, and the
+    full-text ``MATCH`` expression it uses (None when it falls back to LIKE)."""
+    where: list[str] = ["w.slx_directory IS NOT NULL"]
+    params: list[Any] = []
+    if workspace_name:
+        where.append("w.workspace_name = ?")
+        params.append(workspace_name)
+    match = None
+    if q:
+        match = fts_match_query(q) if has_table(conn, ARTIFACTS_FTS_TABLE) else None
+        if match is None:
+            # ``content LIKE`` already matches anything inside the rendered SLX
+            # YAML, including ``spec.alias``, so the human-readable display name
+            # is searchable even though the WHERE clause keys off raw columns.
+            where.append("(w.slx_directory LIKE ? OR w.relative_path LIKE ? OR w.content LIKE ?)")
+            pattern = f"%{q}%"
+            params.extend([pattern, pattern, pattern])
+
+    if match is not None:
+        # The full-text index covers the same three columns. Bundles are
+        # ranked by their best matching artifact, whose rowid comes along
+        # (the other columns of an aggregate query with a single MIN() come
+        # from the row with the minimum) for its snippet.
+        from_sql = (
+            f" FROM {ARTIFACTS_FTS_TABLE} "
+            f"JOIN workspace_artifacts AS w ON w.rowid = {ARTIFACTS_FTS_TABLE}.rowid"
+        )
+        where.insert(0, f"{ARTIFACTS_FTS_TABLE} MATCH ?")
+        params.insert(0, match)
+        rank_sql = f"MIN({ARTIFACTS_FTS_TABLE}.rank)"
+    else:
+        from_sql = " FROM workspace_artifacts AS w"
+        rank_sql = "NULL"
+    where_sql = " WHERE " + " AND ".join(where)
+    matches_sql = (
+        f"SELECT w.workspace_name, w.slx_directory, COUNT(*) AS file_count, "
+        f"{rank_sql} AS best_rank, w.rowid AS best_rowid"
+        f"{from_sql}{where_sql} "
+        f"GROUP BY w.workspace_name, w.slx_directory"
+    )
+    return matches_sql, params, match
 
 
 def list_slx_bundles(
@@ -225,92 +355,203 @@ def list_slx_bundles(
 
     Returns a dict with ``items`` (each bundle has ``slx_directory``, ``slx_name``,
     ``display_name``, ``workspace_name``, file paths grouped by kind) and a
-    ``total`` count of distinct bundles matching the filter.
+    ``total`` count of distinct bundles matching the filter. With a full-text
+    ``q``, the bundles are ordered by relevance and each one has a ``snippet``
+    from its best matching artifact.
+
+    The bundles are read from the ``slx_bundles`` summaries written with the
+    store; older stores are summarized from their artifacts, per bundle.
     """
-    where: list[str] = ["slx_directory IS NOT NULL"]
-    params: list[Any] = []
+    has_summaries = has_table(conn, "slx_bundles")
+    if not q and has_summaries:
+        where_sql = " WHERE b.workspace_name = ?" if workspace_name else ""
+        filter_params: tuple = (workspace_name,) if workspace_name else ()
+        total = int(
+            conn.execute(f"SELECT COUNT(*) FROM slx_bundles AS b{where_sql}", filter_params).fetchone()[0]
+        )
+        rows = conn.execute(
+            f"SELECT {_SLX_BUNDLE_COLUMNS}, b.file_count FROM slx_bundles AS b{where_sql} "
+            f"ORDER BY b.workspace_name, b.slx_directory LIMIT ? OFFSET ?",
+            filter_params + (limit, offset),
+        )
+        items = [_slx_bundle_from_row(row, row[6]) for row in rows]
+        return {"total": total, "items": items, "limit": limit, "offset": offset}
+
+    matches_sql, params, match = _slx_bundle_matches(conn, workspace_name, q)
+
+    total = int(conn.execute(f"SELECT COUNT(*) FROM ({matches_sql})", tuple(params)).fetchone()[0])
+
+    page_sql = f"{matches_sql} ORDER BY best_rank, w.workspace_name, w.slx_directory LIMIT ? OFFSET ?"
+    page_params = tuple(params) + (limit, offset)
+    if has_summaries:
+        rows = conn.execute(
+            f"SELECT {_SLX_BUNDLE_COLUMNS}, m.file_count, m.best_rowid "
+            f"FROM ({page_sql}) AS m "
+            f"JOIN slx_bundles AS b ON b.workspace_name = m.workspace_name "
+            f"AND b.slx_directory = m.slx_directory "
+            f"ORDER BY m.best_rank, m.workspace_name, m.slx_directory",
+            page_params,
+        ).fetchall()
+        items = [_slx_bundle_from_row(row, row[6]) for row in rows]
+        best_rowids = [row[7] for row in rows]
+    else:
+        rows = conn.execute(page_sql, page_params).fetchall()
+        items = [_slx_bundle_from_artifacts(conn, ws, slx_dir, file_count) for ws, slx_dir, file_count, _, _ in rows]
+        best_rowids = [row[4] for row in rows]
+
+    if match is not None and items:
+        # The snippets of the best matching artifacts of the page, in one query
+        snippets = dict(
+            conn.execute(
+                f"SELECT rowid, {ARTIFACTS_FTS_SNIPPET} FROM {ARTIFACTS_FTS_TABLE} "
+                f"WHERE {ARTIFACTS_FTS_TABLE} MATCH ? "
+                f"AND rowid IN ({', '.join('?' * len(best_rowids))})",
+                (match, *best_rowids),
+            )
+        )
+        for item, best_rowid in zip(items, best_rowids):
+            item["snippet"] = snippets.get(best_rowid)
+
+    return {"total": total, "items": items, "limit": limit, "offset": offset}
+
+
+def rank_slx_bundles(
+    conn: sqlite3.Connection,
+    query_tokens: list[str],
+    workspace_name: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 20,
+) -> dict[str, Any]:
+    """Rank the SLX bundles by the weighted overlap of their tokens with
+    ``query_tokens``, from the ``skill_tokens`` index of the store.
+
+    The score of a bundle is the sum of the field weights of its postings of
+    the distinct query tokens, i.e. ``mcp.search.score_candidate`` over its
+    name, path, kinds and content. ``q`` restricts the candidates to the
+    bundles :func:`list_slx_bundles` matches for it. Returns the ``total``
+    number of bundles with a score, the size of the ``candidate_pool`` and
+    the ``limit`` best ``items`` (same shape as :func:`list_slx_bundles`, with
+    a ``score``), best first.
+    """
+    tokens = sorted(set(query_tokens))
+    if q:
+        matches_sql, match_params, _ = _slx_bundle_matches(conn, workspace_name, q)
+        candidate_pool = int(
+            conn.execute(f"SELECT COUNT(*) FROM ({matches_sql})", tuple(match_params)).fetchone()[0]
+        )
+        join_sql = (
+            f" JOIN ({matches_sql}) AS m ON m.workspace_name = c.workspace_name "
+            f"AND m.slx_directory = c.slx_directory"
+        )
+    else:
+        match_params = []
+        candidate_pool = int(
+            conn.execute(
+                "SELECT COUNT(*) FROM slx_bundles" + (" WHERE workspace_name = ?" if workspace_name else ""),
+                (workspace_name,) if workspace_name else (),
+            ).fetchone()[0]
+        )
+        join_sql = ""
+    if not tokens:
+        return {"total": 0, "candidate_pool": candidate_pool, "items": []}
+
+    where = [f"t.token IN ({', '.join('?' * len(tokens))})"]
+    params: list[Any] = list(match_params) + tokens
     if workspace_name:
-        where.append("workspace_name = ?")
+        where.append("c.workspace_name = ?")
         params.append(workspace_name)
-    if q:
-        # ``content LIKE`` already matches anything inside the rendered SLX
-        # YAML, including ``spec.alias``, so the human-readable display name
-        # is searchable even though the WHERE clause keys off raw columns.
-        where.append("(slx_directory LIKE ? OR relative_path LIKE ? OR content LIKE ?)")
-        pattern = f"%{q}%"
-        params.extend([pattern, pattern, pattern])
-    where_sql = " WHERE " + " AND ".join(where)
+    # The postings of the query tokens, summed up by bundle
+    scored_sql = (
+        f"SELECT t.bundle_id, c.workspace_name, c.slx_directory, SUM(t.weight) AS score "
+        f"FROM skill_tokens AS t "
+        f"JOIN slx_bundles AS c ON c.bundle_id = t.bundle_id{join_sql} "
+        f"WHERE {' AND '.join(where)} "
+        f"GROUP BY t.bundle_id"
+    )
+    total = int(conn.execute(f"SELECT COUNT(*) FROM ({scored_sql})", tuple(params)).fetchone()[0])
+    rows = conn.execute(
+        f"SELECT {_SLX_BUNDLE_COLUMNS}, b.file_count, s.score "
+        f"FROM ({scored_sql} ORDER BY score DESC, c.workspace_name, c.slx_directory LIMIT ?) AS s "
+        f"JOIN slx_bundles AS b ON b.bundle_id = s.bundle_id "
+        f"ORDER BY s.score DESC, s.workspace_name, s.slx_directory",
+        tuple(params) + (limit,),
+    )
+    items = []
+    for row in rows:
+        item = _slx_bundle_from_row(row, row[6])
+        item["score"] = row[7]
+        items.append(item)
+    return {"total": total, "candidate_pool": candidate_pool, "items": items}
+
+
+def has_slx_bindings(conn: sqlite3.Connection) -> bool:
+    """Whether the store recorded the SLX-to-resource bindings of its run.
+
+    Stores written before schema v5, or by a run that didn't generate the
+    workspace (and so has no bindings), don't.
+    """
+    return has_table(conn, "slx_bindings") and conn.execute(
+        "SELECT 1 FROM slx_bindings LIMIT 1"
+    ).fetchone() is not None
+
+
+def list_slx_bundles_for_resource(
+    conn: sqlite3.Connection,
+    platform: str,
+    resource_type: str,
+    qualified_name: str,
+    limit: int = 200,
+    offset: int = 0,
+) -> dict[str, Any]:
+    """Return the SLX bundles generated for a resource, from ``slx_bindings``.
 
+    Same shape as :func:`list_slx_bundles`, with the ``role`` of the resource
+    in each bundle (``primary`` bundles first, then the bundles the resource
+    was aggregated into as a ``child``).
+    """
+    params = (platform, resource_type, qualified_name)
+    if has_table(conn, "slx_bundles"):
+        from_sql = (
+            " FROM slx_bindings AS s "
+            "JOIN slx_bundles AS b ON b.workspace_name = s.workspace_name "
+            "AND b.slx_directory = s.slx_directory "
+            "WHERE s.platform = ? AND s.resource_type = ? AND s.qualified_name = ?"
+        )
+        total = int(conn.execute(f"SELECT COUNT(*){from_sql}", params).fetchone()[0])
+        rows = conn.execute(
+            f"SELECT {_SLX_BUNDLE_COLUMNS}, b.file_count, s.role{from_sql} "
+            f"ORDER BY s.role DESC, s.workspace_name, s.slx_directory "
+            f"LIMIT ? OFFSET ?",
+            params + (limit, offset),
+        ).fetchall()
+        items = []
+        for row in rows:
+            item = _slx_bundle_from_row(row, row[6])
+            item["role"] = row[7]
+            items.append(item)
+        return {"total": total, "items": items, "limit": limit, "offset": offset}
+
+    from_sql = (
+        " FROM slx_bindings AS b "
+        "JOIN workspace_artifacts AS w ON w.workspace_name = b.workspace_name "
+        "AND w.slx_directory = b.slx_directory "
+        "WHERE b.platform = ? AND b.resource_type = ? AND b.qualified_name = ?"
+    )
     total = int(
         conn.execute(
-            f"SELECT COUNT(DISTINCT workspace_name || '|' || slx_directory) "
-            f"FROM workspace_artifacts{where_sql}",
-            tuple(params),
+            f"SELECT COUNT(DISTINCT b.workspace_name || '|' || b.slx_directory){from_sql}", params
         ).fetchone()[0]
     )
-
-    bundle_sql = (
-        f"SELECT workspace_name, slx_directory, COUNT(*) AS file_count "
-        f"FROM workspace_artifacts{where_sql} "
-        f"GROUP BY workspace_name, slx_directory "
-        f"ORDER BY workspace_name, slx_directory "
-        f"LIMIT ? OFFSET ?"
-    )
-    bundle_params = list(params) + [limit, offset]
-    bundle_rows = list(conn.execute(bundle_sql, tuple(bundle_params)))
-
+    bundle_rows = conn.execute(
+        f"SELECT b.workspace_name, b.slx_directory, b.role, COUNT(*) AS file_count{from_sql} "
+        f"GROUP BY b.workspace_name, b.slx_directory "
+        f"ORDER BY b.role DESC, b.workspace_name, b.slx_directory "
+        f"LIMIT ? OFFSET ?",
+        params + (limit, offset),
+    ).fetchall()
     items: list[dict[str, Any]] = []
-    for ws, slx_dir, file_count in bundle_rows:
-        files_sql = (
-            "SELECT relative_path, artifact_kind, media_type, "
-            "length(content) AS size_bytes, updated_at "
-            "FROM workspace_artifacts "
-            "WHERE workspace_name = ? AND slx_directory = ? "
-            "ORDER BY artifact_kind, relative_path"
-        )
-        files = [
-            {
-                "relative_path": row[0],
-                "artifact_kind": row[1],
-                "media_type": row[2],
-                "size_bytes": row[3],
-                "updated_at": row[4],
-            }
-            for row in conn.execute(files_sql, (ws, slx_dir))
-        ]
-        kinds = sorted({f["artifact_kind"] for f in files})
-        slx_name = os.path.basename(slx_dir) if slx_dir else None
-
-        # Pull just the SLX artifact's content (small string) so we can parse
-        # the ``spec.alias`` for display. Anything else would be too big to
-        # eagerly materialize in a list view.
-        display_name: Optional[str] = None
-        if "slx" in kinds:
-            alias_row = conn.execute(
-                "SELECT content FROM workspace_artifacts "
-                "WHERE workspace_name = ? AND slx_directory = ? "
-                "AND artifact_kind = 'slx' LIMIT 1",
-                (ws, slx_dir),
-            ).fetchone()
-            if alias_row and alias_row[0]:
-                display_name = extract_slx_display_name(alias_row[0])
-        if not display_name:
-            display_name = slx_name
-
-        items.append(
-            {
-                "workspace_name": ws,
-                "slx_directory": slx_dir,
-                "slx_name": slx_name,
-                "display_name": display_name,
-                "file_count": file_count,
-                "kinds": kinds,
-                "has_slx": "slx" in kinds,
-                "has_sli": "sli" in kinds,
-                "has_runbook": "runbook" in kinds,
-                "has_skill": "skill" in kinds,
-                "files": files,
-            }
-        )
-
+    for ws, slx_dir, role, file_count in bundle_rows:
+        item = _slx_bundle_from_artifacts(conn, ws, slx_dir, file_count)
+        item["role"] = role
+        items.append(item)
     return {"total": total, "items": items, "limit": limit, "offset": offset}
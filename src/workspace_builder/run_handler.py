@@ -3,13 +3,20 @@
 from __future__ import annotations
 
 import io
+import json
 import os
+import shutil
 import tarfile
 import tempfile
 import traceback
-from typing import Any
+from typing import Any, Optional, Union
 
+from starlette.datastructures import FormData, UploadFile
+
+from archive_compression import ArchiveCompression
 from component import (
+    ARCHIVE_COMPRESSION_LEVEL_SETTING,
+    ARCHIVE_COMPRESSION_WORKERS_SETTING,
     Component,
     Context,
     Setting,
@@ -19,13 +26,17 @@ from component import (
     run_components,
 )
 from exceptions import WorkspaceBuilderUserException
-from outputter import TarFileOutputter
+from outputter import SpooledTarFileOutputter, TarFileOutputter
 from resources import REGISTRY_PROPERTY_NAME, Registry
+from template import TEMPLATE_STRING_CACHE_STATS_PROPERTY, get_template_string_cache_stats
 
-from .models import ArchiveRunResult
+from .models import ArchiveRunResult, StreamingArchiveRunResult
+from .serialization import RUN_REQUEST_DATA_PART
 
 _TMPDIR = os.getenv("TMPDIR", "/tmp")
 
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+
 
 def _parse_component_names(components_data: Any) -> list[str]:
     if isinstance(components_data, list):
@@ -35,8 +46,75 @@ def _parse_component_names(components_data: Any) -> list[str]:
     return []
 
 
-def execute_run(request_data: dict[str, Any]) -> ArchiveRunResult:
-    """Run the workspace-builder pipeline for a JSON request body."""
+def _extract_uploaded_file_setting(path: str, setting_temp_dirs: list[tempfile.TemporaryDirectory]) -> str:
+    """
+    Resolve the value of a file setting uploaded as a separate request part: if
+    the file is a tar archive (e.g. a directory of map customization rules),
+    it's extracted to a temporary directory, otherwise the uploaded file is used
+    as is.
+    """
+    try:
+        with tarfile.open(path, mode="r") as archive:
+            setting_temp_directory = tempfile.TemporaryDirectory(dir=_TMPDIR)
+            setting_temp_dirs.append(setting_temp_directory)
+            archive.extractall(setting_temp_directory.name)
+            return setting_temp_directory.name
+    except Exception:
+        return path
+
+
+def save_multipart_run_request(form: FormData, directory: str) -> tuple[dict[str, Any], dict[str, str]]:
+    """
+    Read a multipart /run request: the JSON request data is in the
+    RUN_REQUEST_DATA_PART part, and each of the other parts is the content of a
+    file setting, named by the setting's JSON name. The files are copied in
+    chunks to ``directory`` instead of being read into memory.
+
+    Returns the request data and the paths of the uploaded files, keyed by the
+    setting's JSON name, for ``execute_run``.
+    """
+    request_data: dict[str, Any] = dict()
+    request_files: dict[str, str] = dict()
+    for name, value in form.multi_items():
+        if name == RUN_REQUEST_DATA_PART:
+            text = value.file.read() if isinstance(value, UploadFile) else value
+            try:
+                request_data = json.loads(text)
+            except ValueError as e:
+                raise WorkspaceBuilderUserException(f"Invalid JSON in the {RUN_REQUEST_DATA_PART} part: {e}")
+            if not isinstance(request_data, dict):
+                raise WorkspaceBuilderUserException(f"The {RUN_REQUEST_DATA_PART} part must be a JSON object.")
+        elif isinstance(value, UploadFile):
+            path = os.path.join(directory, f"{len(request_files)}-upload")
+            value.file.seek(0)
+            with open(path, "wb") as f:
+                shutil.copyfileobj(value.file, f, UPLOAD_COPY_CHUNK_SIZE)
+            request_files[name] = path
+        else:
+            raise WorkspaceBuilderUserException(
+                f"Unexpected non-file part {name!r} in the /run request; "
+                f"settings must be specified in the {RUN_REQUEST_DATA_PART} part."
+            )
+    return request_data, request_files
+
+
+def execute_run(request_data: dict[str, Any],
+                stream_output: bool = False,
+                request_files: Optional[dict[str, str]] = None) -> Union[ArchiveRunResult, StreamingArchiveRunResult]:
+    """Run the workspace-builder pipeline for a JSON request body.
+
+    With ``stream_output`` the output archive is spooled to a temporary file
+    (past a small in-memory threshold) and returned as a
+    ``StreamingArchiveRunResult``, so that it can be streamed in the response
+    without holding the whole archive in memory.
+
+    ``request_files`` maps the JSON names of file settings to the paths of
+    files uploaded for them (see ``save_multipart_run_request``). These take
+    precedence over base64-encoded values in ``request_data``. The files are
+    owned by the caller.
+    """
+    if request_files is None:
+        request_files = dict()
     try:
         from .health import get_health_tracker
 
@@ -57,6 +135,7 @@ def execute_run(request_data: dict[str, Any]) -> ArchiveRunResult:
 
     setting_temp_files: list[tempfile._TemporaryFileWrapper] = []
     setting_temp_dirs: list[tempfile.TemporaryDirectory] = []
+    outputter = None
 
     try:
         active_settings = get_active_settings(components)
@@ -66,7 +145,11 @@ def execute_run(request_data: dict[str, Any]) -> ArchiveRunResult:
             setting = setting_dependency.setting
             value_string = request_data.get(setting.json_name)
             using_default_value = False
+            request_file_path = request_files.get(setting.json_name) if setting.type == Setting.Type.FILE else None
 
+            if request_file_path is not None:
+                setting_values[setting.name] = _extract_uploaded_file_setting(request_file_path, setting_temp_dirs)
+                continue
             if value_string is not None:
                 value = setting.convert_value(value_string)
             elif setting.default_value:
@@ -96,9 +179,19 @@ def execute_run(request_data: dict[str, Any]) -> ArchiveRunResult:
                         value = setting_temp_file.name
                 setting_values[setting.name] = value
 
-        outputter = TarFileOutputter()
+        try:
+            compression_options = ArchiveCompression.from_settings(
+                setting_values.get(ARCHIVE_COMPRESSION_LEVEL_SETTING.name),
+                setting_values.get(ARCHIVE_COMPRESSION_WORKERS_SETTING.name))
+        except ValueError as e:
+            raise WorkspaceBuilderUserException(str(e)) from e
+        if stream_output:
+            outputter = SpooledTarFileOutputter(directory=_TMPDIR, compression_options=compression_options)
+        else:
+            outputter = TarFileOutputter(compression_options=compression_options)
         context = Context(setting_values, outputter)
         context.set_property(REGISTRY_PROPERTY_NAME, Registry())
+        context.set_property(TEMPLATE_STRING_CACHE_STATS_PROPERTY, get_template_string_cache_stats())
 
         overrides = request_data.get("overrides", {})
         if overrides:
@@ -106,7 +199,6 @@ def execute_run(request_data: dict[str, Any]) -> ArchiveRunResult:
 
         run_components(context, components)
         outputter.close()
-        archive_bytes = outputter.get_bytes()
 
         slx_count = None
         try:
@@ -122,13 +214,14 @@ def execute_run(request_data: dict[str, Any]) -> ArchiveRunResult:
             except Exception as health_error:
                 print(f"Warning: Health tracker complete_run failed: {health_error}")
 
-        return ArchiveRunResult(
-            "Workspace builder completed successfully.",
-            context.warnings,
-            archive_bytes,
-        )
+        message = "Workspace builder completed successfully."
+        if stream_output:
+            return StreamingArchiveRunResult(message, context.warnings, outputter)
+        return ArchiveRunResult(message, context.warnings, outputter.get_bytes())
 
     except Exception as exc:
+        if isinstance(outputter, SpooledTarFileOutputter):
+            outputter.discard()
         full_stacktrace = traceback.format_exc()
         if health_tracker:
             try:
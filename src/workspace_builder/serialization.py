@@ -2,13 +2,30 @@
 
 from __future__ import annotations
 
-from base64 import b64encode
+import json
+from base64 import b64encode, urlsafe_b64decode, urlsafe_b64encode
 from typing import Any
 
 from component import Component, Setting
 from outputter import DirectoryItem, FileItem, OutputItem
 
-from .models import ArchiveRunResult, InfoResult
+from .models import ArchiveRunResult, CommonRunResult, InfoResult
+
+# Name of the part of a multipart /run request that holds the JSON request
+# data; the other parts are the contents of file settings (kubeconfig,
+# mapCustomizationRules, ...), sent as binary instead of base64 in the JSON.
+RUN_REQUEST_DATA_PART = "request"
+
+# Media type of the /run response body when the client accepts the output
+# archive streamed as is, rather than base64-encoded in a JSON response. The
+# message and warnings of the run are then returned in the RUN_RESULT_HEADER
+# response header, as base64url-encoded JSON.
+ARCHIVE_MEDIA_TYPE = "application/gzip"
+RUN_RESULT_HEADER = "X-Workspace-Builder-Result"
+# Cap on the size of the warnings in the RUN_RESULT_HEADER header, to stay well
+# within the header size limits of HTTP clients. The remaining warnings are
+# replaced by a single truncation warning (they're still in the service log).
+MAX_RUN_RESULT_HEADER_WARNINGS_SIZE = 16 * 1024
 
 
 def _omit_empty(mapping: dict[str, Any]) -> dict[str, Any]:
@@ -86,3 +103,29 @@ def serialize_run_result(result: ArchiveRunResult) -> dict[str, Any]:
             "output": b64encode(result.output).decode("utf-8"),
         }
     )
+
+
+def serialize_run_result_header(result: CommonRunResult) -> str:
+    warnings = list()
+    warnings_size = 0
+    for warning in result.warnings:
+        warnings_size += len(warning.encode("utf-8"))
+        if warnings_size > MAX_RUN_RESULT_HEADER_WARNINGS_SIZE:
+            warnings.append(f"{len(result.warnings) - len(warnings)} more warnings were truncated; "
+                            f"see the workspace builder service log.")
+            break
+        warnings.append(warning)
+    data = _omit_empty(
+        {
+            "message": result.message,
+            "warnings": warnings,
+            "outputType": result.output_type,
+        }
+    )
+    return urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+
+
+def deserialize_run_result_header(header_value: str) -> dict[str, Any]:
+    if not header_value:
+        return dict()
+    return json.loads(urlsafe_b64decode(header_value.encode("ascii")))
@@ -13,6 +13,7 @@ from fastapi.testclient import TestClient
 
 from indexers.sqlite_resource_writer import (
     _init_schema,
+    _snapshot_slx_bundles,
     open_database,
 )
 from workspace_builder.api import app
@@ -61,6 +62,8 @@ def _seed_resource_store(db_path: str) -> None:
             ),
         ],
     )
+    # The bundle summaries are written from the artifacts, as by persist_sqlite_store
+    _snapshot_slx_bundles(conn, "demo-ws")
     conn.commit()
     conn.close()
 
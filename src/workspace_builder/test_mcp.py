@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import sqlite3
 import tempfile
 import unittest
 from unittest.mock import patch
@@ -26,9 +27,12 @@ from workspace_builder.mcp.server import (
 # ---------------------------------------------------------------------------
 
 
-def _seed_database(db_path: str, with_skills: bool = True) -> None:
+def _seed_database(db_path: str, with_skills: bool = True, with_bindings: bool = False,
+                   with_pod: bool = False) -> None:
     """Seed a SQLite resource store with two resources and (optionally) two
-    full SLX bundles for the MCP tools to exercise."""
+    full SLX bundles for the MCP tools to exercise. ``with_bindings`` also
+    records the SLX bindings the generation rules would; ``with_pod`` adds a
+    Pod owned by the Deployment, two hops from the Namespace."""
     with tempfile.TemporaryDirectory() as tmpdir:
         ctx = Context(
             setting_values={
@@ -49,13 +53,21 @@ def _seed_database(db_path: str, with_skills: bool = True) -> None:
         )
         # Deployment carries a $ref-encodable attribute pointing at its
         # Namespace so get_resource_neighbors has a forward edge to walk.
-        registry.add_resource(
+        api = registry.add_resource(
             "kubernetes",
             "Deployment",
             "api",
             "default/api",
             {"lod": "detailed", "replicas": 3, "namespace": ns},
         )
+        if with_pod:
+            registry.add_resource(
+                "kubernetes",
+                "Pod",
+                "api-7d4b9",
+                "default/api-7d4b9",
+                {"lod": "detailed", "owner": api},
+            )
         registry.add_resource(
             "azure",
             "azure_keyvault_vaults",
@@ -132,6 +144,13 @@ def _seed_database(db_path: str, with_skills: bool = True) -> None:
                 "the Deployment named `api` in the `default` namespace.\n",
             )
 
+        if with_bindings:
+            from renderers.rendered_artifacts import record_slx_bindings
+
+            record_slx_bindings(ctx, "workspaces/demo-ws/slxs/k8s-deployment-default-api-health", api)
+            # An SLX for the namespace that aggregates its deployments
+            record_slx_bindings(ctx, "workspaces/demo-ws/slxs/k8s-deployment-health", ns, [ns, api])
+
         persist_sqlite_store(ctx, db_path="resources.sqlite")
         with open(os.path.join(tmpdir, "resources.sqlite"), "rb") as src, open(db_path, "wb") as dst:
             dst.write(src.read())
@@ -277,6 +296,45 @@ class SkillToolTests(unittest.TestCase):
         self.assertGreaterEqual(results["total"], 1)
         self.assertEqual("k8s-deployment-health", results["items"][0]["slx_name"])
 
+    def test_search_token_index_matches_rescoring(self):
+        """The scores from the search token index are the scores of the
+        content re-tokenized at query time (stores without the index)."""
+        queries = [
+            ("rotate key vault secrets", None, None),
+            ("failing pods in the deployment", None, None),
+            ("health slx runbook", "kubernetes", None),
+            ("default api", None, "Deployment"),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "resources.sqlite")
+            _seed_database(db_path)
+            with patch.dict(
+                os.environ,
+                {"RW_RESOURCE_STORE_PATH": db_path},
+                clear=False,
+            ):
+                indexed = [mcp_tools.search_skills(q, platform=p, resource_type=t) for q, p, t in queries]
+                indexed.append(mcp_tools.recommend_skills("pods keep restarting in the api deployment"))
+                conn = sqlite3.connect(db_path)
+                conn.execute("DROP TABLE skill_tokens")
+                conn.commit()
+                conn.close()
+                # Ranking only a candidate pool is logged
+                with self.assertLogs(mcp_tools.logger, level="WARNING") as logs:
+                    rescored = [mcp_tools.search_skills(q, platform=p, resource_type=t) for q, p, t in queries]
+                    rescored.append(mcp_tools.recommend_skills("pods keep restarting in the api deployment"))
+                self.assertEqual(len(logs.records), len(queries) + 1)
+        # The index reports the number of files of the whole bundle; the
+        # candidate pool of a filtered search counts the matching files
+        for result in indexed + rescored:
+            for item in result["items"]:
+                del item["file_count"]
+        self.assertEqual(indexed, rescored)
+        self.assertEqual(
+            [(item["slx_name"], item["score"]) for item in indexed[0]["items"]],
+            [("azure-keyvault-rotation", 4.0)],
+        )
+
     def test_search_skills_returns_empty_for_blank_query(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             db_path = os.path.join(tmpdir, "resources.sqlite")
@@ -442,6 +500,42 @@ class GetSkillsForResourceTests(unittest.TestCase):
                         qualified_name="missing/ns/dep",
                     )
 
+    def test_uses_recorded_bindings(self):
+        """With the bindings recorded at generation time, exactly the SLXs
+        generated for the resource are returned, with its role in each."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "resources.sqlite")
+            _seed_database(db_path, with_bindings=True)
+            with patch.dict(
+                os.environ,
+                {"RW_RESOURCE_STORE_PATH": db_path},
+                clear=False,
+            ):
+                result = mcp_tools.get_skills_for_resource(
+                    platform="kubernetes",
+                    resource_type="Deployment",
+                    qualified_name="default/api",
+                )
+                namespace_result = mcp_tools.get_skills_for_resource(
+                    platform="kubernetes",
+                    resource_type="Namespace",
+                    qualified_name="default",
+                )
+                skill = mcp_tools.get_skill("k8s-deployment-health")
+        self.assertEqual(result["total"], 2)
+        self.assertEqual(
+            [(b["slx_name"], b["role"]) for b in result["items"]],
+            [("k8s-deployment-default-api-health", "primary"), ("k8s-deployment-health", "child")],
+        )
+        self.assertNotIn("matched_terms", result["items"][0])
+        self.assertEqual(
+            [b["slx_name"] for b in namespace_result["items"]], ["k8s-deployment-health"]
+        )
+        self.assertEqual(
+            [(r["qualified_name"], r["name"], r["role"]) for r in skill["resources"]],
+            [("default", "default", "primary"), ("default/api", "api", "child")],
+        )
+
 
 class GetWorkspaceHealthTests(unittest.TestCase):
     def test_returns_health_payload(self):
@@ -517,6 +611,74 @@ class GetResourceNeighborsTests(unittest.TestCase):
         rev = {r["resource_type"] for r in result["reverse_refs"]}
         self.assertIn("Deployment", rev)
 
+    def test_depth_follows_refs_over_several_hops(self):
+        def neighbors(qualified_name, resource_type, depth=None):
+            result = mcp_tools.get_resource_neighbors(
+                platform="kubernetes",
+                resource_type=resource_type,
+                qualified_name=qualified_name,
+                depth=depth,
+            )
+            return {
+                direction: [(ref["resource_type"], ref["qualified_name"], ref["attr_path"], ref["depth"])
+                            for ref in result[direction]]
+                for direction in ("forward_refs", "reverse_refs")
+            }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "resources.sqlite")
+            _seed_database(db_path, with_pod=True)
+            with patch.dict(
+                os.environ,
+                {"RW_RESOURCE_STORE_PATH": db_path},
+                clear=False,
+            ):
+                # Pod -owner-> Deployment -namespace-> Namespace
+                pod_one_hop = neighbors("default/api-7d4b9", "Pod")
+                pod_two_hops = neighbors("default/api-7d4b9", "Pod", depth=2)
+                namespace_one_hop = neighbors("default", "Namespace")
+                namespace_two_hops = neighbors("default", "Namespace", depth=2)
+        self.assertEqual(pod_one_hop["forward_refs"], [("Deployment", "default/api", "owner", 1)])
+        self.assertEqual(
+            pod_two_hops["forward_refs"],
+            [("Deployment", "default/api", "owner", 1), ("Namespace", "default", "namespace", 2)],
+        )
+        self.assertEqual(namespace_one_hop["reverse_refs"], [("Deployment", "default/api", "namespace", 1)])
+        self.assertEqual(
+            namespace_two_hops["reverse_refs"],
+            [("Deployment", "default/api", "namespace", 1), ("Pod", "default/api-7d4b9", "owner", 2)],
+        )
+
+    def test_store_without_edge_table(self):
+        # Stores written before resource_refs existed fall back to the
+        # attribute walk / LIKE lookups.
+        import sqlite3
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "resources.sqlite")
+            _seed_database(db_path)
+            conn = sqlite3.connect(db_path)
+            conn.execute("DROP TABLE resource_refs")
+            conn.commit()
+            conn.close()
+            with patch.dict(
+                os.environ,
+                {"RW_RESOURCE_STORE_PATH": db_path},
+                clear=False,
+            ):
+                forward = mcp_tools.get_resource_neighbors(
+                    platform="kubernetes",
+                    resource_type="Deployment",
+                    qualified_name="default/api",
+                )
+                reverse = mcp_tools.get_resource_neighbors(
+                    platform="kubernetes",
+                    resource_type="Namespace",
+                    qualified_name="default",
+                )
+        self.assertEqual([r["qualified_name"] for r in forward["forward_refs"]], ["default"])
+        self.assertIn("Deployment", {r["resource_type"] for r in reverse["reverse_refs"]})
+
     def test_raises_for_unknown_resource(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             db_path = os.path.join(tmpdir, "resources.sqlite")
@@ -0,0 +1,265 @@
+"""Tests for the full-text search of the resource store reader."""
+
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import unittest
+
+from component import Context
+from indexers.sqlite_resource_writer import (
+    ARTIFACTS_FTS_TABLE,
+    RESOURCES_FTS_TABLE,
+    build_skill_token_index,
+    count_workspace_artifacts,
+    fts_match_query,
+    has_table,
+    open_database,
+    persist_sqlite_store,
+    search_workspace_artifacts,
+)
+from outputter import FileSystemOutputter, TarFileOutputter
+from renderers.rendered_artifacts import record_rendered_artifact
+from resources import REGISTRY_PROPERTY_NAME, Registry
+from workspace_builder.resource_store_reader import (
+    count_resources,
+    list_slx_bundles,
+    rank_slx_bundles,
+    search_resources,
+)
+
+SLXS = {
+    "app-health": (
+        "kind: ServiceLevelX\n"
+        "spec:\n"
+        '  alias: "App Health Check"\n'
+        "  statement: The checkout app responds in time\n"
+    ),
+    "db-latency": (
+        "kind: ServiceLevelX\n"
+        "spec:\n"
+        '  alias: "Database Latency"\n'
+        "  statement: Queries to the orders database are fast, and the app health is fine\n"
+    ),
+    "vault-rotation": (
+        "kind: ServiceLevelX\n"
+        "spec:\n"
+        '  alias: "Key Vault Secret Rotation"\n'
+        "  statement: Secrets are rotated\n"
+    ),
+}
+
+
+def _seed_database(tmpdir: str, archive: bool = False) -> str:
+    """Write the store into ``tmpdir``; with ``archive``, into a /run/ output
+    archive that's extracted there."""
+    ctx = Context(
+        setting_values={
+            "RESOURCE_STORE_BACKEND": "sqlite",
+            "RESOURCE_STORE_PATH": "resources.sqlite",
+            "WORKSPACE_NAME": "demo-ws",
+        },
+        outputter=TarFileOutputter() if archive else FileSystemOutputter(tmpdir),
+    )
+    registry = Registry()
+    ctx.set_property(REGISTRY_PROPERTY_NAME, registry)
+    registry.add_resource("kubernetes", "namespace", "checkout", "cluster-1/checkout", {"labels": {}})
+    registry.add_resource("kubernetes", "deployment", "checkout-api", "cluster-1/checkout/checkout-api",
+                          {"labels": {"team": "payments"}})
+    registry.add_resource("kubernetes", "deployment", "orders-db", "cluster-1/orders/orders-db",
+                          {"labels": {"team": "storage"}, "note": "backs the checkout flow"})
+    for slx_name, slx_yaml in SLXS.items():
+        record_rendered_artifact(ctx, f"workspaces/demo-ws/slxs/{slx_name}/slx.yaml", slx_yaml)
+        record_rendered_artifact(ctx, f"workspaces/demo-ws/slxs/{slx_name}/sli.yaml",
+                                 "kind: ServiceLevelIndicator\n")
+    persist_sqlite_store(ctx, db_path="resources.sqlite")
+    if archive:
+        ctx.outputter.close()
+        with tarfile.open(fileobj=io.BytesIO(ctx.outputter.get_bytes()), mode="r") as output_archive:
+            output_archive.extractall(tmpdir)
+    return os.path.join(tmpdir, "resources.sqlite")
+
+
+class FtsMatchQueryTests(unittest.TestCase):
+    def test_words_become_prefix_phrases(self):
+        self.assertEqual(fts_match_query("app-he"), '"app he"*')
+        self.assertEqual(fts_match_query("  key  VAULT "), '"key"* "VAULT"*')
+        self.assertEqual(fts_match_query('cluster-1/checkout "x" OR'), '"cluster 1 checkout"* "x"* "OR"*')
+        self.assertEqual(fts_match_query("snake_case"), '"snake case"*')
+
+    def test_no_tokens(self):
+        for q in (None, "", "  ", "-/-", "***"):
+            self.assertIsNone(fts_match_query(q))
+
+
+class FullTextSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.db_path = _seed_database(self.tmpdir)
+        self.conn = open_database(self.db_path)
+        self.addCleanup(self.conn.close)
+
+    def _drop_fts_tables(self):
+        # A store written before the full-text indexes were added
+        for table in (ARTIFACTS_FTS_TABLE, RESOURCES_FTS_TABLE):
+            self.conn.execute(f"DROP TABLE {table}")
+
+    def test_artifacts(self):
+        items = search_workspace_artifacts(self.conn, q="app health")
+        # The path and alias matches in app-health rank above the statement match in db-latency
+        self.assertCountEqual([item["relative_path"] for item in items[:2]],
+                              ["workspaces/demo-ws/slxs/app-health/slx.yaml",
+                               "workspaces/demo-ws/slxs/app-health/sli.yaml"])
+        self.assertEqual(items[2]["relative_path"], "workspaces/demo-ws/slxs/db-latency/slx.yaml")
+        snippets = {item["relative_path"]: item["snippet"] for item in items}
+        self.assertIn("**App** **Health** Check", snippets["workspaces/demo-ws/slxs/app-health/slx.yaml"])
+        self.assertEqual(snippets["workspaces/demo-ws/slxs/app-health/sli.yaml"],
+                         "workspaces/demo-ws/slxs/**app**-**health**/sli.yaml")
+        self.assertEqual(count_workspace_artifacts(self.conn, q="app health"), 3)
+        self.assertEqual(count_workspace_artifacts(self.conn, workspace_name="other-ws", q="app health"), 0)
+        # A prefix of the last word, and a match on the path
+        self.assertEqual(count_workspace_artifacts(self.conn, q="vault rot"), 2)
+        self.assertEqual(count_workspace_artifacts(self.conn, artifact_kind="sli", q="db-latency"), 1)
+
+    def test_resources(self):
+        items = search_resources(self.conn, q="checkout")
+        self.assertEqual([item["name"] for item in items], ["checkout", "checkout-api"])
+        self.assertEqual(items[0]["snippet"], "**checkout**")
+        self.assertEqual(count_resources(self.conn, q="checkout"), 2)
+        self.assertEqual(count_resources(self.conn, resource_type="deployment", q="checkout"), 1)
+        # The attribute values are only searched on request
+        self.assertEqual(count_resources(self.conn, q="payments"), 0)
+        self.assertEqual(
+            [item["name"] for item in search_resources(self.conn, q="checkout", search_attributes=True)],
+            ["checkout", "checkout-api", "orders-db"],
+        )
+        self.assertEqual(count_resources(self.conn, q="payments", search_attributes=True), 1)
+
+    def test_slx_bundles(self):
+        data = list_slx_bundles(self.conn, q="app health")
+        self.assertEqual(data["total"], 2)
+        self.assertEqual([item["display_name"] for item in data["items"]], ["App Health Check", "Database Latency"])
+        # The number of matching files
+        self.assertEqual([item["file_count"] for item in data["items"]], [2, 1])
+        self.assertEqual(len(data["items"][0]["files"]), 2)
+        self.assertIn("**app**-**health**", data["items"][0]["snippet"])
+        self.assertEqual(list_slx_bundles(self.conn, q="vault-rotation")["total"], 1)
+        self.assertNotIn("snippet", list_slx_bundles(self.conn)["items"][0])
+
+    def test_like_fallback(self):
+        # Same results, without ranking or snippets, for stores without the indexes
+        full_text = {
+            "artifacts": {item["relative_path"] for item in search_workspace_artifacts(self.conn, q="latency")},
+            "resources": {item["name"] for item in search_resources(self.conn, q="orders")},
+            "bundles": {item["slx_name"] for item in list_slx_bundles(self.conn, q="vault")["items"]},
+        }
+        self._drop_fts_tables()
+        like_items = search_workspace_artifacts(self.conn, q="latency")
+        self.assertNotIn("snippet", like_items[0])
+        self.assertEqual(
+            {
+                "artifacts": {item["relative_path"] for item in like_items},
+                "resources": {item["name"] for item in search_resources(self.conn, q="orders")},
+                "bundles": {item["slx_name"] for item in list_slx_bundles(self.conn, q="vault")["items"]},
+            },
+            full_text,
+        )
+
+    def test_punctuation_query_falls_back_to_like(self):
+        self.assertEqual(count_resources(self.conn, q="/"), 3)
+        self.assertEqual(len(search_workspace_artifacts(self.conn, q="/slxs/")), 6)
+
+    def test_bundle_summaries(self):
+        # The listings read the summaries written with the store, and are the same
+        # as the listings summarized from the artifacts of a store without them
+        listings = {
+            "all": list_slx_bundles(self.conn),
+            "page": list_slx_bundles(self.conn, limit=1, offset=1),
+            "workspace": list_slx_bundles(self.conn, workspace_name="demo-ws", limit=2),
+            "full_text": list_slx_bundles(self.conn, q="app health"),
+            "full_text_page": list_slx_bundles(self.conn, q="app health", limit=1, offset=1),
+            "other_workspace": list_slx_bundles(self.conn, workspace_name="other-ws", q="app"),
+        }
+        self.assertEqual(listings["all"]["total"], 3)
+        self.assertEqual(
+            [(item["slx_name"], item["display_name"], item["file_count"], item["kinds"])
+             for item in listings["all"]["items"]],
+            [("app-health", "App Health Check", 2, ["sli", "slx"]),
+             ("db-latency", "Database Latency", 2, ["sli", "slx"]),
+             ("vault-rotation", "Key Vault Secret Rotation", 2, ["sli", "slx"])],
+        )
+        self.assertEqual([item["slx_name"] for item in listings["page"]["items"]], ["db-latency"])
+        self.assertEqual(listings["full_text_page"]["items"][0]["snippet"],
+                         listings["full_text"]["items"][1]["snippet"])
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        list_slx_bundles(self.conn, q="app health")
+        self.conn.set_trace_callback(None)
+        # The table lookups, the count, the page and its snippets, not queries per
+        # bundle (the statements run by the full-text index itself are left out)
+        self.assertEqual(len([sql for sql in statements if not sql.startswith("--") and "'main'" not in sql]), 5)
+
+        self.conn.execute("DROP TABLE slx_bundles")
+        self.assertEqual(
+            {
+                "all": list_slx_bundles(self.conn),
+                "page": list_slx_bundles(self.conn, limit=1, offset=1),
+                "workspace": list_slx_bundles(self.conn, workspace_name="demo-ws", limit=2),
+                "full_text": list_slx_bundles(self.conn, q="app health"),
+                "full_text_page": list_slx_bundles(self.conn, q="app health", limit=1, offset=1),
+                "other_workspace": list_slx_bundles(self.conn, workspace_name="other-ws", q="app"),
+            },
+            listings,
+        )
+
+    def test_indexes_are_in_the_store(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for table in (ARTIFACTS_FTS_TABLE, RESOURCES_FTS_TABLE):
+                conn.execute(f"INSERT INTO {table}({table}) VALUES ('integrity-check')")
+        finally:
+            conn.close()
+
+
+class SkillTokenIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.db_path = _seed_database(self.tmpdir)
+
+    @staticmethod
+    def _index_rows(db_path: str) -> list:
+        conn = sqlite3.connect(db_path)
+        try:
+            return conn.execute(
+                "SELECT token, bundle_id, field, weight FROM skill_tokens ORDER BY token, bundle_id, field"
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def test_written_with_the_store(self):
+        conn = open_database(self.db_path)
+        self.addCleanup(conn.close)
+        self.assertTrue(has_table(conn, "skill_tokens"))
+        data = rank_slx_bundles(conn, ["vault", "rotation"])
+        self.assertEqual([item["slx_name"] for item in data["items"]], ["vault-rotation"])
+        self.assertEqual(data["candidate_pool"], 3)
+
+    def test_built_into_the_store_of_the_output_archive(self):
+        db_path = _seed_database(os.path.join(self.tmpdir, "archive"), archive=True)
+        conn = sqlite3.connect(db_path)
+        self.addCleanup(conn.close)
+        # The index is left out of the archive
+        self.assertFalse(has_table(conn, "skill_tokens"))
+        self.assertTrue(build_skill_token_index(conn))
+        self.assertFalse(build_skill_token_index(conn))
+        self.assertEqual(self._index_rows(db_path), self._index_rows(self.db_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
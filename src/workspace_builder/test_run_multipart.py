@@ -0,0 +1,163 @@
+"""Tests for the multipart ``/run/`` request, with file settings as binary parts."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import tarfile
+import unittest
+from base64 import b64encode
+from unittest.mock import Mock, patch
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from component import SettingDependency
+from enrichers.generation_rules import MAP_CUSTOMIZATION_RULES_SETTING
+from indexers.load_resources import RESOURCE_LOAD_FILE_SETTING
+from workspace_builder import run_handler
+from workspace_builder import api
+from workspace_builder.api import app
+from workspace_builder.serialization import RUN_REQUEST_DATA_PART
+
+RESOURCE_DUMP = b"resources:\n- name: a\n" + bytes(range(256)) * 1024
+MAP_CUSTOMIZATION_RULES = {"rules.yaml": b"rules: []\n", "more-rules.yaml": b"rules:\n- x\n"}
+ACTIVE_SETTINGS = {
+    "resourceLoadFile": SettingDependency(RESOURCE_LOAD_FILE_SETTING, False),
+    "mapCustomizationRules": SettingDependency(MAP_CUSTOMIZATION_RULES_SETTING, False),
+}
+
+
+# A service from before the multipart /run/ requests: the handler parses the
+# body as JSON first, and the error handler returns a 500 for the
+# JSONDecodeError of a multipart body
+legacy_app = FastAPI()
+legacy_app.add_exception_handler(Exception, api.workspace_builder_exception_handler)
+
+
+@legacy_app.post("/run/")
+async def legacy_run(request: Request):
+    await request.json()
+    return await api.run(request)
+
+
+def _make_tar(files: dict) -> bytes:
+    tar_bytes = io.BytesIO()
+    with tarfile.open(mode="x:gz", fileobj=tar_bytes) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return tar_bytes.getvalue()
+
+
+class RunMultipartTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        self.settings_seen = dict()
+        self.uploaded_paths = list()
+
+        def fake_run_components(context, components):
+            resource_load_path = context.get_setting(RESOURCE_LOAD_FILE_SETTING)
+            with open(resource_load_path, "rb") as f:
+                self.settings_seen["resourceLoadFile"] = f.read()
+            rules_path = context.get_setting(MAP_CUSTOMIZATION_RULES_SETTING)
+            if os.path.isdir(rules_path):
+                rules = dict()
+                for name in os.listdir(rules_path):
+                    with open(os.path.join(rules_path, name), "rb") as f:
+                        rules[name] = f.read()
+            else:
+                with open(rules_path, "rb") as f:
+                    rules = f.read()
+            self.settings_seen["mapCustomizationRules"] = rules
+            self.uploaded_paths.extend((resource_load_path, rules_path))
+
+        for patcher in (patch.object(run_handler, "run_components", fake_run_components),
+                        patch.object(run_handler, "get_active_settings", return_value=ACTIVE_SETTINGS)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_file_settings_as_binary_parts(self):
+        files = {
+            RUN_REQUEST_DATA_PART: ("request.json", json.dumps({"components": ""}), "application/json"),
+            "resourceLoadFile": ("resourceLoadFile", RESOURCE_DUMP),
+            "mapCustomizationRules": ("mapCustomizationRules", _make_tar(MAP_CUSTOMIZATION_RULES)),
+            # Not a file setting of the active components, so it's ignored (as in the JSON request)
+            "kubeconfig": ("kubeconfig", b"apiVersion: v1\n"),
+        }
+        response = self.client.post("/run/", files=files)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.settings_seen, {"resourceLoadFile": RESOURCE_DUMP,
+                                              "mapCustomizationRules": MAP_CUSTOMIZATION_RULES})
+        # The uploaded files and the extracted archive are removed after the run
+        for path in self.uploaded_paths:
+            self.assertFalse(os.path.exists(path), path)
+
+    def test_matches_base64_json_request(self):
+        request_data = {"components": "",
+                        "resourceLoadFile": b64encode(RESOURCE_DUMP).decode("utf-8"),
+                        "mapCustomizationRules": b64encode(_make_tar(MAP_CUSTOMIZATION_RULES)).decode("utf-8")}
+        response = self.client.post("/run/", json=request_data)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.settings_seen, {"resourceLoadFile": RESOURCE_DUMP,
+                                              "mapCustomizationRules": MAP_CUSTOMIZATION_RULES})
+
+    def test_request_data_can_be_a_form_field(self):
+        response = self.client.post("/run/", data={RUN_REQUEST_DATA_PART: json.dumps({"components": ""})},
+                                    files={"resourceLoadFile": ("resourceLoadFile", RESOURCE_DUMP),
+                                           "mapCustomizationRules": ("rules", b"rules: []\n")})
+        self.assertEqual(response.status_code, 200, response.text)
+        # A file that isn't a tar archive is used as is
+        self.assertEqual(self.settings_seen, {"resourceLoadFile": RESOURCE_DUMP,
+                                              "mapCustomizationRules": b"rules: []\n"})
+
+    def _post_run_request(self, accepts_multipart: bool) -> list:
+        """Send a request with run.post_run_request, returning the kinds of the requests made."""
+        from run import post_run_request
+
+        requests_made = list()
+        client = self.client if accepts_multipart else TestClient(legacy_app, raise_server_exceptions=False)
+
+        def post(url, files=None, json=None, headers=None, stream=False, proxies=None):
+            requests_made.append("multipart" if files else "json")
+            return client.post("/run/", files=files, json=json, headers=headers)
+
+        request_files = {"resourceLoadFile": ("resourceLoadFile", RESOURCE_DUMP),
+                         "mapCustomizationRules": ("mapCustomizationRules", _make_tar(MAP_CUSTOMIZATION_RULES))}
+        with patch("run.requests.post", side_effect=post):
+            response = post_run_request("http://localhost/run/", {"components": ""}, request_files, {})
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self.settings_seen, {"resourceLoadFile": RESOURCE_DUMP,
+                                              "mapCustomizationRules": MAP_CUSTOMIZATION_RULES})
+        return requests_made
+
+    def test_client_sends_multipart_request(self):
+        self.assertEqual(self._post_run_request(True), ["multipart"])
+
+    def test_client_falls_back_to_json_for_older_service(self):
+        self.assertEqual(self._post_run_request(False), ["multipart", "json"])
+
+    def test_client_fails_on_other_server_errors(self):
+        from run import is_multipart_run_request_rejected
+
+        self.assertTrue(is_multipart_run_request_rejected(Mock(status_code=415)))
+        error_response = Mock(status_code=500)
+        error_response.json.return_value = {"message": "boom", "exceptionType": "<class 'RuntimeError'>"}
+        self.assertFalse(is_multipart_run_request_rejected(error_response))
+        error_response.json.side_effect = ValueError("not JSON")
+        self.assertFalse(is_multipart_run_request_rejected(error_response))
+
+    def test_invalid_request_data(self):
+        client = TestClient(app, raise_server_exceptions=False)
+        for data in ({RUN_REQUEST_DATA_PART: "{not json"}, {RUN_REQUEST_DATA_PART: "[]"}, {"components": ""}):
+            response = client.post("/run/", data=data, files={"resourceLoadFile": ("f", b"x")})
+            self.assertEqual(response.status_code, 400, data)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Tests for the streamed ``/run/`` response (``Accept: application/gzip``)."""
+
+from __future__ import annotations
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+from base64 import b64decode
+from unittest.mock import Mock, patch
+
+from fastapi.testclient import TestClient
+from urllib3.response import HTTPResponse
+
+from outputter import SpooledTarFileOutputter
+from run import extract_streamed_archive
+from workspace_builder import run_handler
+from workspace_builder.api import app
+from workspace_builder.models import CommonRunResult
+from workspace_builder.serialization import (
+    ARCHIVE_MEDIA_TYPE,
+    MAX_RUN_RESULT_HEADER_WARNINGS_SIZE,
+    RUN_RESULT_HEADER,
+    deserialize_run_result_header,
+    serialize_run_result_header,
+)
+
+OUTPUT_FILES = {
+    "workspaces/ws/workspace.yaml": "kind: Workspace\n",
+    "workspaces/ws/slxs/slx-a/slx.yaml": "kind: ServiceLevelX\n" + "# padding\n" * 20000,
+    "resources.sqlite": os.urandom(64 * 1024),
+}
+
+
+def _fake_run_components(context, components):
+    for path, data in OUTPUT_FILES.items():
+        context.outputter.write_file(path, data)
+    context.add_warning("something was skipped")
+
+
+def _read_archive(archive_bytes: bytes) -> dict:
+    with tarfile.open(fileobj=io.BytesIO(archive_bytes), mode="r") as archive:
+        return {member.name: archive.extractfile(member).read() for member in archive.getmembers()}
+
+
+def _expected_files() -> dict:
+    return {path: data if isinstance(data, bytes) else data.encode("utf-8") for path, data in OUTPUT_FILES.items()}
+
+
+class RecordingSpooledTarFileOutputter(SpooledTarFileOutputter):
+    instances: list = []
+
+    def __init__(self, *args, **kwargs):
+        # A small threshold, so the archive is rolled over to a temporary file
+        super().__init__(max_size=1024, directory=kwargs.get("directory"))
+        self.instances.append(self)
+
+
+class RunStreamingTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        RecordingSpooledTarFileOutputter.instances = []
+        for patcher in (patch.object(run_handler, "run_components", _fake_run_components),
+                        patch.object(run_handler, "SpooledTarFileOutputter", RecordingSpooledTarFileOutputter)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_archive_is_streamed_when_accepted(self):
+        response = self.client.post("/run/", json={"components": ""},
+                                    headers={"Accept": f"{ARCHIVE_MEDIA_TYPE}, application/json"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith(ARCHIVE_MEDIA_TYPE))
+        self.assertEqual(int(response.headers["content-length"]), len(response.content))
+        self.assertEqual(_read_archive(response.content), _expected_files())
+        result = deserialize_run_result_header(response.headers[RUN_RESULT_HEADER])
+        self.assertEqual(result["message"], "Workspace builder completed successfully.")
+        self.assertEqual(result["warnings"], ["something was skipped"])
+        # The archive was spooled to a temporary file, which is gone once it has been sent
+        [outputter] = RecordingSpooledTarFileOutputter.instances
+        self.assertTrue(outputter.byte_stream._rolled)
+        self.assertTrue(outputter.byte_stream.closed)
+
+    def test_json_response_by_default(self):
+        response = self.client.post("/run/", json={"components": ""})
+        self.assertEqual(response.status_code, 200)
+        response_data = response.json()
+        self.assertEqual(response_data["warnings"], ["something was skipped"])
+        self.assertEqual(_read_archive(b64decode(response_data["output"])), _expected_files())
+        self.assertEqual(RecordingSpooledTarFileOutputter.instances, [])
+
+    def test_streamed_archive_is_extracted(self):
+        response = self.client.post("/run/", json={"components": ""}, headers={"Accept": ARCHIVE_MEDIA_TYPE})
+        streamed_response = Mock()
+        streamed_response.raw = HTTPResponse(body=io.BytesIO(response.content), preload_content=False)
+        with tempfile.TemporaryDirectory() as output_path:
+            extract_streamed_archive(streamed_response, output_path)
+            for path, data in _expected_files().items():
+                with open(os.path.join(output_path, path), "rb") as f:
+                    self.assertEqual(f.read(), data)
+
+
+class RunResultHeaderTests(unittest.TestCase):
+    def test_warnings_are_truncated(self):
+        warnings = [f"warning {i}: " + "x" * 1000 for i in range(100)]
+        header = serialize_run_result_header(CommonRunResult("done", warnings, "archive"))
+        result = deserialize_run_result_header(header)
+        self.assertLess(len(header), 2 * MAX_RUN_RESULT_HEADER_WARNINGS_SIZE)
+        kept = len(result["warnings"]) - 1
+        self.assertEqual(result["warnings"][:kept], warnings[:kept])
+        self.assertTrue(result["warnings"][-1].startswith(f"{len(warnings) - kept} more warnings"))
+        self.assertEqual(result["message"], "done")
+
+    def test_empty_header(self):
+        self.assertEqual(deserialize_run_result_header(None), {})
+        self.assertEqual(deserialize_run_result_header(serialize_run_result_header(
+            CommonRunResult("done", [], "archive"))), {"message": "done", "outputType": "archive"})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()